@@ -44,11 +44,25 @@ done
 
 echo -e "\033[32mAll Jmeter slave replicas are ready!\033[0m"
 
+# Base URL pattern
+baseUrl="http://localhost:3000/d/3e682b4e-3144-4434-9c30-4bc0c856b26f/jmeter-dashboard"
+staticParams="?orgId=1&timezone=browser&var-data_source=beq056f1s8lq8a&var-application=test&var-transaction=Created%20User&refresh=5s"
+
 echo "Test Start Time"
 testStartTime=$(date)
 testStartTimeGrafanaLink=$(date -u +"%Y-%m-%dT%H:%M:%S.%3NZ")
 testStartTimeJmeterList=$(date -u)
 
+# Optional live report (REPORT_LIVE=true): the AI report agent follows the
+# test from its start and writes the final report once it is stopped
+if [ "${REPORT_LIVE:-false}" = "true" ]; then
+    agentDir="${REPORT_AGENT_DIR:-$(dirname "$0")/../06_AI_report_generation/Agent}"
+    echo "Start live report"
+    python3 "$agentDir/agent.py" --url "$baseUrl$staticParams&from=$testStartTimeGrafanaLink&to=now" \
+        --live --output-dir "${REPORT_OUTPUT_DIR:-./reports}" &
+    livePid=$!
+fi
+
 echo "Run Test"
 ips=$(kubectl get pods -n jmeter -l app=jmeter-slave -o jsonpath="{range .items[*]}{.status.podIP}{'\n'}{end}" | tr '\n' ',' | sed 's/,$//')
 JMETER_MASTER_POD=$(kubectl get po -n jmeter -l app=jmeter-master -o jsonpath="{.items[0].metadata.name}")
@@ -59,9 +73,12 @@ testEndTime=$(date)
 testEndTimeGrafanaLink=$(date -u +"%Y-%m-%dT%H:%M:%S.%3NZ")
 testEndTimeJmeterList=$(date -u)
 
-# Base URL pattern
-baseUrl="http://localhost:3000/d/3e682b4e-3144-4434-9c30-4bc0c856b26f/jmeter-dashboard"
-staticParams="?orgId=1&timezone=browser&var-data_source=beq056f1s8lq8a&var-application=test&var-transaction=Created%20User&refresh=5s"
+if [ -n "$livePid" ]; then
+    # SIGTERM makes the agent fetch the remaining data and write the final report
+    echo "Stop live report"
+    kill -TERM "$livePid"
+    wait "$livePid"
+fi
 
 # Build full URL
 grafanaUrlFirst="$baseUrl$staticParams&from=$testStartTimeGrafanaLink&to=$testEndTimeGrafanaLink"
@@ -5,13 +5,128 @@ Performance Report Agent - Main Entry Point
 Usage:
     python agent.py "http://localhost:3000/d/dashboard-uid?from=...&to=..."
     python agent.py --url "http://localhost:3000/d/dashboard-uid?from=...&to=..."
+    python agent.py --urls-file urls.txt
+    cat urls.txt | python agent.py --urls-file -
 """
 
+import os
 import sys
+import json
+import time
+import signal
 import argparse
+from dataclasses import asdict
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import List, Optional, TYPE_CHECKING
 
-from src.agent import PerformanceReportAgent
+if TYPE_CHECKING:
+    from src.agent import PerformanceReportAgent, ReportJobResult
+    from src.telemetry import Tracer
+
+
+def read_urls(source) -> List[str]:
+    """Read dashboard URLs, one per line, skipping blank lines and # comments"""
+    urls = []
+    for line in source:
+        line = line.strip()
+        if line and not line.startswith('#'):
+            urls.append(line)
+    return urls
+
+
+def print_stage_summary(tracer: 'Tracer', limit: int = 10) -> None:
+    """Print the slowest pipeline stages"""
+    print("\n⏱️  Stages (total time, calls, slowest call):")
+    for name, stage in list(tracer.stage_summary().items())[:limit]:
+        print(
+            f"  - {name}: {stage['seconds'] * 1000:.0f} ms, {stage['calls']} calls, "
+            f"max {stage['max_seconds'] * 1000:.0f} ms"
+        )
+
+
+def write_batch_summary(
+    path: Path,
+    results: List['ReportJobResult'],
+    started_at: datetime,
+    duration_s: float,
+    http_summary: dict
+) -> None:
+    """Write outputs, timings and failures of a batch as JSON"""
+    summary = {
+        'started_at': started_at.isoformat(),
+        'duration_s': round(duration_s, 3),
+        'reports': len(results),
+        'succeeded': sum(1 for result in results if result.status == 'ok'),
+        'failed': sum(1 for result in results if result.status != 'ok'),
+        'http': http_summary,
+        'results': [
+            {**asdict(result), 'duration_s': round(result.duration_s, 3)}
+            for result in results
+        ]
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(summary, indent=2), encoding='utf-8')
+
+
+def list_runs(dashboard_url: str, run_store_path: Optional[str], limit: int = 20) -> None:
+    """Print the latest stored runs of a dashboard; needs neither Grafana nor LLM settings"""
+    from dotenv import load_dotenv
+    from src.parsers.url_parser import GrafanaURLParser
+    from src.storage.run_store import DEFAULT_RUN_STORE, RunStore
+    
+    load_dotenv()
+    dashboard_uid = GrafanaURLParser().parse_dashboard_uid(dashboard_url)
+    path = run_store_path or os.getenv('REPORT_RUN_STORE', DEFAULT_RUN_STORE)
+    if not Path(path).exists():
+        print(f"No stored runs ({path} does not exist)")
+        return
+    
+    store = RunStore(path)
+    try:
+        runs = store.latest_runs(dashboard_uid, limit=limit)
+    finally:
+        store.close()
+    
+    if not runs:
+        print(f"No stored runs of dashboard {dashboard_uid}")
+    for run in runs:
+        print(f"{run.describe()}  {run.dashboard_url}")
+
+
+def _raise_interrupt(signum, frame):
+    """Turn SIGTERM (e.g. an aborted CI job) into KeyboardInterrupt"""
+    raise KeyboardInterrupt
+
+
+def run_batch(agent: 'PerformanceReportAgent', dashboard_urls: List[str], args: argparse.Namespace) -> None:
+    """Generate every report of a batch, write its summary and exit 1 on failures"""
+    started_at = datetime.now(timezone.utc)
+    started = time.perf_counter()
+    
+    results = agent.generate_reports(dashboard_urls, output_dir=args.output_dir, jobs=args.jobs)
+    
+    summary_path = Path(args.summary_file or Path(args.output_dir) / 'batch_summary.json')
+    write_batch_summary(
+        summary_path,
+        results,
+        started_at=started_at,
+        duration_s=time.perf_counter() - started,
+        http_summary=agent.transport.summary()
+    )
+    
+    failed = [result for result in results if result.status != 'ok']
+    print("\n" + "=" * 60)
+    if failed:
+        print(f"⚠️  {len(results) - len(failed)}/{len(results)} reports generated, {len(failed)} failed")
+    else:
+        print(f"✅ {len(results)} reports generated successfully!")
+    print(f"📄 Summary: {summary_path}")
+    print("=" * 60)
+    print()
+    
+    if failed:
+        sys.exit(1)
 
 
 def main():
@@ -27,9 +142,76 @@ Examples:
   
   python agent.py --url "http://localhost:3000/d/abc123?from=...&to=..." --output-dir ./reports
 
+  python agent.py --url "http://localhost:3000/d/abc123?from=...&to=..." --workers 16
+  
+  python agent.py --url "http://localhost:3000/d/abc123?from=...&to=..." --batch-size 20
+  
+  python agent.py --url "http://localhost:3000/d/abc123?from=...&to=..." --stream-responses
+  
+  python agent.py --url "http://localhost:3000/d/abc123?from=...&to=..." --window-minutes 30
+  
+  python agent.py --url "http://localhost:3000/d/abc123?from=...&to=..." --stream-report
+  
+  python agent.py --url "http://localhost:3000/d/abc123?from=...&to=..." --ai-mode mapreduce --ai-concurrency 8
+  
+  python agent.py --url "http://localhost:3000/d/abc123?from=...&to=..." --influxdb-url http://influxdb:8086
+  
+  python agent.py --url "http://localhost:3000/d/abc123?from=...&to=..." --jtl ./results/results.jtl
+  
+  python agent.py --url "http://localhost:3000/d/abc123?from=...&to=..." --no-ai
+  
+  python agent.py --url "http://localhost:3000/d/abc123?from=...&to=..." --baseline latest
+  
+  python agent.py --url "http://localhost:3000/d/abc123" --list-runs
+  
+  python agent.py --url "http://localhost:3000/d/abc123?from=1763416448137&to=now" --live --poll-seconds 30
+  
+  python agent.py --urls-file runs.txt --jobs 4 --summary-file ./reports/batch_summary.json
+  
+  cat runs.txt | python agent.py --urls-file - --jobs 4
+  
 Environment Variables Required:
-  OPENAI_API_KEY          - OpenAI API key for AI analysis
+  OPENAI_API_KEY          - OpenAI API key for AI analysis (openai backend only, not needed with --no-ai)
   SERVICE_ACCOUNT_TOKEN   - Grafana service account token
+  
+Optional Environment Variables:
+  REPORT_WORKERS          - Panels fetched concurrently (default: 8)
+  REPORT_BATCH_SIZE       - Queries per batched /api/ds/query request (default: 0, off)
+  REPORT_STREAM_RESPONSES - Set to "true" to decode query responses incrementally
+  REPORT_KEEP_RAW_DATA    - Set to "true" to keep raw query results after processing (default: dropped)
+  REPORT_WINDOW_MINUTES   - Split long time ranges into windows of N minutes (default: 0, off)
+  REPORT_DOWNSAMPLE_POINTS - Keep N shape-preserving points per series after processing (default: 0, all)
+  PROMPT_TOKEN_BUDGET     - Maximum estimated tokens of the AI prompt (default: 3000)
+  REPORT_STREAM_OUTPUT    - Set to "true" to write the report and AI summary as they are generated
+  AI_MODE                 - "single" (default) or "mapreduce" analysis over panel groups
+  AI_CONCURRENCY          - Panel group analyses in flight in map-reduce mode (default: 4)
+  AI_RATE_LIMIT           - Maximum LLM calls per minute in map-reduce mode (default: 60, 0 = unlimited)
+  LLM_BACKEND             - "openai" (default) or "local" deterministic stand-in for offline runs
+  REPORT_USE_AI           - Set to "false" for metrics-only reports without AI summary (default: true)
+  LOCAL_LLM_LATENCY       - Simulated completion latency of the local backend in seconds
+  GRAFANA_CACHE_DIR       - Query, dashboard and AI response cache directory (default: ./.cache/grafana)
+  GRAFANA_CACHE_MAX_MB    - Total size of all caches before least recently used entries are evicted (default: 512)
+  GRAFANA_CACHE_TTL       - Seconds results of ranges ending near "now" stay cached (default: 60)
+  REPORT_JTL_FILE         - JMeter result file summarized per sampler label (tab or comma delimited)
+  REPORT_AGGREGATION_WORKERS - Processes merging per-host series sketches (default: 1 = in-process)
+  INFLUXDB_URL            - Query panel data directly from InfluxDB 1.x instead of through Grafana
+  INFLUXDB_DATABASE       - InfluxDB database of the JMeter backend listener (default: jmeter)
+  INFLUXDB_USER           - InfluxDB user, with INFLUXDB_PASSWORD, if authentication is enabled
+  GRAFANA_CONNECT_TIMEOUT - Seconds to establish a Grafana connection (default: 5)
+  GRAFANA_READ_TIMEOUT    - Seconds to wait for Grafana response data (default: 60)
+  GRAFANA_MAX_RETRIES     - Retries of Grafana requests failing with 429/5xx or connection errors (default: 3)
+  REPORT_RUN_STORE        - SQLite file keeping the metrics of every run (default: ./.cache/runs.sqlite3)
+  REPORT_BASELINE         - Baseline run compared against: "latest", a stored run ID or a dashboard URL
+  REPORT_REGRESSION_THRESHOLD - Relative change flagged as regression (default: 0.1)
+  REPORT_DETECT_ANOMALIES - Flag spikes, dips and level shifts ahead of the AI analysis (default: true)
+  REPORT_LIVE_POLL_SECONDS - Seconds between polls in live mode (default: 30)
+  REPORT_LIVE_REFRESH_SECONDS - Seconds between interim reports in live mode (default: 300)
+  REPORT_LIVE_INTERVAL_SECONDS - Query interval pinned in live mode, so every poll buckets alike (default: 10)
+  REPORT_LIVE_SETTLE_SECONDS - Data younger than this is left to the next poll (default: 30)
+  REPORT_TRACE_FILE       - JSON trace (Chrome trace events) of every pipeline stage
+  REPORT_METRICS_FILE     - Prometheus text file of stage timings, bytes, points, tokens and peak RSS
+  REPORT_BATCH_JOBS       - Reports generated at once in batch mode (default: 4)
+  REPORT_MAX_IN_FLIGHT    - Grafana/InfluxDB requests in flight across all reports (default: workers x window workers)
         """
     )
     
@@ -43,24 +225,212 @@ Environment Variables Required:
         dest='url_flag',
         help='Grafana dashboard URL (alternative to positional argument)'
     )
+    parser.add_argument(
+        '--baseline',
+        help='Compare with a stored run: "latest" earlier run of the dashboard, a run ID or its dashboard URL (env: REPORT_BASELINE)'
+    )
+    parser.add_argument(
+        '--regression-threshold',
+        type=float,
+        help='Relative change against the baseline flagged as regression (default: 0.1, env: REPORT_REGRESSION_THRESHOLD)'
+    )
+    parser.add_argument(
+        '--run-store',
+        help='SQLite file keeping the metrics of every run (default: ./.cache/runs.sqlite3, env: REPORT_RUN_STORE)'
+    )
+    parser.add_argument(
+        '--no-run-store',
+        action='store_true',
+        help='Do not store runs (disables --baseline)'
+    )
+    parser.add_argument(
+        '--list-runs',
+        action='store_true',
+        help='List the latest stored runs of the dashboard and exit'
+    )
+    parser.add_argument(
+        '--no-anomalies',
+        action='store_true',
+        help='Skip spike, dip and level shift detection (env: REPORT_DETECT_ANOMALIES=false)'
+    )
+    parser.add_argument(
+        '--live',
+        action='store_true',
+        help='Follow a running test: poll new data only and refresh an interim report until "to" (or Ctrl+C/SIGTERM with to=now)'
+    )
+    parser.add_argument(
+        '--poll-seconds',
+        type=float,
+        help='Seconds between polls in live mode (default: 30, env: REPORT_LIVE_POLL_SECONDS)'
+    )
+    parser.add_argument(
+        '--refresh-seconds',
+        type=float,
+        help='Seconds between interim reports in live mode (default: 300, env: REPORT_LIVE_REFRESH_SECONDS)'
+    )
+    parser.add_argument(
+        '--urls-file',
+        help='Batch mode: file with one dashboard URL per line, "-" for stdin'
+    )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        help='Reports generated at once in batch mode (default: 4, env: REPORT_BATCH_JOBS)'
+    )
+    parser.add_argument(
+        '--max-in-flight',
+        type=int,
+        help='Requests in flight across all reports, sharing one connection pool (env: REPORT_MAX_IN_FLIGHT)'
+    )
+    parser.add_argument(
+        '--summary-file',
+        help='Batch mode: JSON summary of outputs, timings and failures (default: <output-dir>/batch_summary.json)'
+    )
     parser.add_argument(
         '--output-dir',
         default='./reports',
         help='Output directory (default: ./reports)'
     )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        help='Panels fetched and processed concurrently, 1 = sequential (default: 8, env: REPORT_WORKERS)'
+    )
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        help='Pack up to N panel queries into one /api/ds/query request, 0 = off (default: 0, env: REPORT_BATCH_SIZE)'
+    )
+    parser.add_argument(
+        '--stream-responses',
+        action='store_true',
+        default=None,
+        help='Decode query responses incrementally to bound memory on long tests (env: REPORT_STREAM_RESPONSES)'
+    )
+    parser.add_argument(
+        '--keep-raw-data',
+        action='store_true',
+        default=None,
+        help='Keep raw query results after processing, not only metrics and compact series (env: REPORT_KEEP_RAW_DATA)'
+    )
+    parser.add_argument(
+        '--window-minutes',
+        type=float,
+        help='Fetch long time ranges as concurrent N-minute windows, 0 = off (default: 0, env: REPORT_WINDOW_MINUTES)'
+    )
+    parser.add_argument(
+        '--downsample-points',
+        type=int,
+        help='Keep N LTTB points per series once metrics are computed, 0 = all (default: 0, env: REPORT_DOWNSAMPLE_POINTS)'
+    )
+    parser.add_argument(
+        '--prompt-token-budget',
+        type=int,
+        help='Maximum estimated tokens of the AI prompt (default: 3000, env: PROMPT_TOKEN_BUDGET)'
+    )
+    parser.add_argument(
+        '--llm-backend',
+        choices=['openai', 'local'],
+        help='AI analysis backend, "local" needs no network (default: openai, env: LLM_BACKEND)'
+    )
+    parser.add_argument(
+        '--no-ai',
+        action='store_true',
+        help='Metrics-only report: skip the AI summary, no LLM backend or API key needed (env: REPORT_USE_AI=false)'
+    )
+    parser.add_argument(
+        '--stream-report',
+        action='store_true',
+        default=None,
+        help='Write report sections and the streamed AI summary as they are ready (env: REPORT_STREAM_OUTPUT)'
+    )
+    parser.add_argument(
+        '--ai-mode',
+        choices=['single', 'mapreduce'],
+        help='One AI call over all panels, or parallel calls per panel group reduced into one summary (default: single, env: AI_MODE)'
+    )
+    parser.add_argument(
+        '--ai-concurrency',
+        type=int,
+        help='Panel group analyses in flight in map-reduce mode (default: 4, env: AI_CONCURRENCY)'
+    )
+    parser.add_argument(
+        '--ai-rate-limit',
+        type=float,
+        help='Maximum LLM calls per minute in map-reduce mode, 0 = unlimited (default: 60, env: AI_RATE_LIMIT)'
+    )
+    parser.add_argument(
+        '--influxdb-url',
+        help='Query panel data directly from InfluxDB 1.x, e.g. http://influxdb:8086 (env: INFLUXDB_URL)'
+    )
+    parser.add_argument(
+        '--jtl',
+        help='JMeter result file (JTL/CSV) summarized per sampler label with 1%%-accurate percentiles (env: REPORT_JTL_FILE)'
+    )
+    parser.add_argument(
+        '--aggregation-workers',
+        type=int,
+        help='Processes merging per-host series sketches into cluster statistics (default: 1 = in-process, env: REPORT_AGGREGATION_WORKERS)'
+    )
+    parser.add_argument(
+        '--trace-file',
+        help='Write timed spans of every stage as a JSON trace for chrome://tracing or Perfetto (env: REPORT_TRACE_FILE)'
+    )
+    parser.add_argument(
+        '--metrics-file',
+        help='Write stage timings, bytes, points, tokens and peak RSS in Prometheus text format (env: REPORT_METRICS_FILE)'
+    )
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Profile all threads with cProfile; writes profile.pstats, hot paths (profile.txt), trace.json and metrics.prom to the output directory unless paths are given'
+    )
+    parser.add_argument(
+        '--cache-dir',
+        help='Query, dashboard and AI response cache directory (default: ./.cache/grafana, env: GRAFANA_CACHE_DIR)'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Always query Grafana and the AI backend, bypassing the caches'
+    )
     
     args = parser.parse_args()
     
     # Get URL from either positional or flag argument
     dashboard_url = args.url or args.url_flag
     
-    if not dashboard_url:
+    dashboard_urls = None
+    # Only read stdin when asked to: CI runners and cron pipe stdin without URLs on it
+    if args.urls_file == '-':
+        dashboard_urls = read_urls(sys.stdin)
+    elif args.urls_file:
+        with open(args.urls_file, encoding='utf-8') as urls_file:
+            dashboard_urls = read_urls(urls_file)
+    
+    if not dashboard_url and not dashboard_urls:
         parser.print_help()
         sys.exit(1)
     
+    if args.list_runs:
+        list_runs(dashboard_url or dashboard_urls[0], args.run_store)
+        return
+    
     # Create output directory if it doesn't exist
     Path(args.output_dir).mkdir(parents=True, exist_ok=True)
     
+    # Imported once arguments are valid, so --help and usage errors return at once
+    from src.agent import PerformanceReportAgent
+    
+    profiler = None
+    if args.profile:
+        args.trace_file = args.trace_file or str(Path(args.output_dir) / 'trace.json')
+        args.metrics_file = args.metrics_file or str(Path(args.output_dir) / 'metrics.prom')
+        from src.telemetry import ThreadProfiler
+        
+        profiler = ThreadProfiler()
+        profiler.start()
+    
     try:
         # Run agent
         print("=" * 60)
@@ -68,17 +438,75 @@ Environment Variables Required:
         print("=" * 60)
         print()
         
-        agent = PerformanceReportAgent()
-        report_path = agent.generate_report(
-            dashboard_url=dashboard_url,
-            output_dir=args.output_dir
+        agent = PerformanceReportAgent(
+            workers=args.workers,
+            batch_size=args.batch_size,
+            stream_responses=args.stream_responses,
+            keep_raw_data=args.keep_raw_data,
+            cache_dir=args.cache_dir,
+            use_cache=not args.no_cache,
+            window_minutes=args.window_minutes,
+            downsample_points=args.downsample_points,
+            prompt_token_budget=args.prompt_token_budget,
+            llm_backend=args.llm_backend,
+            stream_report=args.stream_report,
+            ai_mode=args.ai_mode,
+            ai_concurrency=args.ai_concurrency,
+            ai_rate_limit=args.ai_rate_limit,
+            influxdb_url=args.influxdb_url,
+            jtl_path=args.jtl,
+            aggregation_workers=args.aggregation_workers,
+            max_in_flight=args.max_in_flight,
+            run_store_path=args.run_store,
+            use_run_store=not args.no_run_store,
+            baseline=args.baseline,
+            regression_threshold=args.regression_threshold,
+            detect_anomalies=False if args.no_anomalies else None,
+            trace_path=args.trace_file,
+            metrics_path=args.metrics_file,
+            use_ai=False if args.no_ai else None
         )
         
-        print("\n" + "=" * 60)
-        print("✅ Report generated successfully!")
-        print(f"📄 Location: {report_path}")
-        print("=" * 60)
-        print()
+        try:
+            if args.live:
+                signal.signal(signal.SIGTERM, _raise_interrupt)
+                report_path = agent.run_live(
+                    dashboard_url=dashboard_url or dashboard_urls[0],
+                    output_dir=args.output_dir,
+                    poll_seconds=args.poll_seconds,
+                    refresh_seconds=args.refresh_seconds
+                )
+                print("\n" + "=" * 60)
+                print("✅ Live report completed!")
+                print(f"📄 Location: {report_path}")
+                print("=" * 60)
+                print()
+            elif dashboard_urls:
+                if dashboard_url:
+                    dashboard_urls.insert(0, dashboard_url)
+                run_batch(agent, dashboard_urls, args)
+            else:
+                report_path = agent.generate_report(
+                    dashboard_url=dashboard_url,
+                    output_dir=args.output_dir
+                )
+                
+                print("\n" + "=" * 60)
+                print("✅ Report generated successfully!")
+                print(f"📄 Location: {report_path}")
+                print("=" * 60)
+                print()
+        finally:
+            written = agent.export_telemetry()
+            if written:
+                print_stage_summary(agent.tracer)
+                for path in written:
+                    print(f"📈 Telemetry: {path}")
+            if profiler is not None:
+                profiler.stop()
+                for path in profiler.dump(str(Path(args.output_dir) / 'profile.pstats')):
+                    print(f"🔥 Profile: {path}")
+            agent.close()
         
     except Exception as e:
         print("\n" + "=" * 60)
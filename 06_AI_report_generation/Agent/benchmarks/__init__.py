@@ -0,0 +1 @@
+"""Report generation benchmarks against a synthetic Grafana"""
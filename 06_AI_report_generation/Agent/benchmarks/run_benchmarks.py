@@ -0,0 +1,287 @@
+"""
+End-to-end benchmarks of report generation against a synthetic Grafana
+
+Every case starts the synthetic Grafana stand-in in its own process and
+generates reports with PerformanceReportAgent in another (local LLM
+backend, caches and run store disabled), so peak RSS is measured per case
+and the server does not compete for the agent's GIL.
+
+Usage:
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --sizes small,medium --repeat 5 --output results.json
+    python -m benchmarks.run_benchmarks --compare results.json --tolerance 0.2
+    python -m benchmarks.run_benchmarks --sizes anomalies --repeat 1
+    
+With --compare, cases whose median report time exceeds the baseline by
+more than the tolerance are flagged and the exit status is 1. The
+anomalies case (long series dominated by anomaly detection in the process
+stage, compare with --no-anomalies) only runs when selected.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import argparse
+import platform
+import subprocess
+from contextlib import redirect_stdout
+from dataclasses import asdict, replace
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .synthetic_grafana import DashboardSpec, spec_arguments
+
+
+AGENT_DIR = Path(__file__).resolve().parent.parent
+
+# Preset dashboard sizes, smallest first
+CASES = {
+    'small': DashboardSpec(panels=12, rows=3, points=500, hosts=1),
+    'medium': DashboardSpec(panels=48, rows=6, points=5000, hosts=2),
+    'large': DashboardSpec(panels=96, rows=8, points=10000, hosts=4),
+    'anomalies': DashboardSpec(panels=40, rows=4, points=100000, hosts=2),
+}
+DEFAULT_SIZES = ('small', 'medium', 'large')
+
+# Stages shown in the results table, in pipeline order
+TABLE_STAGES = ('dashboard_fetch', 'query', 'decode', 'process', 'prompt_build', 'llm', 'render', 'export')
+
+DEFAULT_REPEAT = 3
+DEFAULT_TOLERANCE = 0.2
+
+
+def run_case(dashboard_url: str, repeat: int, agent_options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Generate reports of a dashboard and measure them
+    
+    One warm-up report fills the server's response cache and the agent's
+    lazily created pools, then the timed reports run one after another.
+    
+    Args:
+        dashboard_url: Dashboard URL of the synthetic server
+        repeat: Timed reports
+        agent_options: PerformanceReportAgent arguments
+        
+    Returns:
+        Report times, per-report stage times, throughput and peak RSS
+    """
+    os.environ.setdefault('SERVICE_ACCOUNT_TOKEN', 'benchmark')
+    from src.agent import PerformanceReportAgent
+    from src.telemetry import peak_rss_bytes
+    
+    output_dir = tempfile.mkdtemp(prefix='report-benchmark-')
+    durations = []
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        agent = PerformanceReportAgent(llm_backend='local', use_cache=False, use_run_store=False, **agent_options)
+        try:
+            agent.generate_report(dashboard_url, output_dir, echo_report=False)
+            stages_before = agent.tracer.stage_summary()
+            points_before = agent.tracer.counter_total('points')
+            requests_before = agent.transport.summary()
+            
+            for _ in range(repeat):
+                started = time.perf_counter()
+                agent.generate_report(dashboard_url, output_dir, echo_report=False)
+                durations.append(time.perf_counter() - started)
+            
+            stages_after = agent.tracer.stage_summary()
+            points = (agent.tracer.counter_total('points') - points_before) / repeat
+            requests_after = agent.transport.summary()
+        finally:
+            agent.close()
+            shutil.rmtree(output_dir, ignore_errors=True)
+    
+    durations.sort()
+    median = durations[len(durations) // 2]
+    return {
+        'report_s': {'median': median, 'min': durations[0], 'max': durations[-1]},
+        'stages_s': {
+            name: (stage['seconds'] - stages_before.get(name, {}).get('seconds', 0.0)) / repeat
+            for name, stage in stages_after.items()
+        },
+        'points_per_report': points,
+        'points_per_s': points / median if median else 0.0,
+        'bytes_per_report': (requests_after['bytes'] - requests_before['bytes']) / repeat,
+        'requests_per_report': (requests_after['requests'] - requests_before['requests']) / repeat,
+        'peak_rss_bytes': peak_rss_bytes(),
+    }
+
+
+def benchmark(name: str, spec: DashboardSpec, repeat: int, agent_options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run one case: synthetic server and measuring agent in separate processes
+    
+    Returns:
+        Case spec, agent options and run_case measurements
+    """
+    server_args = [
+        f"--panels={spec.panels}", f"--rows={spec.rows}", f"--points={spec.points}", f"--hosts={spec.hosts}",
+        f"--frame-shape={spec.frame_shape}", f"--null-ratio={spec.null_ratio}", f"--latency-ms={spec.latency_ms}",
+    ] + ([] if spec.compress else ['--no-compress'])
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'benchmarks.synthetic_grafana', *server_args],
+        cwd=AGENT_DIR, stdout=subprocess.PIPE, text=True
+    )
+    try:
+        dashboard_url = server.stdout.readline().strip()
+        if not dashboard_url:
+            raise RuntimeError(f"Synthetic Grafana did not start (exit status {server.poll()})")
+        
+        child = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.run_benchmarks', '--child', dashboard_url,
+             f"--repeat={repeat}", f"--agent-options={json.dumps(agent_options)}"],
+            cwd=AGENT_DIR, stdout=subprocess.PIPE, text=True
+        )
+        if child.returncode != 0:
+            raise RuntimeError(f"Benchmark of case {name} failed (exit status {child.returncode})")
+        measurements = json.loads(child.stdout.strip().splitlines()[-1])
+    finally:
+        server.terminate()
+        server.wait()
+    
+    return {'case': name, 'spec': asdict(spec), 'agent_options': agent_options, **measurements}
+
+
+def print_results(results: List[Dict[str, Any]], baseline: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+    """Print one line per case with report time, stage times, throughput and memory"""
+    header = (
+        f"{'case':<10} {'panels':>6} {'points':>10} {'report ms':>10} "
+        + " ".join(f"{stage[:8]:>8}" for stage in TABLE_STAGES)
+        + f" {'Mpts/s':>7} {'MiB':>6}"
+    )
+    if baseline:
+        header += f" {'vs base':>8}"
+    print(header)
+    print("-" * len(header))
+    
+    for result in results:
+        line = (
+            f"{result['case']:<10} {result['spec']['panels']:>6} {result['points_per_report']:>10.0f} "
+            f"{result['report_s']['median'] * 1000:>10.0f} "
+            + " ".join(f"{result['stages_s'].get(stage, 0.0) * 1000:>8.0f}" for stage in TABLE_STAGES)
+            + f" {result['points_per_s'] / 1e6:>7.2f} {(result['peak_rss_bytes'] or 0) / 2 ** 20:>6.0f}"
+        )
+        base = (baseline or {}).get(result['case'])
+        if base:
+            line += f" {result['report_s']['median'] / base['report_s']['median'] - 1:>+8.0%}"
+        print(line)
+    
+    print("\nStage times are per report and summed over threads; query includes network and server time.")
+
+
+def find_regressions(
+    results: List[Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    tolerance: float
+) -> List[str]:
+    """Cases slower than their baseline by more than the tolerance"""
+    regressions = []
+    for result in results:
+        base = baseline.get(result['case'])
+        if base is None:
+            continue
+        ratio = result['report_s']['median'] / base['report_s']['median']
+        if ratio > 1 + tolerance:
+            regressions.append(
+                f"{result['case']}: {base['report_s']['median'] * 1000:.0f} ms -> "
+                f"{result['report_s']['median'] * 1000:.0f} ms ({ratio - 1:+.0%})"
+            )
+    return regressions
+
+
+def main():
+    """Run the benchmark cases and report, save or compare their results"""
+    parser = argparse.ArgumentParser(description='End-to-end report generation benchmarks')
+    parser.add_argument('--sizes', default=','.join(DEFAULT_SIZES),
+                        help=f"Preset cases to run: {', '.join(CASES)} (default: {','.join(DEFAULT_SIZES)})")
+    parser.add_argument('--custom', action='store_true', help='Run one custom case from the dashboard options below')
+    spec_arguments(parser)
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='Timed reports per case')
+    parser.add_argument('--workers', type=int, help='Panels fetched and processed concurrently')
+    parser.add_argument('--batch-size', type=int, help='Queries per /api/ds/query request, 0 disables')
+    parser.add_argument('--stream-responses', action='store_true', help='Decode responses incrementally')
+    parser.add_argument('--downsample-points', type=int, help='Points kept per series after metrics')
+    parser.add_argument('--aggregation-workers', type=int, default=1,
+                        help='Processes merging per-host sketches (default: 1, in-process)')
+    parser.add_argument('--no-anomalies', action='store_true', help='Skip anomaly detection')
+    parser.add_argument('--no-ai', action='store_true', help='Metrics-only reports without AI summary')
+    parser.add_argument('--output', help='Write results as JSON')
+    parser.add_argument('--compare', help='Baseline results JSON to compare against')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Relative slowdown flagged as regression (default: 0.2)')
+    parser.add_argument('--child', metavar='DASHBOARD_URL', help=argparse.SUPPRESS)
+    parser.add_argument('--agent-options', default='{}', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        print(json.dumps(run_case(args.child, args.repeat, json.loads(args.agent_options))))
+        return
+    
+    agent_options = {
+        'workers': args.workers,
+        'batch_size': args.batch_size,
+        'stream_responses': args.stream_responses or None,
+        'downsample_points': args.downsample_points,
+        'detect_anomalies': False if args.no_anomalies else None,
+        'use_ai': False if args.no_ai else None,
+        'window_minutes': 0,
+        'aggregation_workers': args.aggregation_workers,
+    }
+    agent_options = {key: value for key, value in agent_options.items() if value is not None}
+    
+    if args.custom:
+        cases = {'custom': DashboardSpec(
+            panels=args.panels, rows=args.rows, points=args.points, hosts=args.hosts,
+            frame_shape=args.frame_shape, null_ratio=args.null_ratio, latency_ms=args.latency_ms,
+            compress=args.compress
+        )}
+    else:
+        unknown = [name for name in args.sizes.split(',') if name not in CASES]
+        if unknown:
+            parser.error(f"Unknown sizes: {', '.join(unknown)} (expected {', '.join(CASES)})")
+        cases = {
+            name: replace(CASES[name], frame_shape=args.frame_shape, null_ratio=args.null_ratio,
+                          latency_ms=args.latency_ms, compress=args.compress)
+            for name in args.sizes.split(',')
+        }
+    
+    results = []
+    for name, spec in cases.items():
+        print(f"⏱️  {name}: {spec.panels} panels, {spec.points} points x {1 + spec.hosts} series per panel...",
+              flush=True)
+        results.append(benchmark(name, spec, args.repeat, agent_options))
+    
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as baseline_file:
+            baseline = {result['case']: result for result in json.load(baseline_file)['results']}
+    
+    print()
+    print_results(results, baseline)
+    
+    if args.output:
+        Path(args.output).write_text(json.dumps({
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+            'results': results,
+        }, indent=2), encoding='utf-8')
+        print(f"\n💾 Results: {args.output}")
+    
+    if baseline:
+        regressions = find_regressions(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regressions beyond {args.tolerance:.0%}:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            sys.exit(1)
+        print(f"\n✅ No regressions beyond {args.tolerance:.0%}")
+
+
+if __name__ == '__main__':
+    main()
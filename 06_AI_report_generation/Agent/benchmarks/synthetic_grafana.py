@@ -0,0 +1,377 @@
+"""
+Synthetic Grafana stand-in for benchmarks
+
+Serves a generated dashboard and deterministic query results on the
+endpoints the agent uses:
+
+    GET  /api/dashboards/uid/{uid}
+    GET  /api/dashboards/uid/{uid}/versions
+    POST /api/ds/query
+    
+Usage:
+    python -m benchmarks.synthetic_grafana --panels 24 --rows 4 --points 5000 --hosts 2
+    
+The first line printed is the dashboard URL to pass to the agent.
+"""
+
+import gzip
+import json
+import zlib
+import argparse
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import numpy as np
+
+
+FRAME_SHAPES = ('per_host', 'single', 'wide')
+
+# Panel title and value profile, cycled over the panels
+PANEL_KINDS = (
+    ('Response Time', 'latency'),
+    ('Errors', 'errors'),
+    ('Throughput', 'throughput'),
+    ('Active Threads', 'threads'),
+)
+
+# Fixed test window, so dashboard URLs and results are reproducible
+DEFAULT_TIME_FROM = '2025-01-01T10:00:00.000Z'
+DEFAULT_TIME_TO = '2025-01-01T11:00:00.000Z'
+
+# Encoded responses kept, so repeated runs measure the agent, not the generator
+RESPONSE_CACHE_SIZE = 4096
+
+
+@dataclass
+class DashboardSpec:
+    """Shape of a generated dashboard and its query results"""
+    panels: int = 12
+    rows: int = 3
+    points: int = 1000
+    hosts: int = 1
+    frame_shape: str = 'per_host'
+    null_ratio: float = 0.01
+    latency_ms: float = 0.0
+    compress: bool = True
+    uid: str = 'bench'
+    seed: int = 1
+    
+    def __post_init__(self):
+        if self.frame_shape not in FRAME_SHAPES:
+            raise ValueError(f"Unknown frame shape: {self.frame_shape} (expected one of {', '.join(FRAME_SHAPES)})")
+    
+    @property
+    def points_per_report(self) -> int:
+        """Data points served for one report of the dashboard"""
+        series_per_panel = 1 + (self.hosts if self.frame_shape != 'single' else 1)
+        return self.panels * series_per_panel * self.points
+
+
+def build_dashboard(spec: DashboardSpec) -> Dict[str, Any]:
+    """
+    Generate the dashboard JSON of a spec
+    
+    Panels are spread over rows, alternately collapsed (panels nested in the
+    row) and expanded (panels following the row). Every panel has refId A
+    (one series) and refId B (one series per host, grouped by hostname);
+    target aliases carry the value profile and panel id to the query
+    endpoint.
+    
+    Returns:
+        /api/dashboards/uid response body
+    """
+    rows = max(1, min(spec.rows, spec.panels))
+    per_row = -(-spec.panels // rows)
+    top_level: List[Dict[str, Any]] = []
+    panel_id = 1
+    
+    for row in range(rows):
+        row_panel = {
+            'id': 1000 + row, 'type': 'row', 'title': f"Row {row + 1}", 'collapsed': row % 2 == 0, 'panels': []
+        }
+        members = []
+        for _ in range(min(per_row, spec.panels - panel_id + 1)):
+            title, kind = PANEL_KINDS[(panel_id - 1) % len(PANEL_KINDS)]
+            members.append({
+                'id': panel_id,
+                'type': 'timeseries',
+                'title': f"{title} {panel_id}",
+                'datasource': {'type': 'influxdb', 'uid': '${data_source}'},
+                'targets': [
+                    {
+                        'refId': 'A',
+                        'alias': f"{kind} {panel_id}",
+                        'rawQuery': True,
+                        'query': 'SELECT mean("avg") FROM "jmeter" WHERE "transaction" =~ /^$transaction$/ '
+                                 'AND $timeFilter GROUP BY time($__interval)',
+                    },
+                    {
+                        'refId': 'B',
+                        'alias': f"{kind} {panel_id}",
+                        'rawQuery': True,
+                        'query': 'SELECT max("max") FROM "jmeter" WHERE $timeFilter '
+                                 'GROUP BY time($__interval), "hostname"',
+                    },
+                ],
+            })
+            panel_id += 1
+        
+        if row_panel['collapsed']:
+            row_panel['panels'] = members
+            top_level.append(row_panel)
+        else:
+            top_level += [row_panel, *members]
+    
+    return {
+        'dashboard': {'uid': spec.uid, 'title': f"Synthetic {spec.panels} panels", 'version': 1, 'panels': top_level},
+        'meta': {'version': 1},
+    }
+
+
+def build_query_result(spec: DashboardSpec, queries: List[Dict[str, Any]], time_from: int, time_to: int) -> Dict[str, Any]:
+    """
+    Generate /api/ds/query results for the queries of one request
+    
+    Values follow the profile of the panel kind, with nulls, a few spikes
+    and a level shift. Results are deterministic per panel, refId and range.
+    
+    Returns:
+        Query response body
+    """
+    results = {}
+    for query in queries:
+        ref_id = query.get('refId', 'A')
+        alias = query.get('alias', '')
+        kind = alias.split(' ')[0]
+        hosts = spec.hosts if 'hostname' in query.get('query', '') else 1
+        timestamps = np.linspace(time_from, time_to, spec.points, endpoint=False).astype(np.int64)
+        # Batched requests rename refIds, the seed uses the original query
+        key = zlib.crc32(f"{spec.seed}/{alias}/{query.get('query')}/{time_from}/{time_to}".encode())
+        rng = np.random.default_rng(key)
+        series = [_series_values(rng, kind, spec) for _ in range(hosts)]
+        host_labels = [{'hostname': f"slave-{host + 1}"} if hosts > 1 else {} for host in range(hosts)]
+        
+        time_field = {'name': 'Time', 'type': 'time'}
+        if spec.frame_shape == 'wide':
+            frames = [{
+                'schema': {
+                    'refId': ref_id,
+                    'fields': [time_field] + [
+                        {'name': 'Value', 'type': 'number', 'labels': labels} for labels in host_labels
+                    ],
+                },
+                'data': {'values': [timestamps.tolist()] + [_to_json_values(values) for values in series]},
+            }]
+        else:
+            if spec.frame_shape == 'single' and hosts > 1:
+                series, host_labels = [np.nanmean(np.vstack(series), axis=0)], [{}]
+            frames = [
+                {
+                    'schema': {
+                        'refId': ref_id,
+                        'fields': [time_field, {'name': 'Value', 'type': 'number', 'labels': labels}],
+                    },
+                    'data': {'values': [timestamps.tolist(), _to_json_values(values)]},
+                }
+                for values, labels in zip(series, host_labels)
+            ]
+        results[ref_id] = {'status': 200, 'frames': frames}
+    
+    return {'results': results}
+
+
+def _series_values(rng: np.random.Generator, kind: str, spec: DashboardSpec) -> np.ndarray:
+    """Values of one series with the profile of a panel kind"""
+    size = spec.points
+    if kind == 'latency':
+        values = rng.lognormal(np.log(200), 0.25, size)
+    elif kind == 'errors':
+        values = rng.poisson(0.5, size).astype(np.float64)
+    elif kind == 'throughput':
+        values = rng.normal(120, 8, size)
+    else:
+        values = np.minimum(np.arange(size) * 200 / max(size // 4, 1), 200) + rng.normal(0, 1, size)
+    
+    if size >= 100:
+        spikes = rng.integers(0, size, max(1, size // 5000))
+        values[spikes] *= 4
+        values[size * 2 // 3:] *= 1.3
+    
+    values = np.round(values, 3)
+    values[rng.random(size) < spec.null_ratio] = np.nan
+    return values
+
+
+def _to_json_values(values: np.ndarray) -> List[Optional[float]]:
+    """Values as a JSON list, NaN as null"""
+    listed = values.tolist()
+    for index in np.flatnonzero(np.isnan(values)).tolist():
+        listed[index] = None
+    return listed
+
+
+class SyntheticGrafana:
+    """
+    Threaded HTTP server answering like Grafana for one generated dashboard
+    
+    Encoded (and gzip-compressed) responses are cached, so after a warm-up
+    run the server only writes bytes and its cost stays out of the agent's
+    measurements.
+    """
+    
+    def __init__(self, spec: DashboardSpec, host: str = '127.0.0.1', port: int = 0):
+        """
+        Initialize server
+        
+        Args:
+            spec: Dashboard and result shape
+            host: Interface to listen on
+            port: Port, 0 picks a free one
+        """
+        self.spec = spec
+        self._dashboard = json.dumps(build_dashboard(spec)).encode('utf-8')
+        self._cache: 'OrderedDict[bytes, bytes]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def base_url(self) -> str:
+        """Base URL of the server"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def dashboard_url(self, time_from: str = DEFAULT_TIME_FROM, time_to: str = DEFAULT_TIME_TO) -> str:
+        """Dashboard URL with time range and variables, as passed to the agent"""
+        return (
+            f"{self.base_url}/d/{self.spec.uid}/synthetic?orgId=1&var-data_source=bench"
+            f"&var-transaction=all&from={time_from}&to={time_to}"
+        )
+    
+    def start(self) -> 'SyntheticGrafana':
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name='synthetic-grafana', daemon=True)
+        self._thread.start()
+        return self
+    
+    def serve_forever(self) -> None:
+        """Serve in the calling thread until interrupted"""
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+    
+    def stop(self) -> None:
+        """Stop serving in the background thread"""
+        self._server.shutdown()
+        self._server.server_close()
+    
+    def __enter__(self) -> 'SyntheticGrafana':
+        return self.start()
+    
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+    
+    def _query_response(self, body: bytes) -> bytes:
+        """Encoded /api/ds/query response of a request body"""
+        with self._lock:
+            cached = self._cache.get(body)
+            if cached is not None:
+                self._cache.move_to_end(body)
+                return cached
+        
+        payload = json.loads(body)
+        result = build_query_result(self.spec, payload.get('queries', []), int(payload['from']), int(payload['to']))
+        encoded = json.dumps(result).encode('utf-8')
+        if self.spec.compress:
+            encoded = gzip.compress(encoded, compresslevel=1)
+        
+        with self._lock:
+            self._cache[body] = encoded
+            if len(self._cache) > RESPONSE_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return encoded
+    
+    def _handler_class(self) -> type:
+        """Request handler bound to this server"""
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            
+            def log_message(self, format, *args):
+                pass
+            
+            def do_GET(self):
+                server.requests += 1
+                path = urlsplit(self.path).path
+                if path == f"/api/dashboards/uid/{server.spec.uid}/versions":
+                    self._send(b'{"versions": [{"version": 1}]}')
+                elif path == f"/api/dashboards/uid/{server.spec.uid}":
+                    self._send(server._dashboard)
+                else:
+                    self._send(b'{"message": "Dashboard not found"}', status=404)
+            
+            def do_POST(self):
+                server.requests += 1
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                if urlsplit(self.path).path != '/api/ds/query':
+                    self._send(b'{"message": "Not found"}', status=404)
+                    return
+                if server.spec.latency_ms:
+                    threading.Event().wait(server.spec.latency_ms / 1000)
+                compressed = server.spec.compress and 'gzip' in self.headers.get('Accept-Encoding', '')
+                response = server._query_response(body)
+                if server.spec.compress and not compressed:
+                    response = gzip.decompress(response)
+                self._send(response, gzipped=compressed)
+            
+            def _send(self, body: bytes, status: int = 200, gzipped: bool = False):
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                if gzipped:
+                    self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+        
+        return Handler
+
+
+def spec_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the DashboardSpec options to a parser"""
+    defaults = DashboardSpec()
+    parser.add_argument('--panels', type=int, default=defaults.panels, help='Panels of the dashboard')
+    parser.add_argument('--rows', type=int, default=defaults.rows, help='Rows the panels are spread over')
+    parser.add_argument('--points', type=int, default=defaults.points, help='Points per series')
+    parser.add_argument('--hosts', type=int, default=defaults.hosts, help='Series of refId B (one per host)')
+    parser.add_argument('--frame-shape', choices=FRAME_SHAPES, default=defaults.frame_shape,
+                        help='One frame per host, host series averaged into one frame, or one wide frame')
+    parser.add_argument('--null-ratio', type=float, default=defaults.null_ratio, help='Share of null values')
+    parser.add_argument('--latency-ms', type=float, default=defaults.latency_ms, help='Added latency per query')
+    parser.add_argument('--no-compress', dest='compress', action='store_false', help='Never gzip responses')
+
+
+def main():
+    """Serve a synthetic dashboard until interrupted"""
+    parser = argparse.ArgumentParser(description='Synthetic Grafana stand-in for benchmarks')
+    spec_arguments(parser)
+    parser.add_argument('--port', type=int, default=0, help='Port to listen on (default: a free port)')
+    args = parser.parse_args()
+    
+    spec = DashboardSpec(**{key: value for key, value in vars(args).items() if key in asdict(DashboardSpec())})
+    server = SyntheticGrafana(spec, port=args.port)
+    print(server.dashboard_url(), flush=True)
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
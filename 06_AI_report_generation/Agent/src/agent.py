@@ -1,36 +1,312 @@
 """Main performance report agent orchestrator"""
 
 import os
-from typing import List
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional, Tuple, Union, TYPE_CHECKING
 from dotenv import load_dotenv
 
 from .parsers.url_parser import GrafanaURLParser, GrafanaDashboardContext
-from .clients.grafana_client import GrafanaClient
+from .parsers.template_engine import TemplateEngine
+from .clients.grafana_client import GrafanaClient, PanelQuery, DEFAULT_RECENT_RANGE_TTL, DEFAULT_WINDOW_WORKERS
+from .clients.disk_cache import DiskCache
 from .clients.openai_client import OpenAIClient
+from .clients.transport import Transport, TransportConfig
 from .processors.data_processor import DataProcessor, PanelData
+from .processors.aggregation import SketchReducer
+from .processors.anomaly_detection import AnomalyDetector
 from .builders.report_builder import ReportBuilder
+from .builders.prompt_builder import PromptBuilder, DEFAULT_TOKEN_BUDGET
+from .storage.baseline import BaselineComparison, compare_runs, DEFAULT_REGRESSION_THRESHOLD
+from .telemetry.tracer import Tracer
+
+if TYPE_CHECKING:
+    from .clients.influxdb_client import InfluxDBClient
+    from .processors.live_aggregator import LiveAggregator
+    from .storage.run_store import StoredRun
+
+
+DEFAULT_WORKERS = 8
+DEFAULT_CACHE_DIR = './.cache/grafana'
+DEFAULT_CACHE_MAX_MB = 512
+DEFAULT_AI_CONCURRENCY = 4
+DEFAULT_AI_RATE_LIMIT = 60
+DEFAULT_BATCH_JOBS = 4
+DEFAULT_LIVE_POLL_SECONDS = 30
+DEFAULT_LIVE_REFRESH_SECONDS = 300
+DEFAULT_LIVE_INTERVAL_SECONDS = 10
+DEFAULT_LIVE_SETTLE_SECONDS = 30
+
+
+def _env_flag(name: str, default: bool = False) -> bool:
+    """Read a boolean flag from environment"""
+    return os.getenv(name, '1' if default else '').lower() in ('1', 'true', 'yes')
+
+
+def _epoch_ms(moment: datetime) -> int:
+    """Datetime as epoch milliseconds"""
+    return int(moment.timestamp() * 1000)
+
+
+def _from_epoch_ms(epoch_ms: int) -> datetime:
+    """Epoch milliseconds as UTC datetime"""
+    return datetime.fromtimestamp(epoch_ms / 1000, tz=timezone.utc)
+
+
+def _point_count(panel_data: PanelData) -> int:
+    """Points the metrics of a panel were computed from"""
+    return sum(
+        int(metrics.get('count') or 0)
+        for metrics in (panel_data.metrics or {}).values()
+        if isinstance(metrics, dict)
+    )
+
+
+@dataclass
+class ReportJobResult:
+    """Outcome of one report of a batch"""
+    url: str
+    status: str
+    report_path: Optional[str] = None
+    duration_s: float = 0.0
+    error: Optional[str] = None
 
 
 class PerformanceReportAgent:
     """Main orchestrator for performance report generation"""
     
-    def __init__(self):
-        """Initialize the agent with required components"""
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        stream_responses: Optional[bool] = None,
+        keep_raw_data: Optional[bool] = None,
+        cache_dir: Optional[str] = None,
+        use_cache: bool = True,
+        window_minutes: Optional[float] = None,
+        downsample_points: Optional[int] = None,
+        prompt_token_budget: Optional[int] = None,
+        llm_backend: Optional[str] = None,
+        stream_report: Optional[bool] = None,
+        ai_mode: Optional[str] = None,
+        ai_concurrency: Optional[int] = None,
+        ai_rate_limit: Optional[float] = None,
+        influxdb_url: Optional[str] = None,
+        jtl_path: Optional[str] = None,
+        aggregation_workers: Optional[int] = None,
+        max_in_flight: Optional[int] = None,
+        run_store_path: Optional[str] = None,
+        use_run_store: bool = True,
+        baseline: Optional[str] = None,
+        regression_threshold: Optional[float] = None,
+        detect_anomalies: Optional[bool] = None,
+        trace_path: Optional[str] = None,
+        metrics_path: Optional[str] = None,
+        use_ai: Optional[bool] = None
+    ):
+        """
+        Initialize the agent with required components
+        
+        Args:
+            workers: Number of panels (or batches) fetched and processed
+                concurrently (if not provided, reads REPORT_WORKERS from environment)
+            batch_size: Maximum queries packed into one /api/ds/query request,
+                0 disables batching (if not provided, reads REPORT_BATCH_SIZE
+                from environment)
+            stream_responses: Decode query responses incrementally instead of
+                loading whole JSON documents (if not provided, reads
+                REPORT_STREAM_RESPONSES from environment)
+            keep_raw_data: Keep raw query results on the panel data after
+                metrics are computed; by default only metrics and columnar
+                series are kept (if not provided, reads REPORT_KEEP_RAW_DATA
+                from environment)
+            cache_dir: Directory of the Grafana query result cache (if not
+                provided, reads GRAFANA_CACHE_DIR from environment)
+            use_cache: Serve repeated queries from the result cache
+            window_minutes: Split time ranges longer than this into windows
+                fetched concurrently, 0 disables (if not provided, reads
+                REPORT_WINDOW_MINUTES from environment)
+            downsample_points: Points kept per series after metrics are
+                computed, 0 keeps full series (if not provided, reads
+                REPORT_DOWNSAMPLE_POINTS from environment)
+            prompt_token_budget: Maximum estimated tokens of the AI prompt
+                (if not provided, reads PROMPT_TOKEN_BUDGET from environment)
+            llm_backend: "openai" or "local" deterministic stand-in (if not
+                provided, reads LLM_BACKEND from environment)
+            stream_report: Write report sections to the file and console as
+                they are ready, streaming the executive summary from the LLM
+                (if not provided, reads REPORT_STREAM_OUTPUT from environment)
+            ai_mode: "single" completion over all panels or "mapreduce" over
+                panel groups (if not provided, reads AI_MODE from environment)
+            ai_concurrency: Panel group analyses in flight in map-reduce mode
+                (if not provided, reads AI_CONCURRENCY from environment)
+            ai_rate_limit: Maximum LLM calls per minute in map-reduce mode,
+                0 = unlimited (if not provided, reads AI_RATE_LIMIT from environment)
+            influxdb_url: Query panel targets directly from this InfluxDB 1.x
+                instead of through Grafana (if not provided, reads INFLUXDB_URL
+                from environment)
+            jtl_path: JMeter result file (CSV/JTL) summarized per sampler
+                label into additional panels (if not provided, reads
+                REPORT_JTL_FILE from environment)
+            aggregation_workers: Processes merging per-host sketches of
+                multi-series queries, 1 = in-process (if not provided, reads
+                REPORT_AGGREGATION_WORKERS from environment, default: 1)
+            max_in_flight: Grafana/InfluxDB requests in flight across all
+                reports of this agent (if not provided, reads
+                REPORT_MAX_IN_FLIGHT from environment, default: workers times
+                window workers)
+            run_store_path: SQLite file keeping the metrics of every run (if
+                not provided, reads REPORT_RUN_STORE from environment,
+                default: ./.cache/runs.sqlite3)
+            use_run_store: Store runs and allow baseline comparisons
+            baseline: Run compared against: "latest" (latest earlier run of
+                the same dashboard), a stored run ID or a dashboard URL of a
+                stored run (if not provided, reads REPORT_BASELINE from
+                environment)
+            regression_threshold: Relative change flagged as regression (if
+                not provided, reads REPORT_REGRESSION_THRESHOLD from
+                environment, default: 0.1)
+            detect_anomalies: Flag spikes, dips and level shifts in the full
+                series before downsampling (if not provided, reads
+                REPORT_DETECT_ANOMALIES from environment, default: enabled)
+            trace_path: JSON file receiving the timed spans of every stage
+                by export_telemetry (if not provided, reads REPORT_TRACE_FILE
+                from environment)
+            metrics_path: Prometheus text file receiving stage timings,
+                bytes, points, tokens and peak RSS by export_telemetry (if
+                not provided, reads REPORT_METRICS_FILE from environment)
+            use_ai: Write an AI executive summary; without it reports hold
+                the metrics only, no LLM backend is created and no API key
+                is needed (if not provided, reads REPORT_USE_AI from
+                environment, default: enabled)
+        """
         # Load environment variables
         load_dotenv()
         
+        self._llm_backend = llm_backend or os.getenv('LLM_BACKEND', 'openai')
+        self._use_ai = use_ai if use_ai is not None else _env_flag('REPORT_USE_AI', default=True)
+        
         # Validate environment
         self._validate_environment()
         
+        # Spans and counters of every report of this agent
+        self._tracer = Tracer()
+        self._trace_path = trace_path or os.getenv('REPORT_TRACE_FILE')
+        self._metrics_path = metrics_path or os.getenv('REPORT_METRICS_FILE')
+        
+        self._workers = max(1, workers or int(os.getenv('REPORT_WORKERS', DEFAULT_WORKERS)))
+        self._batch_size = max(0, batch_size if batch_size is not None else int(os.getenv('REPORT_BATCH_SIZE', 0)))
+        self._stream_responses = (
+            stream_responses if stream_responses is not None
+            else _env_flag('REPORT_STREAM_RESPONSES')
+        )
+        self._stream_report = (
+            stream_report if stream_report is not None
+            else _env_flag('REPORT_STREAM_OUTPUT')
+        )
+        keep_raw_data = keep_raw_data if keep_raw_data is not None else _env_flag('REPORT_KEEP_RAW_DATA')
+        downsample_points = (
+            downsample_points if downsample_points is not None
+            else int(os.getenv('REPORT_DOWNSAMPLE_POINTS', 0))
+        )
+        
+        self._query_cache = None
+        self._dashboard_cache = None
+        llm_cache = None
+        if use_cache:
+            cache_dir = cache_dir or os.getenv('GRAFANA_CACHE_DIR', DEFAULT_CACHE_DIR)
+            self._query_cache = DiskCache(
+                directory=cache_dir,
+                max_bytes=int(os.getenv('GRAFANA_CACHE_MAX_MB', DEFAULT_CACHE_MAX_MB)) * 1024 * 1024
+            )
+            self._dashboard_cache = self._query_cache.namespace('dashboards')
+            if self._use_ai:
+                llm_cache = self._query_cache.namespace('llm')
+        self._recent_range_ttl = float(os.getenv('GRAFANA_CACHE_TTL', DEFAULT_RECENT_RANGE_TTL))
+        self._influxdb_url = influxdb_url or os.getenv('INFLUXDB_URL')
+        self._jtl_path = jtl_path or os.getenv('REPORT_JTL_FILE')
+        self._window_minutes = (
+            window_minutes if window_minutes is not None
+            else float(os.getenv('REPORT_WINDOW_MINUTES', 0))
+        )
+        
+        self._baseline = baseline or os.getenv('REPORT_BASELINE')
+        self._regression_threshold = (
+            regression_threshold if regression_threshold is not None
+            else float(os.getenv('REPORT_REGRESSION_THRESHOLD', DEFAULT_REGRESSION_THRESHOLD))
+        )
+        self._run_store = None
+        if use_run_store:
+            # Imported here: sqlite3 is only loaded when runs are stored
+            from .storage.run_store import DEFAULT_RUN_STORE, RunStore
+            
+            self._run_store = RunStore(run_store_path or os.getenv('REPORT_RUN_STORE', DEFAULT_RUN_STORE))
+        elif self._baseline:
+            raise ValueError("Baseline comparison needs the run store")
+        
+        # One pooled transport for every report, so batch jobs reuse
+        # connections and share a single cap on requests in flight
+        max_in_flight = max_in_flight or int(os.getenv('REPORT_MAX_IN_FLIGHT', 0)) or (
+            self._workers * (DEFAULT_WINDOW_WORKERS if self._window_minutes else 1)
+        )
+        self._transport = Transport(TransportConfig.from_env(pool_size=max_in_flight, max_in_flight=max_in_flight))
+        
         # Initialize components (composition over inheritance)
         self._url_parser = GrafanaURLParser()
-        self._data_processor = DataProcessor()
-        self._openai_client = OpenAIClient()
+        self._sketch_reducer = SketchReducer(
+            workers=aggregation_workers or int(os.getenv('REPORT_AGGREGATION_WORKERS', 1))
+        )
+        detect_anomalies = (
+            detect_anomalies if detect_anomalies is not None
+            else _env_flag('REPORT_DETECT_ANOMALIES', default=True)
+        )
+        self._data_processor = DataProcessor(
+            retain_raw_data=keep_raw_data,
+            downsample_points=downsample_points or None,
+            reducer=self._sketch_reducer,
+            detector=AnomalyDetector() if detect_anomalies else None
+        )
+        # The LLM backend itself is only created by the first completion
+        self._openai_client = (
+            OpenAIClient(cache=llm_cache, tracer=self._tracer, backend_name=self._llm_backend)
+            if self._use_ai else None
+        )
         self._report_builder = ReportBuilder()
+        self._prompt_builder = PromptBuilder(
+            token_budget=prompt_token_budget or int(os.getenv('PROMPT_TOKEN_BUDGET', DEFAULT_TOKEN_BUDGET))
+        )
+        
+        ai_mode = ai_mode or os.getenv('AI_MODE', 'single')
+        if ai_mode not in ('single', 'mapreduce'):
+            raise ValueError(f"Unknown AI mode: {ai_mode}")
+        
+        self._summary_builder = None
+        if ai_mode == 'mapreduce' and self._use_ai:
+            ai_concurrency = ai_concurrency or int(os.getenv('AI_CONCURRENCY', DEFAULT_AI_CONCURRENCY))
+            ai_rate_limit = (
+                ai_rate_limit if ai_rate_limit is not None
+                else float(os.getenv('AI_RATE_LIMIT', DEFAULT_AI_RATE_LIMIT))
+            )
+            from .builders.summary_builder import MapReduceSummaryBuilder
+            from .clients.rate_limiter import RateLimiter
+            
+            self._summary_builder = MapReduceSummaryBuilder(
+                openai_client=self._openai_client,
+                prompt_builder=self._prompt_builder,
+                concurrency=ai_concurrency,
+                rate_limiter=RateLimiter(ai_rate_limit, burst=ai_concurrency),
+                tracer=self._tracer
+            )
     
     def _validate_environment(self) -> None:
         """Validate required environment variables are set"""
-        required_vars = ['OPENAI_API_KEY', 'SERVICE_ACCOUNT_TOKEN']
+        required_vars = ['SERVICE_ACCOUNT_TOKEN']
+        if self._use_ai and self._llm_backend == 'openai':
+            required_vars.insert(0, 'OPENAI_API_KEY')
         missing_vars = [var for var in required_vars if not os.getenv(var)]
         
         if missing_vars:
@@ -39,10 +315,130 @@ class PerformanceReportAgent:
                 f"Please set them in your .env file or environment"
             )
     
+    @property
+    def transport(self) -> Transport:
+        """HTTP transport shared by every report of this agent"""
+        return self._transport
+    
+    @property
+    def tracer(self) -> Tracer:
+        """Spans, counters and gauges of every report of this agent"""
+        return self._tracer
+    
+    def export_telemetry(self) -> List[str]:
+        """
+        Write the trace and metrics files configured for this agent
+        
+        HTTP, cache and token totals are recorded as gauges first.
+        
+        Returns:
+            Paths written
+        """
+        transport_stats = self._transport.summary()
+        self._tracer.gauge('http_requests', transport_stats['requests'])
+        self._tracer.gauge('http_bytes_received', transport_stats['bytes'])
+        self._tracer.gauge('http_retries', transport_stats['retries'])
+        if self._openai_client is not None:
+            for name, value in self._openai_client.usage().items():
+                self._tracer.gauge(f"llm_{name}", value)
+        if self._query_cache is not None:
+            cache_stats = self._query_cache.stats()
+            self._tracer.gauge('query_cache_lookups', cache_stats['hits'], result='hit')
+            self._tracer.gauge('query_cache_lookups', cache_stats['misses'], result='miss')
+        
+        written = []
+        if self._trace_path:
+            self._tracer.write_trace(self._trace_path)
+            written.append(self._trace_path)
+        if self._metrics_path:
+            self._tracer.write_prometheus(self._metrics_path)
+            written.append(self._metrics_path)
+        return written
+    
+    def close(self) -> None:
+        """Release the aggregation process pool, pooled connections and run store"""
+        self._sketch_reducer.close()
+        self._transport.close()
+        if self._run_store is not None:
+            self._run_store.close()
+    
+    def list_runs(self, dashboard_url: str, limit: int = 20) -> List['StoredRun']:
+        """
+        Latest stored runs of the dashboard of a URL
+        
+        Args:
+            dashboard_url: Grafana dashboard URL (time range is ignored)
+            limit: Maximum runs returned
+            
+        Returns:
+            Runs ordered by test start time, newest first
+        """
+        if self._run_store is None:
+            return []
+        return self._run_store.latest_runs(self._url_parser.parse_dashboard_uid(dashboard_url), limit=limit)
+    
+    def generate_reports(
+        self,
+        dashboard_urls: List[str],
+        output_dir: str = './reports',
+        jobs: Optional[int] = None
+    ) -> List[ReportJobResult]:
+        """
+        Generate reports of several dashboards or runs in parallel
+        
+        Jobs share the clients, caches and connection pool of this agent. A
+        failed job is recorded and does not stop the others.
+        
+        Args:
+            dashboard_urls: Dashboard URLs with time range, duplicates are
+                generated once
+            output_dir: Directory to save reports
+            jobs: Reports generated at once (if not provided, reads
+                REPORT_BATCH_JOBS from environment, default: 4)
+                
+        Returns:
+            Result per unique URL, in input order
+        """
+        dashboard_urls = list(dict.fromkeys(dashboard_urls))
+        jobs = max(1, jobs or int(os.getenv('REPORT_BATCH_JOBS', DEFAULT_BATCH_JOBS)))
+        print(f"📚 Batch: {len(dashboard_urls)} reports, {jobs} at a time")
+        
+        def run(dashboard_url: str) -> ReportJobResult:
+            started = time.perf_counter()
+            try:
+                path = self.generate_report(dashboard_url, output_dir, echo_report=False)
+            except Exception as e:
+                return ReportJobResult(
+                    url=dashboard_url,
+                    status='failed',
+                    duration_s=time.perf_counter() - started,
+                    error=f"{type(e).__name__}: {e}"
+                )
+            return ReportJobResult(
+                url=dashboard_url,
+                status='ok',
+                report_path=path,
+                duration_s=time.perf_counter() - started
+            )
+        
+        results = {}
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = {executor.submit(run, url): url for url in dashboard_urls}
+            for done, future in enumerate(as_completed(futures), start=1):
+                result = future.result()
+                results[result.url] = result
+                if result.status == 'ok':
+                    print(f"[{done}/{len(futures)}] ✅ {result.report_path} ({result.duration_s:.1f} s)")
+                else:
+                    print(f"[{done}/{len(futures)}] ❌ {result.url}: {result.error}")
+        
+        return [results[url] for url in dashboard_urls]
+    
     def generate_report(
         self, 
         dashboard_url: str,
-        output_dir: str = './reports'
+        output_dir: str = './reports',
+        echo_report: bool = True
     ) -> str:
         """
         Generate performance test report from Grafana dashboard URL
@@ -50,150 +446,668 @@ class PerformanceReportAgent:
         Args:
             dashboard_url: Full Grafana dashboard URL with time range
             output_dir: Directory to save report
+            echo_report: Print the report to stdout for CI/CD visibility
             
         Returns:
             Path to generated report file
         """
+        with self._tracer.span('report', url=dashboard_url):
+            print("📊 Parsing dashboard URL...")
+            context = self._parse_url(dashboard_url)
+            
+            print(f"✓ Dashboard: {context.dashboard_uid}")
+            print(f"✓ Time Range: {self._url_parser.get_time_range_description(context)}")
+            print(f"✓ Variables: {len(context.variables)} found")
+            
+            print("\n🔌 Connecting to Grafana...")
+            grafana_client = GrafanaClient(
+                context,
+                cache=self._query_cache,
+                recent_range_ttl=self._recent_range_ttl,
+                dashboard_cache=self._dashboard_cache,
+                window_seconds=self._window_minutes * 60 or None,
+                transport=self._transport,
+                tracer=self._tracer
+            )
+            
+            print("📥 Fetching dashboard data...")
+            with self._tracer.span('dashboard_fetch'):
+                dashboard = grafana_client.get_dashboard()
+            dashboard_title = dashboard['dashboard']['title']
+            print(f"✓ Dashboard: {dashboard_title}")
+            
+            filename = self._report_filename(context)
+            if self._stream_report:
+                return self._generate_streamed_report(
+                    grafana_client, dashboard, dashboard_title, context, output_dir, filename, echo_report
+                )
+            
+            panel_data_list = self._collect_panel_data(grafana_client, dashboard, context)
+            return self._finish_report(context, dashboard_title, panel_data_list, output_dir, filename, echo_report)
+    
+    def run_live(
+        self,
+        dashboard_url: str,
+        output_dir: str = './reports',
+        poll_seconds: Optional[float] = None,
+        refresh_seconds: Optional[float] = None
+    ) -> str:
+        """
+        Follow a running test, keeping an interim report up to date
+        
+        Every poll fetches only the time since the previous poll. Ranges
+        start on a boundary of a pinned query interval and end a settle
+        delay before now, so each complete bucket is fetched exactly once
+        and query cost stays flat however long the test runs. Fetched points
+        are folded into running statistics (Welford mean and variance,
+        mergeable percentile sketches) and dropped. The interim report, with
+        the baseline comparison when one is configured, is rewritten every
+        refresh interval; the final report with AI summary is written when
+        the range end is reached or the run is interrupted.
+        
+        Args:
+            dashboard_url: Dashboard URL; "from" is the test start and "to"
+                its planned end, or "now" to follow until interrupted
+            output_dir: Directory to save report
+            poll_seconds: Seconds between polls (if not provided, reads
+                REPORT_LIVE_POLL_SECONDS from environment, default: 30)
+            refresh_seconds: Seconds between interim reports (if not
+                provided, reads REPORT_LIVE_REFRESH_SECONDS from
+                environment, default: 300)
+                
+        Returns:
+            Path to the final report file
+        """
+        poll_seconds = poll_seconds or float(os.getenv('REPORT_LIVE_POLL_SECONDS', DEFAULT_LIVE_POLL_SECONDS))
+        refresh_seconds = refresh_seconds or float(
+            os.getenv('REPORT_LIVE_REFRESH_SECONDS', DEFAULT_LIVE_REFRESH_SECONDS)
+        )
+        interval_ms = int(float(os.getenv('REPORT_LIVE_INTERVAL_SECONDS', DEFAULT_LIVE_INTERVAL_SECONDS)) * 1000)
+        settle_ms = int(float(os.getenv('REPORT_LIVE_SETTLE_SECONDS', DEFAULT_LIVE_SETTLE_SECONDS)) * 1000)
+        
         print("📊 Parsing dashboard URL...")
         context = self._parse_url(dashboard_url)
-        
+        end_ms = None if context.time_to_relative else _epoch_ms(context.time_to)
         print(f"✓ Dashboard: {context.dashboard_uid}")
-        print(f"✓ Time Range: {self._url_parser.get_time_range_description(context)}")
-        print(f"✓ Variables: {len(context.variables)} found")
+        print(
+            f"✓ Following from {context.time_from.strftime('%Y-%m-%d %H:%M:%S')} "
+            + (f"until {context.time_to.strftime('%Y-%m-%d %H:%M:%S')}" if end_ms else "until interrupted")
+        )
         
         print("\n🔌 Connecting to Grafana...")
-        grafana_client = GrafanaClient(context)
-        
-        print("📥 Fetching dashboard data...")
+        grafana_client = GrafanaClient(
+            context, dashboard_cache=self._dashboard_cache, transport=self._transport, tracer=self._tracer
+        )
         dashboard = grafana_client.get_dashboard()
         dashboard_title = dashboard['dashboard']['title']
-        print(f"✓ Dashboard: {dashboard_title}")
-        
-        print("\n🎛️  Processing panels...")
         panels = grafana_client.extract_panels_from_dashboard(dashboard)
-        print(f"✓ Found {len(panels)} panels")
+        rows = grafana_client.get_panel_rows(dashboard)
+        print(f"✓ Dashboard: {dashboard_title} ({len(panels)} panels)")
         
-        panel_data_list = self._process_panels(grafana_client, panels, context)
+        from .processors.live_aggregator import LiveAggregator
         
-        print(f"\n🤖 Analyzing data with AI...")
-        ai_analysis = self._analyze_with_ai(panel_data_list, context, dashboard_title)
+        aggregator = LiveAggregator()
+        # Running statistics need every point, never downsampled series;
+        # poll windows are too short for anomaly detection
+        processor = DataProcessor(reducer=self._sketch_reducer)
+        filename = self._report_filename(context)
+        path = self._report_builder.report_path(output_dir, filename)
+        cursor_ms = _epoch_ms(context.time_from) // interval_ms * interval_ms
+        polls = 0
+        next_refresh = time.monotonic() + refresh_seconds
+        
+        print(f"\n🔴 Live: polling every {poll_seconds:.0f} s, interim report every {refresh_seconds:.0f} s")
+        try:
+            while True:
+                now_ms = _epoch_ms(datetime.now(timezone.utc))
+                finished = end_ms is not None and now_ms >= end_ms + settle_ms
+                until_ms = end_ms + 1 if finished else (now_ms - settle_ms) // interval_ms * interval_ms
+                if end_ms is not None:
+                    until_ms = min(until_ms, end_ms + 1)
+                
+                if until_ms > cursor_ms:
+                    self._poll_live(
+                        context, panels, rows, processor, aggregator, cursor_ms, until_ms, interval_ms,
+                        grafana_client.templates
+                    )
+                    cursor_ms = until_ms
+                    polls += 1
+                
+                if finished:
+                    break
+                if time.monotonic() >= next_refresh:
+                    self._write_interim_report(context, dashboard_title, aggregator, cursor_ms, path, polls)
+                    next_refresh = time.monotonic() + refresh_seconds
+                time.sleep(poll_seconds)
+        except KeyboardInterrupt:
+            print("\n⏹️  Live mode stopped, fetching the remaining data...")
+            until_ms = _epoch_ms(datetime.now(timezone.utc)) + 1
+            if end_ms is not None:
+                until_ms = min(until_ms, end_ms + 1)
+            if until_ms > cursor_ms:
+                self._poll_live(
+                    context, panels, rows, processor, aggregator, cursor_ms, until_ms, interval_ms,
+                    grafana_client.templates
+                )
+                cursor_ms = until_ms
+        
+        panel_data_list = aggregator.panel_data()
+        if self._jtl_path:
+            panel_data_list += self._analyze_jtl(self._jtl_path)
+        
+        return self._finish_report(
+            replace(context, time_to=_from_epoch_ms(cursor_ms - 1), time_to_relative=False),
+            dashboard_title, panel_data_list, output_dir, filename
+        )
+    
+    def _poll_live(
+        self,
+        context: GrafanaDashboardContext,
+        panels: List[dict],
+        rows: dict,
+        processor: DataProcessor,
+        aggregator: 'LiveAggregator',
+        from_ms: int,
+        until_ms: int,
+        interval_ms: int,
+        templates: TemplateEngine
+    ) -> None:
+        """
+        Fetch panels for [from_ms, until_ms) and fold them into the running statistics
+        
+        The first poll starts at the interval boundary before the test start;
+        it is clamped to the start so data of an earlier run is not counted.
+        """
+        started = time.perf_counter()
+        from_ms = max(from_ms, _epoch_ms(context.time_from))
+        window = replace(context, time_from=_from_epoch_ms(from_ms), time_to=_from_epoch_ms(until_ms - 1))
+        
+        if self._influxdb_url:
+            from .clients.influxdb_client import InfluxDBClient
+            
+            data_client = InfluxDBClient(
+                window, url=self._influxdb_url, transport=self._transport, interval_ms=interval_ms,
+                tracer=self._tracer, templates=templates
+            )
+        else:
+            data_client = GrafanaClient(
+                window, dashboard_cache=self._dashboard_cache, transport=self._transport, interval_ms=interval_ms,
+                tracer=self._tracer, templates=templates
+            )
+        
+        panel_data_list = self._process_panels(data_client, panels, window, processor=processor, quiet=True)
+        for panel_data in panel_data_list:
+            panel_data.row = rows.get(panel_data.panel_id)
+        added = aggregator.ingest(panel_data_list, until_ms)
+        
+        print(
+            f"🔄 {window.time_from.strftime('%H:%M:%S')}-{window.time_to.strftime('%H:%M:%S')}: "
+            f"{added} points in {(time.perf_counter() - started) * 1000:.0f} ms ({aggregator.points} total)"
+        )
+    
+    def _write_interim_report(
+        self,
+        context: GrafanaDashboardContext,
+        dashboard_title: str,
+        aggregator: 'LiveAggregator',
+        cursor_ms: int,
+        path: Path,
+        polls: int
+    ) -> None:
+        """Rewrite the interim report from the running statistics, without AI summary"""
+        live_context = replace(context, time_to=_from_epoch_ms(cursor_ms - 1))
+        panel_data_list = aggregator.panel_data()
+        comparison = self._compare_with_baseline(live_context, panel_data_list)
         
-        print("\n📄 Building report...")
         report = self._report_builder.build_report(
             dashboard_title=dashboard_title,
-            context=context,
+            context=live_context,
             panel_data_list=panel_data_list,
-            ai_analysis=ai_analysis
+            ai_analysis=(
+                f"*Interim report: data up to {live_context.time_to.strftime('%Y-%m-%d %H:%M:%S')} "
+                f"after {polls} polls."
+                + (" The AI summary is written when the test ends.*" if self._use_ai else "*")
+            ),
+            comparison=comparison
         )
         
+        # Replace atomically so readers never see a partial report
+        partial = path.with_suffix('.md.tmp')
+        partial.write_text(report, encoding='utf-8')
+        os.replace(partial, path)
+        print(f"📝 Interim report: {path}")
+    
+    def _finish_report(
+        self,
+        context: GrafanaDashboardContext,
+        dashboard_title: str,
+        panel_data_list: List[PanelData],
+        output_dir: str,
+        filename: str,
+        echo_report: bool = True
+    ) -> str:
+        """
+        Compare, analyze, build, export and store a report of collected panels
+        
+        Returns:
+            Path to generated report file
+        """
+        comparison = self._compare_with_baseline(context, panel_data_list)
+        
+        ai_analysis = None
+        if self._use_ai:
+            print(f"\n🤖 Analyzing data with AI...")
+            ai_analysis = self._analyze_with_ai(panel_data_list, context, dashboard_title, comparison)
+        
+        print("\n📄 Building report...")
+        with self._tracer.span('render'):
+            report = self._report_builder.build_report(
+                dashboard_title=dashboard_title,
+                context=context,
+                panel_data_list=panel_data_list,
+                ai_analysis=ai_analysis,
+                comparison=comparison
+            )
+        
         print("💾 Exporting report...")
-        output_path = self._report_builder.export(
-            report=report,
-            output_dir=output_dir,
-            filename=f"performance_report_{context.dashboard_uid}_{context.time_from.strftime('%Y%m%d_%H%M%S')}"
-        )
+        with self._tracer.span('export', bytes=len(report.encode('utf-8'))):
+            output_path = self._report_builder.export(
+                report=report,
+                output_dir=output_dir,
+                filename=filename
+            )
+        self._store_run(context, dashboard_title, panel_data_list, output_path)
         
-        # Print report to stdout for CI/CD visibility
-        print("\n" + "=" * 80)
-        print("📄 GENERATED REPORT")
-        print("=" * 80)
-        print(report)
-        print("=" * 80)
+        if echo_report:
+            # Print report to stdout for CI/CD visibility
+            print("\n" + "=" * 80)
+            print("📄 GENERATED REPORT")
+            print("=" * 80)
+            print(report)
+            print("=" * 80)
         
         return output_path
     
+    def _generate_streamed_report(
+        self,
+        grafana_client: GrafanaClient,
+        dashboard: dict,
+        dashboard_title: str,
+        context: GrafanaDashboardContext,
+        output_dir: str,
+        filename: str,
+        echo_report: bool = True
+    ) -> str:
+        """
+        Generate the report writing every section as soon as it is ready
+        
+        The header is written before panels are fetched; the executive
+        summary is written fragment by fragment from a streamed completion
+        and, with echo_report, echoed to stdout for CI/CD visibility.
+        
+        Returns:
+            Path to generated report file
+        """
+        from .builders.report_writer import ReportWriter
+        
+        path = self._report_builder.report_path(output_dir, filename)
+        
+        with ReportWriter(self._report_builder, path) as writer:
+            writer.write_header(dashboard_title, context)
+            print(f"💾 Streaming report to {path}")
+            
+            panel_data_list = self._collect_panel_data(grafana_client, dashboard, context)
+            comparison = self._compare_with_baseline(context, panel_data_list)
+            
+            if self._use_ai:
+                print(f"\n🤖 Analyzing data with AI...")
+                user_prompt, system_prompt = self._build_prompt(panel_data_list, context, dashboard_title, comparison)
+            
+            if echo_report:
+                print("\n" + "=" * 80)
+                print("📄 GENERATED REPORT")
+                print("=" * 80, flush=True)
+                writer.echo_to(sys.stdout)
+            
+            if self._use_ai:
+                writer.write_summary(self._openai_client.analyze_stream(user_prompt, system_prompt))
+            with self._tracer.span('render', streamed=True):
+                if comparison is not None:
+                    writer.write_comparison(comparison)
+                writer.write_panels(panel_data_list)
+        
+        if echo_report:
+            print("\n" + "=" * 80)
+        
+        self._store_run(context, dashboard_title, panel_data_list, str(path))
+        
+        return str(path)
+    
+    def _report_filename(self, context: GrafanaDashboardContext) -> str:
+        """Report file name (without extension) of a dashboard run"""
+        return f"performance_report_{context.dashboard_uid}_{context.time_from.strftime('%Y%m%d_%H%M%S')}"
+    
+    def _collect_panel_data(
+        self,
+        grafana_client: GrafanaClient,
+        dashboard: dict,
+        context: GrafanaDashboardContext
+    ) -> List[PanelData]:
+        """Extract, fetch and process dashboard panels"""
+        print("\n🎛️  Processing panels...")
+        panels = grafana_client.extract_panels_from_dashboard(dashboard)
+        print(f"✓ Found {len(panels)} panels")
+        
+        if self._influxdb_url:
+            print(f"✓ Querying InfluxDB directly: {self._influxdb_url}")
+            from .clients.influxdb_client import InfluxDBClient
+            
+            data_client = InfluxDBClient(
+                context, url=self._influxdb_url, transport=grafana_client.transport, tracer=self._tracer,
+                templates=grafana_client.templates
+            )
+        else:
+            data_client = grafana_client
+        
+        with self._tracer.span('panels', panels=len(panels)):
+            panel_data_list = self._process_panels(data_client, panels, context)
+        
+        rows = grafana_client.get_panel_rows(dashboard)
+        for panel_data in panel_data_list:
+            panel_data.row = rows.get(panel_data.panel_id)
+        
+        if self._jtl_path:
+            panel_data_list += self._analyze_jtl(self._jtl_path)
+        
+        if self._query_cache is not None:
+            cache_stats = self._query_cache.stats()
+            print(f"✓ Query cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+        
+        transport_stats = grafana_client.transport.summary()
+        print(
+            f"✓ HTTP requests: {transport_stats['requests']}, "
+            f"{transport_stats['bytes'] / 1024:.0f} KiB received, "
+            f"p50 {transport_stats['p50_ms']:.0f} ms, p95 {transport_stats['p95_ms']:.0f} ms, "
+            f"{transport_stats['retries']} retries"
+        )
+        
+        return panel_data_list
+    
+    def _compare_with_baseline(
+        self,
+        context: GrafanaDashboardContext,
+        panel_data_list: List[PanelData]
+    ) -> Optional[BaselineComparison]:
+        """Compare panel metrics with the stored baseline run, if one is configured"""
+        if not self._baseline:
+            return None
+        
+        with self._tracer.span('baseline') as span:
+            baseline_run = self._resolve_baseline(context)
+            if baseline_run is None:
+                print("  ⚠️  Warning: No earlier run of this dashboard stored, skipping baseline comparison")
+                return None
+            
+            comparison = compare_runs(
+                panel_data_list,
+                baseline_run,
+                self._run_store.load_panels(baseline_run.run_id),
+                threshold=self._regression_threshold
+            )
+            span.set(run_id=baseline_run.run_id, regressions=len(comparison.regressions))
+        print(
+            f"✓ Baseline {baseline_run.describe()}: {len(comparison.regressions)} regressions, "
+            f"{len(comparison.improvements)} improvements in {len(comparison.changes)} compared statistics"
+        )
+        return comparison
+    
+    def _resolve_baseline(self, context: GrafanaDashboardContext) -> Optional['StoredRun']:
+        """
+        Find the baseline run from a "latest", run ID or dashboard URL spec
+        
+        Raises:
+            ValueError: If an explicitly requested run is not stored
+        """
+        if self._baseline == 'latest':
+            earlier = [
+                run for run in self._run_store.latest_runs(context.dashboard_uid, limit=50)
+                if run.time_from < context.time_from
+            ]
+            return earlier[0] if earlier else None
+        
+        if self._baseline.isdigit():
+            baseline_run = self._run_store.get_run(int(self._baseline))
+        else:
+            baseline_run = self._run_store.find_run(self._parse_url(self._baseline))
+        
+        if baseline_run is None:
+            raise ValueError(f"Baseline run not stored, generate its report first: {self._baseline}")
+        return baseline_run
+    
+    def _store_run(
+        self,
+        context: GrafanaDashboardContext,
+        dashboard_title: str,
+        panel_data_list: List[PanelData],
+        report_path: str
+    ) -> None:
+        """Keep the metrics of a run for later baseline comparisons"""
+        if self._run_store is None:
+            return
+        with self._tracer.span('store_run'):
+            run_id = self._run_store.save_run(context, dashboard_title, panel_data_list, report_path=report_path)
+        print(f"✓ Stored run #{run_id}")
+    
+    def _analyze_jtl(self, path: str) -> List[PanelData]:
+        """Summarize a JMeter result file per sampler label"""
+        print(f"\n📑 Analyzing JTL results: {path}")
+        started = time.perf_counter()
+        
+        from .processors.jtl_analyzer import JTLAnalyzer
+        
+        analyzer = JTLAnalyzer()
+        with self._tracer.span('jtl') as span:
+            label_stats = analyzer.analyze(path)
+            samples = sum(stats.sketch.count for stats in label_stats.values())
+            span.set(samples=samples, labels=len(label_stats))
+        self._tracer.count('points', samples, source='jtl')
+        
+        print(
+            f"✓ {samples} samples, {len(label_stats)} labels "
+            f"({(time.perf_counter() - started) * 1000:.0f} ms)"
+        )
+        return analyzer.to_panel_data(label_stats)
+    
     def _parse_url(self, dashboard_url: str) -> GrafanaDashboardContext:
         """Parse dashboard URL to extract context"""
-        return self._url_parser.parse(dashboard_url)
+        with self._tracer.span('parse_url'):
+            return self._url_parser.parse(dashboard_url)
     
     def _process_panels(
         self,
-        grafana_client: GrafanaClient,
+        data_client: Union[GrafanaClient, 'InfluxDBClient'],
         panels: List[dict],
-        context: GrafanaDashboardContext
+        context: GrafanaDashboardContext,
+        processor: Optional[DataProcessor] = None,
+        quiet: bool = False
     ) -> List[PanelData]:
-        """Process all panels and extract metrics"""
-        panel_data_list = []
+        """
+        Process all panels and extract metrics
+        
+        Panels (or query batches when batching is enabled) are fetched and
+        processed by up to ``self._workers`` threads. Results keep dashboard
+        panel order; a failing panel is reported and skipped without
+        affecting the others. With quiet, only failures are printed.
+        """
+        processor = processor or self._data_processor
+        total = len(panels)
+        results: List[Optional[PanelData]] = [None] * total
+        panel_queries = [self._panel_query(panel, context) for panel in panels]
         
-        for i, panel in enumerate(panels, 1):
-            panel_title = panel.get('title', 'Untitled')
-            print(f"  [{i}/{len(panels)}] {panel_title}")
+        if self._batch_size:
+            groups = data_client.build_query_batches(panel_queries, self._batch_size)
+            if not quiet:
+                print(f"✓ Packed into {len(groups)} batched requests")
+        else:
+            groups = [[index] for index in range(total)]
+        
+        process_group = self._tracer.bind(self._process_panel_group)
+        with ThreadPoolExecutor(max_workers=min(self._workers, max(len(groups), 1))) as executor:
+            futures = [
+                executor.submit(process_group, data_client, panels, panel_queries, group, context, processor)
+                for group in groups
+            ]
             
+            done = 0
+            for future in as_completed(futures):
+                for index, outcome in future.result():
+                    done += 1
+                    panel_title = panels[index].get('title', 'Untitled')
+                    
+                    if isinstance(outcome, Exception):
+                        print(f"  [{done}/{total}] {panel_title}")
+                        print(f"  ⚠️  Warning: Failed to process panel: {outcome}")
+                    else:
+                        results[index] = outcome
+                        if not quiet:
+                            print(f"  [{done}/{total}] {panel_title} ({outcome.latency_ms:.0f} ms)")
+        
+        return [panel_data for panel_data in results if panel_data is not None]
+    
+    def _panel_query(self, panel: dict, context: GrafanaDashboardContext) -> PanelQuery:
+        """Build the datasource query of a panel"""
+        return PanelQuery(
+            panel_id=panel['id'],
+            datasource_uid=context.variables.get(
+                'data_source', 
+                panel.get('datasource', {}).get('uid', '')
+            ),
+            queries=panel.get('targets', [])
+        )
+    
+    def _process_panel_group(
+        self,
+        data_client: Union[GrafanaClient, 'InfluxDBClient'],
+        panels: List[dict],
+        panel_queries: List[PanelQuery],
+        group: List[int],
+        context: GrafanaDashboardContext,
+        processor: DataProcessor
+    ) -> List[Tuple[int, Union[PanelData, Exception]]]:
+        """
+        Fetch and process a group of panels, recording per-panel latency
+        
+        Returns:
+            (panel index, processed data or the exception it failed with)
+            for every panel in the group
+        """
+        started = time.perf_counter()
+        
+        # Fetch panel data
+        try:
+            with self._tracer.span('fetch', panel_ids=[panel_queries[i].panel_id for i in group]):
+                if self._batch_size:
+                    raw_data_list = data_client.get_panel_data_batch(
+                        [panel_queries[i] for i in group],
+                        stream=self._stream_responses
+                    )
+                else:
+                    panel_query = panel_queries[group[0]]
+                    raw_data_list = [data_client.get_panel_data(
+                        panel_id=panel_query.panel_id,
+                        datasource_uid=panel_query.datasource_uid,
+                        queries=panel_query.queries,
+                        stream=self._stream_responses
+                    )]
+        except Exception as e:
+            self._tracer.count('panels', len(group), status='failed')
+            return [(index, e) for index in group]
+        
+        fetch_seconds = time.perf_counter() - started
+        outcomes: List[Tuple[int, Union[PanelData, Exception]]] = []
+        
+        for index, raw_data in zip(group, raw_data_list):
+            processing_started = time.perf_counter()
             try:
-                # Fetch panel data
-                raw_data = grafana_client.get_panel_data(
-                    panel_id=panel['id'],
-                    datasource_uid=context.variables.get(
-                        'data_source', 
-                        panel.get('datasource', {}).get('uid', '')
-                    ),
-                    queries=panel.get('targets', [])
-                )
-                
                 # Process and aggregate metrics
-                processed_data = self._data_processor.process_panel_data(
-                    panel_config=panel,
-                    raw_data=raw_data,
-                    context=context
-                )
-                
-                panel_data_list.append(processed_data)
-                
+                with self._tracer.span('process', panel_id=panels[index].get('id')) as span:
+                    processed_data = processor.process_panel_data(
+                        panel_config=panels[index],
+                        raw_data=raw_data,
+                        context=context
+                    )
+                    points = _point_count(processed_data)
+                    span.set(points=points, anomalies=len(processed_data.anomalies))
+                processed_data.latency_ms = (fetch_seconds + time.perf_counter() - processing_started) * 1000
+                outcomes.append((index, processed_data))
+                self._tracer.count('points', points, source='panels')
+                self._tracer.count('panels', status='ok')
             except Exception as e:
-                print(f"  ⚠️  Warning: Failed to process panel: {e}")
-                continue
+                outcomes.append((index, e))
+                self._tracer.count('panels', status='failed')
         
-        return panel_data_list
+        return outcomes
     
     def _analyze_with_ai(
         self,
         panel_data_list: List[PanelData],
         context: GrafanaDashboardContext,
-        dashboard_title: str
+        dashboard_title: str,
+        comparison: Optional[BaselineComparison] = None
     ) -> str:
         """Analyze panel data using AI"""
-        # Prepare data summary for AI
-        data_summary = self._prepare_data_summary(panel_data_list, context)
+        user_prompt, system_prompt = self._build_prompt(panel_data_list, context, dashboard_title, comparison)
         
-        # Create prompt for AI analysis
-        system_prompt = """You are a performance testing expert analyzing Grafana dashboard metrics.
-Provide a concise executive summary of the performance test results.
-Focus on key findings, trends, potential issues, and recommendations."""
+        started = time.perf_counter()
+        ai_analysis = self._openai_client.analyze(user_prompt, system_prompt)
+        print(f"✓ Summary completion: {(time.perf_counter() - started) * 1000:.0f} ms")
         
-        user_prompt = f"""Analyze the following performance test results:
-
-Dashboard: {dashboard_title}
-Time Range: {self._url_parser.get_time_range_description(context)}
-
-Metrics Summary:
-{data_summary}
-
-Please provide:
-1. Overall performance assessment
-2. Key findings and trends
-3. Any concerns or anomalies
-4. Recommendations for improvement
-"""
-        
-        return self._openai_client.analyze(user_prompt, system_prompt)
+        return ai_analysis
     
-    def _prepare_data_summary(
+    def _build_prompt(
         self,
         panel_data_list: List[PanelData],
-        context: GrafanaDashboardContext
-    ) -> str:
-        """Prepare data summary for AI analysis"""
-        summary_lines = []
+        context: GrafanaDashboardContext,
+        dashboard_title: str,
+        comparison: Optional[BaselineComparison] = None
+    ) -> Tuple[str, str]:
+        """
+        Build the prompt of the executive summary completion
         
-        for panel_data in panel_data_list:
-            summary_lines.append(f"\n{panel_data.panel_title} ({panel_data.panel_type}):")
-            
-            if panel_data.metrics:
-                for ref_id, metrics in panel_data.metrics.items():
-                    if isinstance(metrics, dict) and 'error' not in metrics:
-                        summary_lines.append(f"  - {ref_id}: Min={metrics.get('min')}, Max={metrics.get('max')}, Avg={metrics.get('avg', 0):.2f}")
-            else:
-                summary_lines.append("  - No metrics available")
+        In map-reduce mode, panel groups are analyzed first and the prompt
+        combines their findings. A baseline comparison is appended to the
+        user prompt, within the token budget of either prompt.
         
-        return "\n".join(summary_lines)
-
+        Returns:
+            (user prompt, system prompt)
+        """
+        time_range = self._url_parser.get_time_range_description(context)
+        comparison_section = comparison.prompt_section() if comparison is not None else ''
+        
+        if self._summary_builder is not None:
+            with self._tracer.span('map_analysis'):
+                findings = self._summary_builder.map(panel_data_list, dashboard_title, time_range)
+            with self._tracer.span('prompt_build') as span:
+                prompt = self._summary_builder.reduce_prompt(
+                    findings, dashboard_title, time_range, appendix=comparison_section
+                )
+                span.set(tokens=prompt.tokens, panels=prompt.panels_included)
+            print(f"✓ Reducing findings of {sum(1 for group in findings if group.findings)}/{len(findings)} groups")
+            self._summary_builder.wait_for_rate_limit()
+        else:
+            # Build prompt within the token budget
+            with self._tracer.span('prompt_build') as span:
+                prompt = self._prompt_builder.build(
+                    panel_data_list=panel_data_list,
+                    dashboard_title=dashboard_title,
+                    time_range=time_range,
+                    appendix=comparison_section
+                )
+                span.set(tokens=prompt.tokens, panels=prompt.panels_included)
+        
+        self._tracer.count('prompt_tokens_estimated', prompt.tokens)
+        print(
+            f"✓ Prompt: ~{prompt.tokens}/{prompt.token_budget} tokens "
+            f"({prompt.panels_included} panels, {prompt.panels_merged} merged, {prompt.panels_dropped} dropped)"
+        )
+        return prompt.user_prompt, prompt.system_prompt
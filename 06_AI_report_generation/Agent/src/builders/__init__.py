@@ -1,6 +1,25 @@
 """Report building components"""
 
+from importlib import import_module
+
 from .report_builder import ReportBuilder
+from .prompt_builder import PromptBuilder, BuiltPrompt, estimate_tokens
+
+# Streamed reports and map-reduce summaries are opt-in
+_LAZY_EXPORTS = {
+    'ReportWriter': '.report_writer',
+    'MapReduceSummaryBuilder': '.summary_builder',
+    'GroupFindings': '.summary_builder',
+}
+
+__all__ = [
+    'ReportBuilder', 'ReportWriter', 'MapReduceSummaryBuilder', 'GroupFindings',
+    'PromptBuilder', 'BuiltPrompt', 'estimate_tokens'
+]
 
-__all__ = ['ReportBuilder']
 
+def __getattr__(name):
+    """Import optional subsystems on first access"""
+    if name in _LAZY_EXPORTS:
+        return getattr(import_module(_LAZY_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,343 @@
+"""Token-budgeted prompt builder for AI analysis"""
+
+import re
+import math
+from dataclasses import dataclass
+from typing import Callable, List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from ..processors.data_processor import PanelData
+
+
+DEFAULT_TOKEN_BUDGET = 3000
+
+# Detected anomalies listed per panel in the full panel section
+PROMPT_ANOMALIES_PER_PANEL = 3
+
+# Importance added to panels with detected anomalies
+ANOMALY_IMPORTANCE = 0.5
+
+SYSTEM_PROMPT = """You are a performance testing expert analyzing Grafana dashboard metrics.
+Provide a concise executive summary of the performance test results.
+Focus on key findings, trends, potential issues, and recommendations."""
+
+USER_PROMPT_TEMPLATE = """Analyze the following performance test results:
+
+Dashboard: {dashboard_title}
+Time Range: {time_range}
+
+Metrics Summary (min/avg/p95/p99/max per series, "!" marks detected anomalies{omitted}):
+{data_summary}
+
+Please provide:
+1. Overall performance assessment
+2. Key findings and trends
+3. Any concerns or anomalies
+4. Recommendations for improvement
+"""
+
+# Panel title keywords, their metric kind and importance, highest first
+IMPORTANCE_KEYWORDS = [
+    (3.0, 'errors', ('error', 'fail', 'exception', '5xx', '4xx', 'ko')),
+    (2.0, 'latency', ('latency', 'response', 'duration', 'elapsed', 'p9', 'percentile')),
+    (1.5, 'throughput', ('throughput', 'rps', 'tps', 'hits', 'requests', 'transactions')),
+    (1.0, 'resources', ('thread', 'user', 'connect', 'bytes', 'cpu', 'memory')),
+]
+
+_TOKEN_PATTERN = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens of a text locally
+    
+    Approximates BPE tokenizers: words are split into ~4 character pieces,
+    digits into ~3 character pieces, every punctuation mark is one token.
+    
+    Args:
+        text: Prompt text
+        
+    Returns:
+        Estimated token count
+    """
+    tokens = 0
+    for piece in _TOKEN_PATTERN.findall(text):
+        if piece[0].isalpha():
+            tokens += math.ceil(len(piece) / 4)
+        elif piece[0].isdigit():
+            tokens += math.ceil(len(piece) / 3)
+        else:
+            tokens += 1
+    return tokens
+
+
+def _omitted_note(dropped: int) -> str:
+    """Note on panels left out of the prompt, empty when none are"""
+    return f"; {dropped} lower-priority panels omitted" if dropped else ''
+
+
+def fit_to_budget(
+    fixed_tokens: int,
+    detail_tokens: List[int],
+    merged_tokens: List[int],
+    token_budget: int,
+    omitted_note: Callable[[int], str] = _omitted_note
+) -> Tuple[List[int], int]:
+    """
+    Choose the detail level of each prompt section within a token budget
+    
+    Sections are merged, then dropped, from the last one on until the
+    prompt fits.
+    
+    Args:
+        fixed_tokens: Tokens of everything but the sections
+        detail_tokens: Tokens of each section in full, most important first
+        merged_tokens: Tokens of each section merged into one line
+        token_budget: Maximum estimated tokens of the prompt
+        omitted_note: Note on dropped sections by their number, counted
+            against the budget
+            
+    Returns:
+        (detail level per section: 2 = full, 1 = merged, 0 = dropped,
+        number of dropped sections)
+    """
+    levels = [2] * len(detail_tokens)
+    total = fixed_tokens + sum(detail_tokens)
+    dropped = 0
+    
+    for target_level in (1, 0):
+        for index in reversed(range(len(levels))):
+            # Dropping sections adds the note counting them
+            if total + estimate_tokens(omitted_note(dropped)) <= token_budget:
+                break
+            if target_level == 1:
+                total -= detail_tokens[index] - merged_tokens[index]
+            else:
+                total -= merged_tokens[index]
+                dropped += 1
+            levels[index] = target_level
+    
+    return levels, dropped
+
+
+def metric_kind(panel_data: PanelData) -> str:
+    """Metric kind of a panel by title keywords, "other" if none match"""
+    title = f"{panel_data.panel_title} {panel_data.panel_type}".lower()
+    return next(
+        (kind for _, kind, keywords in IMPORTANCE_KEYWORDS if any(k in title for k in keywords)),
+        'other'
+    )
+
+
+def compact_number(value: Optional[float]) -> str:
+    """Format a number with 3 significant digits and k/M/G suffixes"""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return '-'
+    magnitude = abs(value)
+    for threshold, suffix in ((1e9, 'G'), (1e6, 'M'), (1e3, 'k')):
+        if magnitude >= threshold:
+            return f"{value / threshold:.3g}{suffix}"
+    return f"{value:.3g}"
+
+
+@dataclass
+class BuiltPrompt:
+    """Prompt ready for the LLM with its size accounting"""
+    system_prompt: str
+    user_prompt: str
+    tokens: int
+    token_budget: int
+    panels_included: int
+    panels_merged: int
+    panels_dropped: int
+
+
+class PromptBuilder:
+    """
+    Build the analysis prompt within a token budget
+    
+    Over budget, the least important panels are merged into one line,
+    then dropped.
+    """
+    
+    def __init__(self, token_budget: int = DEFAULT_TOKEN_BUDGET):
+        """
+        Initialize builder
+        
+        Args:
+            token_budget: Maximum estimated tokens of system plus user prompt
+        """
+        self._token_budget = token_budget
+    
+    @property
+    def token_budget(self) -> int:
+        """Maximum estimated tokens of system plus user prompt"""
+        return self._token_budget
+    
+    def build(
+        self,
+        panel_data_list: List[PanelData],
+        dashboard_title: str,
+        time_range: str,
+        system_prompt: str = SYSTEM_PROMPT,
+        template: str = USER_PROMPT_TEMPLATE,
+        appendix: str = ''
+    ) -> BuiltPrompt:
+        """
+        Build system and user prompts
+        
+        Args:
+            panel_data_list: Processed panel data
+            dashboard_title: Dashboard title
+            time_range: Human-readable time range description
+            system_prompt: System prompt
+            template: User prompt template with the placeholders of
+                USER_PROMPT_TEMPLATE
+            appendix: Section appended to the user prompt, e.g. a baseline
+                comparison; always kept and counted against the budget
+                
+        Returns:
+            BuiltPrompt with token estimate and panel accounting
+        """
+        ranked = sorted(panel_data_list, key=self._importance, reverse=True)
+        details = [self._panel_detail(panel_data) for panel_data in ranked]
+        merged = [self._panel_merged(panel_data) for panel_data in ranked]
+        detail_tokens = [estimate_tokens(text) for text in details]
+        merged_tokens = [estimate_tokens(text) for text in merged]
+        
+        fixed_tokens = estimate_tokens(system_prompt) + estimate_tokens(
+            template.format(dashboard_title=dashboard_title, time_range=time_range, omitted='', data_summary='')
+        ) + estimate_tokens(appendix)
+        
+        # Detail level per panel in rank order: 2 = full, 1 = merged, 0 = dropped
+        levels, dropped = fit_to_budget(fixed_tokens, detail_tokens, merged_tokens, self._token_budget)
+        
+        sections = [
+            details[index] if level == 2 else merged[index]
+            for index, level in enumerate(levels) if level
+        ]
+        
+        user_prompt = template.format(
+            dashboard_title=dashboard_title,
+            time_range=time_range,
+            omitted=_omitted_note(dropped),
+            data_summary="\n".join(sections)
+        )
+        if appendix:
+            user_prompt += "\n" + appendix
+        
+        return BuiltPrompt(
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            tokens=estimate_tokens(system_prompt) + estimate_tokens(user_prompt),
+            token_budget=self._token_budget,
+            panels_included=levels.count(2) + levels.count(1),
+            panels_merged=levels.count(1),
+            panels_dropped=dropped
+        )
+    
+    def _importance(self, panel_data: PanelData) -> float:
+        """Rank a panel by title keywords, anomalies and series variability"""
+        title = f"{panel_data.panel_title} {panel_data.panel_type}".lower()
+        score = next(
+            (weight for weight, _, keywords in IMPORTANCE_KEYWORDS if any(k in title for k in keywords)),
+            0.0
+        )
+        if panel_data.anomalies:
+            score += ANOMALY_IMPORTANCE
+        
+        series_metrics = self._series_metrics(panel_data)
+        if not series_metrics:
+            return score - 1.0
+        
+        # Variable series carry more signal than flat ones
+        variability = max(
+            (m.get('stddev') or 0.0) / abs(m['avg']) if m.get('avg') else 0.0
+            for m in series_metrics.values()
+        )
+        return score + min(variability, 1.0)
+    
+    def _panel_detail(self, panel_data: PanelData) -> str:
+        """Full panel section: one line per varying series"""
+        lines = [f"{panel_data.panel_title} ({panel_data.panel_type}):"]
+        series_metrics = self._series_metrics(panel_data)
+        
+        if not series_metrics:
+            lines.append("  - No metrics available")
+            return "\n".join(lines)
+        
+        constant = []
+        for ref_id, metrics in series_metrics.items():
+            if not metrics.get('stddev'):
+                constant.append(f"{ref_id}={compact_number(metrics.get('avg'))}")
+                continue
+            line = (
+                f"  - {ref_id}: {compact_number(metrics.get('min'))}/{compact_number(metrics.get('avg'))}/"
+                f"{compact_number(metrics.get('p95'))}/{compact_number(metrics.get('p99'))}/"
+                f"{compact_number(metrics.get('max'))}"
+            )
+            trend = self._trend(panel_data, ref_id)
+            if trend:
+                line += f", trend {trend}"
+            if metrics.get('hosts'):
+                worst_host, worst = max(metrics['hosts'].items(), key=lambda item: item[1].get('p95') or 0)
+                line += f", {len(metrics['hosts'])} hosts, worst p95 {compact_number(worst.get('p95'))} on {worst_host}"
+            if 'throughput' in metrics:
+                line += f", {compact_number(metrics['throughput'])} req/s, errors {metrics['error_rate'] * 100:.2g}%"
+            lines.append(line)
+        
+        if constant:
+            lines.append(f"  - constant: {', '.join(constant)}")
+        
+        strongest = sorted(panel_data.anomalies, key=lambda anomaly: anomaly.score, reverse=True)
+        for anomaly in strongest[:PROMPT_ANOMALIES_PER_PANEL]:
+            lines.append(f"  ! {anomaly.describe()}")
+        if len(strongest) > PROMPT_ANOMALIES_PER_PANEL:
+            lines.append(f"  ! {len(strongest) - PROMPT_ANOMALIES_PER_PANEL} more anomalies")
+        
+        return "\n".join(lines)
+    
+    def _panel_merged(self, panel_data: PanelData) -> str:
+        """Merged panel section: a single line over all series"""
+        series_metrics = self._series_metrics(panel_data)
+        if not series_metrics:
+            return f"{panel_data.panel_title}: no metrics"
+        
+        values = list(series_metrics.values())
+        line = (
+            f"{panel_data.panel_title}: {len(values)} series, "
+            f"avg {compact_number(min(m['avg'] for m in values))}-{compact_number(max(m['avg'] for m in values))}, "
+            f"max {compact_number(max(m['max'] for m in values))}"
+        )
+        if panel_data.anomalies:
+            line += f", {len(panel_data.anomalies)} anomalies"
+        return line
+    
+    @staticmethod
+    def _series_metrics(panel_data: PanelData) -> Dict[str, Dict[str, Any]]:
+        """Metrics entries that hold series statistics"""
+        return {
+            ref_id: metrics
+            for ref_id, metrics in (panel_data.metrics or {}).items()
+            if isinstance(metrics, dict) and 'error' not in metrics and 'avg' in metrics
+        }
+    
+    @staticmethod
+    def _trend(panel_data: PanelData, ref_id: str) -> Optional[str]:
+        """Relative change between the first and last quarter of a series"""
+        columns = panel_data.series.get(ref_id)
+        if not columns or len(columns[-1]) < 8:
+            return None
+        
+        values = columns[-1].values
+        quarter = len(values) // 4
+        head = np.nanmean(values[:quarter]) if np.any(~np.isnan(values[:quarter])) else np.nan
+        tail = np.nanmean(values[-quarter:]) if np.any(~np.isnan(values[-quarter:])) else np.nan
+        if np.isnan(head) or np.isnan(tail) or head == 0:
+            return None
+        
+        change = (tail - head) / abs(head) * 100
+        if abs(change) < 10:
+            return 'flat'
+        return f"{change:+.0f}%"
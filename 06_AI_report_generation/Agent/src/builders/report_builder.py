@@ -2,10 +2,13 @@
 
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, TYPE_CHECKING
 from ..parsers.url_parser import GrafanaDashboardContext
 from ..processors.data_processor import PanelData
 
+if TYPE_CHECKING:
+    from ..storage.baseline import BaselineComparison, MetricChange
+
 
 class ReportBuilder:
     """Build performance test reports"""
@@ -15,7 +18,8 @@ class ReportBuilder:
         dashboard_title: str,
         context: GrafanaDashboardContext,
         panel_data_list: List[PanelData],
-        ai_analysis: str
+        ai_analysis: Optional[str],
+        comparison: Optional['BaselineComparison'] = None
     ) -> str:
         """
         Build comprehensive report
@@ -24,26 +28,71 @@ class ReportBuilder:
             dashboard_title: Dashboard title
             context: Dashboard context
             panel_data_list: List of processed panel data
-            ai_analysis: AI analysis summary
+            ai_analysis: AI analysis summary, None for a metrics-only report
+            comparison: Optional comparison against a baseline run
             
         Returns:
             Report content as markdown
         """
-        report = []
+        report = self.render_header(dashboard_title, context)
+        if ai_analysis is not None:
+            report += self.render_summary_heading()
+            report += [ai_analysis, ""]
+        if comparison is not None:
+            report += self.render_comparison(comparison)
+        report += self.render_panels(panel_data_list)
+        report += self.render_footer()
         
-        # Header
-        report.append(f"# Performance Test Report: {dashboard_title}")
-        report.append("")
-        report.append(f"**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        report.append(f"**Test Duration:** {self._format_duration(context)}")
-        report.append(f"**Dashboard URL:** {context.raw_url}")
-        report.append("")
+        return "\n".join(report)
+    
+    def render_header(self, dashboard_title: str, context: GrafanaDashboardContext) -> List[str]:
+        """Report title and test details"""
+        return [
+            f"# Performance Test Report: {dashboard_title}",
+            "",
+            f"**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+            f"**Test Duration:** {self._format_duration(context)}",
+            f"**Dashboard URL:** {context.raw_url}",
+            "",
+        ]
+    
+    def render_summary_heading(self) -> List[str]:
+        """Executive summary heading, followed by the AI analysis"""
+        return ["## 📊 Executive Summary", ""]
+    
+    def render_comparison(self, comparison: 'BaselineComparison') -> List[str]:
+        """Baseline comparison section: regressions and improvements"""
+        baseline = comparison.baseline
+        regressions = comparison.regressions
+        report = [
+            "## 🔁 Baseline Comparison",
+            "",
+            f"**Baseline:** {baseline.describe()}" + (f" ({baseline.report_path})" if baseline.report_path else ""),
+            f"**Regressions:** {len(regressions)} of {len(comparison.changes)} compared statistics "
+            f"beyond {comparison.threshold * 100:.0f}%",
+            "",
+        ]
         
-        # Executive Summary
-        report.append("## 📊 Executive Summary")
-        report.append("")
-        report.append(ai_analysis)
-        report.append("")
+        for title, changes in (('Regressions', regressions), ('Improvements', comparison.improvements)):
+            if not changes:
+                continue
+            report.append(f"### {title}")
+            report.append("")
+            report.append("| Panel | Series | Metric | Baseline | Current | Change |")
+            report.append("|---|---|---|---|---|---|")
+            for change in changes:
+                report.append(self._comparison_row(change))
+            report.append("")
+        
+        if not regressions:
+            report.append(f"*No regressions beyond {comparison.threshold * 100:.0f}%*")
+            report.append("")
+        
+        return report
+    
+    def render_panels(self, panel_data_list: List[PanelData]) -> List[str]:
+        """Panel metrics section"""
+        report = []
         
         # Panel Details
         report.append("## 📈 Panel Metrics")
@@ -65,17 +114,67 @@ class ReportBuilder:
                         report.append(f"  - Max: {metrics.get('max', 'N/A')}")
                         report.append(f"  - Avg: {metrics.get('avg', 'N/A'):.2f}" if isinstance(metrics.get('avg'), (int, float)) else f"  - Avg: N/A")
                         report.append(f"  - Latest: {metrics.get('latest', 'N/A')}")
+                        for key, label in (('p90', 'P90'), ('p95', 'P95'), ('p99', 'P99'), ('stddev', 'StdDev')):
+                            if isinstance(metrics.get(key), (int, float)):
+                                report.append(f"  - {label}: {metrics[key]:.2f}")
+                        if 'throughput' in metrics:
+                            report.append(f"  - Throughput: {metrics['throughput']:.2f} req/s")
+                            report.append(f"  - Error Rate: {metrics['error_rate'] * 100:.2f}% ({metrics['errors']} errors)")
+                        if metrics.get('hosts'):
+                            report.append(f"  - Per Host ({len(metrics['hosts'])}):")
+                            for host, host_metrics in metrics['hosts'].items():
+                                report.append(
+                                    f"    - {host}: avg {host_metrics.get('avg', 0):.2f}, "
+                                    f"p95 {host_metrics.get('p95') or 0:.2f}, p99 {host_metrics.get('p99') or 0:.2f}, "
+                                    f"max {host_metrics.get('max', 0):.2f}"
+                                )
+                        if metrics.get('response_codes'):
+                            codes = ", ".join(f"{code}: {count}" for code, count in metrics['response_codes'].items())
+                            report.append(f"  - Response Codes: {codes}")
+                    elif isinstance(metrics, dict):
+                        report.append(f"- **{ref_id}:** ⚠️ Query failed: {metrics['error']}")
                 report.append("")
             else:
                 report.append("*No metrics available*")
                 report.append("")
+            
+            if panel_data.anomalies:
+                report.append("**Anomalies:**")
+                report.append("")
+                for anomaly in panel_data.anomalies:
+                    report.append(f"- {anomaly.describe()}")
+                report.append("")
         
-        # Footer
-        report.append("---")
-        report.append("")
-        report.append("*Report generated by Performance Report Agent*")
+        return report
+    
+    def render_footer(self) -> List[str]:
+        """Report footer"""
+        return [
+            "---",
+            "",
+            "*Report generated by Performance Report Agent*",
+        ]
+    
+    def report_path(self, output_dir: str = './reports', filename: str = None) -> Path:
+        """
+        Resolve the report file path, creating the output directory
         
-        return "\n".join(report)
+        Args:
+            output_dir: Output directory
+            filename: Optional filename (without extension)
+            
+        Returns:
+            Path of the markdown report file
+        """
+        # Create output directory
+        output_path = Path(output_dir)
+        output_path.mkdir(parents=True, exist_ok=True)
+        
+        # Generate filename
+        if not filename:
+            filename = f"performance_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        
+        return output_path / f"{filename}.md"
     
     def export(
         self,
@@ -94,20 +193,21 @@ class ReportBuilder:
         Returns:
             Path to exported file
         """
-        # Create output directory
-        output_path = Path(output_dir)
-        output_path.mkdir(parents=True, exist_ok=True)
-        
-        # Generate filename
-        if not filename:
-            filename = f"performance_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        
         # Save as markdown
-        file_path = output_path / f"{filename}.md"
+        file_path = self.report_path(output_dir, filename)
         file_path.write_text(report, encoding='utf-8')
         
         return str(file_path)
     
+    @staticmethod
+    def _comparison_row(change: 'MetricChange') -> str:
+        """Table row of a baseline comparison"""
+        relative = f"{change.change * 100:+.1f}%" if change.change is not None else "new"
+        return (
+            f"| {change.panel_title} | {change.ref_id} | {change.metric} | "
+            f"{change.baseline:.2f} | {change.current:.2f} | {relative} |"
+        )
+    
     def _format_duration(self, context: GrafanaDashboardContext) -> str:
         """Format time duration"""
         duration = context.time_to - context.time_from
@@ -0,0 +1,114 @@
+"""Incremental report writer"""
+
+from pathlib import Path
+from typing import Iterable, List, Optional, TextIO, TYPE_CHECKING
+
+from .report_builder import ReportBuilder
+from ..parsers.url_parser import GrafanaDashboardContext
+from ..processors.data_processor import PanelData
+
+if TYPE_CHECKING:
+    from ..storage.baseline import BaselineComparison
+
+
+class ReportWriter:
+    """
+    Write a report section by section as the data becomes available
+    
+    Every write is flushed to the report file at once, so the file (and the
+    optional echo stream, e.g. the CI console) shows progress while the
+    report is still being produced. Output is identical to ReportBuilder.
+    """
+    
+    def __init__(self, report_builder: ReportBuilder, path: Path, echo: Optional[TextIO] = None):
+        """
+        Initialize writer
+        
+        Args:
+            report_builder: Builder rendering the report sections
+            path: Report file path (truncated)
+            echo: Optional stream receiving a copy of everything written
+        """
+        self._report_builder = report_builder
+        self.path = path
+        self._file = open(path, 'w', encoding='utf-8')
+        self._echo = echo
+        self._unechoed: List[str] = []
+    
+    def __enter__(self) -> 'ReportWriter':
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        # A failed report is left without footer
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+    
+    def echo_to(self, echo: TextIO) -> None:
+        """Start echoing, replaying what was written so far"""
+        self._echo = echo
+        self._emit_echo("".join(self._unechoed))
+        self._unechoed.clear()
+    
+    def write_header(self, dashboard_title: str, context: GrafanaDashboardContext) -> None:
+        """Write report title and test details"""
+        self._write_lines(self._report_builder.render_header(dashboard_title, context))
+    
+    def write_summary(self, chunks: Iterable[str]) -> str:
+        """
+        Write the executive summary fragment by fragment
+        
+        Args:
+            chunks: AI analysis text fragments, e.g. a streamed completion
+            
+        Returns:
+            Complete AI analysis text
+        """
+        self._write_lines(self._report_builder.render_summary_heading())
+        
+        fragments = []
+        for chunk in chunks:
+            fragments.append(chunk)
+            self._write(chunk)
+        
+        self._write_lines([""], leading_newline=True)
+        return "".join(fragments)
+    
+    def write_comparison(self, comparison: 'BaselineComparison') -> None:
+        """Write the baseline comparison section"""
+        self._write_lines(self._report_builder.render_comparison(comparison))
+    
+    def write_panels(self, panel_data_list: List[PanelData]) -> None:
+        """Write the panel metrics section"""
+        self._write_lines(self._report_builder.render_panels(panel_data_list))
+    
+    def close(self) -> None:
+        """Write the footer and close the report file"""
+        if self._file.closed:
+            return
+        self._write_lines(self._report_builder.render_footer(), trailing_newline=False)
+        self._file.close()
+    
+    def _write_lines(self, lines: List[str], leading_newline: bool = False, trailing_newline: bool = True) -> None:
+        """Write lines joined like ReportBuilder.build_report joins them"""
+        text = "\n".join(lines)
+        if leading_newline:
+            text = "\n" + text
+        if trailing_newline:
+            text += "\n"
+        self._write(text)
+    
+    def _write(self, text: str) -> None:
+        """Write and flush text to the file and the echo stream"""
+        self._file.write(text)
+        self._file.flush()
+        if self._echo is not None:
+            self._emit_echo(text)
+        else:
+            self._unechoed.append(text)
+    
+    def _emit_echo(self, text: str) -> None:
+        """Write and flush text to the echo stream"""
+        self._echo.write(text)
+        self._echo.flush()
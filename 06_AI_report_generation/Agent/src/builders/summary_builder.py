@@ -0,0 +1,269 @@
+"""Map-reduce executive summary over panel groups"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from .prompt_builder import BuiltPrompt, PromptBuilder, SYSTEM_PROMPT, estimate_tokens, fit_to_budget, metric_kind
+from ..clients.openai_client import OpenAIClient
+from ..clients.rate_limiter import RateLimiter
+from ..processors.data_processor import PanelData
+from ..telemetry.tracer import Tracer
+
+
+DEFAULT_GROUP_SIZE = 6
+
+MAP_SYSTEM_PROMPT = """You are a performance testing expert analyzing one group of Grafana dashboard panels.
+Report only findings supported by the numbers: anomalies, bottlenecks, trends and error patterns."""
+
+MAP_PROMPT_TEMPLATE = """Analyze the following panels of a performance test:
+
+Dashboard: {dashboard_title}
+Time Range: {time_range}
+
+Metrics Summary (min/avg/p95/p99/max per series{omitted}):
+{data_summary}
+
+Reply with at most 5 short bullet points of findings, citing panel names and values.
+"""
+
+REDUCE_PROMPT_TEMPLATE = """Combine the findings below, each from the analysis of one group of dashboard panels, into a summary of the performance test results:
+
+Dashboard: {dashboard_title}
+Time Range: {time_range}
+
+Findings per panel group{omitted}:
+{findings}
+
+Please provide:
+1. Overall performance assessment
+2. Key findings and trends
+3. Any concerns or anomalies
+4. Recommendations for improvement
+"""
+
+
+def _omitted_groups_note(dropped: int) -> str:
+    """Note on group findings left out of the prompt, empty when none are"""
+    return f"; findings of {dropped} groups omitted" if dropped else ''
+
+
+@dataclass
+class GroupFindings:
+    """Result of analyzing one panel group"""
+    name: str
+    panel_count: int
+    findings: Optional[str]
+    latency_ms: float
+    error: Optional[str] = None
+
+
+class MapReduceSummaryBuilder:
+    """
+    Build the executive summary with one LLM call per panel group
+    
+    Panels are grouped by dashboard row, or by metric kind when they are
+    not in a row, and groups larger than ``group_size`` are split. Groups
+    are analyzed concurrently (map) and their findings are combined by a
+    final call (reduce), so analysis time grows with the number of groups
+    per worker rather than with the number of panels.
+    """
+    
+    def __init__(
+        self,
+        openai_client: OpenAIClient,
+        prompt_builder: PromptBuilder,
+        concurrency: int = 4,
+        rate_limiter: Optional[RateLimiter] = None,
+        group_size: int = DEFAULT_GROUP_SIZE,
+        tracer: Optional[Tracer] = None
+    ):
+        """
+        Initialize builder
+        
+        Args:
+            openai_client: Client running the completions
+            prompt_builder: Builder of the token-budgeted group prompts
+            concurrency: Maximum group analyses in flight
+            rate_limiter: Optional limiter every LLM call waits on
+            group_size: Maximum panels analyzed in one call
+            tracer: Tracer the group analyses are recorded under
+        """
+        self._openai_client = openai_client
+        self._prompt_builder = prompt_builder
+        self._concurrency = max(1, concurrency)
+        self._rate_limiter = rate_limiter
+        self._group_size = max(1, group_size)
+        self._tracer = tracer or Tracer()
+    
+    def group_panels(self, panel_data_list: List[PanelData]) -> List[Tuple[str, List[PanelData]]]:
+        """
+        Group panels for analysis, keeping dashboard order within groups
+        
+        Returns:
+            (group name, panels) pairs
+        """
+        groups: Dict[str, List[PanelData]] = {}
+        for panel_data in panel_data_list:
+            groups.setdefault(panel_data.row or metric_kind(panel_data), []).append(panel_data)
+        
+        result = []
+        for name, panels in groups.items():
+            chunks = [panels[i:i + self._group_size] for i in range(0, len(panels), self._group_size)]
+            for number, chunk in enumerate(chunks, start=1):
+                result.append((f"{name} ({number}/{len(chunks)})" if len(chunks) > 1 else name, chunk))
+        
+        return result
+    
+    def map(
+        self,
+        panel_data_list: List[PanelData],
+        dashboard_title: str,
+        time_range: str
+    ) -> List[GroupFindings]:
+        """
+        Analyze every panel group concurrently
+        
+        A failing group is reported and left out of the summary without
+        affecting the others.
+        
+        Args:
+            panel_data_list: Processed panel data
+            dashboard_title: Dashboard title
+            time_range: Human-readable time range description
+            
+        Returns:
+            Findings per group in group order
+        """
+        groups = self.group_panels(panel_data_list)
+        results: List[Optional[GroupFindings]] = [None] * len(groups)
+        
+        analyze_group = self._tracer.bind(self._analyze_group)
+        with ThreadPoolExecutor(max_workers=min(self._concurrency, max(len(groups), 1))) as executor:
+            futures = {
+                executor.submit(analyze_group, name, panels, dashboard_title, time_range): index
+                for index, (name, panels) in enumerate(groups)
+            }
+            
+            for done, future in enumerate(as_completed(futures), start=1):
+                group = future.result()
+                results[futures[future]] = group
+                
+                if group.error:
+                    print(f"  [{done}/{len(groups)}] {group.name}")
+                    print(f"  ⚠️  Warning: Failed to analyze group: {group.error}")
+                else:
+                    print(f"  [{done}/{len(groups)}] {group.name}: {group.panel_count} panels ({group.latency_ms:.0f} ms)")
+        
+        return results
+    
+    def reduce_prompt(
+        self,
+        findings: List[GroupFindings],
+        dashboard_title: str,
+        time_range: str,
+        appendix: str = ''
+    ) -> BuiltPrompt:
+        """
+        Build the prompt combining group findings into one summary
+        
+        Over the token budget of the prompt builder, the findings of the
+        last groups are cut to their first line, then dropped.
+        
+        Args:
+            findings: Findings per group in group order
+            dashboard_title: Dashboard title
+            time_range: Human-readable time range description
+            appendix: Section appended to the user prompt, e.g. a baseline
+                comparison; always kept and counted against the budget
+                
+        Returns:
+            BuiltPrompt; its panel counts are those of the groups whose
+            findings are kept, cut and dropped
+        """
+        analyzed = [group for group in findings if group.findings]
+        if not analyzed:
+            raise RuntimeError("AI analysis failed for every panel group")
+        
+        details = [f"{group.name} ({group.panel_count} panels):\n{group.findings.strip()}" for group in analyzed]
+        merged = [
+            f"{group.name} ({group.panel_count} panels):\n{group.findings.strip().splitlines()[0]}"
+            for group in analyzed
+        ]
+        fixed_tokens = estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(
+            REDUCE_PROMPT_TEMPLATE.format(
+                dashboard_title=dashboard_title, time_range=time_range, omitted='', findings=''
+            )
+        ) + estimate_tokens(appendix)
+        
+        levels, dropped = fit_to_budget(
+            fixed_tokens,
+            [estimate_tokens(text) for text in details],
+            [estimate_tokens(text) for text in merged],
+            self._prompt_builder.token_budget,
+            omitted_note=_omitted_groups_note
+        )
+        sections = [
+            details[index] if level == 2 else merged[index]
+            for index, level in enumerate(levels) if level
+        ]
+        
+        user_prompt = REDUCE_PROMPT_TEMPLATE.format(
+            dashboard_title=dashboard_title,
+            time_range=time_range,
+            omitted=_omitted_groups_note(dropped),
+            findings="\n\n".join(sections)
+        )
+        if appendix:
+            user_prompt += "\n" + appendix
+        
+        def panels_at(*kept_levels: int) -> int:
+            return sum(group.panel_count for group, level in zip(analyzed, levels) if level in kept_levels)
+        
+        return BuiltPrompt(
+            system_prompt=SYSTEM_PROMPT,
+            user_prompt=user_prompt,
+            tokens=estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(user_prompt),
+            token_budget=self._prompt_builder.token_budget,
+            panels_included=panels_at(2, 1),
+            panels_merged=panels_at(1),
+            panels_dropped=panels_at(0)
+        )
+    
+    def wait_for_rate_limit(self) -> None:
+        """Block until the rate limiter allows another LLM call"""
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire()
+    
+    def _analyze_group(
+        self,
+        name: str,
+        panels: List[PanelData],
+        dashboard_title: str,
+        time_range: str
+    ) -> GroupFindings:
+        """Analyze one panel group, recording call latency"""
+        prompt = self._prompt_builder.build(
+            panel_data_list=panels,
+            dashboard_title=f"{dashboard_title} / {name}",
+            time_range=time_range,
+            system_prompt=MAP_SYSTEM_PROMPT,
+            template=MAP_PROMPT_TEMPLATE
+        )
+        
+        self.wait_for_rate_limit()
+        started = time.perf_counter()
+        try:
+            findings = self._openai_client.analyze(prompt.user_prompt, prompt.system_prompt)
+            error = None
+        except Exception as e:
+            findings, error = None, str(e)
+        
+        return GroupFindings(
+            name=name,
+            panel_count=len(panels),
+            findings=findings,
+            latency_ms=(time.perf_counter() - started) * 1000,
+            error=error
+        )
@@ -1,7 +1,28 @@
 """API client components"""
 
-from .grafana_client import GrafanaClient
+from importlib import import_module
+
+from .grafana_client import GrafanaClient, PanelQuery
 from .openai_client import OpenAIClient
+from .llm_backends import LLMBackend, OpenAIBackend, LocalBackend
+from .disk_cache import DiskCache
+from .transport import Transport, TransportConfig
+
+# Direct InfluxDB queries and map-reduce rate limiting are opt-in
+_LAZY_EXPORTS = {
+    'InfluxDBClient': '.influxdb_client',
+    'RateLimiter': '.rate_limiter',
+}
+
+__all__ = [
+    'GrafanaClient', 'PanelQuery', 'InfluxDBClient', 'OpenAIClient',
+    'LLMBackend', 'OpenAIBackend', 'LocalBackend', 'DiskCache', 'RateLimiter',
+    'Transport', 'TransportConfig'
+]
 
-__all__ = ['GrafanaClient', 'OpenAIClient']
 
+def __getattr__(name):
+    """Import optional subsystems on first access"""
+    if name in _LAZY_EXPORTS:
+        return getattr(import_module(_LAZY_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
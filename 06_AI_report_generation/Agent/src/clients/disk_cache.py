@@ -0,0 +1,217 @@
+"""On-disk result cache"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, Optional
+
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+class DiskCache:
+    """
+    Size-bounded key/value cache stored as one file per entry
+    
+    Entry files keep their write time as mtime and their last use as atime,
+    which is set explicitly on every hit so LRU eviction does not depend on
+    filesystem atime settings. Namespaces are caches in subdirectories that
+    share the size limit of the cache they were created from.
+    """
+    
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Initialize cache
+        
+        Args:
+            directory: Directory holding cache entries (created if missing)
+            max_bytes: Total size above which least recently used entries
+                are evicted
+        """
+        self._directory = Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._max_bytes = max_bytes
+        self._root = self._directory
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """
+        Build a cache key from JSON-serializable parts
+        
+        Returns:
+            SHA-256 hex digest of the canonical JSON of parts
+        """
+        canonical = json.dumps(parts, sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+    
+    def namespace(self, name: str) -> 'DiskCache':
+        """
+        Cache in a subdirectory, evicted together with this cache
+        
+        Args:
+            name: Subdirectory name
+            
+        Returns:
+            DiskCache whose entries count against this cache's max_bytes
+        """
+        cache = DiskCache(str(self._directory / name), self._max_bytes)
+        cache._root = self._root
+        cache._lock = self._lock
+        return cache
+    
+    def get(
+        self,
+        key: str,
+        max_age: Optional[float] = None,
+        stable_since: Optional[float] = None
+    ) -> Optional[bytes]:
+        """
+        Read an entry
+        
+        Args:
+            key: Cache key
+            max_age: Seconds after which the entry expires
+            stable_since: Epoch seconds; entries written at or after this
+                time never expire, max_age only applies to older ones
+                
+        Returns:
+            Entry content, or None on miss
+        """
+        with self._open_entry(key, max_age, stable_since) as entry:
+            return entry.read() if entry else None
+    
+    @contextmanager
+    def open(
+        self,
+        key: str,
+        max_age: Optional[float] = None,
+        stable_since: Optional[float] = None
+    ) -> Iterator[Optional[BinaryIO]]:
+        """
+        Open an entry for streaming reads (see get for arguments)
+        
+        Yields:
+            Binary file object, or None on miss
+        """
+        with self._open_entry(key, max_age, stable_since) as entry:
+            yield entry
+    
+    def put(self, key: str, data: bytes) -> None:
+        """
+        Write an entry
+        
+        Args:
+            key: Cache key
+            data: Entry content
+        """
+        with self.writer(key) as file:
+            file.write(data)
+    
+    @contextmanager
+    def writer(self, key: str) -> Iterator[BinaryIO]:
+        """
+        Write an entry incrementally
+        
+        The entry only becomes visible once the block completes; it is
+        discarded if the block raises or writes nothing.
+        
+        Yields:
+            Binary file object to write entry content to
+        """
+        path = self._path(key)
+        temp_path = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        
+        try:
+            with open(temp_path, 'wb') as file:
+                yield file
+                written = file.tell()
+            if written:
+                os.replace(temp_path, path)
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+        
+        self._evict()
+    
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current size"""
+        entries = list(self._directory.glob('*.cache'))
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(entries),
+            'bytes': sum(self._safe_size(entry) for entry in entries)
+        }
+    
+    @contextmanager
+    def _open_entry(
+        self,
+        key: str,
+        max_age: Optional[float],
+        stable_since: Optional[float]
+    ) -> Iterator[Optional[BinaryIO]]:
+        """Open an entry if present and not expired, counting hits and misses"""
+        path = self._path(key)
+        now = time.time()
+        
+        try:
+            written_at = path.stat().st_mtime
+            expired = (
+                max_age is not None
+                and (stable_since is None or written_at < stable_since)
+                and now - written_at > max_age
+            )
+            if expired:
+                path.unlink()
+                raise FileNotFoundError(path)
+            
+            file = open(path, 'rb')
+            os.utime(path, (now, written_at))
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            yield None
+            return
+        
+        with self._lock:
+            self.hits += 1
+        
+        with file:
+            yield file
+    
+    def _evict(self) -> None:
+        """Remove least recently used entries of all namespaces until they fit max_bytes"""
+        with self._lock:
+            entries = []
+            for path in self._root.rglob('*.cache'):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_atime, stat.st_size, path))
+            
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self._max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+    
+    def _path(self, key: str) -> Path:
+        """Entry file path for a key"""
+        return self._directory / f"{key}.cache"
+    
+    @staticmethod
+    def _safe_size(path: Path) -> int:
+        """File size, 0 if the file was removed meanwhile"""
+        try:
+            return path.stat().st_size
+        except FileNotFoundError:
+            return 0
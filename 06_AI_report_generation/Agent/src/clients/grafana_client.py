@@ -1,28 +1,123 @@
 """Grafana API client"""
 
+import io
 import os
 import json
+import math
 import requests
-from typing import Dict, List, Any
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Any, BinaryIO, Optional, Tuple, Union
 from ..parsers.url_parser import GrafanaDashboardContext
+from ..parsers.frame_parser import StreamingFrameParser, StreamedQueryResult
+from ..parsers.template_engine import TemplateEngine
+from .disk_cache import DiskCache
+from .transport import Transport
+from ..telemetry.tracer import Tracer
+
+
+DEFAULT_BATCH_SIZE = 20
+
+# Ranges ending less than this many seconds before a result was cached may
+# still have been receiving data; such results expire after the cache TTL
+RANGE_SETTLE_SECONDS = 60
+DEFAULT_RECENT_RANGE_TTL = 60
+
+DEFAULT_WINDOW_MAX_DATA_POINTS = 1000
+DEFAULT_WINDOW_WORKERS = 4
+
+# /api/ds/query answers 400 when every query of a request failed and 207
+# when some did, with the error of each query under results[refId].error
+QUERY_ERROR_STATUSES = (207, 400)
+
+
+@dataclass
+class PanelQuery:
+    """Queries of a single panel to be sent to /api/ds/query"""
+    panel_id: int
+    datasource_uid: str
+    queries: List[Dict]
+
+
+class _TeeReader:
+    """File-like reader copying everything read into a second file"""
+    
+    def __init__(self, source: BinaryIO, sink: BinaryIO):
+        self._source = source
+        self._sink = sink
+    
+    def read(self, size: int = -1) -> bytes:
+        data = self._source.read(size)
+        self._sink.write(data)
+        return data
+
+
+def _query_results(response: requests.Response) -> Optional[Dict[str, Any]]:
+    """Per-query results of an /api/ds/query response, None if the body has none"""
+    try:
+        body = response.json()
+    except ValueError:
+        return None
+    if isinstance(body, dict) and isinstance(body.get('results'), dict):
+        return body['results']
+    return None
 
 
 class GrafanaClient:
     """Grafana API client with service account token authentication"""
     
-    def __init__(self, context: GrafanaDashboardContext):
+    def __init__(
+        self,
+        context: GrafanaDashboardContext,
+        cache: Optional[DiskCache] = None,
+        recent_range_ttl: float = DEFAULT_RECENT_RANGE_TTL,
+        dashboard_cache: Optional[DiskCache] = None,
+        window_seconds: Optional[float] = None,
+        window_max_data_points: int = DEFAULT_WINDOW_MAX_DATA_POINTS,
+        window_workers: int = DEFAULT_WINDOW_WORKERS,
+        transport: Optional[Transport] = None,
+        interval_ms: Optional[int] = None,
+        tracer: Optional[Tracer] = None,
+        templates: Optional[TemplateEngine] = None
+    ):
         """
         Initialize Grafana client
         
         Args:
             context: Parsed dashboard context from URL
+            cache: Optional on-disk cache for query results
+            recent_range_ttl: Seconds a cached result stays valid when its
+                time range was not yet over when it was cached
+            dashboard_cache: Optional on-disk cache for dashboard definitions
+                and their flattened panel lists
+            window_seconds: Split query time ranges longer than this into
+                windows fetched concurrently and merged in timestamp order
+            window_max_data_points: maxDataPoints requested per window; also
+                sets the shared intervalMs of all windows
+            window_workers: Windows of one query fetched concurrently
+            transport: HTTP transport, may be shared between clients
+                (default: a new Transport with default settings)
+            interval_ms: Pin the intervalMs of every query, so ranges of
+                different lengths (e.g. live polls) use the same buckets
+            tracer: Tracer recording query and decode spans
+            templates: Template engine substituting dashboard variables,
+                may be shared between clients of the same dashboard URL
+                (default: one for the variables of context)
         """
         self._base_url = context.base_url
         self._dashboard_uid = context.dashboard_uid
         self._org_id = context.org_id
         self._time_from = context.time_from
         self._time_to = context.time_to
-        self._variables = context.variables
+        self._templates = templates or TemplateEngine.from_context(context)
+        self._cache = cache
+        self._recent_range_ttl = recent_range_ttl
+        self._dashboard_cache = dashboard_cache
+        self._cached_panels: Optional[Tuple[Dict[str, Any], List[Dict]]] = None
+        self._window_seconds = window_seconds
+        self._window_max_data_points = window_max_data_points
+        self._window_workers = window_workers
+        self._interval_ms = interval_ms
         
         # Read token from environment
         token = os.getenv('SERVICE_ACCOUNT_TOKEN')
@@ -35,27 +130,92 @@ class GrafanaClient:
             'Accept': 'application/json'
         }
         
-        self._session = requests.Session()
-        self._session.headers.update(self._headers)
+        self._transport = transport or Transport()
+        self._tracer = tracer or Tracer()
+        self._frame_parser = StreamingFrameParser()
+    
+    @property
+    def transport(self) -> Transport:
+        """HTTP transport with the metrics of every request sent"""
+        return self._transport
+    
+    @property
+    def templates(self) -> TemplateEngine:
+        """Template engine, with the variable definitions of the dashboard once fetched"""
+        return self._templates
     
     def get_dashboard(self) -> Dict[str, Any]:
         """
         Get dashboard by UID extracted from URL
         
+        With a dashboard cache, the cached definition is revalidated against
+        the latest saved version and only re-downloaded when it changed.
+        
         Returns:
             Dashboard JSON with panels and configuration
         """
+        if self._dashboard_cache is None:
+            return self._use_dashboard(self._fetch_dashboard())
+        
+        key = DiskCache.make_key('dashboard', self._base_url, self._org_id, self._dashboard_uid)
+        cached = self._dashboard_cache.get(key)
+        
+        if cached is not None:
+            entry = json.loads(cached)
+            if entry['version'] is not None and entry['version'] == self._get_dashboard_version():
+                self._cached_panels = (entry['dashboard'], entry['panels'])
+                return self._use_dashboard(entry['dashboard'])
+        
+        dashboard = self._fetch_dashboard()
+        panels = self._flatten_panels(dashboard)
+        self._dashboard_cache.put(key, json.dumps({
+            'version': dashboard.get('dashboard', {}).get('version'),
+            'dashboard': dashboard,
+            'panels': panels
+        }).encode('utf-8'))
+        self._cached_panels = (dashboard, panels)
+        
+        return self._use_dashboard(dashboard)
+    
+    def _use_dashboard(self, dashboard: Dict[str, Any]) -> Dict[str, Any]:
+        """Take the variable definitions of a dashboard into the template engine"""
+        self._templates.set_definitions(dashboard.get('dashboard', {}).get('templating', {}).get('list', []))
+        return dashboard
+    
+    def _fetch_dashboard(self) -> Dict[str, Any]:
+        """Download dashboard JSON"""
         url = f"{self._base_url}/api/dashboards/uid/{self._dashboard_uid}"
-        response = self._session.get(url)
+        response = self._transport.get(url, headers=self._headers)
         response.raise_for_status()
         return response.json()
     
+    def _get_dashboard_version(self) -> Optional[int]:
+        """
+        Get the latest saved dashboard version without downloading its body
+        
+        Returns:
+            Version number, or None if the versions API is not available
+        """
+        url = f"{self._base_url}/api/dashboards/uid/{self._dashboard_uid}/versions"
+        
+        try:
+            response = self._transport.get(url, params={'limit': 1}, headers=self._headers)
+            response.raise_for_status()
+            body = response.json()
+        except (requests.RequestException, ValueError):
+            return None
+        
+        # Grafana 11 wraps the list as {"versions": [...]}
+        versions = body.get('versions', []) if isinstance(body, dict) else body
+        return versions[0].get('version') if versions else None
+    
     def get_panel_data(
         self, 
         panel_id: int, 
         datasource_uid: str,
-        queries: List[Dict]
-    ) -> Dict[str, Any]:
+        queries: List[Dict],
+        stream: bool = False
+    ) -> Union[Dict[str, Any], StreamedQueryResult]:
         """
         Query panel data using datasource
         
@@ -63,66 +223,454 @@ class GrafanaClient:
             panel_id: Panel ID from dashboard
             datasource_uid: Datasource UID
             queries: Panel queries from dashboard JSON
+            stream: Decode the response incrementally into value buffers
+                instead of loading the whole JSON document
+                
+        Returns:
+            Query results with time series data (StreamedQueryResult when
+            stream is set)
+        """
+        # Apply variables to queries
+        processed_queries = self._templates.render(queries)
+        
+        return self._post_queries(processed_queries, datasource_uid, stream)
+    
+    def build_query_batches(
+        self,
+        panel_queries: List[PanelQuery],
+        max_queries: int = DEFAULT_BATCH_SIZE
+    ) -> List[List[int]]:
+        """
+        Split panel queries into batches for get_panel_data_batch
+        
+        Panels are grouped by datasource and packed in order until a batch
+        holds max_queries targets. A panel is never split across batches.
+        
+        Args:
+            panel_queries: Queries of every panel to fetch
+            max_queries: Maximum number of targets per request
             
         Returns:
-            Query results with time series data
+            Batches as lists of indices into panel_queries
         """
-        url = f"{self._base_url}/api/ds/query"
+        batches: List[List[int]] = []
+        open_batches: Dict[str, Tuple[List[int], int]] = {}
+        
+        for index, panel_query in enumerate(panel_queries):
+            size = max(len(panel_query.queries), 1)
+            batch, batch_size = open_batches.get(panel_query.datasource_uid, (None, 0))
+            
+            if batch is None or batch_size + size > max_queries:
+                batch, batch_size = [], 0
+                batches.append(batch)
+            
+            batch.append(index)
+            open_batches[panel_query.datasource_uid] = (batch, batch_size + size)
+        
+        return batches
+    
+    def get_panel_data_batch(
+        self,
+        panel_queries: List[PanelQuery],
+        stream: bool = False
+    ) -> List[Union[Dict[str, Any], StreamedQueryResult]]:
+        """
+        Query data of several panels with a single /api/ds/query request
+        
+        Every panel tends to use the same refIds ("A", "B", ...), so refIds
+        are namespaced per panel in the request and restored in the results.
+        Errors of single queries stay with their panel. When the request
+        fails as a whole, the panels are sent again one at a time and each
+        panel that still fails gets its error on every refId.
+        
+        Args:
+            panel_queries: Panel queries sharing one datasource
+            stream: Decode the response incrementally (see get_panel_data)
+            
+        Returns:
+            Query results per panel, in the same order and shape as
+            get_panel_data returns them
+        """
+        batch_queries = []
+        ref_ids: Dict[str, Tuple[int, str]] = {}
+        
+        for index, panel_query in enumerate(panel_queries):
+            for query in self._templates.render(panel_query.queries):
+                ref_id = query.get('refId', 'A')
+                batch_ref_id = f"p{index}_{ref_id}"
+                ref_ids[batch_ref_id] = (index, ref_id)
+                batch_queries.append({**query, 'refId': batch_ref_id})
+        
+        try:
+            if batch_queries:
+                response = self._post_queries(batch_queries, panel_queries[0].datasource_uid, stream)
+            else:
+                response = StreamedQueryResult() if stream else {}
+        except requests.HTTPError:
+            if len(panel_queries) == 1:
+                raise
+            return [self._get_panel_data_or_error(panel_query, stream) for panel_query in panel_queries]
+        
+        if stream:
+            return self._split_streamed_batch(response, ref_ids, len(panel_queries))
+        
+        panel_results: List[Dict[str, Any]] = [{'results': {}} for _ in panel_queries]
+        for batch_ref_id, result in response.get('results', {}).items():
+            if batch_ref_id not in ref_ids:
+                continue
+            index, ref_id = ref_ids[batch_ref_id]
+            for frame in result.get('frames', []):
+                schema = frame.get('schema', {})
+                if schema.get('refId') == batch_ref_id:
+                    schema['refId'] = ref_id
+            panel_results[index]['results'][ref_id] = result
+        
+        return panel_results
+    
+    def _get_panel_data_or_error(
+        self,
+        panel_query: PanelQuery,
+        stream: bool
+    ) -> Union[Dict[str, Any], StreamedQueryResult]:
+        """Query one panel of a failed batch, with an HTTP error as the error of its queries"""
+        try:
+            return self.get_panel_data(panel_query.panel_id, panel_query.datasource_uid, panel_query.queries, stream)
+        except requests.HTTPError as e:
+            ref_ids = [query.get('refId', 'A') for query in panel_query.queries] or ['A']
+            if stream:
+                return StreamedQueryResult(errors={ref_id: str(e) for ref_id in ref_ids})
+            status = e.response.status_code if e.response is not None else None
+            return {'results': {ref_id: {'error': str(e), 'status': status, 'frames': []} for ref_id in ref_ids}}
+    
+    def _split_streamed_batch(
+        self,
+        response: StreamedQueryResult,
+        ref_ids: Dict[str, Tuple[int, str]],
+        panel_count: int
+    ) -> List[StreamedQueryResult]:
+        """Map streamed batch results back to their panels"""
+        panel_results = [StreamedQueryResult() for _ in range(panel_count)]
+        
+        for batch_ref_id, (index, ref_id) in ref_ids.items():
+            if batch_ref_id in response.frames:
+                panel_results[index].frames[ref_id] = response.frames[batch_ref_id]
+                panel_results[index].labels[ref_id] = response.labels.get(batch_ref_id, [])
+            if batch_ref_id in response.errors:
+                panel_results[index].errors[ref_id] = response.errors[batch_ref_id]
+        
+        for panel_result in panel_results:
+            panel_result.estimated_buffer_bytes = response.estimated_buffer_bytes
+        
+        return panel_results
+    
+    def _post_queries(
+        self,
+        queries: List[Dict],
+        datasource_uid: str,
+        stream: bool = False
+    ) -> Union[Dict[str, Any], StreamedQueryResult]:
+        """
+        Send variable-substituted queries for the dashboard time range
+        
+        When windowing is configured and the range is longer than one
+        window, every window is fetched concurrently with the same intervalMs
+        and the frames are concatenated in timestamp order. Windows do not
+        overlap, so every point (and every GROUP BY time bucket) appears
+        exactly once and statistics over the merged series stay exact.
         
+        Args:
+            queries: Queries ready to be sent to the datasource
+            datasource_uid: Datasource the queries target
+            stream: Parse the response body incrementally from the socket
+            
+        Returns:
+            Query results with time series data
+        """
         # Convert datetime to epoch milliseconds
         time_from_ms = int(self._time_from.timestamp() * 1000)
         time_to_ms = int(self._time_to.timestamp() * 1000)
         
-        # Apply variables to queries
-        processed_queries = self._apply_variables_to_queries(queries)
+        if self._interval_ms:
+            queries = [{'intervalMs': self._interval_ms, **query} for query in queries]
+        
+        windows, interval_ms = self._split_time_range(time_from_ms, time_to_ms)
+        if len(windows) == 1:
+            return self._post_window(queries, datasource_uid, stream, time_from_ms, time_to_ms)
+        
+        window_queries = [
+            {'maxDataPoints': self._window_max_data_points, 'intervalMs': interval_ms, **query}
+            for query in queries
+        ]
+        
+        with ThreadPoolExecutor(max_workers=min(self._window_workers, len(windows))) as executor:
+            results = list(executor.map(
+                self._tracer.bind(lambda window: self._post_window(window_queries, datasource_uid, stream, *window)),
+                windows
+            ))
+        
+        if stream:
+            return self._merge_streamed_windows(results)
+        return self._merge_windows(results)
+    
+    def _split_time_range(self, time_from_ms: int, time_to_ms: int) -> Tuple[List[Tuple[int, int]], int]:
+        """
+        Split a time range into query windows
+        
+        Window boundaries fall on multiples of the shared interval, so
+        InfluxDB GROUP BY time buckets never straddle two windows. Window
+        ends are exclusive (one millisecond before the next window starts).
+        
+        Returns:
+            (from_ms, to_ms) windows and the interval in milliseconds
+        """
+        if not self._window_seconds or time_to_ms - time_from_ms <= self._window_seconds * 1000:
+            return [(time_from_ms, time_to_ms)], 0
+        
+        interval_ms = max(1000, math.ceil(self._window_seconds * 1000 / self._window_max_data_points / 1000) * 1000)
+        window_ms = max(interval_ms, int(self._window_seconds * 1000) // interval_ms * interval_ms)
+        
+        windows = []
+        start = time_from_ms
+        boundary = (time_from_ms // window_ms + 1) * window_ms
+        while boundary <= time_to_ms:
+            windows.append((start, boundary - 1))
+            start = boundary
+            boundary += window_ms
+        if start <= time_to_ms:
+            windows.append((start, time_to_ms))
+        
+        return windows, interval_ms
+    
+    def _post_window(
+        self,
+        queries: List[Dict],
+        datasource_uid: str,
+        stream: bool,
+        time_from_ms: int,
+        time_to_ms: int
+    ) -> Union[Dict[str, Any], StreamedQueryResult]:
+        """
+        Send queries for one time window
+        
+        Responses are served from and stored in the result cache when one
+        is configured.
+        
+        Returns:
+            Query results with time series data
+        """
+        url = f"{self._base_url}/api/ds/query"
         
         payload = {
-            "queries": processed_queries,
+            "queries": queries,
             "from": str(time_from_ms),
             "to": str(time_to_ms)
         }
         
-        response = self._session.post(url, json=payload)
-        response.raise_for_status()
-        return response.json()
+        if self._cache is None:
+            return self._send_queries(url, payload, stream)
+        
+        key = DiskCache.make_key(self._base_url, self._org_id, datasource_uid, payload)
+        expiry = {
+            'max_age': self._recent_range_ttl,
+            'stable_since': time_to_ms / 1000 + RANGE_SETTLE_SECONDS
+        }
+        
+        if stream:
+            with self._cache.open(key, **expiry) as cached:
+                if cached is not None:
+                    return self._frame_parser.parse(cached)
+        else:
+            cached = self._cache.get(key, **expiry)
+            if cached is not None:
+                return json.loads(cached)
+        
+        with self._cache.writer(key) as sink:
+            return self._send_queries(url, payload, stream, sink)
     
-    def _apply_variables_to_queries(self, queries: List[Dict]) -> List[Dict]:
+    def _merge_windows(self, window_results: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
-        Replace variable placeholders with actual values from URL
+        Merge per-window query results into one result
         
-        Args:
-            queries: List of query configurations
+        Frames are matched across windows by name and field labels, and
+        their value columns are concatenated in window order. The first
+        error reported for a refId is kept.
+        """
+        merged: Dict[str, Dict[str, Any]] = {}
+        
+        for window_result in window_results:
+            for ref_id, result in window_result.get('results', {}).items():
+                target = merged.setdefault(ref_id, {'frames': [], '_index': {}})
+                if 'error' in result and 'error' not in target:
+                    target['error'] = result['error']
+                    target['status'] = result.get('status')
+                
+                for frame in result.get('frames', []):
+                    schema = frame.get('schema', {})
+                    frame_key = json.dumps(
+                        [schema.get('name'), [f.get('labels') for f in schema.get('fields', [])]],
+                        sort_keys=True
+                    )
+                    values = frame.get('data', {}).get('values', [])
+                    
+                    if frame_key not in target['_index']:
+                        target['_index'][frame_key] = len(target['frames'])
+                        target['frames'].append({'schema': schema, 'data': {'values': [list(v) for v in values]}})
+                        continue
+                    
+                    merged_values = target['frames'][target['_index'][frame_key]]['data']['values']
+                    for column, column_values in zip(merged_values, values):
+                        column.extend(column_values)
+        
+        for target in merged.values():
+            del target['_index']
+        
+        return {'results': merged}
+    
+    def _merge_streamed_windows(self, window_results: List[StreamedQueryResult]) -> StreamedQueryResult:
+        """
+        Merge per-window streamed results into one result
+        
+        Frames are matched by their labels, or by their position within the
+        refId when they have none; Grafana returns series in a stable order.
+        """
+        merged = StreamedQueryResult()
+        frame_index: Dict[str, Dict[Union[str, int], int]] = {}
+        
+        for window_result in window_results:
+            for ref_id, frames in window_result.frames.items():
+                merged_frames = merged.frames.setdefault(ref_id, [])
+                merged_labels = merged.labels.setdefault(ref_id, [])
+                window_labels = window_result.labels.get(ref_id, [])
+                ref_index = frame_index.setdefault(ref_id, {})
+                
+                for index, columns in enumerate(frames):
+                    labels = window_labels[index] if index < len(window_labels) else {}
+                    key = json.dumps(labels, sort_keys=True) if labels else index
+                    if key not in ref_index:
+                        ref_index[key] = len(merged_frames)
+                        merged_frames.append(columns)
+                        merged_labels.append(labels)
+                        continue
+                    for column, column_values in zip(merged_frames[ref_index[key]], columns):
+                        column.extend(column_values)
             
-        Returns:
-            Queries with variables replaced
+            for ref_id, error in window_result.errors.items():
+                merged.errors.setdefault(ref_id, error)
+            
+            merged.estimated_buffer_bytes += window_result.estimated_buffer_bytes
+        
+        return merged
+    
+    def _send_queries(
+        self,
+        url: str,
+        payload: Dict[str, Any],
+        stream: bool,
+        sink: Optional[BinaryIO] = None
+    ) -> Union[Dict[str, Any], StreamedQueryResult]:
         """
-        # Convert queries to JSON string for replacement
-        queries_str = json.dumps(queries)
+        POST a query payload
         
-        # Replace each variable
-        for var_name, var_value in self._variables.items():
-            # Handle both ${var} and $var formats
-            queries_str = queries_str.replace(f"${{{var_name}}}", var_value)
-            queries_str = queries_str.replace(f"${var_name}", var_value)
+        Args:
+            url: Query endpoint
+            payload: Queries and time range
+            stream: Parse the response body incrementally from the socket
+            sink: Optional file receiving a copy of complete (HTTP 200)
+                response bodies
+                
+        Returns:
+            Query results with time series data; queries that failed carry
+            their error (HTTP 207 and 400 with per-query results)
             
-            # Handle special Grafana variables
-            if var_value == "$__all":
-                queries_str = queries_str.replace(f"${{{var_name}}}", ".*")
+        Raises:
+            requests.HTTPError: The request failed without per-query results
+        """
+        if stream:
+            # Frames are decoded while the body is read, one span covers both
+            with self._tracer.span('query', source='grafana', streamed=True) as span, \
+                    self._transport.stream('POST', url, json=payload, headers=self._headers) as response:
+                if response.status_code in QUERY_ERROR_STATUSES and _query_results(response) is not None:
+                    # Error responses are small, parse them from memory
+                    result = self._frame_parser.parse(io.BytesIO(response.content))
+                    span.set(bytes=len(response.content))
+                    return result
+                response.raise_for_status()
+                response.raw.decode_content = True
+                body = response.raw
+                if sink is not None and response.status_code == 200:
+                    body = _TeeReader(body, sink)
+                result = self._frame_parser.parse(body)
+                span.set(bytes=response.raw.tell())
+                return result
         
-        return json.loads(queries_str)
+        with self._tracer.span('query', source='grafana') as span:
+            response = self._transport.post(url, json=payload, headers=self._headers)
+            if response.status_code not in QUERY_ERROR_STATUSES or _query_results(response) is None:
+                response.raise_for_status()
+            span.set(bytes=len(response.content))
+        if sink is not None and response.status_code == 200:
+            sink.write(response.content)
+        with self._tracer.span('decode', source='grafana'):
+            return response.json()
     
     def extract_panels_from_dashboard(self, dashboard: Dict) -> List[Dict]:
         """
         Extract all panels from dashboard JSON
         
+        Panels and rows repeated by a variable are expanded into one panel
+        per value of the variable.
+        
         Returns:
             List of panel configurations with queries
         """
+        top_level = dashboard.get('dashboard', {}).get('panels', [])
+        expanded = self._templates.expand_repeats(top_level)
+        if expanded is not top_level:
+            return self._flatten(expanded)
+        
+        if self._cached_panels is not None and self._cached_panels[0] is dashboard:
+            return list(self._cached_panels[1])
+        
+        return self._flatten_panels(dashboard)
+    
+    def get_panel_rows(self, dashboard: Dict) -> Dict[int, str]:
+        """
+        Map panels to the title of the dashboard row they belong to
+        
+        Covers both collapsed rows (panels nested in the row panel) and
+        expanded rows (panels following the row panel).
+        
+        Args:
+            dashboard: Dashboard JSON
+            
+        Returns:
+            Row title per panel id, panels above the first row are omitted
+        """
+        rows = {}
+        row_title = None
+        
+        for panel in self._templates.expand_repeats(dashboard.get('dashboard', {}).get('panels', [])):
+            if panel.get('type') == 'row':
+                row_title = panel.get('title') or None
+                for nested in panel.get('panels', []):
+                    if row_title:
+                        rows[nested.get('id')] = row_title
+            elif row_title:
+                rows[panel.get('id')] = row_title
+        
+        return rows
+    
+    def _flatten_panels(self, dashboard: Dict) -> List[Dict]:
+        """Flatten row panels into a single panel list"""
+        return self._flatten(dashboard.get('dashboard', {}).get('panels', []))
+    
+    @staticmethod
+    def _flatten(top_level: List[Dict]) -> List[Dict]:
+        """Flatten a top-level panel list, rows included"""
         panels = []
-        dashboard_json = dashboard.get('dashboard', {})
         
         # Panels can be nested in rows
-        for panel in dashboard_json.get('panels', []):
+        for panel in top_level:
             if panel.get('type') == 'row':
                 # Row panel contains nested panels
                 panels.extend(panel.get('panels', []))
@@ -0,0 +1,337 @@
+"""InfluxDB 1.x client querying JMeter metrics without Grafana"""
+
+import os
+import json
+import re
+from typing import Dict, List, Any, Optional, Tuple
+
+from ..parsers.url_parser import GrafanaDashboardContext
+from ..parsers.template_engine import TemplateEngine
+from .grafana_client import PanelQuery, DEFAULT_BATCH_SIZE
+from .transport import Transport
+from ..telemetry.tracer import Tracer
+
+
+DEFAULT_DATABASE = 'jmeter'
+DEFAULT_CHUNK_SIZE = 10000
+DEFAULT_MAX_DATA_POINTS = 1000
+
+# InfluxQL aggregations and selectors of the Grafana query builder
+_SELECTORS = {
+    'mean', 'median', 'mode', 'count', 'distinct', 'integral', 'spread', 'stddev', 'sum',
+    'min', 'max', 'first', 'last', 'percentile', 'bottom', 'top', 'sample',
+    'derivative', 'non_negative_derivative', 'difference', 'non_negative_difference',
+    'moving_average', 'cumulative_sum', 'elapsed'
+}
+
+
+class InfluxDBClient:
+    """
+    Query panel targets directly from the InfluxDB 1.x HTTP API
+    
+    Drop-in replacement of GrafanaClient for fetching panel data: raw
+    InfluxQL and query builder targets are rendered locally (Grafana macros
+    and dashboard variables included), sent with chunked responses and
+    epoch-millisecond timestamps, and reshaped into /api/ds/query results so
+    DataProcessor handles them unchanged. Dashboards still come from Grafana.
+    """
+    
+    def __init__(
+        self,
+        context: GrafanaDashboardContext,
+        url: str,
+        database: Optional[str] = None,
+        transport: Optional[Transport] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_data_points: int = DEFAULT_MAX_DATA_POINTS,
+        interval_ms: Optional[int] = None,
+        tracer: Optional[Tracer] = None,
+        templates: Optional[TemplateEngine] = None
+    ):
+        """
+        Initialize InfluxDB client
+        
+        Args:
+            context: Parsed dashboard context from URL
+            url: InfluxDB base URL, e.g. http://influxdb:8086
+            database: Database name (if not provided, reads INFLUXDB_DATABASE
+                from environment, default "jmeter")
+            transport: HTTP transport, may be shared between clients
+            chunk_size: Points per chunk of a chunked response
+            max_data_points: Target points per series, sets $__interval
+            interval_ms: Fixed $__interval instead of one derived from the
+                time range and max_data_points
+            tracer: Tracer recording query spans
+            templates: Template engine with the dashboard variables, e.g.
+                GrafanaClient.templates once the dashboard was fetched
+                (default: one for the variables of context)
+        """
+        self._url = url.rstrip('/')
+        self._database = database or os.getenv('INFLUXDB_DATABASE', DEFAULT_DATABASE)
+        self._from_ms = int(context.time_from.timestamp() * 1000)
+        self._to_ms = int(context.time_to.timestamp() * 1000)
+        self._interval_ms = interval_ms or max(1000, (self._to_ms - self._from_ms) // max(max_data_points, 1))
+        # Grafana macros are rendered here, as Grafana would have
+        self._templates = (templates or TemplateEngine.from_context(context)).with_builtins({
+            'timeFilter': f"time >= {self._from_ms}ms and time <= {self._to_ms}ms",
+            '__interval_ms': str(self._interval_ms),
+            '__interval': f"{self._interval_ms}ms",
+            'interval': f"{self._interval_ms}ms",
+        })
+        self._chunk_size = chunk_size
+        self._transport = transport or Transport()
+        self._tracer = tracer or Tracer()
+        
+        self._auth_params = {}
+        if os.getenv('INFLUXDB_USER'):
+            self._auth_params = {'u': os.getenv('INFLUXDB_USER'), 'p': os.getenv('INFLUXDB_PASSWORD', '')}
+    
+    @property
+    def transport(self) -> Transport:
+        """HTTP transport with the metrics of every request sent"""
+        return self._transport
+    
+    def get_panel_data(
+        self,
+        panel_id: int,
+        datasource_uid: str,
+        queries: List[Dict],
+        stream: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Query panel data from InfluxDB
+        
+        Args:
+            panel_id: Panel ID from dashboard
+            datasource_uid: Ignored, kept for GrafanaClient compatibility
+            queries: Panel queries from dashboard JSON
+            stream: Ignored, chunked responses are always decoded
+                incrementally
+                
+        Returns:
+            Query results shaped like /api/ds/query results
+        """
+        return self.get_panel_data_batch(
+            [PanelQuery(panel_id=panel_id, datasource_uid=datasource_uid, queries=queries)]
+        )[0]
+    
+    def build_query_batches(
+        self,
+        panel_queries: List[PanelQuery],
+        max_queries: int = DEFAULT_BATCH_SIZE
+    ) -> List[List[int]]:
+        """
+        Split panel queries into batches for get_panel_data_batch
+        
+        Panels are packed in order until a batch holds max_queries targets.
+        A panel is never split across batches.
+        
+        Returns:
+            Batches as lists of indices into panel_queries
+        """
+        batches: List[List[int]] = []
+        batch_size = 0
+        
+        for index, panel_query in enumerate(panel_queries):
+            size = max(len(panel_query.queries), 1)
+            if not batches or batch_size + size > max_queries:
+                batches.append([])
+                batch_size = 0
+            batches[-1].append(index)
+            batch_size += size
+        
+        return batches
+    
+    def get_panel_data_batch(
+        self,
+        panel_queries: List[PanelQuery],
+        stream: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Query data of several panels with a single multi-statement request
+        
+        Args:
+            panel_queries: Panel queries
+            stream: Ignored (see get_panel_data)
+            
+        Returns:
+            Query results per panel, in the same order
+        """
+        panel_results: List[Dict[str, Any]] = [{'results': {}} for _ in panel_queries]
+        statements: List[str] = []
+        statement_ref_ids: List[Tuple[int, str]] = []
+        
+        for index, panel_query in enumerate(panel_queries):
+            for query in panel_query.queries:
+                ref_id = query.get('refId', 'A')
+                if query.get('hide'):
+                    continue
+                
+                statement = self.render_query(query)
+                if statement is None:
+                    panel_results[index]['results'][ref_id] = {
+                        'error': 'Not an InfluxQL query', 'frames': []
+                    }
+                    continue
+                
+                statements.append(statement)
+                statement_ref_ids.append((index, ref_id))
+        
+        if not statements:
+            return panel_results
+        
+        for statement_id, result in self._query(";".join(statements)).items():
+            if statement_id >= len(statement_ref_ids):
+                continue
+            index, ref_id = statement_ref_ids[statement_id]
+            panel_results[index]['results'][ref_id] = result
+        
+        return panel_results
+    
+    def render_query(self, query: Dict[str, Any]) -> Optional[str]:
+        """
+        Render a panel target as an InfluxQL statement
+        
+        Args:
+            query: Grafana InfluxQL target (raw or query builder)
+            
+        Returns:
+            InfluxQL statement, or None if the target is not InfluxQL
+        """
+        if query.get('rawQuery') or ('query' in query and 'measurement' not in query):
+            text = query.get('query')
+        elif query.get('measurement'):
+            text = self._build_query(query)
+        else:
+            return None
+        
+        if not text:
+            return None
+        
+        return self._templates.render_text(text.strip().rstrip(';'))
+    
+    def _build_query(self, query: Dict[str, Any]) -> str:
+        """Render a query builder target the way Grafana does"""
+        fields = []
+        for parts in query.get('select') or [[{'type': 'field', 'params': ['value']}]]:
+            expression, alias = '', None
+            for part in parts:
+                part_type, params = part.get('type'), [str(p) for p in part.get('params', [])]
+                if part_type == 'field':
+                    expression = f'"{params[0]}"'
+                elif part_type in _SELECTORS:
+                    expression = f"{part_type}({', '.join([expression] + params)})"
+                elif part_type == 'math':
+                    expression = f"{expression} {params[0]}"
+                elif part_type == 'alias':
+                    alias = params[0]
+            fields.append(f'{expression} AS "{alias}"' if alias else expression)
+        
+        policy = query.get('policy')
+        measurement = f'"{query["measurement"]}"'
+        if policy and policy != 'default':
+            measurement = f'"{policy}".{measurement}'
+        
+        conditions = []
+        for position, tag in enumerate(query.get('tags', [])):
+            operator = tag.get('operator') or '='
+            value = str(tag.get('value', ''))
+            if operator not in ('=~', '!~') and not re.fullmatch(r'-?\d+(\.\d+)?', value):
+                value = "'" + value.replace("'", "\\'") + "'"
+            condition = f'"{tag.get("key")}" {operator} {value}'
+            if position:
+                condition = f"{tag.get('condition') or 'AND'} {condition}"
+            conditions.append(condition)
+        
+        where = f"({' '.join(conditions)}) AND $timeFilter" if conditions else "$timeFilter"
+        
+        group_by, fill = [], None
+        for part in query.get('groupBy', []):
+            params = [str(p) for p in part.get('params', [])]
+            if part.get('type') == 'time':
+                group_by.append(f"time({params[0] if params else '$__interval'})")
+            elif part.get('type') == 'tag':
+                group_by.append(f'"{params[0]}"')
+            elif part.get('type') == 'fill':
+                fill = params[0] if params else 'null'
+        
+        statement = f"SELECT {', '.join(fields)} FROM {measurement} WHERE {where}"
+        if group_by:
+            statement += f" GROUP BY {', '.join(group_by)}"
+        if fill:
+            statement += f" fill({fill})"
+        return statement
+    
+    def _query(self, statements: str) -> Dict[int, Dict[str, Any]]:
+        """
+        Run InfluxQL statements with a chunked response
+        
+        Chunks of the same series are concatenated while they arrive, so
+        only decoded columns are held, never the whole response body.
+        
+        Returns:
+            Grafana-shaped result per statement id
+        """
+        params = {
+            'db': self._database,
+            'q': statements,
+            'epoch': 'ms',
+            'chunked': 'true',
+            'chunk_size': self._chunk_size,
+            **self._auth_params
+        }
+        
+        # Columns per statement, keyed by series name, tags and field
+        columns: Dict[int, Dict[Tuple[str, str, str], Tuple[List[float], List[Any]]]] = {}
+        errors: Dict[int, str] = {}
+        
+        # Chunks are decoded while the body is read, one span covers both
+        with self._tracer.span('query', source='influxdb', streamed=True) as span, \
+                self._transport.stream('POST', f"{self._url}/query", data=params) as response:
+            response.raise_for_status()
+            
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if 'error' in chunk:
+                    raise RuntimeError(f"InfluxDB query failed: {chunk['error']}")
+                
+                for result in chunk.get('results', []):
+                    statement_id = result.get('statement_id', 0)
+                    statement_columns = columns.setdefault(statement_id, {})
+                    if 'error' in result:
+                        errors[statement_id] = result['error']
+                    
+                    for series in result.get('series', []):
+                        tags = json.dumps(series.get('tags') or {}, sort_keys=True)
+                        names = series.get('columns', [])
+                        for position, field_name in enumerate(names[1:], start=1):
+                            timestamps, values = statement_columns.setdefault(
+                                (series.get('name', ''), tags, field_name), ([], [])
+                            )
+                            for row in series.get('values', []):
+                                timestamps.append(row[0])
+                                values.append(row[position])
+            
+            span.set(bytes=response.raw.tell())
+        
+        results: Dict[int, Dict[str, Any]] = {}
+        for statement_id in set(columns) | set(errors):
+            frames = []
+            for (name, tags, field_name), (timestamps, values) in columns.get(statement_id, {}).items():
+                frames.append({
+                    'schema': {
+                        'name': name,
+                        'fields': [
+                            {'name': 'Time', 'type': 'time'},
+                            {'name': field_name, 'type': 'number', 'labels': json.loads(tags)}
+                        ]
+                    },
+                    'data': {'values': [timestamps, values]}
+                })
+            results[statement_id] = {'frames': frames}
+            if statement_id in errors:
+                results[statement_id]['error'] = errors[statement_id]
+        
+        return results
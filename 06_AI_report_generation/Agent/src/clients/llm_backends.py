@@ -0,0 +1,191 @@
+"""Pluggable LLM backends for OpenAIClient"""
+
+import re
+import time
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from typing import List, Dict, Iterator
+
+
+class LLMBackend(ABC):
+    """Chat completion backend"""
+    
+    name = 'base'
+    
+    @abstractmethod
+    def complete(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: int
+    ) -> str:
+        """
+        Run a chat completion
+        
+        Args:
+            messages: Chat messages (role/content)
+            model: Model name
+            temperature: Sampling temperature
+            max_tokens: Maximum completion tokens
+            
+        Returns:
+            Completion text
+        """
+    
+    def stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: int
+    ) -> Iterator[str]:
+        """
+        Run a chat completion, yielding text as it is generated
+        
+        Backends without native streaming yield the whole completion at once.
+        
+        Yields:
+            Completion text fragments
+        """
+        yield self.complete(messages, model, temperature, max_tokens)
+    
+    def usage(self) -> Dict[str, int]:
+        """Tokens used so far, empty for backends without token accounting"""
+        return {}
+
+
+class OpenAIBackend(LLMBackend):
+    """OpenAI chat completions API"""
+    
+    name = 'openai'
+    
+    def __init__(self, api_key: str):
+        """
+        Initialize backend
+        
+        Args:
+            api_key: OpenAI API key
+        """
+        # Imported here: the openai package (and httpx) takes longer to
+        # import than the rest of the agent, and local or metrics-only
+        # runs never need it
+        from openai import OpenAI
+        
+        self._client = OpenAI(api_key=api_key)
+        self._lock = threading.Lock()
+        self._usage = {'calls': 0, 'prompt_tokens': 0, 'completion_tokens': 0}
+    
+    def complete(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: int
+    ) -> str:
+        response = self._client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        self._record_usage(response.usage)
+        
+        return response.choices[0].message.content
+    
+    def stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: int
+    ) -> Iterator[str]:
+        response = self._client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+            # Usage arrives in a final chunk without choices
+            stream_options={'include_usage': True}
+        )
+        
+        for chunk in response:
+            if chunk.usage is not None:
+                self._record_usage(chunk.usage)
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    
+    def usage(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._usage)
+    
+    def _record_usage(self, usage) -> None:
+        """Add the token usage reported for a completion"""
+        if usage is None:
+            return
+        with self._lock:
+            self._usage['calls'] += 1
+            self._usage['prompt_tokens'] += usage.prompt_tokens or 0
+            self._usage['completion_tokens'] += usage.completion_tokens or 0
+
+
+class LocalBackend(LLMBackend):
+    """
+    Deterministic offline stand-in for tests, benchmarks and offline CI
+    
+    Produces a fixed-structure summary derived only from the prompt, so the
+    same prompt always yields the same text.
+    """
+    
+    name = 'local'
+    
+    def __init__(self, latency_seconds: float = 0.0):
+        """
+        Initialize backend
+        
+        Args:
+            latency_seconds: Simulated completion latency
+        """
+        self._latency_seconds = latency_seconds
+    
+    def complete(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: int
+    ) -> str:
+        if self._latency_seconds:
+            time.sleep(self._latency_seconds)
+        
+        prompt = messages[-1]['content'] if messages else ''
+        digest = hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:12]
+        panels = re.findall(r'^(\S[^\n]*?)(?: \([^)\n]*\))?:\n\s+- ', prompt, re.MULTILINE)
+        series = len(re.findall(r'^\s+- ', prompt, re.MULTILINE))
+        
+        return "\n".join([
+            "### Overall performance assessment",
+            f"Local analysis of {len(panels)} panels and {series} series (prompt {digest}).",
+            "",
+            "### Key findings and trends",
+            *[f"- {title}" for title in panels[:10]],
+            "",
+            "### Concerns or anomalies",
+            "- Not evaluated by the local backend",
+            "",
+            "### Recommendations",
+            "- Re-run with the openai backend for a full analysis",
+        ])
+    
+    def stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: int
+    ) -> Iterator[str]:
+        content = self.complete(messages, model, temperature, max_tokens)
+        for word in re.findall(r'\S+\s*', content):
+            yield word
@@ -1,26 +1,74 @@
 """OpenAI API client"""
 
 import os
-from typing import List, Dict, Any
-from openai import OpenAI
+import time
+import threading
+from typing import List, Dict, Any, Iterator, Optional
+from .disk_cache import DiskCache
+from .llm_backends import LLMBackend, OpenAIBackend, LocalBackend
+from ..telemetry.tracer import Tracer
 
 
 class OpenAIClient:
     """OpenAI API client for AI analysis"""
     
-    def __init__(self, api_key: str = None):
+    def __init__(
+        self,
+        api_key: str = None,
+        backend: Optional[LLMBackend] = None,
+        cache: Optional[DiskCache] = None,
+        tracer: Optional[Tracer] = None,
+        backend_name: Optional[str] = None
+    ):
         """
         Initialize OpenAI client
         
         Args:
             api_key: OpenAI API key (if not provided, reads from environment)
+            backend: Completion backend (if not provided, selected by
+                backend_name and created on the first completion that is
+                not cached)
+            cache: Optional on-disk cache of completions, keyed by backend,
+                model, parameters and prompts
+            tracer: Tracer recording completion spans
+            backend_name: "openai" or "local" (if not provided, reads
+                LLM_BACKEND from environment, default: openai)
         """
-        self._api_key = api_key or os.getenv('OPENAI_API_KEY')
-        if not self._api_key:
-            raise ValueError("OPENAI_API_KEY not found")
+        if backend is not None:
+            self._backend_name = backend.name
+        else:
+            self._backend_name = backend_name or os.getenv('LLM_BACKEND', 'openai')
+            if self._backend_name not in ('openai', 'local'):
+                raise ValueError(f"Unknown LLM backend: {self._backend_name}")
         
-        self._client = OpenAI(api_key=self._api_key)
+        self._backend = backend
+        self._api_key = api_key
+        self._backend_lock = threading.Lock()
+        self._cache = cache
+        self._tracer = tracer or Tracer()
         self._model = "gpt-4o-mini"
+        self._temperature = 0.7
+        self._max_tokens = 2000
+    
+    @property
+    def backend(self) -> LLMBackend:
+        """Completion backend, created on first use"""
+        if self._backend is None:
+            with self._backend_lock:
+                if self._backend is None:
+                    self._backend = self._create_backend(self._api_key)
+        return self._backend
+    
+    def _create_backend(self, api_key: Optional[str]) -> LLMBackend:
+        """Create the backend selected by name"""
+        if self._backend_name == 'local':
+            return LocalBackend(latency_seconds=float(os.getenv('LOCAL_LLM_LATENCY', 0)))
+        
+        api_key = api_key or os.getenv('OPENAI_API_KEY')
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY not found")
+        
+        return OpenAIBackend(api_key=api_key)
     
     def analyze(self, prompt: str, system_prompt: str = None) -> str:
         """
@@ -33,6 +81,71 @@ class OpenAIClient:
         Returns:
             AI analysis result
         """
+        messages = self._build_messages(prompt, system_prompt)
+        
+        with self._tracer.span('llm', backend=self._backend_name, cached=False) as span:
+            if self._cache is None:
+                content = self._complete(messages)
+            else:
+                key = self._cache_key(messages)
+                cached = self._cache.get(key)
+                if cached is not None:
+                    span.set(cached=True)
+                    return cached.decode('utf-8')
+                content = self._complete(messages)
+                self._cache.put(key, content.encode('utf-8'))
+            span.set(completion_chars=len(content))
+        
+        return content
+    
+    def analyze_stream(self, prompt: str, system_prompt: str = None) -> Iterator[str]:
+        """
+        Analyze data using OpenAI, yielding the analysis as it is generated
+        
+        A cached analysis is yielded at once; a streamed one is cached after
+        it completes.
+        
+        Args:
+            prompt: User prompt with data to analyze
+            system_prompt: Optional system prompt
+            
+        Yields:
+            AI analysis text fragments
+        """
+        messages = self._build_messages(prompt, system_prompt)
+        
+        if self._cache is not None:
+            key = self._cache_key(messages)
+            cached = self._cache.get(key)
+            if cached is not None:
+                yield cached.decode('utf-8')
+                return
+        
+        # The span includes the time the caller spends on each fragment
+        fragments = []
+        started = time.perf_counter()
+        with self._tracer.span('llm', backend=self._backend_name, streamed=True) as span:
+            for fragment in self.backend.stream(
+                messages=messages,
+                model=self._model,
+                temperature=self._temperature,
+                max_tokens=self._max_tokens
+            ):
+                if not fragments:
+                    span.set(first_fragment_ms=round((time.perf_counter() - started) * 1000))
+                fragments.append(fragment)
+                yield fragment
+            span.set(completion_chars=sum(len(fragment) for fragment in fragments))
+        
+        if self._cache is not None:
+            self._cache.put(key, "".join(fragments).encode('utf-8'))
+    
+    def usage(self) -> Dict[str, int]:
+        """Tokens used so far by the backend (cached analyses use none)"""
+        return self._backend.usage() if self._backend is not None else {}
+    
+    def _build_messages(self, prompt: str, system_prompt: Optional[str]) -> List[Dict[str, Any]]:
+        """Build chat messages from prompts"""
         messages = []
         
         if system_prompt:
@@ -46,12 +159,19 @@ class OpenAIClient:
             "content": prompt
         })
         
-        response = self._client.chat.completions.create(
-            model=self._model,
+        return messages
+    
+    def _cache_key(self, messages: List[Dict[str, Any]]) -> str:
+        """Cache key of a completion request"""
+        return DiskCache.make_key(
+            self._backend_name, self._model, self._temperature, self._max_tokens, messages
+        )
+    
+    def _complete(self, messages: List[Dict[str, Any]]) -> str:
+        """Run the completion on the backend"""
+        return self.backend.complete(
             messages=messages,
-            temperature=0.7,
-            max_tokens=2000
+            model=self._model,
+            temperature=self._temperature,
+            max_tokens=self._max_tokens
         )
-        
-        return response.choices[0].message.content
-
@@ -0,0 +1,53 @@
+"""Client-side request rate limiter"""
+
+import time
+import threading
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket
+    
+    Allows bursts of up to ``burst`` requests, refilled continuously at
+    ``requests_per_minute``. A rate of 0 disables limiting.
+    """
+    
+    def __init__(self, requests_per_minute: float, burst: int = 1):
+        """
+        Initialize limiter
+        
+        Args:
+            requests_per_minute: Sustained request rate, 0 = unlimited
+            burst: Requests allowed at once before the rate applies
+        """
+        self._rate = requests_per_minute / 60.0
+        self._capacity = max(1, burst)
+        self._tokens = float(self._capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> float:
+        """
+        Block until a request may be sent
+        
+        Returns:
+            Seconds spent waiting
+        """
+        if self._rate <= 0:
+            return 0.0
+        
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                
+                delay = (1 - self._tokens) / self._rate
+            
+            time.sleep(delay)
+            waited += delay
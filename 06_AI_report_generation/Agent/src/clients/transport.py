@@ -0,0 +1,245 @@
+"""HTTP transport with pooling, timeouts, retries and request metrics"""
+
+import os
+import time
+import random
+import threading
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Deque, Dict, Iterator, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 60.0
+DEFAULT_MAX_RETRIES = 3
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Recent requests kept for latency percentiles; totals cover all requests
+DEFAULT_RECORD_HISTORY = 10000
+
+
+@dataclass
+class TransportConfig:
+    """Connection and retry settings of a Transport"""
+    pool_size: int = DEFAULT_POOL_SIZE
+    connect_timeout: float = DEFAULT_CONNECT_TIMEOUT
+    read_timeout: float = DEFAULT_READ_TIMEOUT
+    max_retries: int = DEFAULT_MAX_RETRIES
+    backoff_base: float = 0.5
+    backoff_max: float = 30.0
+    compress: bool = True
+    # Requests in flight across all threads sharing the transport, 0 = unlimited
+    max_in_flight: int = 0
+    record_history: int = DEFAULT_RECORD_HISTORY
+    
+    @classmethod
+    def from_env(cls, pool_size: int = DEFAULT_POOL_SIZE, max_in_flight: int = 0) -> 'TransportConfig':
+        """
+        Build a config from GRAFANA_CONNECT_TIMEOUT, GRAFANA_READ_TIMEOUT
+        and GRAFANA_MAX_RETRIES
+        
+        Args:
+            pool_size: Connections kept open per host
+            max_in_flight: Requests in flight at once, 0 = unlimited
+        """
+        return cls(
+            pool_size=pool_size,
+            max_in_flight=max_in_flight,
+            connect_timeout=float(os.getenv('GRAFANA_CONNECT_TIMEOUT', DEFAULT_CONNECT_TIMEOUT)),
+            read_timeout=float(os.getenv('GRAFANA_READ_TIMEOUT', DEFAULT_READ_TIMEOUT)),
+            max_retries=int(os.getenv('GRAFANA_MAX_RETRIES', DEFAULT_MAX_RETRIES))
+        )
+
+
+@dataclass
+class RequestRecord:
+    """Metrics of a single request, retries included"""
+    method: str
+    path: str
+    status: int
+    bytes_received: int
+    latency_ms: float
+    retries: int
+
+
+class Transport:
+    """
+    Pooled requests session for concurrent API calls
+    
+    Responses with status 429 or 5xx and connection failures are retried
+    with jittered exponential backoff, honoring Retry-After. Every request
+    counts towards the request, byte and retry totals; the most recent ones
+    are kept with their wire size, latency and retry count. With
+    max_in_flight set, callers beyond the cap wait for a free slot, so one
+    transport bounds the load of every report sharing it.
+    """
+    
+    def __init__(self, config: Optional[TransportConfig] = None, headers: Optional[Dict[str, str]] = None):
+        """
+        Initialize transport
+        
+        Args:
+            config: Connection and retry settings
+            headers: Headers sent with every request
+        """
+        self.config = config or TransportConfig()
+        self.records: Deque[RequestRecord] = deque(maxlen=self.config.record_history)
+        self._totals = {'requests': 0, 'bytes': 0, 'retries': 0, 'max_ms': 0.0}
+        self._lock = threading.Lock()
+        self._slots = (
+            threading.BoundedSemaphore(self.config.max_in_flight)
+            if self.config.max_in_flight > 0 else nullcontext()
+        )
+        
+        adapter = HTTPAdapter(
+            pool_connections=self.config.pool_size,
+            pool_maxsize=self.config.pool_size,
+            max_retries=0
+        )
+        self._session = requests.Session()
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+        self._session.headers['Accept-Encoding'] = 'gzip, deflate' if self.config.compress else 'identity'
+        if headers:
+            self._session.headers.update(headers)
+    
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request and read the whole response
+        
+        Args:
+            method: HTTP method
+            url: Request URL
+            **kwargs: Arguments of requests.Session.request
+            
+        Returns:
+            Final response after retries (status is not checked)
+        """
+        with self._slots:
+            started = time.perf_counter()
+            response, retries = self._send(method, url, stream=False, **kwargs)
+        self._record(method, url, response, started, retries)
+        return response
+    
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """Send a GET request (see request)"""
+        return self.request('GET', url, **kwargs)
+    
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """Send a POST request (see request)"""
+        return self.request('POST', url, **kwargs)
+    
+    @contextmanager
+    def stream(self, method: str, url: str, **kwargs) -> Iterator[requests.Response]:
+        """
+        Send a request and read the response body incrementally
+        
+        The request is recorded once the block completes, so the recorded
+        size and latency cover the whole body. The in-flight slot is held
+        until then as well.
+        
+        Yields:
+            Final response after retries (status is not checked)
+        """
+        with self._slots:
+            started = time.perf_counter()
+            response, retries = self._send(method, url, stream=True, **kwargs)
+            try:
+                with response:
+                    yield response
+            finally:
+                self._record(method, url, response, started, retries)
+    
+    def summary(self) -> Dict[str, float]:
+        """Request count, bytes and retries so far, latency percentiles of the recent requests"""
+        with self._lock:
+            totals = dict(self._totals)
+            latencies = sorted(record.latency_ms for record in self.records)
+        
+        def percentile(fraction: float) -> float:
+            return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] if latencies else 0.0
+        
+        return {
+            'requests': totals['requests'],
+            'bytes': totals['bytes'],
+            'p50_ms': percentile(0.5),
+            'p95_ms': percentile(0.95),
+            'max_ms': totals['max_ms'],
+            'retries': totals['retries']
+        }
+    
+    def close(self) -> None:
+        """Close pooled connections"""
+        self._session.close()
+    
+    def _send(self, method: str, url: str, stream: bool, **kwargs) -> Tuple[requests.Response, int]:
+        """Send with retries, returning the final response and retry count"""
+        kwargs.setdefault('timeout', (self.config.connect_timeout, self.config.read_timeout))
+        
+        attempt = 0
+        while True:
+            delay = None
+            try:
+                response = self._session.request(method, url, stream=stream, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.config.max_retries:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.config.max_retries:
+                    return response, attempt
+                delay = self._retry_after(response)
+                response.close()
+            
+            time.sleep(delay if delay is not None else self._backoff(attempt))
+            attempt += 1
+    
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff delay"""
+        return random.uniform(0, min(self.config.backoff_max, self.config.backoff_base * 2 ** attempt))
+    
+    def _retry_after(self, response: requests.Response) -> Optional[float]:
+        """Delay requested by a Retry-After header, capped by backoff_max"""
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        
+        try:
+            delay = float(value)
+        except ValueError:
+            try:
+                delay = parsedate_to_datetime(value).timestamp() - time.time()
+            except (TypeError, ValueError):
+                return None
+        
+        return min(max(delay, 0.0), self.config.backoff_max)
+    
+    def _record(
+        self,
+        method: str,
+        url: str,
+        response: requests.Response,
+        started: float,
+        retries: int
+    ) -> None:
+        """Record metrics of a completed request"""
+        record = RequestRecord(
+            method=method,
+            path=urlsplit(url).path,
+            status=response.status_code,
+            # Bytes read from the socket, i.e. compressed size
+            bytes_received=response.raw.tell() if response.raw is not None else len(response.content),
+            latency_ms=(time.perf_counter() - started) * 1000,
+            retries=retries
+        )
+        with self._lock:
+            self.records.append(record)
+            self._totals['requests'] += 1
+            self._totals['bytes'] += record.bytes_received
+            self._totals['retries'] += retries
+            self._totals['max_ms'] = max(self._totals['max_ms'], record.latency_ms)
@@ -1,6 +1,8 @@
-"""URL parsing components"""
+"""URL, frame and template parsing components"""
 
 from .url_parser import GrafanaURLParser, GrafanaDashboardContext
+from .frame_parser import StreamingFrameParser, StreamedQueryResult
+from .template_engine import TemplateEngine
 
-__all__ = ['GrafanaURLParser', 'GrafanaDashboardContext']
+__all__ = ['GrafanaURLParser', 'GrafanaDashboardContext', 'StreamingFrameParser', 'StreamedQueryResult', 'TemplateEngine']
 
@@ -0,0 +1,345 @@
+"""Grafana dashboard variable interpolation"""
+
+import re
+import json
+from urllib.parse import quote
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from .url_parser import GrafanaDashboardContext
+
+
+# $var, [[var]], [[var:format]], ${var}, ${var.field}, ${var:format}, as
+# matched by Grafana's template service; names are matched greedily, so
+# $app never matches the beginning of $application
+_VARIABLE = re.compile(
+    r'\$(\w+)'
+    r'|\[\[(\w+?)(?::(\w+))?\]\]'
+    r'|\$\{(\w+)(?:\.[^:^}]+)?(?::([^}]+))?\}'
+)
+
+ALL_VALUE = '$__all'
+# Substituted for "All" when neither a custom all value nor the options
+# of the variable are known
+DEFAULT_ALL_PATTERN = '.*'
+
+# A compiled template: literal text and (variable, format) placeholders
+_Segment = Union[str, Tuple[str, Optional[str]]]
+
+
+def _escape_regex(value: str) -> str:
+    """Escape a value the way Grafana does inside regular expressions"""
+    return re.sub(r'[\\^$*+?.()|{}\[\]/]', lambda match: '\\' + match.group(0), value)
+
+
+def _escape_lucene(value: str) -> str:
+    """Escape Lucene special characters"""
+    return re.sub(r'([+\-=&|><!(){}\[\]^"~*?:\\/ ])', r'\\\1', value)
+
+
+def _format_regex(name: str, values: List[str]) -> str:
+    escaped = [_escape_regex(value) for value in values]
+    return escaped[0] if len(escaped) == 1 else f"({'|'.join(escaped)})"
+
+
+def _format_glob(name: str, values: List[str]) -> str:
+    return values[0] if len(values) == 1 else f"{{{','.join(values)}}}"
+
+
+def _format_lucene(name: str, values: List[str]) -> str:
+    if len(values) == 1:
+        return _escape_lucene(values[0])
+    return f"({' OR '.join(chr(34) + _escape_lucene(value) + chr(34) for value in values)})"
+
+
+def _format_distributed(name: str, values: List[str]) -> str:
+    return ','.join([values[0]] + [f"{name}={value}" for value in values[1:]])
+
+
+# Grafana's ${var:format} modifiers, applied to every value of a variable
+FORMATS: Dict[str, Callable[[str, List[str]], str]] = {
+    'raw': lambda name, values: ','.join(values),
+    'text': lambda name, values: ' + '.join(values),
+    'csv': lambda name, values: ','.join(values),
+    'pipe': lambda name, values: '|'.join(values),
+    'regex': _format_regex,
+    'glob': _format_glob,
+    'json': lambda name, values: json.dumps(values[0] if len(values) == 1 else values),
+    'lucene': _format_lucene,
+    'distributed': _format_distributed,
+    'doublequote': lambda name, values: ','.join('"' + value.replace('"', '\\"') + '"' for value in values),
+    'singlequote': lambda name, values: ','.join("'" + value.replace("'", "\\'") + "'" for value in values),
+    'sqlstring': lambda name, values: ','.join("'" + value.replace("'", "''") + "'" for value in values),
+    'percentencode': lambda name, values: quote(','.join(values), safe=''),
+    'queryparam': lambda name, values: '&'.join(f"var-{name}={quote(value, safe='')}" for value in values),
+}
+
+
+class TemplateEngine:
+    """
+    Substitute dashboard variables in queries, titles and datasources
+    
+    Every distinct string is parsed once into literal text and variable
+    placeholders, and every (variable, format) pair is formatted once, so
+    rendering the targets of a large dashboard is a lookup and a join per
+    string. Substitution is a single pass: substituted values are never
+    scanned for further variables.
+    
+    Without a format, a single value is substituted as is and several
+    values (multi-value or "All" variables) as a regex alternation
+    "(a|b)", the form InfluxDB and Prometheus queries expect; values of
+    variables defined as multi-value or "include All" are regex-escaped.
+    "All" expands to the custom all value of the variable, or to all of
+    its options, or to ".*" when neither is known. Unknown variables and
+    Grafana macros such as $__interval are left for the datasource.
+    """
+    
+    def __init__(
+        self,
+        variables: Dict[str, List[str]],
+        definitions: Optional[List[Dict[str, Any]]] = None,
+        builtins: Optional[Dict[str, str]] = None
+    ):
+        """
+        Initialize template engine
+        
+        Args:
+            variables: Values of each dashboard variable, as in the URL
+                (var-host=a&var-host=b)
+            definitions: Dashboard templating list ("templating.list"),
+                used for "All" options, custom all values and multi-value
+                escaping
+            builtins: Variables substituted verbatim regardless of format,
+                e.g. macros a datasource client expands itself
+        """
+        self._variables = {name: list(values) for name, values in variables.items()}
+        self._builtins = dict(builtins or {})
+        self._definitions: Dict[str, Dict[str, Any]] = {}
+        self._templates: Dict[str, List[_Segment]] = {}
+        self._formatted: Dict[Tuple[str, Optional[str]], str] = {}
+        if definitions:
+            self.set_definitions(definitions)
+    
+    @classmethod
+    def from_context(cls, context: GrafanaDashboardContext) -> 'TemplateEngine':
+        """Template engine for the variables of a parsed dashboard URL"""
+        return cls(context.variable_values or {name: [value] for name, value in context.variables.items()})
+    
+    def with_builtins(self, builtins: Dict[str, str]) -> 'TemplateEngine':
+        """Copy of this engine that also substitutes builtins"""
+        engine = TemplateEngine(self._variables, builtins={**self._builtins, **builtins})
+        engine._definitions = self._definitions
+        return engine
+    
+    def set_definitions(self, definitions: List[Dict[str, Any]]) -> None:
+        """
+        Use the variable definitions of a dashboard
+        
+        Args:
+            definitions: Dashboard templating list ("templating.list")
+        """
+        self._definitions = {
+            definition['name']: definition
+            for definition in definitions
+            if definition.get('name')
+        }
+        self._formatted = {}
+    
+    def values(self, name: str) -> Optional[List[str]]:
+        """
+        Values a variable stands for, with "All" expanded to its options
+        
+        Returns:
+            Values, or None if the variable is unknown or "All" cannot be
+            expanded because its options are unknown
+        """
+        values = self._variables.get(name)
+        if values is None or ALL_VALUE not in values:
+            return values
+        
+        options = [
+            str(option.get('value'))
+            for option in self._definitions.get(name, {}).get('options', [])
+            if option.get('value') not in (None, ALL_VALUE)
+        ]
+        return options or None
+    
+    def render(self, obj: Any) -> Any:
+        """
+        Substitute variables in every string of a query, panel or list
+        
+        Args:
+            obj: String or JSON-like structure
+            
+        Returns:
+            Copy of obj with variables substituted; strings without
+            variables and non-string values are shared, not copied
+        """
+        if isinstance(obj, str):
+            return self.render_text(obj)
+        if isinstance(obj, dict):
+            return {key: self.render(value) for key, value in obj.items()}
+        if isinstance(obj, list):
+            return [self.render(value) for value in obj]
+        return obj
+    
+    def render_text(self, text: str) -> str:
+        """Substitute variables in a string"""
+        if '$' not in text and '[[' not in text:
+            return text
+        
+        segments = self._templates.get(text)
+        if segments is None:
+            segments = self._templates[text] = self._compile(text)
+        if len(segments) == 1 and isinstance(segments[0], str):
+            return text
+        
+        parts = []
+        for segment in segments:
+            if isinstance(segment, str):
+                parts.append(segment)
+                continue
+            
+            value = self._formatted.get(segment)
+            if value is None:
+                value = self._formatted[segment] = self._format(*segment)
+            parts.append(value)
+        
+        return ''.join(parts)
+    
+    def expand_repeats(self, panels: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Expand panels and rows repeated by a variable, as Grafana does
+        
+        A repeated panel becomes one panel per value of its variable, a
+        repeated row one row per value, with its panels (nested in a
+        collapsed row or following an expanded one). Each copy has the
+        variable substituted in its title, targets and datasource and
+        records it in scopedVars; the first copy keeps the original ids,
+        later copies get new ones. Copies saved by older Grafana versions
+        (repeatPanelId) are dropped and generated again.
+        
+        Args:
+            panels: Top-level panels of the dashboard JSON
+            
+        Returns:
+            Panels with repeats expanded (panels itself when nothing
+            repeats)
+        """
+        nested_panels = [nested for panel in panels for nested in panel.get('panels', [])]
+        if not any(panel.get('repeat') or panel.get('repeatPanelId') for panel in panels + nested_panels):
+            return panels
+        
+        ids = [panel.get('id') or 0 for panel in panels + nested_panels]
+        next_id = [max(ids, default=0) + 1]
+        
+        def new_id() -> int:
+            next_id[0] += 1
+            return next_id[0] - 1
+        
+        # Group the top level into rows: (row panel or None, panels following it)
+        groups: List[Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]] = [(None, [])]
+        for panel in panels:
+            if panel.get('repeatPanelId'):
+                continue
+            if panel.get('type') == 'row':
+                groups.append((panel, []))
+            else:
+                groups[-1][1].append(panel)
+        
+        expanded = []
+        for row, row_panels in groups:
+            if row is None:
+                expanded.extend(self._expand_panels(row_panels, new_id))
+                continue
+            
+            nested = [panel for panel in row.get('panels', []) if not panel.get('repeatPanelId')]
+            if not self._repeats(row):
+                expanded.append({**row, 'panels': self._expand_panels(nested, new_id)} if 'panels' in row else row)
+                expanded.extend(self._expand_panels(row_panels, new_id))
+                continue
+            
+            name = row['repeat']
+            for position, value in enumerate(self.values(name)):
+                copy_id = new_id if position else lambda: None
+                row_copy = self._repeat_copy(row, name, value, copy_id())
+                if 'panels' in row:
+                    row_copy['panels'] = self._expand_panels(
+                        [self._repeat_copy(panel, name, value, copy_id()) for panel in nested], new_id
+                    )
+                expanded.append(row_copy)
+                expanded.extend(self._expand_panels(
+                    [self._repeat_copy(panel, name, value, copy_id()) for panel in row_panels], new_id
+                ))
+        
+        return expanded
+    
+    def _expand_panels(self, panels: List[Dict[str, Any]], new_id: Callable[[], int]) -> List[Dict[str, Any]]:
+        """Expand the repeated panels of one row"""
+        expanded = []
+        for panel in panels:
+            if not self._repeats(panel):
+                expanded.append(panel)
+                continue
+            name = panel['repeat']
+            for position, value in enumerate(self.values(name)):
+                expanded.append(self._repeat_copy(panel, name, value, new_id() if position else None))
+        return expanded
+    
+    def _repeats(self, panel: Dict[str, Any]) -> bool:
+        """Whether a panel repeats by a variable whose values are known"""
+        return bool(panel.get('repeat')) and bool(self.values(panel['repeat']))
+    
+    def _repeat_copy(
+        self,
+        panel: Dict[str, Any],
+        name: str,
+        value: str,
+        panel_id: Optional[int]
+    ) -> Dict[str, Any]:
+        """Copy of a panel with one value of a repeat variable substituted"""
+        # Without definitions the value is substituted as is, also in titles
+        copy = TemplateEngine({name: [value]}).render(panel)
+        copy['scopedVars'] = {**panel.get('scopedVars', {}), name: {'text': value, 'value': value}}
+        if panel_id is not None:
+            copy['id'] = panel_id
+            copy['repeatPanelId'] = panel.get('id')
+        return copy
+    
+    def _compile(self, text: str) -> List[_Segment]:
+        """Split text into literal parts and (variable, format) placeholders"""
+        segments: List[_Segment] = []
+        position = 0
+        for match in _VARIABLE.finditer(text):
+            name = match.group(1) or match.group(2) or match.group(4)
+            if name not in self._variables and name not in self._builtins:
+                continue
+            if match.start() > position:
+                segments.append(text[position:match.start()])
+            segments.append((name, match.group(3) or match.group(5)))
+            position = match.end()
+        if position < len(text) or not segments:
+            segments.append(text[position:])
+        return segments
+    
+    def _format(self, name: str, format_name: Optional[str]) -> str:
+        """Value of a variable in the given format"""
+        if name in self._builtins:
+            return self._builtins[name]
+        
+        definition = self._definitions.get(name, {})
+        values = self._variables[name]
+        if ALL_VALUE in values:
+            if definition.get('allValue'):
+                return definition['allValue']
+            values = self.values(name)
+            if values is None:
+                return DEFAULT_ALL_PATTERN
+        
+        if format_name:
+            formatter = FORMATS.get(format_name.split(':')[0])
+            return formatter(name, values) if formatter else ','.join(values)
+        
+        if len(values) > 1:
+            return _format_regex(name, values)
+        if definition.get('multi') or definition.get('includeAll'):
+            return _escape_regex(values[0])
+        return values[0]
@@ -1,9 +1,10 @@
 """Grafana dashboard URL parser"""
 
+import re
 from urllib.parse import urlparse, parse_qs
-from datetime import datetime
-from dataclasses import dataclass
-from typing import Dict
+from datetime import datetime, timedelta, timezone
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
 
 
 @dataclass
@@ -17,6 +18,16 @@ class GrafanaDashboardContext:
     timezone: str
     variables: Dict[str, str]
     raw_url: str
+    # True when the range ends relative to now (e.g. to=now), i.e. still moving
+    time_to_relative: bool = False
+    # Every value of each variable (var-host=a&var-host=b); variables holds the first
+    variable_values: Dict[str, List[str]] = field(default_factory=dict)
+
+
+# Relative Grafana times: now, now-15m, now+1h
+_RELATIVE_TIME = re.compile(r'^now(?:([+-])(\d+)([smhdw]))?$')
+_UNIT_SECONDS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+_UTC = timezone.utc
 
 
 class GrafanaURLParser:
@@ -37,17 +48,12 @@ class GrafanaURLParser:
         
         # Extract base URL
         base_url = f"{parsed.scheme}://{parsed.netloc}"
+        dashboard_uid = self.parse_dashboard_uid(dashboard_url)
         
-        # Extract dashboard UID from path: /d/{uid}/{slug} or /d/{uid}
-        path_parts = parsed.path.strip('/').split('/')
-        if len(path_parts) >= 2 and path_parts[0] == 'd':
-            dashboard_uid = path_parts[1]
-        else:
-            raise ValueError(f"Invalid dashboard URL format: {dashboard_url}")
-        
-        # Extract time range
-        time_from = self._parse_time(params.get('from', [''])[0])
-        time_to = self._parse_time(params.get('to', [''])[0])
+        # Extract time range, relative times resolved against one "now"
+        now = datetime.now(_UTC)
+        time_from = self._parse_time(params.get('from', [''])[0], now)
+        time_to = self._parse_time(params.get('to', [''])[0], now)
         
         # Extract organization ID
         org_id = params.get('orgId', ['1'])[0]
@@ -56,11 +62,12 @@ class GrafanaURLParser:
         timezone = params.get('timezone', ['browser'])[0]
         
         # Extract all variables (parameters starting with 'var-')
-        variables = {
-            key.replace('var-', ''): value[0]
+        variable_values = {
+            key.replace('var-', ''): value
             for key, value in params.items()
             if key.startswith('var-')
         }
+        variables = {name: values[0] for name, values in variable_values.items()}
         
         return GrafanaDashboardContext(
             base_url=base_url,
@@ -70,14 +77,49 @@ class GrafanaURLParser:
             time_to=time_to,
             timezone=timezone,
             variables=variables,
-            raw_url=dashboard_url
+            raw_url=dashboard_url,
+            time_to_relative=params.get('to', [''])[0].startswith('now'),
+            variable_values=variable_values
         )
     
-    def _parse_time(self, time_str: str) -> datetime:
-        """Parse Grafana time format to datetime"""
+    def parse_dashboard_uid(self, dashboard_url: str) -> str:
+        """
+        Extract the dashboard UID of a URL, which needs no time range
+        
+        Args:
+            dashboard_url: Grafana dashboard URL
+            
+        Returns:
+            Dashboard UID
+        """
+        # Dashboard path: /d/{uid}/{slug} or /d/{uid}
+        path_parts = urlparse(dashboard_url).path.strip('/').split('/')
+        if len(path_parts) < 2 or path_parts[0] != 'd':
+            raise ValueError(f"Invalid dashboard URL format: {dashboard_url}")
+        return path_parts[1]
+    
+    def _parse_time(self, time_str: str, now: Optional[datetime] = None) -> datetime:
+        """
+        Parse Grafana time format to datetime
+        
+        Supports ISO timestamps, epoch milliseconds (as in Grafana links)
+        and times relative to now such as "now" or "now-1h".
+        """
         if not time_str:
             raise ValueError("Time parameter is missing")
         
+        relative = _RELATIVE_TIME.match(time_str)
+        if relative:
+            now = now or datetime.now(_UTC)
+            sign, amount, unit = relative.groups()
+            if not sign:
+                return now
+            offset = timedelta(seconds=int(amount) * _UNIT_SECONDS[unit])
+            return now - offset if sign == '-' else now + offset
+        
+        if time_str.isdigit():
+            return datetime.fromtimestamp(int(time_str) / 1000, tz=_UTC)
+        
         # Handle ISO format: 2025-11-17T21:54:08.137Z
         try:
             if time_str.endswith('Z'):
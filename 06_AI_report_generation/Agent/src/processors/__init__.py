@@ -1,6 +1,31 @@
 """Data processing components"""
 
-from .data_processor import DataProcessor, PanelData
+from importlib import import_module
 
-__all__ = ['DataProcessor', 'PanelData']
+from .data_processor import DataProcessor, PanelData, SeriesColumns
+from .statistics import compute_series_statistics
+from .downsampling import lttb
+from .sketches import LatencySketch
+from .aggregation import SketchReducer, series_host
+from .anomaly_detection import Anomaly, AnomalyDetector
 
+# JTL analysis and live mode are opt-in
+_LAZY_EXPORTS = {
+    'JTLAnalyzer': '.jtl_analyzer',
+    'LabelStats': '.jtl_analyzer',
+    'LiveAggregator': '.live_aggregator',
+    'RunningStats': '.live_aggregator',
+}
+
+__all__ = [
+    'DataProcessor', 'PanelData', 'SeriesColumns', 'compute_series_statistics', 'lttb',
+    'LatencySketch', 'JTLAnalyzer', 'LabelStats', 'SketchReducer', 'series_host',
+    'LiveAggregator', 'RunningStats', 'Anomaly', 'AnomalyDetector'
+]
+
+
+def __getattr__(name):
+    """Import optional subsystems on first access"""
+    if name in _LAZY_EXPORTS:
+        return getattr(import_module(_LAZY_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
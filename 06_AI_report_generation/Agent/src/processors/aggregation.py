@@ -0,0 +1,166 @@
+"""Mergeable aggregation of series across hosts"""
+
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .sketches import LatencySketch
+
+
+# Frame labels identifying the JMeter slave (or host) a series comes from
+HOST_LABELS = ('hostname', 'host', 'slave', 'instance', 'pod')
+
+# Fewer sketches than this are merged in-process even with a pool
+DEFAULT_MIN_PARALLEL = 16
+
+
+def series_host(labels: Dict[str, str], position: int) -> str:
+    """
+    Name the host of a series from its frame labels
+    
+    Args:
+        labels: Frame field labels
+        position: Position of the series within its refId, used when the
+            series has no labels
+            
+    Returns:
+        Host label value, all labels as "key=value" pairs, or "series N"
+    """
+    return _host_label(labels) or _label_text(labels) or f"series {position + 1}"
+
+
+def series_entries(labels: List[Dict[str, str]]) -> Dict[str, Dict[str, List[int]]]:
+    """
+    Group the series of one refId into metric entries
+    
+    Series that differ only by a host label (one per JMeter slave or host)
+    form one entry with a host each. Any other series, e.g. one per JMeter
+    transaction, is an entry of its own.
+    
+    Args:
+        labels: Frame labels of every series of the refId
+        
+    Returns:
+        {entry name: {host: positions of its series}}, in first-seen order
+    """
+    entries: Dict[str, Dict[str, List[int]]] = {}
+    for position, series_labels in enumerate(labels):
+        host = _host_label(series_labels)
+        if host is None:
+            name = _label_text(series_labels) or f"series {position + 1}"
+            host = name
+        else:
+            name = _label_text({k: v for k, v in series_labels.items() if k not in HOST_LABELS}) or 'all hosts'
+        entries.setdefault(name, {}).setdefault(host, []).append(position)
+    return entries
+
+
+def entry_key(ref_id: str, name: str, entries: int) -> str:
+    """Metrics key of an entry: the refId, with the entry name when it has several"""
+    return f"{ref_id} {name}" if entries > 1 else ref_id
+
+
+def build_sketch(values: np.ndarray) -> LatencySketch:
+    """Sketch of the values of one series"""
+    sketch = LatencySketch()
+    sketch.add(values)
+    return sketch
+
+
+def merge_sketches(left: LatencySketch, right: LatencySketch) -> LatencySketch:
+    """Merge two sketches into a new one (one node of the reduction tree)"""
+    return left.copy().merge(right)
+
+
+class SketchReducer:
+    """
+    Build and merge series sketches, optionally across a process pool
+    
+    Merging is a pairwise tree reduction in log2(n) rounds. Merges are
+    cheap array sums, so everything runs in-process by default; spawning
+    and pickling only pay off for very long series on many cores.
+    """
+    
+    def __init__(self, workers: int = 1, min_parallel: int = DEFAULT_MIN_PARALLEL):
+        """
+        Initialize reducer
+        
+        Args:
+            workers: Processes of the pool, 1 keeps everything in-process
+            min_parallel: Minimum number of sketches to use the pool for
+        """
+        self._workers = max(1, workers)
+        self._min_parallel = min_parallel
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+    
+    def build(self, value_arrays: List[np.ndarray]) -> List[LatencySketch]:
+        """
+        Sketch every series
+        
+        Args:
+            value_arrays: Values of every series
+            
+        Returns:
+            One sketch per series, in the same order
+        """
+        executor = self._pool(len(value_arrays))
+        if executor is None:
+            return [build_sketch(values) for values in value_arrays]
+        return list(executor.map(build_sketch, value_arrays))
+    
+    def reduce(self, sketches: List[LatencySketch]) -> LatencySketch:
+        """
+        Merge sketches into one
+        
+        Returns:
+            Merged sketch (an empty sketch if none were given)
+        """
+        if not sketches:
+            return LatencySketch()
+        
+        while len(sketches) > 1:
+            executor = self._pool(len(sketches))
+            lefts, rights = sketches[0::2], sketches[1::2]
+            odd = [lefts.pop()] if len(lefts) > len(rights) else []
+            
+            if executor is None:
+                sketches = [merge_sketches(left, right) for left, right in zip(lefts, rights)] + odd
+            else:
+                sketches = list(executor.map(merge_sketches, lefts, rights)) + odd
+        
+        return sketches[0]
+    
+    def close(self) -> None:
+        """Shut the process pool down"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+    
+    def _pool(self, size: int) -> Optional[ProcessPoolExecutor]:
+        """Process pool for a job of the given size, None to run in-process"""
+        if self._workers == 1 or size < self._min_parallel:
+            return None
+        
+        with self._lock:
+            if self._executor is None:
+                # Spawned workers do not inherit the locks of running threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self._workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+
+def _host_label(labels: Dict[str, str]) -> Optional[str]:
+    """Value of the first host label present, None if there is none"""
+    return next((labels[key] for key in HOST_LABELS if labels.get(key)), None)
+
+
+def _label_text(labels: Dict[str, str]) -> str:
+    """Labels as sorted "key=value" pairs"""
+    return ",".join(f"{key}={value}" for key, value in sorted(labels.items()))
@@ -0,0 +1,306 @@
+"""Vectorized anomaly and change-point detection on panel series"""
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .aggregation import series_host
+
+if TYPE_CHECKING:
+    from .data_processor import SeriesColumns
+
+
+DEFAULT_WINDOW = 30
+DEFAULT_Z_THRESHOLD = 5.0
+DEFAULT_CUSUM_DRIFT = 1.0
+DEFAULT_CUSUM_THRESHOLD = 8.0
+DEFAULT_MIN_SHIFT = 2.0
+DEFAULT_MIN_POINTS = 20
+DEFAULT_MAX_PER_SERIES = 5
+
+# MAD of successive differences to standard deviation of normally
+# distributed noise (1.4826 / sqrt(2))
+DIFF_MAD_SCALE = 1.0484
+
+# Standardized values are clipped before CUSUM, so a single outlier
+# cannot raise a change-point alarm on its own
+CUSUM_CLIP = 4.0
+
+
+@dataclass
+class Anomaly:
+    """Flagged interval of a series"""
+    ref_id: str
+    kind: str
+    start_ms: float
+    end_ms: float
+    value: float
+    expected: float
+    score: float
+    host: Optional[str] = None
+    
+    def describe(self) -> str:
+        """
+        One-line description for prompt and report
+        
+        Spikes and dips give their peak against the rolling mean, level
+        shifts the new level against the previous one.
+        """
+        start, end = _clock(self.start_ms), _clock(self.end_ms)
+        series = f"{self.ref_id} on {self.host}" if self.host else self.ref_id
+        if self.kind == 'level_shift':
+            return (
+                f"level shift {start}-{end} {series}: {self.expected:.4g} -> {self.value:.4g} "
+                f"({self.score:.1f} sigma)"
+            )
+        span = start if start == end else f"{start}-{end}"
+        return f"{self.kind} {span} {series}: {self.value:.4g} vs {self.expected:.4g} (z {self.score:.1f})"
+
+
+class AnomalyDetector:
+    """
+    Flag spikes, dips and level shifts in time series
+    
+    Spikes and dips come from a rolling z-score, level shifts from one
+    two-sided CUSUM pass confirmed by the medians around each alarm.
+    """
+    
+    def __init__(
+        self,
+        window: int = DEFAULT_WINDOW,
+        z_threshold: float = DEFAULT_Z_THRESHOLD,
+        cusum_drift: float = DEFAULT_CUSUM_DRIFT,
+        cusum_threshold: float = DEFAULT_CUSUM_THRESHOLD,
+        min_shift: float = DEFAULT_MIN_SHIFT,
+        min_points: int = DEFAULT_MIN_POINTS,
+        max_per_series: int = DEFAULT_MAX_PER_SERIES
+    ):
+        """
+        Initialize detector
+        
+        Args:
+            window: Points of the trailing window and of a new level
+            z_threshold: Rolling z-score flagging a spike or dip
+            cusum_drift: CUSUM allowance in robust standard deviations
+            cusum_threshold: CUSUM alarm level in robust standard deviations
+            min_shift: Minimum level shift in robust standard deviations
+            min_points: Shorter series are not analyzed
+            max_per_series: Highest scoring anomalies kept per series
+        """
+        self._window = window
+        self._z_threshold = z_threshold
+        self._cusum_drift = cusum_drift
+        self._cusum_threshold = cusum_threshold
+        self._min_shift = min_shift
+        self._min_points = min_points
+        self._max_per_series = max_per_series
+    
+    def detect_panel(self, series: Dict[str, List['SeriesColumns']]) -> List[Anomaly]:
+        """
+        Detect anomalies in every series of a panel
+        
+        Args:
+            series: Columnar series per refId
+            
+        Returns:
+            Anomalies ordered by start time, tagged with the host when a
+            refId has several series
+        """
+        anomalies = []
+        for ref_id, columns in series.items():
+            for position, column in enumerate(columns):
+                host = series_host(column.labels, position) if len(columns) > 1 else None
+                anomalies += self.detect(column, host)
+        return sorted(anomalies, key=lambda anomaly: anomaly.start_ms)
+    
+    def detect(self, column: 'SeriesColumns', host: Optional[str] = None) -> List[Anomaly]:
+        """
+        Detect anomalies in a single series
+        
+        Args:
+            column: Series, NaN points are skipped
+            host: Host label attached to the anomalies
+            
+        Returns:
+            Highest scoring anomalies of the series
+        """
+        timestamps, values = column.timestamps, column.values
+        valid = ~np.isnan(values)
+        if not valid.all():
+            timestamps, values = timestamps[valid], values[valid]
+        if len(values) < self._min_points:
+            return []
+        
+        # Noise scale from successive differences is robust to both
+        # outliers and level shifts
+        differences = np.diff(values)
+        np.abs(differences, out=differences)
+        half = len(differences) // 2
+        differences.partition(half)
+        scale = float(differences[half]) * DIFF_MAD_SCALE or float(values.std())
+        if scale == 0:
+            return []
+        
+        # Trailing window means and deviations shared by both detectors
+        # (values are centered to keep the sum of squares accurate)
+        window = min(self._window, len(values) // 2)
+        center = float(values.mean())
+        centered = values - center
+        means, deviations = _trailing_moments(centered, window)
+        
+        shifts = self._shifts(timestamps, values, centered, means, window, scale)
+        
+        # The trailing window lags behind a level shift, so its first points
+        # read as a spike or dip; those are reported as the shift only
+        last = len(timestamps) - 1
+        settled = [
+            (shift.start_ms, timestamps[min(np.searchsorted(timestamps, shift.start_ms) + window, last)])
+            for shift in shifts
+        ]
+        anomalies = shifts + [
+            spike for spike in self._spikes(timestamps, centered, means, deviations, window, scale, center)
+            if not any(start <= spike.start_ms <= end for start, end in settled)
+        ]
+        for anomaly in anomalies:
+            anomaly.ref_id = column.ref_id
+            anomaly.host = host
+        
+        anomalies.sort(key=lambda anomaly: anomaly.score, reverse=True)
+        return anomalies[:self._max_per_series]
+    
+    def _spikes(
+        self,
+        timestamps: np.ndarray,
+        centered: np.ndarray,
+        means: np.ndarray,
+        deviations: np.ndarray,
+        window: int,
+        scale: float,
+        center: float
+    ) -> List[Anomaly]:
+        """Runs of points beyond the rolling z-score threshold"""
+        z = centered[window:] - means
+        z /= np.maximum(deviations, scale)
+        
+        flagged = np.flatnonzero(np.abs(z) > self._z_threshold)
+        if not len(flagged):
+            return []
+        
+        # Consecutive flagged points of the same sign form one interval
+        signs = np.sign(z[flagged])
+        starts = np.concatenate(([0], np.flatnonzero((np.diff(flagged) > 1) | (np.diff(signs) != 0)) + 1))
+        ends = np.concatenate((starts[1:], [len(flagged)])) - 1
+        peaks = np.maximum.reduceat(np.abs(z[flagged]), starts)
+        
+        anomalies = []
+        for group in np.argsort(peaks)[::-1][:self._max_per_series]:
+            members = flagged[starts[group]:ends[group] + 1]
+            peak = members[np.argmax(np.abs(z[members]))]
+            anomalies.append(Anomaly(
+                ref_id='',
+                kind='spike' if z[peak] > 0 else 'dip',
+                start_ms=float(timestamps[window + members[0]]),
+                end_ms=float(timestamps[window + members[-1]]),
+                value=float(centered[window + peak] + center),
+                expected=float(means[peak] + center),
+                score=float(abs(z[peak]))
+            ))
+        return anomalies
+    
+    def _shifts(
+        self,
+        timestamps: np.ndarray,
+        values: np.ndarray,
+        centered: np.ndarray,
+        means: np.ndarray,
+        window: int,
+        scale: float
+    ) -> List[Anomaly]:
+        """Level shifts confirmed at two-sided CUSUM alarms"""
+        size = len(values)
+        
+        # Reference level of each point: the mean of the window ending one
+        # window earlier, so a new level keeps differing from it for a full
+        # window before the reference catches up. A single pass over the
+        # whole series then alarms once per shift.
+        reference = np.empty(size - window)
+        reference[:window] = means[0]
+        reference[window:] = means[:size - 2 * window]
+        z = centered[window:] - reference
+        z /= scale
+        np.clip(z, -CUSUM_CLIP, CUSUM_CLIP, out=z)
+        
+        totals = np.empty(len(z) + 1)
+        totals[0] = 0.0
+        np.cumsum(z, out=totals[1:])
+        drift = np.arange(len(totals)) * self._cusum_drift
+        
+        candidates = []
+        for direction in (1.0, -1.0):
+            sums = direction * totals
+            sums -= drift
+            # fmin equals minimum here (no NaN) and accumulates faster
+            lows = np.fmin.accumulate(sums)
+            above = sums - lows > self._cusum_threshold
+            alarms = np.flatnonzero(above[1:] & ~above[:-1]) + 1
+            if not len(alarms):
+                continue
+            # The shift began right after the last reset before each alarm,
+            # where the running minimum first took its value at the alarm
+            np.negative(lows, out=lows)
+            candidates.extend((window + np.searchsorted(lows, lows[alarms])).tolist())
+        
+        changes: List[int] = []
+        levels: List[Tuple[float, float]] = []
+        for position in sorted(set(candidates)):
+            if changes and position < changes[-1] + window:
+                continue
+            before = float(np.median(values[max(position - window, changes[-1] if changes else 0):position]))
+            after = float(np.median(values[position:position + window]))
+            if abs(after - before) >= self._min_shift * scale:
+                changes.append(position)
+                levels.append((before, after))
+        
+        anomalies = []
+        for number, (position, (before, after)) in enumerate(zip(changes, levels)):
+            end = changes[number + 1] - 1 if number + 1 < len(changes) else size - 1
+            anomalies.append(Anomaly(
+                ref_id='',
+                kind='level_shift',
+                start_ms=float(timestamps[position]),
+                end_ms=float(timestamps[end]),
+                value=after,
+                expected=before,
+                score=abs(after - before) / scale
+            ))
+        return anomalies
+
+
+def _trailing_moments(centered: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Mean and standard deviation of the window before every point
+    
+    Returns:
+        Arrays for the points from index window on, from cumulative sums
+    """
+    sums = np.empty(len(centered) + 1)
+    sums[0] = 0.0
+    np.cumsum(centered, out=sums[1:])
+    squares = np.empty(len(centered) + 1)
+    squares[0] = 0.0
+    np.cumsum(np.square(centered), out=squares[1:])
+    
+    means = sums[window:-1] - sums[:-window - 1]
+    means /= window
+    variances = squares[window:-1] - squares[:-window - 1]
+    variances /= window
+    variances -= means * means
+    np.maximum(variances, 0.0, out=variances)
+    return means, np.sqrt(variances, out=variances)
+
+
+def _clock(epoch_ms: float) -> str:
+    """Time of day (UTC) of an epoch millisecond"""
+    return datetime.fromtimestamp(epoch_ms / 1000, tz=timezone.utc).strftime('%H:%M:%S')
@@ -1,8 +1,51 @@
 """Data processor for Grafana panel data"""
 
-from dataclasses import dataclass
-from typing import Dict, List, Any, Optional
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional, Tuple, Union
+
+import numpy as np
+
 from ..parsers.url_parser import GrafanaDashboardContext
+from ..parsers.frame_parser import StreamedQueryResult
+from .statistics import compute_series_statistics, to_float_array
+from .downsampling import lttb, DEFAULT_THRESHOLD
+from .aggregation import SketchReducer, entry_key, series_entries
+from .anomaly_detection import Anomaly, AnomalyDetector
+
+
+class SeriesColumns:
+    """Columnar timestamp/value buffers of a single frame"""
+    
+    __slots__ = ('ref_id', 'timestamps', 'values', 'labels')
+    
+    def __init__(
+        self,
+        ref_id: str,
+        timestamps: np.ndarray,
+        values: np.ndarray,
+        labels: Optional[Dict[str, str]] = None
+    ):
+        """
+        Initialize series
+        
+        Args:
+            ref_id: Query refId the frame belongs to
+            timestamps: Epoch milliseconds as float64 array
+            values: Values as float64 array, NaN where missing
+            labels: Frame field labels (e.g. hostname)
+        """
+        self.ref_id = ref_id
+        self.timestamps = timestamps
+        self.values = values
+        self.labels = labels or {}
+    
+    def __len__(self) -> int:
+        return len(self.values)
+    
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the buffers"""
+        return self.timestamps.nbytes + self.values.nbytes
 
 
 @dataclass
@@ -13,15 +56,63 @@ class PanelData:
     panel_type: str
     metrics: Dict[str, Any]
     raw_data: Dict[str, Any]
+    latency_ms: Optional[float] = None
+    series: Dict[str, List[SeriesColumns]] = field(default_factory=dict)
+    row: Optional[str] = None
+    anomalies: List[Anomaly] = field(default_factory=list)
+    
+    def downsample(self, threshold: int = DEFAULT_THRESHOLD) -> Dict[str, List[SeriesColumns]]:
+        """
+        Reduce every series to representative points for trends and charts
+        
+        Args:
+            threshold: Maximum points kept per series
+            
+        Returns:
+            Downsampled series per refId (LTTB, NaN points dropped)
+        """
+        return {
+            ref_id: [
+                SeriesColumns(ref_id, *lttb(column.timestamps, column.values, threshold), labels=column.labels)
+                for column in columns
+            ]
+            for ref_id, columns in self.series.items()
+        }
 
 
 class DataProcessor:
     """Process and aggregate Grafana panel data"""
     
+    def __init__(
+        self,
+        retain_raw_data: bool = False,
+        downsample_points: Optional[int] = None,
+        reducer: Optional[SketchReducer] = None,
+        detector: Optional[AnomalyDetector] = None
+    ):
+        """
+        Initialize processor
+        
+        Args:
+            retain_raw_data: Keep the raw query results on PanelData. By
+                default only metrics and columnar series are kept once
+                metrics are computed.
+            downsample_points: Once metrics are computed from the full
+                series, keep only this many LTTB points per series
+            reducer: Sketch reducer combining the series of a refId across
+                hosts (default: in-process)
+            detector: Anomaly detector run on the full series before
+                downsampling (default: no detection)
+        """
+        self._retain_raw_data = retain_raw_data
+        self._downsample_points = downsample_points
+        self._reducer = reducer or SketchReducer(workers=1)
+        self._detector = detector
+    
     def process_panel_data(
         self,
         panel_config: Dict[str, Any],
-        raw_data: Dict[str, Any],
+        raw_data: Union[Dict[str, Any], StreamedQueryResult],
         context: GrafanaDashboardContext
     ) -> PanelData:
         """
@@ -29,7 +120,8 @@ class DataProcessor:
         
         Args:
             panel_config: Panel configuration from dashboard
-            raw_data: Raw query results from Grafana
+            raw_data: Raw query results from Grafana, or value buffers
+                decoded by the streaming parser
             context: Dashboard context
             
         Returns:
@@ -39,23 +131,111 @@ class DataProcessor:
         panel_title = panel_config.get('title', 'Untitled')
         panel_type = panel_config.get('type', 'unknown')
         
+        # Convert frames to columnar buffers
+        if isinstance(raw_data, StreamedQueryResult):
+            series = self._extract_streamed_series(raw_data)
+            query_errors = dict(raw_data.errors)
+            raw_data = {}
+        else:
+            series = self._extract_series(raw_data)
+            query_errors = {
+                ref_id: result['error']
+                for ref_id, result in raw_data.get('results', {}).items()
+                if result.get('error')
+            }
+        
         # Extract and calculate metrics
-        metrics = self._extract_metrics(raw_data, panel_type)
+        metrics = self._extract_metrics(series, panel_type)
         
-        return PanelData(
+        # Queries that failed without returning data keep their error
+        for ref_id, error in query_errors.items():
+            metrics.setdefault(ref_id, {'error': error})
+        
+        panel_data = PanelData(
             panel_id=panel_id,
             panel_title=panel_title,
             panel_type=panel_type,
             metrics=metrics,
-            raw_data=raw_data
+            raw_data=raw_data if self._retain_raw_data else {},
+            series=series
         )
+        
+        if self._detector:
+            panel_data.anomalies = self._detector.detect_panel(series)
+        
+        if self._downsample_points:
+            panel_data.series = panel_data.downsample(self._downsample_points)
+        
+        return panel_data
     
-    def _extract_metrics(self, raw_data: Dict[str, Any], panel_type: str) -> Dict[str, Any]:
+    def _extract_series(self, raw_data: Dict[str, Any]) -> Dict[str, List[SeriesColumns]]:
         """
-        Extract metrics from raw panel data
+        Extract columnar series from raw panel data
         
         Args:
             raw_data: Raw query results
+            
+        Returns:
+            Series per refId
+        """
+        series: Dict[str, List[SeriesColumns]] = {}
+        results = raw_data.get('results', {})
+        
+        # Iterate through query results
+        for ref_id, result in results.items():
+            frames = result.get('frames', [])
+            
+            for frame in frames:
+                data_values = frame.get('data', {}).get('values', [])
+                
+                if len(data_values) >= 2 and data_values[1]:
+                    # Typically: [timestamps, values]
+                    fields = frame.get('schema', {}).get('fields', [])
+                    series.setdefault(ref_id, []).append(SeriesColumns(
+                        ref_id=ref_id,
+                        timestamps=to_float_array(data_values[0]),
+                        values=to_float_array(data_values[1]),
+                        labels=fields[1].get('labels') if len(fields) >= 2 else None
+                    ))
+        
+        return series
+    
+    def _extract_streamed_series(self, streamed: StreamedQueryResult) -> Dict[str, List[SeriesColumns]]:
+        """
+        Extract columnar series from streamed value buffers
+        
+        Args:
+            streamed: Columns decoded by the streaming frame parser
+            
+        Returns:
+            Series per refId, viewing the parser buffers without copying
+        """
+        series: Dict[str, List[SeriesColumns]] = {}
+        
+        for ref_id, frames in streamed.frames.items():
+            frame_labels = streamed.labels.get(ref_id, [])
+            for index, columns in enumerate(frames):
+                if len(columns) >= 2 and len(columns[1]):
+                    series.setdefault(ref_id, []).append(SeriesColumns(
+                        ref_id=ref_id,
+                        timestamps=to_float_array(columns[0]),
+                        values=to_float_array(columns[1]),
+                        labels=frame_labels[index] if index < len(frame_labels) else None
+                    ))
+        
+        return series
+    
+    def _extract_metrics(self, series: Dict[str, List[SeriesColumns]], panel_type: str) -> Dict[str, Any]:
+        """
+        Extract metrics from panel series
+        
+        Series of a refId that differ only by a host label (one per JMeter
+        slave or host) get cluster-wide statistics from their merged
+        sketches, with per-host statistics under 'hosts'. Other series keep
+        their own statistics, keyed "refId labels" when a refId has several.
+        
+        Args:
+            series: Columnar series per refId
             panel_type: Type of panel (graph, stat, table, etc.)
             
         Returns:
@@ -64,35 +244,96 @@ class DataProcessor:
         metrics = {}
         
         try:
-            results = raw_data.get('results', {})
+            columns = [column for ref_columns in series.values() for column in ref_columns]
             
-            # Iterate through query results
-            for ref_id, result in results.items():
-                frames = result.get('frames', [])
-                
-                for frame in frames:
-                    schema = frame.get('schema', {})
-                    data_values = frame.get('data', {}).get('values', [])
-                    
-                    if len(data_values) >= 2:
-                        # Typically: [timestamps, values]
-                        timestamps = data_values[0]
-                        values = data_values[1]
-                        
-                        if values:
-                            # Calculate basic statistics
-                            numeric_values = [v for v in values if v is not None and isinstance(v, (int, float))]
-                            
-                            if numeric_values:
-                                metrics[ref_id] = {
-                                    'min': min(numeric_values),
-                                    'max': max(numeric_values),
-                                    'avg': sum(numeric_values) / len(numeric_values),
-                                    'count': len(numeric_values),
-                                    'latest': numeric_values[-1] if numeric_values else None
-                                }
+            # Calculate statistics for all series of the panel in bulk
+            stats_list = compute_series_statistics(
+                [(column.timestamps, column.values) for column in columns]
+            )
+            
+            ref_stats: Dict[str, List[Tuple[SeriesColumns, Dict[str, Any]]]] = {}
+            for column, stats in zip(columns, stats_list):
+                if stats is not None:
+                    ref_stats.setdefault(column.ref_id, []).append((column, stats))
+            
+            for ref_id, ref_series in ref_stats.items():
+                entries = series_entries([column.labels for column, _ in ref_series])
+                for name, hosts in entries.items():
+                    positions = [position for host_positions in hosts.values() for position in host_positions]
+                    metrics[entry_key(ref_id, name, len(entries))] = (
+                        ref_series[positions[0]][1] if len(positions) == 1
+                        else self._aggregate_hosts(ref_series, hosts)
+                    )
         except Exception as e:
             metrics['error'] = str(e)
         
         return metrics
+    
+    def _aggregate_hosts(
+        self,
+        ref_series: List[Tuple[SeriesColumns, Dict[str, Any]]],
+        hosts: Dict[str, List[int]]
+    ) -> Dict[str, Any]:
+        """
+        Combine the series of one entry into per-host and cluster statistics
+        
+        Args:
+            ref_series: Series of the refId with their exact statistics
+            hosts: Positions in ref_series of the series of each host
+            
+        Returns:
+            Cluster-wide statistics with per-host statistics under 'hosts'
+        """
+        positions = [position for host_positions in hosts.values() for position in host_positions]
+        sketches = dict(zip(positions, self._reducer.build([ref_series[p][0].values for p in positions])))
+        
+        host_stats = {
+            host: (
+                ref_series[host_positions[0]][1] if len(host_positions) == 1
+                else self._reducer.reduce([sketches[p] for p in host_positions]).summary()
+            )
+            for host, host_positions in hosts.items()
+        }
+        
+        cluster = self._reducer.reduce(list(sketches.values())).summary()
+        columns = [ref_series[p][0] for p in positions]
+        return {**cluster, **_time_statistics(columns, cluster), 'hosts': host_stats}
 
+
+def _time_statistics(columns: List[SeriesColumns], cluster: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Latest value, rate and time-weighted mean of series merged across hosts
+    
+    Args:
+        columns: Merged series
+        cluster: Merged statistics (count, sum, avg)
+        
+    Returns:
+        'latest' of the series reporting last, 'rate' as the sum per second
+        over the span of all series, and 'time_weighted_avg' weighted by
+        the time each series covers
+    """
+    latest_timestamp, latest = -np.inf, None
+    first_timestamp = np.inf
+    weighted_sum = covered = 0.0
+    
+    for column in columns:
+        valid = ~np.isnan(column.values)
+        indices = np.flatnonzero(valid)
+        if not len(indices):
+            continue
+        first_timestamp = min(first_timestamp, column.timestamps[indices[0]])
+        if column.timestamps[indices[-1]] >= latest_timestamp:
+            latest_timestamp, latest = column.timestamps[indices[-1]], float(column.values[indices[-1]])
+        
+        paired = valid[:-1] & valid[1:]
+        durations = np.diff(column.timestamps)[paired]
+        weighted_sum += float(((column.values[:-1][paired] + column.values[1:][paired]) / 2 * durations).sum())
+        covered += float(durations.sum())
+    
+    span = (latest_timestamp - first_timestamp) / 1000 if latest is not None else 0.0
+    return {
+        'latest': latest,
+        'rate': cluster.get('sum', 0.0) / span if span > 0 else None,
+        'time_weighted_avg': weighted_sum / covered if covered > 0 else cluster.get('avg'),
+    }
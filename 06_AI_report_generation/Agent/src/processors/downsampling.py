@@ -0,0 +1,61 @@
+"""Shape-preserving downsampling of time series"""
+
+from typing import Tuple
+
+import numpy as np
+
+
+DEFAULT_THRESHOLD = 500
+
+
+def lttb(timestamps: np.ndarray, values: np.ndarray, threshold: int = DEFAULT_THRESHOLD) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Downsample a series with Largest-Triangle-Three-Buckets
+    
+    Keeps the first and last points and, for every bucket in between, the
+    point forming the largest triangle with the previously kept point and
+    the average of the next bucket. Peaks and level shifts survive where a
+    plain average or stride would flatten them.
+    
+    Args:
+        timestamps: Epoch milliseconds, ascending
+        values: Values, NaN points are dropped first
+        threshold: Number of points to keep
+        
+    Returns:
+        Downsampled (timestamps, values)
+    """
+    valid = ~np.isnan(values)
+    x = np.asarray(timestamps, dtype=np.float64)[valid]
+    y = np.asarray(values, dtype=np.float64)[valid]
+    size = len(y)
+    
+    if threshold >= size or threshold < 3:
+        return x, y
+    
+    # Bucket boundaries for the points between the first and the last one
+    edges = np.linspace(1, size - 1, threshold - 1).astype(np.int64)
+    starts, ends = edges[:-1], edges[1:]
+    
+    # Averages of every bucket, computed at once; the last bucket's
+    # successor is the final point itself
+    counts = ends - starts
+    avg_x = np.append(np.add.reduceat(x[:size - 1], starts) / counts, x[-1])
+    avg_y = np.append(np.add.reduceat(y[:size - 1], starts) / counts, y[-1])
+    
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = size - 1
+    previous = 0
+    
+    for bucket, (start, end) in enumerate(zip(starts, ends)):
+        bucket_x = x[start:end]
+        bucket_y = y[start:end]
+        areas = np.abs(
+            (x[previous] - avg_x[bucket + 1]) * (bucket_y - y[previous])
+            - (x[previous] - bucket_x) * (avg_y[bucket + 1] - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    
+    return x[selected], y[selected]
@@ -0,0 +1,354 @@
+"""Streaming analyzer for JMeter JTL (CSV) result files"""
+
+import io
+import os
+import csv
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from operator import itemgetter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .data_processor import PanelData
+from .sketches import LatencySketch
+
+
+DEFAULT_CHUNK_BYTES = 8 * 1024 * 1024
+DEFAULT_RANGE_BYTES = 64 * 1024 * 1024
+
+# Columns used from a JTL file, and their positions in JMeter's default
+# layout for files written without a header line
+JTL_COLUMNS = ('timeStamp', 'elapsed', 'label', 'responseCode', 'success')
+DEFAULT_JTL_HEADER = (
+    'timeStamp', 'elapsed', 'label', 'responseCode', 'responseMessage', 'threadName',
+    'dataType', 'success', 'failureMessage', 'bytes', 'sentBytes', 'grpThreads',
+    'allThreads', 'URL', 'Latency', 'IdleTime', 'Connect'
+)
+
+
+@dataclass
+class LabelStats:
+    """Mergeable aggregates of the samples of one label"""
+    sketch: LatencySketch = field(default_factory=LatencySketch)
+    errors: int = 0
+    response_codes: Dict[str, int] = field(default_factory=dict)
+    first_timestamp: float = float('inf')
+    last_timestamp: float = float('-inf')
+    
+    def merge(self, other: 'LabelStats') -> 'LabelStats':
+        """Merge another label's aggregates into these"""
+        self.sketch.merge(other.sketch)
+        self.errors += other.errors
+        for code, count in other.response_codes.items():
+            self.response_codes[code] = self.response_codes.get(code, 0) + count
+        self.first_timestamp = min(self.first_timestamp, other.first_timestamp)
+        self.last_timestamp = max(self.last_timestamp, other.last_timestamp)
+        return self
+    
+    def metrics(self) -> Dict[str, object]:
+        """Latency summary with throughput, error rate and response codes"""
+        stats = self.sketch.summary()
+        count = self.sketch.count
+        duration = (self.last_timestamp - self.first_timestamp) / 1000
+        
+        stats['throughput'] = count / duration if duration > 0 else float(count)
+        stats['error_rate'] = self.errors / count if count else 0.0
+        stats['errors'] = self.errors
+        stats['response_codes'] = dict(sorted(self.response_codes.items(), key=lambda item: -item[1]))
+        return stats
+
+
+class JTLAnalyzer:
+    """
+    Summarize JMeter result files per sampler label in bounded memory
+    
+    The file is split into byte ranges analyzed by a process pool; every
+    range is read in fixed-size chunks whose samples are folded into
+    per-label sketches and counters, and range results are merged. Memory
+    is bounded by chunk size and label count, not by file size. Tab and
+    comma delimiters are detected from the first line. Chunks end between
+    records outside quotes; ranges start after the next newline, so files
+    with quoted newlines (e.g. multi-line failureMessage) are analyzed
+    again as a single range.
+    """
+    
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+        range_bytes: int = DEFAULT_RANGE_BYTES
+    ):
+        """
+        Initialize analyzer
+        
+        Args:
+            workers: Processes analyzing byte ranges (default: CPU count)
+            chunk_bytes: Bytes read and parsed at once
+            range_bytes: Bytes of the file assigned to one task
+        """
+        self._workers = workers or os.cpu_count() or 1
+        self._chunk_bytes = chunk_bytes
+        self._range_bytes = range_bytes
+    
+    def analyze(self, path: str) -> Dict[str, LabelStats]:
+        """
+        Aggregate a JTL file per label
+        
+        Args:
+            path: JTL file path (CSV, with or without header line)
+            
+        Returns:
+            Aggregates per label
+        """
+        delimiter, columns, data_start = self._read_layout(path)
+        size = os.path.getsize(path)
+        ranges = [
+            (start, min(start + self._range_bytes, size))
+            for start in range(data_start, size, self._range_bytes)
+        ]
+        
+        results: Dict[str, LabelStats] = {}
+        if len(ranges) <= 1 or self._workers == 1:
+            partials = [
+                _analyze_range(path, start, end, delimiter, columns, self._chunk_bytes, whole_file=len(ranges) == 1)
+                for start, end in ranges
+            ]
+        else:
+            with ProcessPoolExecutor(max_workers=min(self._workers, len(ranges))) as executor:
+                partials = list(executor.map(
+                    _analyze_range,
+                    *zip(*[(path, start, end, delimiter, columns, self._chunk_bytes) for start, end in ranges])
+                ))
+        
+        if any(partial is None for partial in partials):
+            partials = [_analyze_range(path, data_start, size, delimiter, columns, self._chunk_bytes, whole_file=True)]
+        
+        for partial in partials:
+            for label, stats in partial.items():
+                if label in results:
+                    results[label].merge(stats)
+                else:
+                    results[label] = stats
+        
+        return results
+    
+    def to_panel_data(self, label_stats: Dict[str, LabelStats]) -> List[PanelData]:
+        """
+        Convert label aggregates into report panels
+        
+        Returns:
+            One panel per label, plus an "All samples" panel merging every
+            label first
+        """
+        total = LabelStats()
+        for stats in label_stats.values():
+            total.merge(stats)
+        
+        panels = []
+        for index, (label, stats) in enumerate([('All samples', total)] + sorted(label_stats.items()), start=1):
+            panels.append(PanelData(
+                panel_id=-index,
+                panel_title=f"JTL: {label}",
+                panel_type='jtl',
+                metrics={'elapsed': stats.metrics()},
+                raw_data={},
+                row='JTL results'
+            ))
+        return panels
+    
+    def _read_layout(self, path: str) -> Tuple[str, Tuple[int, ...], int]:
+        """
+        Detect delimiter and positions of the used columns
+        
+        Returns:
+            (delimiter, column positions in JTL_COLUMNS order, byte offset
+            of the first sample line)
+        """
+        with open(path, 'rb') as file:
+            first_line = file.readline()
+        
+        text = first_line.decode('utf-8', errors='replace').rstrip('\r\n')
+        delimiter = '\t' if text.count('\t') >= text.count(',') else ','
+        header = next(csv.reader([text], delimiter=delimiter), [])
+        
+        if 'elapsed' in header and 'label' in header:
+            missing = [name for name in JTL_COLUMNS if name not in header]
+            if missing:
+                raise ValueError(f"JTL file lacks columns: {', '.join(missing)}")
+            return delimiter, tuple(header.index(name) for name in JTL_COLUMNS), len(first_line)
+        
+        return delimiter, tuple(DEFAULT_JTL_HEADER.index(name) for name in JTL_COLUMNS), 0
+
+
+def _analyze_range(
+    path: str,
+    start: int,
+    end: int,
+    delimiter: str,
+    columns: Tuple[int, ...],
+    chunk_bytes: int,
+    whole_file: bool = False
+) -> Optional[Dict[str, LabelStats]]:
+    """
+    Aggregate the sample lines starting within [start, end) of a file
+    
+    A line belongs to the range its first byte is in, so ranges can be
+    processed independently as long as no record holds a quoted newline.
+    
+    Args:
+        whole_file: The range starts at the first sample and ends at the
+            end of the file, so records with quoted newlines are parsed
+            
+    Returns:
+        Aggregates per label, None if the range holds (or may have started
+        inside) a quoted newline and the file must be analyzed whole
+    """
+    results: Dict[str, LabelStats] = {}
+    
+    with open(path, 'rb') as file:
+        if start and not whole_file:
+            # Skip the line owned by the previous range
+            file.seek(start - 1)
+            file.readline()
+        else:
+            file.seek(start)
+        
+        remainder = b''
+        while file.tell() < end or remainder:
+            position = file.tell()
+            block = file.read(min(chunk_bytes, max(end - position, 0))) if position < end else b''
+            
+            if not block:
+                # Finish the last line, which may extend past the range end
+                block = remainder + file.readline()
+                remainder = b''
+                if block.count(b'"') % 2 and not whole_file:
+                    return None
+            else:
+                block = remainder + block
+                cut, quoted_newlines = _record_boundary(block)
+                if quoted_newlines and not whole_file:
+                    return None
+                if cut == 0:
+                    remainder = block
+                    continue
+                block, remainder = block[:cut], block[cut:]
+            
+            if block.strip():
+                try:
+                    _aggregate_lines(block.decode('utf-8', errors='replace'), delimiter, columns, results)
+                except (ValueError, csv.Error):
+                    # Unparsable lines after a skipped quoted newline
+                    if start and not whole_file:
+                        return None
+                    raise
+    
+    return results
+
+
+def _record_boundary(block: bytes) -> Tuple[int, bool]:
+    """
+    Find where the last complete record of a block ends
+    
+    Returns:
+        Offset after the last newline outside quotes (0 if none), and
+        whether the block holds a newline inside quotes
+    """
+    if b'"' not in block:
+        return block.rfind(b'\n') + 1, False
+    
+    # Doubled quotes inside quoted fields keep the parity of the count
+    buffer = np.frombuffer(block, dtype=np.uint8)
+    quotes = np.flatnonzero(buffer == ord('"'))
+    newlines = np.flatnonzero(buffer == ord('\n'))
+    quoted = np.searchsorted(quotes, newlines) % 2 == 1
+    unquoted = newlines[~quoted]
+    return (int(unquoted[-1]) + 1 if len(unquoted) else 0), bool(quoted.any())
+
+
+def _aggregate_lines(
+    text: str,
+    delimiter: str,
+    columns: Tuple[int, ...],
+    results: Dict[str, LabelStats]
+) -> None:
+    """Parse a block of sample lines and fold it into per-label aggregates"""
+    picked = _split_columns(text, delimiter, columns)
+    if picked is None:
+        return
+    
+    timestamps, elapsed, labels, codes, success = picked
+    try:
+        timestamps = np.array(timestamps, dtype=np.float64)
+        elapsed = np.array(elapsed, dtype=np.float64)
+    except ValueError:
+        raise ValueError("JTL timeStamp and elapsed columns must be numeric (epoch milliseconds)")
+    
+    # Dictionary encoding through C-level map() beats sorting strings with
+    # np.unique and Python-level loops
+    label_ids = {label: index for index, label in enumerate(set(labels))}
+    label_index = np.fromiter(map(label_ids.__getitem__, labels), dtype=np.int64, count=len(labels))
+    code_ids = {code: index for index, code in enumerate(set(codes))}
+    code_index = np.fromiter(map(code_ids.__getitem__, codes), dtype=np.int64, count=len(codes))
+    failed = np.fromiter(map('true'.__ne__, success), dtype=bool, count=len(success))
+    
+    label_count, code_count = len(label_ids), len(code_ids)
+    code_counts = np.bincount(
+        label_index * code_count + code_index,
+        minlength=label_count * code_count
+    ).reshape(label_count, code_count)
+    error_counts = np.bincount(label_index, weights=failed, minlength=label_count)
+    ends = timestamps + elapsed
+    code_names = list(code_ids)
+    
+    order = np.argsort(label_index, kind='stable')
+    bounds = np.searchsorted(label_index[order], np.arange(label_count + 1))
+    
+    for position, label in enumerate(label_ids):
+        selected = order[bounds[position]:bounds[position + 1]]
+        stats = results.setdefault(label, LabelStats())
+        
+        stats.sketch.add(elapsed[selected])
+        stats.errors += int(error_counts[position])
+        stats.first_timestamp = min(stats.first_timestamp, float(timestamps[selected].min()))
+        stats.last_timestamp = max(stats.last_timestamp, float(ends[selected].max()))
+        for code_position in np.nonzero(code_counts[position])[0]:
+            code = code_names[code_position]
+            stats.response_codes[code] = stats.response_codes.get(code, 0) + int(code_counts[position, code_position])
+
+
+def _uniform_width(lines: str, delimiter: str) -> bool:
+    """Whether every line holds the same number of delimiters"""
+    buffer = np.frombuffer(lines.encode('utf-8'), dtype=np.uint8)
+    starts = np.concatenate(([0], np.flatnonzero(buffer == ord('\n')) + 1))
+    counts = np.add.reduceat((buffer == ord(delimiter)).view(np.uint8), starts, dtype=np.int64)
+    return bool(counts.min() == counts.max())
+
+
+def _split_columns(text: str, delimiter: str, columns: Tuple[int, ...]) -> Optional[List[List[str]]]:
+    """
+    Split a block of lines into the used columns
+    
+    Blocks without quoting whose lines all have the same field count are
+    split in one pass over the whole text; others (quoted fields, short or
+    ragged lines) go through the csv module, which keeps quoted newlines.
+    
+    Returns:
+        Values of every column in JTL_COLUMNS order, None if the block
+        holds no complete sample
+    """
+    lines = text.rstrip('\r\n')
+    
+    if '"' not in lines and _uniform_width(lines, delimiter):
+        flat = lines.replace('\r', '').replace('\n', delimiter).split(delimiter)
+        width = len(flat) // (lines.count('\n') + 1)
+        if width > max(columns):
+            return [flat[column::width] for column in columns]
+    
+    width = max(columns) + 1
+    getter = itemgetter(*columns)
+    picked = [getter(row) for row in csv.reader(io.StringIO(lines), delimiter=delimiter) if len(row) >= width]
+    if not picked:
+        return None
+    return [list(values) for values in zip(*picked)]
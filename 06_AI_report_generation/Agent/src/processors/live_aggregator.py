@@ -0,0 +1,208 @@
+"""Incremental aggregation of panel series for live reports"""
+
+import math
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .data_processor import PanelData
+from .sketches import LatencySketch
+from .statistics import PERCENTILES
+from .aggregation import entry_key, series_entries
+
+
+class RunningStats:
+    """
+    Running statistics of a series updated batch by batch
+    
+    Mean and variance use Welford's update, with batches combined by Chan's
+    parallel formula, so they stay numerically stable over long runs.
+    Percentiles come from a mergeable sketch within 1% of the exact value.
+    Memory does not grow with the number of points.
+    """
+    
+    def __init__(self):
+        """Initialize empty statistics"""
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.first_timestamp = math.inf
+        self.latest_timestamp = -math.inf
+        self.latest = math.nan
+        self.sketch = LatencySketch()
+    
+    def update(self, timestamps: np.ndarray, values: np.ndarray) -> int:
+        """
+        Add a batch of points, NaN values are skipped
+        
+        Args:
+            timestamps: Epoch milliseconds as float64 array
+            values: Values as float64 array
+            
+        Returns:
+            Number of values added
+        """
+        valid = ~np.isnan(values)
+        timestamps, values = timestamps[valid], values[valid]
+        if not len(values):
+            return 0
+        
+        batch_mean = float(values.mean())
+        self._combine(len(values), batch_mean, float(np.dot(values - batch_mean, values - batch_mean)))
+        self.sum += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.first_timestamp = min(self.first_timestamp, float(timestamps[0]))
+        if timestamps[-1] >= self.latest_timestamp:
+            self.latest_timestamp = float(timestamps[-1])
+            self.latest = float(values[-1])
+        self.sketch.add(values)
+        return len(values)
+    
+    def merge(self, other: 'RunningStats') -> 'RunningStats':
+        """
+        Merge another series' statistics into these
+        
+        Returns:
+            These statistics
+        """
+        if not other.count:
+            return self
+        self._combine(other.count, other.mean, other.m2)
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.first_timestamp = min(self.first_timestamp, other.first_timestamp)
+        if other.latest_timestamp >= self.latest_timestamp:
+            self.latest_timestamp = other.latest_timestamp
+            self.latest = other.latest
+        self.sketch.merge(other.sketch)
+        return self
+    
+    def metrics(self) -> Dict[str, Optional[float]]:
+        """Statistics in the shape of compute_series_statistics"""
+        if not self.count:
+            return {'count': 0}
+        
+        span = (self.latest_timestamp - self.first_timestamp) / 1000
+        stats = {
+            'min': self.min,
+            'max': self.max,
+            'avg': self.mean,
+            'count': self.count,
+            'latest': self.latest,
+            'stddev': math.sqrt(self.m2 / self.count),
+            'sum': self.sum,
+            'rate': self.sum / span if span > 0 else None,
+        }
+        for percentile in PERCENTILES:
+            stats[f'p{percentile}'] = self.sketch.quantile(percentile / 100)
+        return stats
+    
+    def _combine(self, count: int, mean: float, m2: float) -> None:
+        """Combine count, mean and sum of squared deviations of another batch"""
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+
+
+class LiveAggregator:
+    """
+    Fold panel data of successive time ranges into running statistics
+    
+    Every poll hands over the panels fetched for the new time range only;
+    their points are added to per-series running statistics and dropped.
+    Series are matched across polls by panel, refId, labels and host.
+    """
+    
+    def __init__(self):
+        """Initialize empty aggregator"""
+        self._panels: Dict[int, PanelData] = {}
+        # Running statistics per panel, refId, entry name and host
+        self._stats: Dict[int, Dict[str, Dict[str, Dict[str, RunningStats]]]] = {}
+        self.points = 0
+    
+    def ingest(self, panel_data_list: List[PanelData], until_ms: Optional[float] = None) -> int:
+        """
+        Add the points of newly fetched panel data
+        
+        Args:
+            panel_data_list: Processed panel data of the new time range
+            until_ms: Only points before this epoch millisecond are added
+            
+        Returns:
+            Number of points added
+        """
+        added = 0
+        for panel_data in panel_data_list:
+            if panel_data.panel_id not in self._panels:
+                self._panels[panel_data.panel_id] = PanelData(
+                    panel_id=panel_data.panel_id,
+                    panel_title=panel_data.panel_title,
+                    panel_type=panel_data.panel_type,
+                    metrics={},
+                    raw_data={},
+                    row=panel_data.row
+                )
+            panel_stats = self._stats.setdefault(panel_data.panel_id, {})
+            
+            for ref_id, columns in panel_data.series.items():
+                ref_stats = panel_stats.setdefault(ref_id, {})
+                for name, hosts in series_entries([column.labels for column in columns]).items():
+                    entry_stats = ref_stats.setdefault(name, {})
+                    for host, positions in hosts.items():
+                        stats = entry_stats.setdefault(host, RunningStats())
+                        for position in positions:
+                            timestamps, values = columns[position].timestamps, columns[position].values
+                            if until_ms is not None:
+                                before = timestamps < until_ms
+                                timestamps, values = timestamps[before], values[before]
+                            added += stats.update(timestamps, values)
+        
+        self.points += added
+        return added
+    
+    def panel_data(self) -> List[PanelData]:
+        """
+        Current statistics as report panels
+        
+        Returns:
+            Panels in first-seen order; series that differ only by host
+            get merged cluster statistics with per-host statistics under
+            'hosts' (see DataProcessor)
+        """
+        panels = []
+        for panel_id, panel in self._panels.items():
+            metrics = {}
+            for ref_id, entries in self._stats.get(panel_id, {}).items():
+                filled_entries = {
+                    name: {host: stats for host, stats in hosts.items() if stats.count}
+                    for name, hosts in entries.items()
+                }
+                filled_entries = {name: hosts for name, hosts in filled_entries.items() if hosts}
+                for name, filled in filled_entries.items():
+                    key = entry_key(ref_id, name, len(filled_entries))
+                    if len(filled) == 1:
+                        metrics[key] = next(iter(filled.values())).metrics()
+                        continue
+                    cluster = RunningStats()
+                    for stats in filled.values():
+                        cluster.merge(stats)
+                    metrics[key] = {
+                        **cluster.metrics(),
+                        'hosts': {host: stats.metrics() for host, stats in filled.items()}
+                    }
+            panels.append(PanelData(
+                panel_id=panel.panel_id,
+                panel_title=panel.panel_title,
+                panel_type=panel.panel_type,
+                metrics=metrics,
+                raw_data={},
+                row=panel.row
+            ))
+        return panels
@@ -0,0 +1,178 @@
+"""Mergeable latency sketches"""
+
+import math
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+
+# Buckets per sign: keys -4096..4095 cover magnitudes 1e-35..1e35 at 1%
+# relative accuracy; smaller magnitudes count as zero, larger ones land in
+# the last bucket (quantiles are still clamped to the exact min and max)
+DEFAULT_BUCKETS = 8192
+
+
+class LatencySketch:
+    """
+    Log-bucketed histogram with bounded relative error (DDSketch)
+    
+    Value v != 0 falls into key ceil(log(|v|) / log(gamma)) of the store of
+    its sign, with gamma = (1 + a) / (1 - a), so every quantile is returned
+    within relative accuracy a at any magnitude. Count, sum, sum of
+    squares, min and max are exact over all values.
+    """
+    
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY, buckets: int = DEFAULT_BUCKETS):
+        """
+        Initialize sketch
+        
+        Args:
+            relative_accuracy: Maximum relative error of quantiles
+            buckets: Number of buckets per sign, centered on key 0 (|v| = 1)
+        """
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._key_offset = buckets // 2
+        self.counts = np.zeros(buckets, dtype=np.int64)
+        # Allocated with the first negative value, most series have none
+        self.negative_counts: Optional[np.ndarray] = None
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.sum_squares = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+    
+    def add(self, values: np.ndarray) -> None:
+        """
+        Add values, NaN values are ignored
+        
+        Args:
+            values: Values as float64 array
+        """
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        
+        positive = values[values > 0]
+        negative = -values[values < 0]
+        tiny = 0
+        if len(positive):
+            counts, small = self._bincount(positive)
+            self.counts += counts
+            tiny += small
+        if len(negative):
+            if self.negative_counts is None:
+                self.negative_counts = np.zeros_like(self.counts)
+            counts, small = self._bincount(negative)
+            self.negative_counts += counts
+            tiny += small
+        
+        self.zero_count += len(values) - len(positive) - len(negative) + tiny
+        self.count += len(values)
+        self.sum += float(values.sum())
+        self.sum_squares += float(np.dot(values, values))
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+    
+    def copy(self) -> 'LatencySketch':
+        """Independent copy of this sketch"""
+        clone = LatencySketch.__new__(LatencySketch)
+        clone.__dict__.update(self.__dict__)
+        clone.counts = self.counts.copy()
+        if self.negative_counts is not None:
+            clone.negative_counts = self.negative_counts.copy()
+        return clone
+    
+    def merge(self, other: 'LatencySketch') -> 'LatencySketch':
+        """
+        Merge another sketch with the same accuracy into this one
+        
+        Returns:
+            This sketch
+        """
+        if other.relative_accuracy != self.relative_accuracy or len(other.counts) != len(self.counts):
+            raise ValueError("Cannot merge sketches with different accuracy or bucket count")
+        
+        self.counts += other.counts
+        if other.negative_counts is not None:
+            if self.negative_counts is None:
+                self.negative_counts = other.negative_counts.copy()
+            else:
+                self.negative_counts += other.negative_counts
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.sum_squares += other.sum_squares
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+    
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate a quantile
+        
+        Args:
+            q: Quantile in [0, 1]
+            
+        Returns:
+            Value within relative accuracy of the exact quantile, None if
+            the sketch is empty
+        """
+        if not self.count:
+            return None
+        
+        rank = q * (self.count - 1)
+        negative_count = int(self.negative_counts.sum()) if self.negative_counts is not None else 0
+        
+        if rank < negative_count:
+            # Negative values in ascending order: largest magnitude first
+            descending = self.negative_counts[::-1]
+            index = len(descending) - 1 - int(np.searchsorted(np.cumsum(descending), rank, side='right'))
+            estimate = -self._value(index)
+        elif rank < negative_count + self.zero_count:
+            estimate = 0.0
+        else:
+            rank -= negative_count + self.zero_count
+            estimate = self._value(int(np.searchsorted(np.cumsum(self.counts), rank, side='right')))
+        return min(max(estimate, self.min), self.max)
+    
+    def _bincount(self, magnitudes: np.ndarray) -> Tuple[np.ndarray, int]:
+        """Bucket counts of positive magnitudes and how many are too small to index"""
+        index = np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64) + self._key_offset
+        tiny = index < 0
+        index = index[~tiny]
+        np.clip(index, 0, len(self.counts) - 1, out=index)
+        return np.bincount(index, minlength=len(self.counts)), int(tiny.sum())
+    
+    def _value(self, index: int) -> float:
+        """Representative magnitude of a bucket"""
+        return 2 * self._gamma ** (index - self._key_offset) / (self._gamma + 1)
+    
+    def summary(self, percentiles=(50, 90, 95, 99)) -> Dict[str, Optional[float]]:
+        """
+        Summary statistics in the shape of compute_series_statistics
+        
+        Returns:
+            count, min, max, avg, sum, stddev and pNN percentiles
+        """
+        if not self.count:
+            return {'count': 0}
+        
+        avg = self.sum / self.count
+        variance = max(self.sum_squares / self.count - avg * avg, 0.0)
+        stats = {
+            'min': self.min,
+            'max': self.max,
+            'avg': avg,
+            'count': self.count,
+            'sum': self.sum,
+            'stddev': math.sqrt(variance),
+        }
+        for percentile in percentiles:
+            stats[f'p{percentile}'] = self.quantile(percentile / 100)
+        return stats
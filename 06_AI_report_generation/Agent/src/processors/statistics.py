@@ -0,0 +1,127 @@
+"""Vectorized statistics for Grafana time series"""
+
+import warnings
+from array import array
+from collections import defaultdict
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def to_float_array(values: Sequence[Any]) -> np.ndarray:
+    """
+    Convert frame values to a float array
+    
+    Args:
+        values: Column values from a Grafana frame or an array('d') buffer
+        
+    Returns:
+        Float array where None and non-numeric values are NaN
+    """
+    if isinstance(values, array) and values.typecode == 'd':
+        # Buffers from the streaming parser are viewed without copying
+        return np.frombuffer(values, dtype=np.float64)
+    
+    try:
+        return np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return np.array(
+            [v if isinstance(v, (int, float)) else np.nan for v in values],
+            dtype=np.float64
+        )
+
+
+def compute_series_statistics(
+    series: List[Tuple[Sequence[Any], Sequence[Any]]]
+) -> List[Optional[Dict[str, Any]]]:
+    """
+    Calculate statistics for many series at once
+    
+    Series of equal length are stacked into one 2D array so every statistic
+    is computed for the whole group in a single NumPy call.
+    
+    Args:
+        series: (timestamps in epoch ms, values) pairs
+        
+    Returns:
+        Statistics per series in input order, None for series without
+        numeric values
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(series)
+    groups: Dict[int, List[int]] = defaultdict(list)
+    
+    for index, (_, values) in enumerate(series):
+        if len(values):
+            groups[len(values)].append(index)
+    
+    for indices in groups.values():
+        timestamps = np.vstack([to_float_array(series[i][0]) for i in indices])
+        values = np.vstack([to_float_array(series[i][1]) for i in indices])
+        
+        for index, stats in zip(indices, _compute_stacked(timestamps, values)):
+            results[index] = stats
+    
+    return results
+
+
+def _compute_stacked(timestamps: np.ndarray, values: np.ndarray) -> List[Optional[Dict[str, Any]]]:
+    """Compute statistics row-wise over stacked (series x points) arrays"""
+    valid = ~np.isnan(values)
+    count = valid.sum(axis=1)
+    has_data = count > 0
+    
+    # All-NaN rows are expected here and filtered out by has_data
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        minimum = np.nanmin(values, axis=1)
+        maximum = np.nanmax(values, axis=1)
+        mean = np.nanmean(values, axis=1)
+        stddev = np.nanstd(values, axis=1)
+        percentiles = np.nanpercentile(values, PERCENTILES, axis=1)
+    
+    total = np.nansum(values, axis=1)
+    
+    # Last and first valid sample of each row
+    width = values.shape[1]
+    last_index = width - 1 - np.argmax(valid[:, ::-1], axis=1)
+    first_index = np.argmax(valid, axis=1)
+    rows = np.arange(values.shape[0])
+    latest = values[rows, last_index]
+    span_seconds = (timestamps[rows, last_index] - timestamps[rows, first_index]) / 1000
+    
+    # Trapezoidal time-weighted mean over intervals with both ends present
+    paired = valid[:, :-1] & valid[:, 1:]
+    durations = np.where(paired, np.diff(timestamps, axis=1), 0.0)
+    areas = np.where(paired, (values[:, :-1] + values[:, 1:]) / 2 * durations, 0.0)
+    weighted_duration = durations.sum(axis=1)
+    
+    results: List[Optional[Dict[str, Any]]] = []
+    for row in rows:
+        if not has_data[row]:
+            results.append(None)
+            continue
+        
+        span = float(span_seconds[row])
+        stats = {
+            'min': float(minimum[row]),
+            'max': float(maximum[row]),
+            'avg': float(mean[row]),
+            'count': int(count[row]),
+            'latest': float(latest[row]),
+            'stddev': float(stddev[row]),
+            'sum': float(total[row]),
+            'rate': float(total[row]) / span if span > 0 else None,
+            'time_weighted_avg': (
+                float(areas[row].sum() / weighted_duration[row])
+                if weighted_duration[row] > 0 else float(mean[row])
+            ),
+        }
+        for q, values_at_q in zip(PERCENTILES, percentiles):
+            stats[f'p{q}'] = float(values_at_q[row])
+        
+        results.append(stats)
+    
+    return results
@@ -0,0 +1,22 @@
+"""Run storage components"""
+
+from importlib import import_module
+
+from .baseline import BaselineComparison, MetricChange, compare_runs
+
+# The run store loads sqlite3, only needed when runs are stored
+_LAZY_EXPORTS = {
+    'RunStore': '.run_store',
+    'StoredRun': '.run_store',
+}
+
+__all__ = [
+    'RunStore', 'StoredRun', 'BaselineComparison', 'MetricChange', 'compare_runs'
+]
+
+
+def __getattr__(name):
+    """Import optional subsystems on first access"""
+    if name in _LAZY_EXPORTS:
+        return getattr(import_module(_LAZY_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
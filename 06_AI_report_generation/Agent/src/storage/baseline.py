@@ -0,0 +1,177 @@
+"""Regression comparison of a run against a stored baseline run"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from ..processors.data_processor import PanelData
+from ..builders.prompt_builder import metric_kind
+
+if TYPE_CHECKING:
+    from .run_store import StoredRun
+
+
+DEFAULT_REGRESSION_THRESHOLD = 0.10
+
+# Compared statistics per metric kind, and whether an increase is worse
+COMPARED_METRICS = {
+    'latency': (('avg', True), ('p95', True), ('p99', True)),
+    'errors': (('avg', True), ('max', True)),
+    'throughput': (('avg', False),),
+    # JTL label panels carry latency, throughput and error rate together
+    'jtl': (('p95', True), ('p99', True), ('throughput', False), ('error_rate', True)),
+}
+
+
+@dataclass
+class MetricChange:
+    """Change of one statistic between baseline and current run"""
+    panel_title: str
+    ref_id: str
+    metric: str
+    baseline: float
+    current: float
+    higher_is_worse: bool
+    regression: bool
+    
+    @property
+    def change(self) -> Optional[float]:
+        """Relative change, None if the baseline is zero"""
+        if not self.baseline:
+            return None
+        return (self.current - self.baseline) / abs(self.baseline)
+    
+    def describe(self) -> str:
+        """One-line description, e.g. Latency A p95: 120 -> 180 (+50%)"""
+        change = f"{self.change * 100:+.0f}%" if self.change is not None else "from zero"
+        return (
+            f"{self.panel_title} {self.ref_id} {self.metric}: "
+            f"{self.baseline:.4g} -> {self.current:.4g} ({change})"
+        )
+
+
+@dataclass
+class BaselineComparison:
+    """Changes of a run against a stored baseline run"""
+    baseline: 'StoredRun'
+    changes: List[MetricChange] = field(default_factory=list)
+    threshold: float = DEFAULT_REGRESSION_THRESHOLD
+    unmatched_panels: int = 0
+    
+    @property
+    def regressions(self) -> List[MetricChange]:
+        """Changes in the worse direction beyond the threshold"""
+        return [change for change in self.changes if change.regression]
+    
+    @property
+    def improvements(self) -> List[MetricChange]:
+        """Changes in the better direction beyond the threshold"""
+        return [
+            change for change in self.changes
+            if not change.regression and _beyond_threshold(change, self.threshold)
+        ]
+    
+    def prompt_section(self, limit: int = 10) -> str:
+        """
+        Comparison summary for the AI prompt
+        
+        Args:
+            limit: Maximum regressions and improvements listed each
+            
+        Returns:
+            Regressions first, largest changes first
+        """
+        lines = [
+            f"Baseline comparison against run {self.baseline.describe()} "
+            f"(changes beyond {self.threshold * 100:.0f}%):"
+        ]
+        for label, changes in (('REGRESSION', self.regressions), ('improvement', self.improvements)):
+            for change in sorted(changes, key=_magnitude, reverse=True)[:limit]:
+                lines.append(f"  - {label}: {change.describe()}")
+        if len(lines) == 1:
+            lines.append("  - no significant changes")
+        return "\n".join(lines)
+
+
+def compare_runs(
+    current: List[PanelData],
+    baseline_run: 'StoredRun',
+    baseline: List[PanelData],
+    threshold: float = DEFAULT_REGRESSION_THRESHOLD
+) -> BaselineComparison:
+    """
+    Compare panel metrics of a run with those of a baseline run
+    
+    Panels are matched by panel ID, then by title, and statistics by refId.
+    Only panels with a known metric kind (latency, errors, throughput) and
+    JTL panels are compared.
+    
+    Args:
+        current: Panel data of the current run
+        baseline_run: Stored baseline run
+        baseline: Panel data of the baseline run
+        threshold: Relative change flagged as regression or improvement
+        
+    Returns:
+        Comparison with every compared statistic
+    """
+    by_id: Dict[int, PanelData] = {panel.panel_id: panel for panel in baseline}
+    by_title: Dict[str, PanelData] = {panel.panel_title: panel for panel in baseline}
+    comparison = BaselineComparison(baseline=baseline_run, threshold=threshold)
+    
+    for panel in current:
+        base_panel = by_id.get(panel.panel_id)
+        if base_panel is None or base_panel.panel_title != panel.panel_title:
+            base_panel = by_title.get(panel.panel_title, base_panel)
+        if base_panel is None:
+            comparison.unmatched_panels += 1
+            continue
+        
+        kind = 'jtl' if panel.panel_type == 'jtl' else metric_kind(panel)
+        for ref_id, stats in (panel.metrics or {}).items():
+            base_stats = base_panel.metrics.get(ref_id)
+            if not _is_series_stats(stats) or not _is_series_stats(base_stats):
+                continue
+            for metric, higher_is_worse in COMPARED_METRICS.get(kind, ()):
+                values = _pair(stats, base_stats, metric)
+                if values is None:
+                    continue
+                change = MetricChange(
+                    panel_title=panel.panel_title,
+                    ref_id=ref_id,
+                    metric=metric,
+                    baseline=values[1],
+                    current=values[0],
+                    higher_is_worse=higher_is_worse,
+                    regression=False
+                )
+                change.regression = _beyond_threshold(change, threshold) and (
+                    (change.current > change.baseline) == higher_is_worse
+                )
+                comparison.changes.append(change)
+    
+    return comparison
+
+
+def _magnitude(change: MetricChange) -> float:
+    """Sort key of changes, changes from a zero baseline first"""
+    return abs(change.change) if change.change is not None else float('inf')
+
+
+def _is_series_stats(stats) -> bool:
+    """Whether a metrics entry holds series statistics"""
+    return isinstance(stats, dict) and 'error' not in stats and 'avg' in stats
+
+
+def _pair(stats: Dict, base_stats: Dict, metric: str) -> Optional[Tuple[float, float]]:
+    """Current and baseline value of a statistic, None if either is missing"""
+    current, base = stats.get(metric), base_stats.get(metric)
+    if not isinstance(current, (int, float)) or not isinstance(base, (int, float)):
+        return None
+    return float(current), float(base)
+
+
+def _beyond_threshold(change: MetricChange, threshold: float) -> bool:
+    """Whether a change exceeds the threshold (any change from a zero baseline)"""
+    if change.change is None:
+        return change.current != change.baseline
+    return abs(change.change) > threshold
@@ -0,0 +1,274 @@
+"""SQLite store of report runs and their metrics"""
+
+import json
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ..parsers.url_parser import GrafanaDashboardContext
+from ..processors.data_processor import PanelData, SeriesColumns
+
+
+DEFAULT_RUN_STORE = './.cache/runs.sqlite3'
+DEFAULT_SERIES_POINTS = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_key TEXT NOT NULL UNIQUE,
+    dashboard_uid TEXT NOT NULL,
+    dashboard_title TEXT NOT NULL,
+    time_from TEXT NOT NULL,
+    time_to TEXT NOT NULL,
+    variables TEXT NOT NULL,
+    dashboard_url TEXT NOT NULL,
+    report_path TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_by_dashboard ON runs (dashboard_uid, time_from DESC);
+CREATE TABLE IF NOT EXISTS panels (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    panel_id INTEGER NOT NULL,
+    panel_title TEXT NOT NULL,
+    panel_type TEXT NOT NULL,
+    row_title TEXT,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (run_id, panel_id)
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    panel_id INTEGER NOT NULL,
+    ref_id TEXT NOT NULL,
+    stats TEXT NOT NULL,
+    PRIMARY KEY (run_id, panel_id, ref_id)
+);
+CREATE TABLE IF NOT EXISTS series (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    panel_id INTEGER NOT NULL,
+    ref_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    labels TEXT NOT NULL,
+    timestamps BLOB NOT NULL,
+    vals BLOB NOT NULL,
+    PRIMARY KEY (run_id, panel_id, ref_id, position)
+);
+"""
+
+
+@dataclass
+class StoredRun:
+    """A report run kept in the store"""
+    run_id: int
+    dashboard_uid: str
+    dashboard_title: str
+    time_from: datetime
+    time_to: datetime
+    variables: Dict[str, str]
+    dashboard_url: str
+    report_path: Optional[str]
+    created_at: datetime
+    
+    def describe(self) -> str:
+        """One-line description for listings and reports"""
+        return (
+            f"#{self.run_id} {self.dashboard_title} "
+            f"{self.time_from.strftime('%Y-%m-%d %H:%M')} - {self.time_to.strftime('%Y-%m-%d %H:%M')}"
+        )
+
+
+class RunStore:
+    """
+    Local store of report runs keyed by dashboard, time range and variables
+    
+    Every run keeps the metrics of each panel and refId and a downsampled
+    copy of its series, so later reports compare against it without
+    querying Grafana again. Storing the same run again replaces it. The
+    store is a single SQLite file, safe to share between the threads of an
+    agent.
+    """
+    
+    def __init__(self, path: str):
+        """
+        Initialize store
+        
+        Args:
+            path: SQLite database file (created with its directory if missing)
+        """
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA foreign_keys=ON")
+        self._connection.executescript(_SCHEMA)
+    
+    @staticmethod
+    def run_key(context: GrafanaDashboardContext) -> str:
+        """Identity of a run: dashboard UID, time range and variables"""
+        return json.dumps(
+            [context.dashboard_uid, context.time_from.isoformat(), context.time_to.isoformat(), context.variables],
+            sort_keys=True,
+            separators=(',', ':')
+        )
+    
+    def save_run(
+        self,
+        context: GrafanaDashboardContext,
+        dashboard_title: str,
+        panel_data_list: List[PanelData],
+        report_path: Optional[str] = None,
+        series_points: int = DEFAULT_SERIES_POINTS
+    ) -> int:
+        """
+        Store a run, replacing an earlier run with the same key
+        
+        Args:
+            context: Dashboard context of the run
+            dashboard_title: Dashboard title
+            panel_data_list: Processed panel data
+            report_path: Path of the generated report
+            series_points: LTTB points kept per series
+            
+        Returns:
+            ID of the stored run
+        """
+        panel_rows, metric_rows, series_rows = [], [], []
+        for position, panel_data in enumerate(panel_data_list):
+            panel_rows.append((
+                panel_data.panel_id, panel_data.panel_title, panel_data.panel_type, panel_data.row, position
+            ))
+            for ref_id, stats in (panel_data.metrics or {}).items():
+                metric_rows.append((panel_data.panel_id, ref_id, json.dumps(stats, default=float)))
+            for ref_id, columns in panel_data.downsample(series_points).items():
+                for series_position, column in enumerate(columns):
+                    series_rows.append((
+                        panel_data.panel_id, ref_id, series_position, json.dumps(column.labels),
+                        column.timestamps.astype(np.float64).tobytes(), column.values.astype(np.float64).tobytes()
+                    ))
+        
+        with self._lock, self._connection:
+            run_key = self.run_key(context)
+            self._connection.execute("DELETE FROM runs WHERE run_key = ?", (run_key,))
+            run_id = self._connection.execute(
+                "INSERT INTO runs (run_key, dashboard_uid, dashboard_title, time_from, time_to, variables, "
+                "dashboard_url, report_path, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    run_key, context.dashboard_uid, dashboard_title,
+                    context.time_from.isoformat(), context.time_to.isoformat(),
+                    json.dumps(context.variables, sort_keys=True), context.raw_url, report_path,
+                    datetime.now(timezone.utc).isoformat()
+                )
+            ).lastrowid
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO panels VALUES (?, ?, ?, ?, ?, ?)",
+                [(run_id, *row) for row in panel_rows]
+            )
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO metrics VALUES (?, ?, ?, ?)",
+                [(run_id, *row) for row in metric_rows]
+            )
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO series VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(run_id, *row) for row in series_rows]
+            )
+        
+        return run_id
+    
+    def get_run(self, run_id: int) -> Optional[StoredRun]:
+        """Stored run by ID, None if unknown"""
+        return self._fetch_run("SELECT * FROM runs WHERE run_id = ?", (run_id,))
+    
+    def find_run(self, context: GrafanaDashboardContext) -> Optional[StoredRun]:
+        """Stored run with the dashboard, time range and variables of context"""
+        return self._fetch_run("SELECT * FROM runs WHERE run_key = ?", (self.run_key(context),))
+    
+    def latest_runs(self, dashboard_uid: str, limit: int = 10) -> List[StoredRun]:
+        """
+        Most recent runs of a dashboard
+        
+        Args:
+            dashboard_uid: Dashboard UID
+            limit: Maximum runs returned
+            
+        Returns:
+            Runs ordered by test start time, newest first
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT * FROM runs WHERE dashboard_uid = ? ORDER BY time_from DESC LIMIT ?",
+                (dashboard_uid, limit)
+            ).fetchall()
+        return [self._to_run(row) for row in rows]
+    
+    def load_panels(self, run_id: int) -> List[PanelData]:
+        """
+        Rebuild the panel data of a stored run
+        
+        Returns:
+            Panels in report order with metrics and downsampled series,
+            without raw data
+        """
+        with self._lock:
+            panel_rows = self._connection.execute(
+                "SELECT * FROM panels WHERE run_id = ? ORDER BY position", (run_id,)
+            ).fetchall()
+            metric_rows = self._connection.execute(
+                "SELECT * FROM metrics WHERE run_id = ?", (run_id,)
+            ).fetchall()
+            series_rows = self._connection.execute(
+                "SELECT * FROM series WHERE run_id = ? ORDER BY panel_id, ref_id, position", (run_id,)
+            ).fetchall()
+        
+        panels = {
+            row['panel_id']: PanelData(
+                panel_id=row['panel_id'],
+                panel_title=row['panel_title'],
+                panel_type=row['panel_type'],
+                metrics={},
+                raw_data={},
+                row=row['row_title']
+            )
+            for row in panel_rows
+        }
+        for row in metric_rows:
+            panels[row['panel_id']].metrics[row['ref_id']] = json.loads(row['stats'])
+        for row in series_rows:
+            panels[row['panel_id']].series.setdefault(row['ref_id'], []).append(SeriesColumns(
+                row['ref_id'],
+                np.frombuffer(row['timestamps'], dtype=np.float64),
+                np.frombuffer(row['vals'], dtype=np.float64),
+                labels=json.loads(row['labels'])
+            ))
+        
+        return list(panels.values())
+    
+    def close(self) -> None:
+        """Close the database"""
+        with self._lock:
+            self._connection.close()
+    
+    def _fetch_run(self, query: str, params: tuple) -> Optional[StoredRun]:
+        """Run a query returning at most one run"""
+        with self._lock:
+            row = self._connection.execute(query, params).fetchone()
+        return self._to_run(row) if row else None
+    
+    @staticmethod
+    def _to_run(row: sqlite3.Row) -> StoredRun:
+        """Convert a runs table row"""
+        return StoredRun(
+            run_id=row['run_id'],
+            dashboard_uid=row['dashboard_uid'],
+            dashboard_title=row['dashboard_title'],
+            time_from=datetime.fromisoformat(row['time_from']),
+            time_to=datetime.fromisoformat(row['time_to']),
+            variables=json.loads(row['variables']),
+            dashboard_url=row['dashboard_url'],
+            report_path=row['report_path'],
+            created_at=datetime.fromisoformat(row['created_at'])
+        )
@@ -0,0 +1,21 @@
+"""Pipeline instrumentation components"""
+
+from importlib import import_module
+
+from .tracer import Tracer, Span, peak_rss_bytes
+
+# The profiler loads cProfile, only needed with --profile
+_LAZY_EXPORTS = {
+    'ThreadProfiler': '.profiler',
+}
+
+__all__ = [
+    'Tracer', 'Span', 'peak_rss_bytes', 'ThreadProfiler'
+]
+
+
+def __getattr__(name):
+    """Import optional subsystems on first access"""
+    if name in _LAZY_EXPORTS:
+        return getattr(import_module(_LAZY_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
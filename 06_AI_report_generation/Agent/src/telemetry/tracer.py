@@ -0,0 +1,291 @@
+"""Timed spans, counters and gauges of the report pipeline"""
+
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# Prefix of every exported Prometheus metric
+METRIC_PREFIX = 'report'
+
+
+@dataclass
+class Span:
+    """A timed pipeline stage"""
+    name: str
+    span_id: int
+    parent_id: Optional[int]
+    thread: str
+    start_s: float
+    duration_s: Optional[float] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    
+    def set(self, **attributes) -> None:
+        """Attach attributes, e.g. bytes or points handled by the stage"""
+        self.attributes.update(attributes)
+
+
+class Tracer:
+    """
+    Record timed spans, counters and gauges of report generation
+    
+    Spans nest per thread; work handed to a thread pool is attached to the
+    submitting span through bind. Spans, counters and gauges are kept in
+    memory and exported as a Chrome trace-event JSON file (chrome://tracing,
+    Perfetto) and a Prometheus text-format file (node_exporter textfile
+    collector). Recording is thread-safe and cheap enough to stay enabled.
+    """
+    
+    def __init__(self):
+        """Initialize empty tracer"""
+        self._epoch = time.perf_counter()
+        self._wall_epoch = time.time()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._next_id = 1
+        self.spans: List[Span] = []
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+        self._gauges: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+    
+    @contextmanager
+    def span(self, name: str, parent: Optional[Span] = None, **attributes) -> Iterator[Span]:
+        """
+        Time a block as a span
+        
+        Args:
+            name: Stage name, e.g. "query" or "llm"
+            parent: Parent span (default: innermost open span of this thread)
+            **attributes: Initial span attributes
+            
+        Yields:
+            The open span, to attach further attributes
+        """
+        stack = self._stack()
+        parent = parent or (stack[-1] if stack else None)
+        with self._lock:
+            span_id = self._next_id
+            self._next_id += 1
+        
+        span = Span(
+            name=name,
+            span_id=span_id,
+            parent_id=parent.span_id if parent else None,
+            thread=threading.current_thread().name,
+            start_s=time.perf_counter() - self._epoch,
+            attributes=attributes
+        )
+        stack.append(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set(error=f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            span.duration_s = time.perf_counter() - self._epoch - span.start_s
+            stack.pop()
+            with self._lock:
+                self.spans.append(span)
+    
+    def current(self) -> Optional[Span]:
+        """Innermost open span of this thread"""
+        stack = self._stack()
+        return stack[-1] if stack else None
+    
+    def bind(self, function: Callable) -> Callable:
+        """
+        Run a function, e.g. in a thread pool, under the current span
+        
+        Returns:
+            Wrapper whose spans are children of the span open at bind time
+        """
+        parent = self.current()
+        
+        def bound(*args, **kwargs):
+            stack = self._stack()
+            if parent is not None:
+                stack.append(parent)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                if parent is not None:
+                    stack.pop()
+        
+        return bound
+    
+    def count(self, name: str, value: float = 1, **labels) -> None:
+        """Add to a counter, e.g. points processed"""
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+    
+    def gauge(self, name: str, value: float, **labels) -> None:
+        """Set a gauge, e.g. bytes received so far"""
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self._gauges[key] = value
+    
+    def counter_total(self, name: str) -> float:
+        """Value of a counter summed over its labels"""
+        with self._lock:
+            return sum(value for (counter, _), value in self._counters.items() if counter == name)
+    
+    def stage_summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Calls and time per span name
+        
+        Returns:
+            {name: {'calls', 'seconds', 'max_seconds'}}, slowest stage first
+        """
+        with self._lock:
+            spans = list(self.spans)
+        
+        stages: Dict[str, Dict[str, float]] = {}
+        for span in spans:
+            stage = stages.setdefault(span.name, {'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0})
+            stage['calls'] += 1
+            stage['seconds'] += span.duration_s
+            stage['max_seconds'] = max(stage['max_seconds'], span.duration_s)
+        return dict(sorted(stages.items(), key=lambda item: item[1]['seconds'], reverse=True))
+    
+    def write_trace(self, path: str) -> None:
+        """
+        Write spans as Chrome trace events, counters and gauges as metadata
+        
+        Args:
+            path: JSON file (directory is created if missing)
+        """
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span.start_s)
+            counters, gauges = dict(self._counters), dict(self._gauges)
+        
+        threads: Dict[str, int] = {}
+        events = []
+        for span in spans:
+            events.append({
+                'name': span.name,
+                'ph': 'X',
+                'ts': round(span.start_s * 1e6, 1),
+                'dur': round(span.duration_s * 1e6, 1),
+                'pid': os.getpid(),
+                'tid': threads.setdefault(span.thread, len(threads) + 1),
+                'args': {'span_id': span.span_id, 'parent_id': span.parent_id, **span.attributes}
+            })
+        events += [
+            {'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid, 'args': {'name': thread}}
+            for thread, tid in threads.items()
+        ]
+        
+        trace = {
+            'traceEvents': events,
+            'displayTimeUnit': 'ms',
+            'otherData': {
+                'started_at': self._wall_epoch,
+                'stages': self.stage_summary(),
+                'counters': [_metric_entry(key, value) for key, value in counters.items()],
+                'gauges': [_metric_entry(key, value) for key, value in gauges.items()],
+                'peak_rss_bytes': peak_rss_bytes(),
+            }
+        }
+        _write_atomic(path, json.dumps(trace, default=str, indent=1))
+    
+    def write_prometheus(self, path: str) -> None:
+        """
+        Write stage timings, counters, gauges and peak RSS in Prometheus
+        text format
+        
+        Args:
+            path: Text file (directory is created if missing)
+        """
+        with self._lock:
+            counters, gauges = dict(self._counters), dict(self._gauges)
+        
+        stages = self.stage_summary()
+        lines = [
+            f"# HELP {METRIC_PREFIX}_stage_seconds_total Time spent per pipeline stage",
+            f"# TYPE {METRIC_PREFIX}_stage_seconds_total counter",
+            *[
+                f'{METRIC_PREFIX}_stage_seconds_total{{stage="{name}"}} {stage["seconds"]:.6f}'
+                for name, stage in stages.items()
+            ],
+            f"# HELP {METRIC_PREFIX}_stage_calls_total Spans recorded per pipeline stage",
+            f"# TYPE {METRIC_PREFIX}_stage_calls_total counter",
+            *[
+                f'{METRIC_PREFIX}_stage_calls_total{{stage="{name}"}} {stage["calls"]}'
+                for name, stage in stages.items()
+            ],
+        ]
+        lines += _prometheus_family(counters, 'counter', '_total')
+        lines += _prometheus_family(gauges, 'gauge', '')
+        
+        rss = peak_rss_bytes()
+        if rss is not None:
+            lines += [
+                f"# HELP {METRIC_PREFIX}_peak_rss_bytes Peak resident set size of the process",
+                f"# TYPE {METRIC_PREFIX}_peak_rss_bytes gauge",
+                f"{METRIC_PREFIX}_peak_rss_bytes {rss}",
+            ]
+        _write_atomic(path, "\n".join(lines) + "\n")
+    
+    def _stack(self) -> List[Span]:
+        """Open spans of this thread"""
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process, None where unavailable"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _metric_entry(key: Tuple[str, Tuple[Tuple[str, str], ...]], value: float) -> Dict[str, Any]:
+    """Counter or gauge as a JSON object"""
+    name, labels = key
+    return {'name': name, 'labels': dict(labels), 'value': value}
+
+
+def _prometheus_family(
+    metrics: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float],
+    metric_type: str,
+    suffix: str
+) -> List[str]:
+    """Prometheus text lines of counters or gauges, grouped by name"""
+    lines = []
+    for name in sorted({name for name, _ in metrics}):
+        metric = f"{METRIC_PREFIX}_{name}{suffix}"
+        lines.append(f"# TYPE {metric} {metric_type}")
+        for (entry_name, labels), value in sorted(metrics.items()):
+            if entry_name != name:
+                continue
+            label_text = ",".join(f'{key}="{_escape_label(label)}"' for key, label in labels)
+            lines.append(f"{metric}{{{label_text}}} {value:g}" if label_text else f"{metric} {value:g}")
+    return lines
+
+
+def _escape_label(value: str) -> str:
+    """Escape a Prometheus label value"""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _write_atomic(path: str, content: str) -> None:
+    """Write a file through a temporary file, so readers never see it partial"""
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temporary = target.with_name(f".{target.name}.tmp")
+    temporary.write_text(content, encoding='utf-8')
+    os.replace(temporary, target)
@@ -0,0 +1,76 @@
+"""Agent configuration from arguments and environment"""
+
+import os
+
+import pytest
+
+from src.agent import PerformanceReportAgent
+from src.builders.prompt_builder import estimate_tokens
+from src.parsers.url_parser import GrafanaURLParser
+from src.parsers.template_engine import TemplateEngine
+from src.processors.data_processor import DataProcessor, PanelData
+from src.processors.live_aggregator import LiveAggregator
+from src.storage.baseline import compare_runs
+from src.storage.run_store import StoredRun
+
+
+CONTEXT = GrafanaURLParser().parse('http://grafana.local/d/abc/test?from=1700000000000&to=1700003600000')
+
+
+@pytest.fixture(autouse=True)
+def environment(monkeypatch):
+    monkeypatch.setenv('SERVICE_ACCOUNT_TOKEN', 'test')
+    monkeypatch.delenv('LLM_BACKEND', raising=False)
+    monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+
+
+def agent(**options):
+    return PerformanceReportAgent(use_cache=False, use_run_store=False, **options)
+
+
+def test_llm_backend_argument_does_not_leak_into_later_agents():
+    local = agent(llm_backend='local')
+    
+    assert local._openai_client._backend_name == 'local'
+    assert 'LLM_BACKEND' not in os.environ
+    with pytest.raises(EnvironmentError, match='OPENAI_API_KEY'):
+        agent()
+
+
+def test_llm_backend_falls_back_to_environment(monkeypatch):
+    monkeypatch.setenv('LLM_BACKEND', 'local')
+    
+    assert agent()._openai_client._backend_name == 'local'
+    monkeypatch.setenv('OPENAI_API_KEY', 'key')
+    assert agent(llm_backend='openai')._openai_client._backend_name == 'openai'
+
+
+@pytest.mark.parametrize('options', [{}, {'ai_mode': 'mapreduce', 'ai_rate_limit': 0}], ids=['single', 'mapreduce'])
+def test_baseline_comparison_counts_against_the_prompt_budget(options):
+    stats = {'min': 1.0, 'avg': 90.0, 'p95': 180.0, 'p99': 200.0, 'max': 250.0, 'stddev': 20.0}
+    current = [PanelData(i, f"Response time {i}", 'timeseries', {'A': stats}, {}) for i in range(40)]
+    baseline = [PanelData(i, f"Response time {i}", 'timeseries', {'A': {'avg': 60.0, 'p95': 120.0}}, {}) for i in range(40)]
+    run = StoredRun(1, 'abc', 'Load test', CONTEXT.time_from, CONTEXT.time_to, {}, CONTEXT.raw_url, None, CONTEXT.time_to)
+    comparison = compare_runs(current, run, baseline)
+    
+    user_prompt, system_prompt = agent(llm_backend='local', prompt_token_budget=1200, **options)._build_prompt(
+        current, CONTEXT, 'Load test', comparison
+    )
+    
+    assert user_prompt.endswith(comparison.prompt_section())
+    assert estimate_tokens(system_prompt) + estimate_tokens(user_prompt) <= 1200
+
+
+def test_first_live_poll_starts_at_the_test_start():
+    context = GrafanaURLParser().parse('http://grafana.local/d/abc/test?from=1700000004321&to=now')
+    live_agent = agent(use_ai=False)
+    windows = []
+    live_agent._process_panels = lambda data_client, panels, window, **options: windows.append(window) or []
+    
+    for from_ms, until_ms in ((1700000000000, 1700000010000), (1700000010000, 1700000020000)):
+        live_agent._poll_live(
+            context, [], {}, DataProcessor(), LiveAggregator(), from_ms, until_ms, 10000,
+            TemplateEngine.from_context(context)
+        )
+    
+    assert [round(window.time_from.timestamp() * 1000) for window in windows] == [1700000004321, 1700000010000]
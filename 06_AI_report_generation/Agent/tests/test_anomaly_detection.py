@@ -0,0 +1,95 @@
+"""Spike, dip and level shift detection on synthetic series"""
+
+import numpy as np
+import pytest
+
+from src.processors.anomaly_detection import AnomalyDetector
+from src.processors.data_processor import SeriesColumns
+
+
+def detect(values, **options):
+    timestamps = 1.7e12 + np.arange(len(values)) * 1000.0
+    return AnomalyDetector(**options).detect(SeriesColumns('A', timestamps, np.asarray(values, dtype=float)))
+
+
+def seconds(anomaly):
+    return int((anomaly.start_ms - 1.7e12) / 1000), int((anomaly.end_ms - 1.7e12) / 1000)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_noise_has_no_anomalies(seed):
+    rng = np.random.default_rng(seed)
+    
+    assert detect(rng.normal(100, 5, 100_000)) == []
+    assert detect(rng.poisson(0.5, 20_000)) == []
+
+
+def test_spike_and_dip():
+    values = np.random.default_rng(1).normal(100, 5, 2000)
+    values[500] += 60
+    values[1200] -= 60
+    
+    spike, dip = sorted(detect(values), key=lambda anomaly: anomaly.start_ms)
+    
+    assert (spike.kind, seconds(spike)) == ('spike', (500, 500))
+    assert spike.value == values[500]
+    assert spike.expected == pytest.approx(100, abs=3)
+    assert (dip.kind, seconds(dip)) == ('dip', (1200, 1200))
+    assert dip.value == values[1200]
+
+
+@pytest.mark.parametrize('shift', [12.0, 30.0, -30.0])
+def test_level_shift(shift):
+    values = np.random.default_rng(2).normal(100, 5, 3000)
+    values[1000:] += shift
+    
+    [anomaly] = detect(values)
+    
+    assert anomaly.kind == 'level_shift'
+    assert seconds(anomaly) == (pytest.approx(1000, abs=3), 2999)
+    assert anomaly.expected == pytest.approx(100, abs=2)
+    assert anomaly.value == pytest.approx(100 + shift, abs=2)
+
+
+def test_successive_level_shifts_end_at_the_next_shift():
+    values = np.random.default_rng(3).normal(100, 5, 3000)
+    values[1000:] += 30
+    values[2000:] -= 50
+    
+    first, second = sorted(detect(values), key=lambda anomaly: anomaly.start_ms)
+    
+    assert seconds(first)[0] == pytest.approx(1000, abs=3)
+    assert seconds(first)[1] == seconds(second)[0] - 1
+    assert seconds(second) == (pytest.approx(2000, abs=3), 2999)
+    assert second.value == pytest.approx(80, abs=2)
+
+
+def test_shift_is_not_also_reported_as_spike():
+    values = np.random.default_rng(4).normal(100, 5, 3000)
+    values[1500:] += 100
+    
+    assert [anomaly.kind for anomaly in detect(values)] == ['level_shift']
+
+
+def test_missing_points_and_short_series():
+    values = np.random.default_rng(5).normal(100, 5, 2000)
+    values[800] += 60
+    values[::7] = np.nan
+    
+    assert [anomaly.kind for anomaly in detect(values)] == ['spike']
+    assert detect(values[:10]) == []
+    assert detect(np.full(100, 3.0)) == []
+
+
+def test_detect_panel_tags_hosts():
+    rng = np.random.default_rng(6)
+    timestamps = np.arange(1000) * 1000.0
+    quiet, spiky = rng.normal(10, 1, 1000), rng.normal(10, 1, 1000)
+    spiky[600] = 40
+    
+    anomalies = AnomalyDetector().detect_panel({'A': [
+        SeriesColumns('A', timestamps, quiet, labels={'host': 'slave-1'}),
+        SeriesColumns('A', timestamps, spiky, labels={'host': 'slave-2'}),
+    ]})
+    
+    assert [(anomaly.ref_id, anomaly.host, anomaly.kind) for anomaly in anomalies] == [('A', 'slave-2', 'spike')]
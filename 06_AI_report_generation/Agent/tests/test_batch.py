@@ -0,0 +1,175 @@
+"""Batch mode: parallel reports sharing one transport, from the API and the command line"""
+
+import io
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import agent as cli
+from src.agent import PerformanceReportAgent
+
+
+class FakeGrafanaServer(ThreadingHTTPServer):
+    """
+    Grafana answering dashboards, their versions and /api/ds/query
+    
+    Every dashboard has three timeseries panels; dashboard "missing" is
+    not found. Queries answer after delay seconds, and the peak number of
+    queries answered at once is tracked.
+    """
+    
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _Handler)
+        self.delay = 0.0
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+    
+    def url(self, uid):
+        return f"http://127.0.0.1:{self.server_address[1]}/d/{uid}/test?from=1700000000000&to=1700000600000"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    
+    def log_message(self, *args):
+        pass
+    
+    def do_GET(self):
+        uid = self.path.split('/')[4]
+        if uid == 'missing':
+            self.reply(404, {'message': 'Dashboard not found'})
+        elif self.path.endswith('/versions?limit=1'):
+            self.reply(200, [{'version': 1}])
+        else:
+            self.reply(200, {'dashboard': {'uid': uid, 'title': f"Load {uid}", 'version': 1, 'panels': [
+                {'id': panel_id, 'title': f"Response time {panel_id}", 'type': 'timeseries',
+                 'datasource': {'uid': 'prometheus'}, 'targets': [{'refId': 'A', 'expr': 'latency'}]}
+                for panel_id in (1, 2, 3)
+            ]}})
+    
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        server = self.server
+        with server.lock:
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+        try:
+            time.sleep(server.delay)
+        finally:
+            with server.lock:
+                server.active -= 1
+        timestamps = list(range(int(payload['from']), int(payload['to']), 60000))
+        self.reply(200, {'results': {query['refId']: {'frames': [{
+            'schema': {'fields': [{'name': 'time'}, {'name': 'value'}]},
+            'data': {'values': [timestamps, [float(i % 7) for i in range(len(timestamps))]]},
+        }]} for query in payload['queries']}})
+    
+    def reply(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+@pytest.fixture(scope='module')
+def grafana_server():
+    server = FakeGrafanaServer()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def grafana(grafana_server, monkeypatch):
+    monkeypatch.setenv('SERVICE_ACCOUNT_TOKEN', 'test')
+    for name in ('REPORT_MAX_IN_FLIGHT', 'REPORT_BATCH_JOBS', 'REPORT_STREAM_OUTPUT', 'INFLUXDB_URL', 'REPORT_JTL_FILE'):
+        monkeypatch.delenv(name, raising=False)
+    grafana_server.delay = 0.0
+    grafana_server.peak = 0
+    return grafana_server
+
+
+def agent(**options):
+    return PerformanceReportAgent(use_cache=False, use_run_store=False, use_ai=False, **options)
+
+
+def test_results_keep_input_order_and_failures(grafana, tmp_path):
+    urls = [grafana.url('first'), grafana.url('missing'), grafana.url('second'), grafana.url('first')]
+    report_agent = agent()
+    
+    results = report_agent.generate_reports(urls, output_dir=str(tmp_path), jobs=3)
+    
+    assert [(result.url, result.status) for result in results] == [
+        (urls[0], 'ok'), (urls[1], 'failed'), (urls[2], 'ok')
+    ]
+    assert '404' in results[1].error and results[1].report_path is None
+    assert all(open(result.report_path).read().count('Response time') >= 3 for result in (results[0], results[2]))
+    assert report_agent.transport.summary()['requests'] == 2 * 4 + 1
+    report_agent.close()
+
+
+def test_max_in_flight_is_shared_by_all_jobs(grafana, tmp_path):
+    grafana.delay = 0.05
+    report_agent = agent(workers=4, max_in_flight=2)
+    
+    results = report_agent.generate_reports(
+        [grafana.url(f"run{index}") for index in range(4)], output_dir=str(tmp_path), jobs=4
+    )
+    
+    assert all(result.status == 'ok' for result in results)
+    assert grafana.peak == 2
+    report_agent.close()
+
+
+def run_cli(monkeypatch, *args, stdin=''):
+    monkeypatch.setattr(sys, 'argv', ['agent.py', '--no-ai', '--no-cache', '--no-run-store', *args])
+    monkeypatch.setattr(sys, 'stdin', io.StringIO(stdin))
+    cli.main()
+
+
+def test_cli_writes_the_batch_summary(grafana, tmp_path, monkeypatch):
+    urls_file = tmp_path / 'runs.txt'
+    urls_file.write_text(f"# nightly runs\n{grafana.url('first')}\n\n{grafana.url('second')}\n")
+    summary_file = tmp_path / 'out' / 'summary.json'
+    grafana.delay = 0.02
+    
+    run_cli(
+        monkeypatch, '--urls-file', str(urls_file), '--jobs', '2', '--max-in-flight', '1',
+        '--summary-file', str(summary_file), '--output-dir', str(tmp_path / 'reports')
+    )
+    
+    summary = json.loads(summary_file.read_text())
+    assert (summary['reports'], summary['succeeded'], summary['failed']) == (2, 2, 0)
+    assert [result['url'] for result in summary['results']] == [grafana.url('first'), grafana.url('second')]
+    assert summary['http']['requests'] == 2 * 4
+    assert grafana.peak == 1
+
+
+def test_cli_exits_with_failure_when_a_report_fails(grafana, tmp_path, monkeypatch):
+    with pytest.raises(SystemExit) as exit_info:
+        run_cli(
+            monkeypatch, '--urls-file', '-', '--output-dir', str(tmp_path),
+            stdin=f"{grafana.url('first')}\n{grafana.url('missing')}\n"
+        )
+    
+    assert exit_info.value.code == 1
+    summary = json.loads((tmp_path / 'batch_summary.json').read_text())
+    assert [result['status'] for result in summary['results']] == ['ok', 'failed']
+
+
+def test_cli_does_not_read_stdin_unless_asked(grafana, tmp_path, monkeypatch, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        run_cli(monkeypatch, '--output-dir', str(tmp_path), stdin=f"{grafana.url('first')}\n")
+    
+    assert exit_info.value.code == 1
+    assert sys.stdin.tell() == 0
+    assert 'usage:' in capsys.readouterr().out
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,123 @@
+"""Cluster-wide statistics of multi-host refIds against the pooled samples"""
+
+import numpy as np
+import pytest
+
+from src.builders.prompt_builder import PromptBuilder
+from src.processors.data_processor import DataProcessor
+from src.processors.sketches import DEFAULT_RELATIVE_ACCURACY
+
+
+def frame(values, host=None, start=0, **labels):
+    timestamps = [float(start + i * 1000) for i in range(len(values))]
+    if host is not None:
+        labels['host'] = host
+    return {
+        'schema': {'fields': [{'name': 'time'}, {'name': 'value', 'labels': labels}]},
+        'data': {'values': [timestamps, [None if np.isnan(v) else float(v) for v in values]]},
+    }
+
+
+def process_frames(frames):
+    raw_data = {'results': {'A': {'frames': frames}}}
+    return DataProcessor().process_panel_data({'id': 1, 'title': 'Latency', 'type': 'timeseries'}, raw_data, None)
+
+
+def process(hosts):
+    return process_frames([frame(values, host) for host, values in hosts.items()]).metrics['A']
+
+
+def assert_matches_pooled(stats, values):
+    values = values[~np.isnan(values)]
+    assert stats['count'] == len(values)
+    assert stats['min'] == values.min()
+    assert stats['max'] == values.max()
+    assert stats['sum'] == pytest.approx(values.sum())
+    assert stats['avg'] == pytest.approx(values.mean())
+    assert stats['stddev'] == pytest.approx(values.std(), rel=1e-6)
+    for percentile in (50, 90, 95, 99):
+        exact = np.percentile(values, percentile, method='lower')
+        assert stats[f'p{percentile}'] == pytest.approx(exact, rel=DEFAULT_RELATIVE_ACCURACY, abs=1e-12), percentile
+
+
+@pytest.mark.parametrize('hosts', [
+    # Response times in seconds, below 1
+    {'slave-1': np.random.default_rng(1).uniform(0.05, 0.8, 5000),
+     'slave-2': np.random.default_rng(2).uniform(0.1, 0.95, 3000)},
+    # Deltas around zero, with missing samples
+    {'a': np.where(np.arange(4000) % 7 == 0, np.nan, np.random.default_rng(3).normal(0, 20, 4000)),
+     'b': np.random.default_rng(4).normal(-5, 3, 4000),
+     'c': np.zeros(100)},
+    # Large byte counters on hosts of very different scale
+    {'a': np.random.default_rng(5).lognormal(20, 1, 2000),
+     'b': np.random.default_rng(6).lognormal(10, 2, 6000)},
+])
+def test_cluster_statistics_match_pooled_samples(hosts):
+    stats = process(hosts)
+    
+    assert_matches_pooled(stats, np.concatenate(list(hosts.values())))
+    assert set(stats['hosts']) == set(hosts)
+
+
+def test_host_statistics_are_exact_per_host():
+    hosts = {'a': np.array([0.2, 0.4, -1.0]), 'b': np.array([3.0, np.nan, 5.0])}
+    stats = process(hosts)
+    
+    assert stats['hosts']['a']['min'] == -1.0
+    assert stats['hosts']['a']['p50'] == pytest.approx(0.2)
+    assert stats['hosts']['b']['count'] == 2
+    assert stats['hosts']['b']['avg'] == 4.0
+
+
+def test_cluster_keeps_latest_rate_and_time_weighted_mean():
+    stats = process_frames([
+        frame(np.array([1.0, 3.0, 5.0]), 'a', start=0),
+        frame(np.array([10.0, np.nan, 20.0, 30.0]), 'b', start=500),
+    ]).metrics['A']
+    
+    assert stats['latest'] == 30.0
+    assert stats['rate'] == pytest.approx(69.0 / 3.5)
+    # Areas 2+4 over 2 s on a, 15 over 1 s on b (the gap does not count)
+    assert stats['time_weighted_avg'] == pytest.approx((2 + 4 + 25) / 3)
+
+
+def test_transaction_series_keep_their_own_statistics():
+    rng = np.random.default_rng(7)
+    values = {name: rng.lognormal(mean, 0.3, 500) for name, mean in (('login', -2), ('checkout', 0), ('search', -1))}
+    
+    panel = process_frames([frame(series, transaction=name) for name, series in values.items()])
+    
+    assert set(panel.metrics) == {f"A transaction={name}" for name in values}
+    for name, series in values.items():
+        stats = panel.metrics[f"A transaction={name}"]
+        assert 'hosts' not in stats
+        assert stats['p95'] == pytest.approx(np.percentile(series, 95))
+        assert stats['latest'] == series[-1]
+    prompt = PromptBuilder().build([panel], 'Load test', '1 hour').user_prompt
+    assert 'hosts' not in prompt and 'A transaction=checkout:' in prompt
+
+
+def test_transactions_are_merged_across_hosts_only():
+    rng = np.random.default_rng(8)
+    values = {
+        (transaction, host): rng.uniform(low, low + 1, 400)
+        for transaction, low in (('login', 0.1), ('checkout', 2.0)) for host in ('slave-1', 'slave-2')
+    }
+    
+    metrics = process_frames([
+        frame(series, host=host, transaction=transaction) for (transaction, host), series in values.items()
+    ]).metrics
+    
+    assert set(metrics) == {'A transaction=login', 'A transaction=checkout'}
+    for transaction in ('login', 'checkout'):
+        stats = metrics[f"A transaction={transaction}"]
+        assert set(stats['hosts']) == {'slave-1', 'slave-2'}
+        assert_matches_pooled(stats, np.concatenate([values[transaction, host] for host in ('slave-1', 'slave-2')]))
+
+
+def test_raw_data_is_dropped_unless_kept():
+    raw_data = {'results': {'A': {'frames': [frame(np.array([1.0, 2.0]), 'a')]}}}
+    panel = {'id': 1, 'title': 'Latency', 'type': 'timeseries'}
+    
+    assert DataProcessor().process_panel_data(panel, raw_data, None).raw_data == {}
+    assert DataProcessor(retain_raw_data=True).process_panel_data(panel, raw_data, None).raw_data is raw_data
@@ -0,0 +1,99 @@
+"""LRU eviction, expiry, atomic writes and counters of the on-disk cache"""
+
+import os
+import time
+
+import pytest
+
+from src.clients.disk_cache import DiskCache
+
+
+def touch(cache, key, used_at):
+    path = cache._path(key)
+    os.utime(path, (used_at, path.stat().st_mtime))
+
+
+def age(cache, key, seconds):
+    path = cache._path(key)
+    written_at = time.time() - seconds
+    os.utime(path, (written_at, written_at))
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=300)
+    for used_at, key in enumerate(('a', 'b', 'c'), start=1000):
+        cache.put(key, b'x' * 100)
+        touch(cache, key, used_at)
+    
+    assert cache.get('a') == b'x' * 100
+    cache.put('d', b'y' * 100)
+    
+    assert cache.get('b') is None
+    assert all(cache.get(key) is not None for key in ('a', 'c', 'd'))
+    assert cache.stats()['bytes'] == 300
+
+
+def test_namespaces_share_the_size_limit(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=250)
+    dashboards, llm = cache.namespace('dashboards'), cache.namespace('llm')
+    cache.put('query', b'q' * 100)
+    touch(cache, 'query', 1000)
+    dashboards.put('dashboard', b'd' * 100)
+    touch(dashboards, 'dashboard', 2000)
+    
+    llm.put('completion', b'c' * 100)
+    
+    assert cache.get('query') is None
+    assert dashboards.get('dashboard') == b'd' * 100 and llm.get('completion') == b'c' * 100
+    assert sum(path.stat().st_size for path in tmp_path.rglob('*.cache')) == 200
+
+
+@pytest.mark.parametrize('written_ago, max_age, stable_since, hit', [
+    (10, None, None, True),
+    (10, 60, None, True),
+    (120, 60, None, False),
+    # Written after the range became stable: never expires
+    (120, 60, time.time() - 3600, True),
+    # Written while the range still moved: max_age applies
+    (120, 60, time.time(), False),
+])
+def test_expiry(tmp_path, written_ago, max_age, stable_since, hit):
+    cache = DiskCache(str(tmp_path))
+    cache.put('key', b'data')
+    age(cache, 'key', written_ago)
+    
+    assert (cache.get('key', max_age=max_age, stable_since=stable_since) is not None) == hit
+    assert cache._path('key').exists() == hit
+
+
+def test_writes_are_atomic(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    cache.put('key', b'old')
+    
+    with cache.writer('key') as file:
+        file.write(b'new')
+        assert cache.get('key') == b'old'
+    with pytest.raises(RuntimeError):
+        with cache.writer('key') as file:
+            file.write(b'partial')
+            raise RuntimeError('connection reset')
+    with cache.writer('empty'):
+        pass
+    
+    assert cache.get('key') == b'new'
+    assert cache.get('empty') is None
+    assert [path.name for path in tmp_path.iterdir()] == [cache._path('key').name]
+
+
+def test_hit_and_miss_counters(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    cache.put('key', b'data')
+    
+    cache.get('key')
+    cache.get('missing')
+    with cache.open('key') as file:
+        assert file.read() == b'data'
+    with cache.open('missing') as file:
+        assert file is None
+    
+    assert cache.stats() == {'hits': 2, 'misses': 2, 'entries': 1, 'bytes': 4}
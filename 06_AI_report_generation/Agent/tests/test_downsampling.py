@@ -0,0 +1,96 @@
+"""LTTB downsampling against a point-by-point reference implementation"""
+
+import math
+
+import numpy as np
+import pytest
+
+from src.processors.downsampling import lttb
+
+
+def reference_lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets as published, one point at a time"""
+    size = len(x)
+    every = (size - 2) / (threshold - 2)
+    selected = [0]
+    previous = 0
+    for bucket in range(threshold - 2):
+        start = math.floor(bucket * every) + 1
+        end = math.floor((bucket + 1) * every) + 1
+        next_end = min(math.floor((bucket + 2) * every) + 1, size)
+        if bucket == threshold - 3:
+            avg_x, avg_y = x[-1], y[-1]
+        else:
+            avg_x = sum(x[end:next_end]) / (next_end - end)
+            avg_y = sum(y[end:next_end]) / (next_end - end)
+        areas = [
+            abs((x[previous] - avg_x) * (y[i] - y[previous]) - (x[previous] - x[i]) * (avg_y - y[previous]))
+            for i in range(start, end)
+        ]
+        previous = start + areas.index(max(areas))
+        selected.append(previous)
+    selected.append(size - 1)
+    return selected
+
+
+def series(size, seed=1):
+    rng = np.random.default_rng(seed)
+    return np.arange(size) * 1000.0, np.cumsum(rng.normal(0, 1, size))
+
+
+@pytest.mark.parametrize('size, threshold', [(1000, 100), (1001, 3), (10_000, 500), (997, 996), (50, 7)])
+def test_matches_reference(size, threshold):
+    x, y = series(size)
+    
+    out_x, out_y = lttb(x, y, threshold)
+    
+    indices = reference_lttb(list(x), list(y), threshold)
+    assert np.array_equal(out_x, x[indices])
+    assert np.array_equal(out_y, y[indices])
+
+
+@pytest.mark.parametrize('size, threshold', [(1000, 100), (12_345, 500), (10, 9)])
+def test_keeps_endpoints_and_one_point_per_bucket(size, threshold):
+    x, y = series(size, seed=2)
+    
+    out_x, out_y = lttb(x, y, threshold)
+    
+    assert len(out_x) == threshold
+    assert (out_x[0], out_y[0]) == (x[0], y[0])
+    assert (out_x[-1], out_y[-1]) == (x[-1], y[-1])
+    # Bucket b covers the points [edges[b], edges[b + 1]) between the endpoints
+    edges = np.linspace(1, size - 1, threshold - 1).astype(np.int64)
+    indices = (out_x / 1000).astype(np.int64)
+    assert np.all((indices[1:-1] >= edges[:-1]) & (indices[1:-1] < edges[1:]))
+
+
+def test_keeps_a_spike():
+    x = np.arange(10_000) * 1000.0
+    y = np.zeros(10_000)
+    y[4321] = 100.0
+    
+    out_x, out_y = lttb(x, y, 50)
+    
+    assert 4321 * 1000.0 in out_x
+    assert out_y.max() == 100.0
+
+
+def test_drops_missing_points_first():
+    x, y = series(100)
+    y[::3] = np.nan
+    
+    out_x, out_y = lttb(x, y, 10)
+    
+    assert not np.isnan(out_y).any()
+    assert out_x[0] == x[1] and out_x[-1] == x[98]
+
+
+@pytest.mark.parametrize('threshold', [2, 100, 1000])
+def test_short_series_and_small_thresholds_are_kept_whole(threshold):
+    x, y = series(100)
+    y[5] = np.nan
+    
+    out_x, out_y = lttb(x, y, threshold)
+    
+    assert len(out_x) == 99
+    assert np.array_equal(out_y, np.delete(y, 5))
@@ -0,0 +1,135 @@
+"""Streaming decode of /api/ds/query bodies, gzipped, cached and with errors"""
+
+import gzip
+import io
+import json
+import math
+from contextlib import contextmanager
+
+import requests
+import urllib3
+
+from src.clients.disk_cache import DiskCache
+from src.clients.grafana_client import GrafanaClient
+from src.parsers.frame_parser import StreamingFrameParser
+from src.parsers.url_parser import GrafanaURLParser
+
+
+BODY = {
+    'results': {
+        'A': {
+            'status': 200,
+            'frames': [
+                {
+                    'schema': {'refId': 'A', 'name': 'cpu', 'fields': [
+                        {'name': 'Time', 'type': 'time', 'config': {'interval': 1000}},
+                        {'name': 'Value', 'type': 'number', 'labels': {'host': 'web-1', 'k8s.pod': 'api-0'}},
+                    ]},
+                    'data': {'values': [[1700000000000, 1700000001000, 1700000002000], [0.5, None, 2]]},
+                },
+                {
+                    'schema': {'refId': 'A', 'fields': [
+                        {'name': 'Time', 'type': 'time'},
+                        {'name': 'Value', 'type': 'number', 'labels': {'host': 'web-2'}},
+                    ]},
+                    'data': {'values': [[1700000000000], ['NaN']], 'nanos': [[0]]},
+                },
+            ],
+        },
+        'p1.latency': {
+            'frames': [{
+                'schema': {'fields': [{'name': 'time'}, {'name': 'value', 'labels': {'labels': 'nested'}}]},
+                'data': {'values': [[1700000000000, 1700000060000], [120.0, 180.0]]},
+            }],
+        },
+        'B': {'error': 'bad_data: parse error at char 4', 'status': 400, 'frames': []},
+    }
+}
+DATA = json.dumps(BODY).encode()
+
+
+def parse(data, buffer_size=16):
+    return StreamingFrameParser(buffer_size=buffer_size).parse(io.BytesIO(data))
+
+
+def columns(result, ref_id):
+    return [[list(column) for column in frame] for frame in result.frames[ref_id]]
+
+
+def same(actual, expected):
+    return len(actual) == len(expected) and all(
+        a == e or (math.isnan(a) and math.isnan(e)) for a, e in zip(actual, expected)
+    )
+
+
+def test_frames_labels_and_errors():
+    result = parse(DATA)
+    
+    cpu, web2 = columns(result, 'A')
+    assert cpu[0] == [1700000000000, 1700000001000, 1700000002000]
+    assert same(cpu[1], [0.5, float('nan'), 2.0])
+    assert web2[0] == [1700000000000] and math.isnan(web2[1][0])
+    assert result.labels['A'] == [{'host': 'web-1', 'k8s.pod': 'api-0'}, {'host': 'web-2'}]
+    assert columns(result, 'p1.latency') == [[[1700000000000, 1700000060000], [120.0, 180.0]]]
+    assert result.labels['p1.latency'] == [{'labels': 'nested'}]
+    assert result.errors == {'B': 'bad_data: parse error at char 4'}
+    assert result.frames['B'] == []
+    assert result.estimated_buffer_bytes == 12 * 8 + 16
+
+
+def test_buffer_size_does_not_change_the_result():
+    small, large = parse(DATA, buffer_size=1), parse(DATA, buffer_size=1 << 16)
+    
+    assert small.labels == large.labels and small.errors == large.errors
+    assert columns(small, 'p1.latency') == columns(large, 'p1.latency')
+
+
+def test_gzipped_response_body():
+    raw = urllib3.response.HTTPResponse(
+        body=io.BytesIO(gzip.compress(DATA)), headers={'Content-Encoding': 'gzip'},
+        preload_content=False, decode_content=True, status=200
+    )
+    
+    result = StreamingFrameParser(buffer_size=64).parse(raw)
+    
+    assert columns(result, 'p1.latency') == columns(parse(DATA), 'p1.latency')
+    assert result.labels == parse(DATA).labels
+    assert result.errors == {'B': 'bad_data: parse error at char 4'}
+
+
+class GzipGrafana:
+    """Transport streaming the gzipped BODY for every query"""
+    
+    def __init__(self):
+        self.requests = 0
+    
+    @contextmanager
+    def stream(self, method, url, json=None, headers=None):
+        self.requests += 1
+        response = requests.Response()
+        response.status_code = 200
+        response.raw = urllib3.response.HTTPResponse(
+            body=io.BytesIO(gzip.compress(DATA)),
+            headers={'Content-Encoding': 'gzip'}, preload_content=False, status=200
+        )
+        yield response
+
+
+def test_cached_body_parses_like_the_streamed_one(tmp_path, monkeypatch):
+    monkeypatch.setenv('SERVICE_ACCOUNT_TOKEN', 'test')
+    transport = GzipGrafana()
+    context = GrafanaURLParser().parse('http://grafana.local/d/abc/test?from=1700000000000&to=1700000600000')
+    client = GrafanaClient(context, cache=DiskCache(str(tmp_path)), transport=transport)
+    queries = [{'refId': 'A'}, {'refId': 'p1.latency'}, {'refId': 'B'}]
+    
+    streamed = client.get_panel_data(1, 'ds', queries, stream=True)
+    cached = client.get_panel_data(1, 'ds', queries, stream=True)
+    
+    assert transport.requests == 1
+    [entry] = tmp_path.glob('*.cache')
+    assert entry.read_bytes().startswith(b'{"results"')
+    assert cached.labels == streamed.labels and cached.errors == streamed.errors
+    for ref_id in ('A', 'p1.latency'):
+        for cached_frame, streamed_frame in zip(columns(cached, ref_id), columns(streamed, ref_id), strict=True):
+            assert all(same(a, b) for a, b in zip(cached_frame, streamed_frame, strict=True))
+    assert cached.errors == {'B': 'bad_data: parse error at char 4'}
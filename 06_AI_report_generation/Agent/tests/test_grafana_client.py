@@ -0,0 +1,195 @@
+"""Batched panel queries when single queries or whole requests fail"""
+
+import io
+import json
+from contextlib import contextmanager
+
+import pytest
+import requests
+import urllib3
+
+from src.clients.disk_cache import DiskCache
+from src.clients.grafana_client import GrafanaClient, PanelQuery
+from src.parsers.url_parser import GrafanaURLParser
+from src.processors.data_processor import DataProcessor
+
+
+DASHBOARD_URL = 'http://grafana.local/d/abc/test?orgId=1&from=1700000000000&to=1700000600000'
+
+
+class FakeGrafana:
+    """
+    Transport answering /api/ds/query like Grafana
+    
+    Queries with expr "bad" fail on their own (207, or 400 when all
+    queries of the request fail); an expr "reject" fails the whole request
+    without per-query results. The dashboard is saved at version, its
+    versions API answers versions_status (403 or 404 like for provisioned
+    dashboards without history).
+    """
+    
+    def __init__(self):
+        self.requests = []
+        self.gets = []
+        self.version = 3
+        self.versions_status = 200
+    
+    def get(self, url, params=None, headers=None):
+        path = url.split('grafana.local', 1)[1]
+        self.gets.append(path)
+        if path == '/api/dashboards/uid/abc/versions':
+            assert params == {'limit': 1}
+            if self.versions_status != 200:
+                return response(self.versions_status, {'message': 'not found'})
+            return response(200, [{'version': self.version}])
+        return response(200, {'dashboard': {'uid': 'abc', 'version': self.version, 'panels': [
+            {'id': 1, 'title': f"Latency v{self.version}", 'type': 'timeseries'},
+        ]}})
+    
+    def post(self, url, json=None, headers=None):
+        return self._response(json)
+    
+    @contextmanager
+    def stream(self, method, url, json=None, headers=None):
+        yield self._response(json)
+    
+    def _response(self, payload):
+        queries = payload['queries']
+        self.requests.append([query['refId'] for query in queries])
+        
+        if any(query.get('expr') == 'reject' for query in queries):
+            return response(400, {'message': 'bad request'})
+        
+        results = {}
+        for query in queries:
+            if query.get('expr') == 'bad':
+                results[query['refId']] = {'error': f"parse error in {query['refId']}", 'status': 400}
+            else:
+                results[query['refId']] = {'frames': [{
+                    'schema': {'refId': query['refId'], 'fields': [{'name': 'time'}, {'name': 'value'}]},
+                    'data': {'values': [[1700000000000, 1700000060000], [1.0, 3.0]]},
+                }]}
+        failed = sum('error' in result for result in results.values())
+        status = 200 if not failed else 400 if failed == len(results) else 207
+        return response(status, {'results': results})
+
+
+def response(status, body):
+    content = json.dumps(body).encode()
+    result = requests.Response()
+    result.status_code = status
+    result.url = 'http://grafana.local/api/ds/query'
+    result.raw = urllib3.response.HTTPResponse(body=io.BytesIO(content), preload_content=False, status=status)
+    return result
+
+
+@pytest.fixture
+def cached_grafana(monkeypatch, tmp_path):
+    monkeypatch.setenv('SERVICE_ACCOUNT_TOKEN', 'test')
+    transport = FakeGrafana()
+    cache = DiskCache(str(tmp_path))
+    return lambda: GrafanaClient(GrafanaURLParser().parse(DASHBOARD_URL), transport=transport,
+                                 dashboard_cache=cache), transport
+
+
+@pytest.fixture
+def grafana(monkeypatch):
+    monkeypatch.setenv('SERVICE_ACCOUNT_TOKEN', 'test')
+    transport = FakeGrafana()
+    client = GrafanaClient(GrafanaURLParser().parse(DASHBOARD_URL), transport=transport)
+    return client, transport
+
+
+def panel(panel_id, *exprs):
+    return PanelQuery(panel_id, 'ds', [{'refId': chr(ord('A') + i), 'expr': expr} for i, expr in enumerate(exprs)])
+
+
+def metrics(results, index):
+    return DataProcessor().process_panel_data({'id': index}, results[index], None).metrics
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_query_errors_stay_with_their_panel(grafana, stream):
+    client, transport = grafana
+    
+    results = client.get_panel_data_batch([panel(1, 'ok'), panel(2, 'ok', 'bad'), panel(3, 'ok')], stream=stream)
+    
+    assert len(transport.requests) == 1
+    assert metrics(results, 0)['A']['count'] == 2
+    assert metrics(results, 1)['A']['avg'] == 2.0
+    assert metrics(results, 1)['B'] == {'error': 'parse error in p1_B'}
+    assert 'B' not in metrics(results, 2)
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_batch_where_every_query_fails_returns_errors(grafana, stream):
+    client, _ = grafana
+    
+    results = client.get_panel_data_batch([panel(1, 'bad'), panel(2, 'bad')], stream=stream)
+    
+    assert metrics(results, 0) == {'A': {'error': 'parse error in p0_A'}}
+    assert metrics(results, 1) == {'A': {'error': 'parse error in p1_A'}}
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_rejected_batch_is_sent_again_panel_by_panel(grafana, stream):
+    client, transport = grafana
+    
+    results = client.get_panel_data_batch([panel(1, 'ok'), panel(2, 'reject', 'ok'), panel(3, 'ok')], stream=stream)
+    
+    assert transport.requests[1:] == [['A'], ['A', 'B'], ['A']]
+    assert metrics(results, 0)['A']['count'] == 2
+    assert set(metrics(results, 1)) == {'A', 'B'}
+    assert all('400' in error['error'] for error in metrics(results, 1).values())
+    assert metrics(results, 2)['A']['count'] == 2
+
+
+def test_rejected_single_panel_raises(grafana):
+    client, _ = grafana
+    
+    with pytest.raises(requests.HTTPError):
+        client.get_panel_data_batch([panel(1, 'reject')])
+
+
+def title(dashboard):
+    return dashboard['dashboard']['panels'][0]['title']
+
+
+def test_unchanged_dashboard_is_served_from_cache(cached_grafana):
+    new_client, transport = cached_grafana
+    new_client().get_dashboard()
+    transport.gets.clear()
+    
+    dashboard = new_client().get_dashboard()
+    
+    assert title(dashboard) == 'Latency v3'
+    assert transport.gets == ['/api/dashboards/uid/abc/versions']
+
+
+def test_saved_dashboard_version_is_fetched_again(cached_grafana):
+    new_client, transport = cached_grafana
+    new_client().get_dashboard()
+    transport.version = 4
+    transport.gets.clear()
+    
+    dashboard = new_client().get_dashboard()
+    
+    assert title(dashboard) == 'Latency v4'
+    assert transport.gets == ['/api/dashboards/uid/abc/versions', '/api/dashboards/uid/abc']
+    transport.gets.clear()
+    assert title(new_client().get_dashboard()) == 'Latency v4'
+    assert transport.gets == ['/api/dashboards/uid/abc/versions']
+
+
+@pytest.mark.parametrize('status', [403, 404])
+def test_dashboard_without_versions_is_always_fetched(cached_grafana, status):
+    new_client, transport = cached_grafana
+    transport.versions_status = status
+    new_client().get_dashboard()
+    transport.version = 4
+    transport.gets.clear()
+    
+    dashboard = new_client().get_dashboard()
+    
+    assert title(dashboard) == 'Latency v4'
+    assert transport.gets == ['/api/dashboards/uid/abc/versions', '/api/dashboards/uid/abc']
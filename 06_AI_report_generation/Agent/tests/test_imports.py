@@ -0,0 +1,55 @@
+"""Modules loaded by importing the agent, optional subsystems only on use"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+
+AGENT_DIR = Path(__file__).resolve().parent.parent
+
+# Loaded only by the features that need them
+OPTIONAL_MODULES = {
+    'sqlite3', 'ijson', 'cProfile', 'pstats', 'openai',
+    'src.storage.run_store', 'src.processors.jtl_analyzer', 'src.processors.live_aggregator',
+    'src.clients.influxdb_client', 'src.clients.rate_limiter', 'src.builders.report_writer',
+    'src.builders.summary_builder', 'src.telemetry.profiler',
+}
+
+
+def loaded_modules(statement):
+    """Modules in sys.modules after running a statement in a fresh interpreter"""
+    script = f"import json, sys\n{statement}\nprint(json.dumps(sorted(sys.modules)))"
+    output = subprocess.run(
+        [sys.executable, '-c', script], cwd=AGENT_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    return set(json.loads(output.splitlines()[-1]))
+
+
+def test_importing_the_agent_loads_no_optional_subsystem():
+    modules = loaded_modules('import src.agent')
+    
+    assert OPTIONAL_MODULES.isdisjoint(modules), sorted(OPTIONAL_MODULES & modules)
+    assert {'src.clients.grafana_client', 'src.processors.data_processor', 'src.telemetry.tracer'} <= modules
+
+
+def test_importing_the_cli_loads_no_agent_code():
+    modules = loaded_modules('import agent')
+    
+    assert not any(module == 'src' or module.startswith('src.') for module in modules)
+    assert 'numpy' not in modules
+
+
+@pytest.mark.parametrize('package, name, module', [
+    ('src.storage', 'RunStore', 'sqlite3'),
+    ('src.processors', 'JTLAnalyzer', 'src.processors.jtl_analyzer'),
+    ('src.telemetry', 'ThreadProfiler', 'cProfile'),
+])
+def test_optional_exports_load_on_first_access(package, name, module):
+    before = loaded_modules(f'import {package}')
+    after = loaded_modules(f'from {package} import {name}')
+    
+    assert module not in before
+    assert module in after
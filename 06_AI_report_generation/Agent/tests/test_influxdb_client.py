@@ -0,0 +1,228 @@
+"""InfluxQL rendering and chunked multi-statement queries against a fake InfluxDB"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pytest
+
+from src.clients.grafana_client import PanelQuery
+from src.clients.influxdb_client import InfluxDBClient
+from src.parsers.url_parser import GrafanaURLParser
+from src.processors.data_processor import DataProcessor
+
+
+DASHBOARD_URL = (
+    'http://grafana.local/d/abc/test?orgId=1&from=1700000000000&to=1700000600000'
+    '&var-app=checkout&var-transaction=Login&var-transaction=Logout'
+)
+TIME_FILTER = 'time >= 1700000000000ms and time <= 1700000600000ms'
+
+
+class FakeInfluxDB(ThreadingHTTPServer):
+    """
+    /query endpoint answering like InfluxDB 1.x with chunked=true
+    
+    Every statement returns the series in SERIES whose measurement it
+    selects, split into one chunk per point and sent out of statement
+    order. Statements mentioning "bad" fail on their own, "broken" fails
+    the whole query.
+    """
+    
+    SERIES = {
+        'jmeter': [
+            {'name': 'jmeter', 'tags': {'transaction': 'Login'}, 'columns': ['time', 'avg', 'max'],
+             'values': [[1700000000000, 10.0, 30.0], [1700000060000, 20.0, 40.0], [1700000120000, None, 50.0]]},
+            {'name': 'jmeter', 'tags': {'transaction': 'Logout'}, 'columns': ['time', 'avg', 'max'],
+             'values': [[1700000000000, 5.0, 6.0]]},
+        ],
+        'threads': [
+            {'name': 'threads', 'columns': ['time', 'count'],
+             'values': [[1700000000000, 50], [1700000060000, 100]]},
+        ],
+    }
+    
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _Handler)
+        self.requests = []
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+    
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+    
+    def chunks(self, statements):
+        if any('broken' in statement for statement in statements):
+            return [{'error': 'error parsing query: found broken'}]
+        
+        chunks = []
+        for statement_id, statement in reversed(list(enumerate(statements))):
+            if 'bad' in statement:
+                chunks.append({'results': [{'statement_id': statement_id, 'error': f"bad statement {statement_id}"}]})
+                continue
+            measurement = statement.split(' FROM ')[1].split()[0].split('.')[-1].strip('"')
+            for series in self.SERIES.get(measurement, []):
+                for row in series['values']:
+                    chunks.append({'results': [{
+                        'statement_id': statement_id,
+                        'series': [{**series, 'values': [row]}],
+                        'partial': True,
+                    }]})
+            if measurement not in self.SERIES:
+                chunks.append({'results': [{'statement_id': statement_id}]})
+        return chunks
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    
+    def log_message(self, *args):
+        pass
+    
+    def do_POST(self):
+        params = parse_qs(self.rfile.read(int(self.headers['Content-Length'])).decode())
+        self.server.requests.append(params)
+        body = "".join(json.dumps(chunk) + "\n" for chunk in self.server.chunks(params['q'][0].split(';')))
+        
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        # HTTP chunks cut through JSON lines, as a proxy may re-chunk them
+        data = body.encode()
+        for start in range(0, len(data), 37):
+            part = data[start:start + 37]
+            self.wfile.write(f"{len(part):x}\r\n".encode() + part + b"\r\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+@pytest.fixture(scope='module')
+def influxdb():
+    server = FakeInfluxDB()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(influxdb, monkeypatch):
+    monkeypatch.delenv('INFLUXDB_USER', raising=False)
+    influxdb.requests.clear()
+    return InfluxDBClient(GrafanaURLParser().parse(DASHBOARD_URL), influxdb.url, database='perf', chunk_size=500)
+
+
+def test_raw_query_gets_variables_and_macros(client):
+    query = {
+        'refId': 'A',
+        'rawQuery': True,
+        'query': 'SELECT mean("avg") FROM "jmeter" WHERE "application" = \'$app\' AND "transaction" =~ '
+                 '/^$transaction$/ AND $timeFilter GROUP BY time($__interval) fill(null);\n',
+    }
+    
+    assert client.render_query(query) == (
+        'SELECT mean("avg") FROM "jmeter" WHERE "application" = \'checkout\' AND "transaction" =~ '
+        f'/^(Login|Logout)$/ AND {TIME_FILTER} GROUP BY time(1000ms) fill(null)'
+    )
+
+
+def test_builder_query_is_rendered_like_grafana(client):
+    query = {
+        'refId': 'A',
+        'policy': 'autogen',
+        'measurement': 'jmeter',
+        'select': [
+            [{'type': 'field', 'params': ['avg']}, {'type': 'mean', 'params': []},
+             {'type': 'math', 'params': ['/ 1000']}, {'type': 'alias', 'params': ['avg s']}],
+            [{'type': 'field', 'params': ['pct95.0']}, {'type': 'percentile', 'params': [95]}],
+        ],
+        'tags': [
+            {'key': 'application', 'operator': '=', 'value': "o'neil"},
+            {'key': 'transaction', 'operator': '=~', 'value': '/^$transaction$/', 'condition': 'AND'},
+            {'key': 'responseCode', 'value': '200', 'condition': 'OR'},
+        ],
+        'groupBy': [
+            {'type': 'time', 'params': ['$__interval']},
+            {'type': 'tag', 'params': ['transaction']},
+            {'type': 'fill', 'params': ['none']},
+        ],
+    }
+    
+    assert client.render_query(query) == (
+        'SELECT mean("avg") / 1000 AS "avg s", percentile("pct95.0", 95) FROM "autogen"."jmeter" '
+        '''WHERE ("application" = 'o\\'neil' AND "transaction" =~ /^(Login|Logout)$/ OR "responseCode" = 200) '''
+        f'AND {TIME_FILTER} GROUP BY time(1000ms), "transaction" fill(none)'
+    )
+
+
+def test_builder_query_defaults(client):
+    query = {'refId': 'A', 'policy': 'default', 'measurement': 'threads', 'groupBy': [{'type': 'time'}]}
+    
+    assert client.render_query(query) == f'SELECT "value" FROM "threads" WHERE {TIME_FILTER} GROUP BY time(1000ms)'
+    assert client.render_query({'refId': 'B', 'expr': 'up'}) is None
+
+
+def test_batch_maps_statements_back_to_panels(client, influxdb):
+    panels = [
+        PanelQuery(1, 'influx', [
+            {'refId': 'A', 'rawQuery': True, 'query': 'SELECT "avg", "max" FROM "jmeter" WHERE $timeFilter'},
+            {'refId': 'B', 'rawQuery': True, 'query': 'SELECT * FROM "hidden"', 'hide': True},
+            {'refId': 'C', 'expr': 'rate(up[5m])'},
+        ]),
+        PanelQuery(2, 'influx', [
+            {'refId': 'A', 'measurement': 'threads', 'select': [[{'type': 'field', 'params': ['count']}]]},
+            {'refId': 'B', 'rawQuery': True, 'query': 'SELECT "x" FROM "empty" WHERE $timeFilter'},
+        ]),
+    ]
+    
+    first, second = client.get_panel_data_batch(panels)
+    
+    [params] = influxdb.requests
+    assert (params['db'], params['epoch'], params['chunked'], params['chunk_size']) == (
+        ['perf'], ['ms'], ['true'], ['500']
+    )
+    assert len(params['q'][0].split(';')) == 3
+    assert set(first['results']) == {'A', 'C'}
+    assert first['results']['C'] == {'error': 'Not an InfluxQL query', 'frames': []}
+    frames = {
+        (frame['schema']['fields'][1]['labels']['transaction'], frame['schema']['fields'][1]['name']): frame
+        for frame in first['results']['A']['frames']
+    }
+    assert sorted(frames) == [('Login', 'avg'), ('Login', 'max'), ('Logout', 'avg'), ('Logout', 'max')]
+    assert frames['Login', 'avg']['data']['values'] == [
+        [1700000000000, 1700000060000, 1700000120000], [10.0, 20.0, None]
+    ]
+    assert frames['Logout', 'max']['data']['values'] == [[1700000000000], [6.0]]
+    assert second['results']['A']['frames'][0]['data']['values'] == [[1700000000000, 1700000060000], [50, 100]]
+    assert second['results']['B'] == {'frames': []}
+    assert client.transport.summary()['requests'] == 1
+
+
+def test_results_feed_the_data_processor(client):
+    panel = PanelQuery(1, 'influx', [{'refId': 'A', 'rawQuery': True, 'query': 'SELECT "count" FROM "threads"'}])
+    
+    [result] = client.get_panel_data_batch([panel])
+    metrics = DataProcessor().process_panel_data({'id': 1, 'title': 'Threads'}, result, None).metrics
+    
+    assert (metrics['A']['count'], metrics['A']['avg'], metrics['A']['max']) == (2, 75.0, 100.0)
+
+
+def test_statement_errors_stay_with_their_target(client):
+    panel = PanelQuery(1, 'influx', [
+        {'refId': 'A', 'rawQuery': True, 'query': 'SELECT "count" FROM "threads"'},
+        {'refId': 'B', 'rawQuery': True, 'query': 'SELECT bad FROM "threads"'},
+    ])
+    
+    [result] = client.get_panel_data_batch([panel])
+    
+    assert result['results']['B'] == {'frames': [], 'error': 'bad statement 1'}
+    assert len(result['results']['A']['frames']) == 1
+    metrics = DataProcessor().process_panel_data({'id': 1}, result, None).metrics
+    assert metrics['B'] == {'error': 'bad statement 1'}
+
+
+def test_query_error_raises(client):
+    panel = PanelQuery(1, 'influx', [{'refId': 'A', 'rawQuery': True, 'query': 'SELECT broken'}])
+    
+    with pytest.raises(RuntimeError, match='found broken'):
+        client.get_panel_data_batch([panel])
@@ -0,0 +1,102 @@
+"""JTLAnalyzer parsing of JMeter result files"""
+
+import pytest
+
+from src.processors.jtl_analyzer import JTLAnalyzer, DEFAULT_JTL_HEADER, JTL_COLUMNS, _split_columns
+
+
+HEADER = ','.join(DEFAULT_JTL_HEADER)
+COLUMNS = tuple(DEFAULT_JTL_HEADER.index(name) for name in JTL_COLUMNS)
+
+
+def sample(timestamp, elapsed, label, code='200', success='true', trailing=('1', '1', '0'), message=''):
+    fields = [str(timestamp), str(elapsed), label, code, 'OK', 'Thread 1-1', 'text', success, message,
+              '512', '128', '1', '1', 'http://app/login', '10']
+    return ','.join(fields + list(trailing))
+
+
+def analyze(tmp_path, lines, **options):
+    path = tmp_path / 'results.jtl'
+    path.write_text('\n'.join([HEADER] + lines) + '\n', encoding='utf-8')
+    return JTLAnalyzer(**{'workers': 1, **options}).analyze(str(path))
+
+
+def test_quoted_label_with_delimiter(tmp_path):
+    results = analyze(tmp_path, [
+        sample(1000, 100, '"Login, step 1"'),
+        sample(1100, 300, '"Login, step 1"', code='500', success='false'),
+        sample(1200, 200, 'Home'),
+    ])
+    
+    assert set(results) == {'Login, step 1', 'Home'}
+    login = results['Login, step 1']
+    assert login.sketch.count == 2
+    assert login.sketch.max == 300
+    assert login.errors == 1
+    assert login.response_codes == {'200': 1, '500': 1}
+
+
+def test_ragged_lines_keep_their_columns():
+    # 16 + 18 fields divide evenly into two 17-field lines; the fast split
+    # would shift the second line by one column
+    text = '\n'.join([
+        sample(1000, 100, 'Short', trailing=('1', '0')),
+        sample(2000, 200, 'Long', trailing=('1', '1', '0', 'extra')),
+    ]) + '\n'
+    
+    timestamps, elapsed, labels, codes, success = _split_columns(text, ',', COLUMNS)
+    
+    assert labels == ['Short', 'Long']
+    assert elapsed == ['100', '200']
+    assert success == ['true', 'true']
+
+
+def test_uniform_lines_use_fast_split():
+    text = '\n'.join(sample(1000 + i, i, f"L{i % 3}") for i in range(30)) + '\n'
+    
+    timestamps, elapsed, labels, codes, success = _split_columns(text, ',', COLUMNS)
+    
+    assert len(labels) == 30
+    assert labels[:4] == ['L0', 'L1', 'L2', 'L0']
+    assert elapsed[29] == '29'
+
+
+def test_throughput_and_error_rate(tmp_path):
+    results = analyze(tmp_path, [sample(1000 * i, 50, 'Api', success='false' if i % 4 == 0 else 'true')
+                                 for i in range(1, 9)])
+    metrics = results['Api'].metrics()
+    
+    assert metrics['count'] == 8
+    assert metrics['error_rate'] == pytest.approx(0.25)
+    # 8 samples from 1.0 s to 8.05 s
+    assert metrics['throughput'] == pytest.approx(8 / 7.05)
+
+
+MULTI_LINE_FAILURES = [
+    sample(1000 + i, 10 + i, 'Checkout' if i % 2 else 'Login',
+           code='500' if i % 5 == 0 else '200', success='false' if i % 5 == 0 else 'true',
+           message='"Assertion failed:\nexpected ""200"",\n123,200,Fake,200\ngot 500"' if i % 5 == 0 else '')
+    for i in range(40)
+]
+
+
+def summarize(results):
+    return {label: (stats.sketch.count, stats.sketch.max, stats.errors, stats.response_codes)
+            for label, stats in results.items()}
+
+
+@pytest.mark.parametrize('range_bytes', range(40, 400, 7))
+def test_quoted_newlines_straddling_range_and_chunk_boundaries(tmp_path, range_bytes):
+    results = analyze(tmp_path, MULTI_LINE_FAILURES, range_bytes=range_bytes, chunk_bytes=range_bytes // 3 + 1)
+    
+    assert summarize(results) == {
+        'Login': (20, 48, 4, {'500': 4, '200': 16}),
+        'Checkout': (20, 49, 4, {'500': 4, '200': 16}),
+    }
+
+
+def test_quoted_newlines_with_worker_processes(tmp_path):
+    results = analyze(tmp_path, MULTI_LINE_FAILURES, workers=2, range_bytes=150)
+    
+    assert summarize(results) == summarize(analyze(tmp_path, MULTI_LINE_FAILURES))
+    assert results['Login'].errors == 4
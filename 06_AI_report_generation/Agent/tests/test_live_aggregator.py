@@ -0,0 +1,91 @@
+"""Live statistics folded chunk by chunk against exact statistics of all points"""
+
+import numpy as np
+import pytest
+
+from src.processors.data_processor import PanelData, SeriesColumns
+from src.processors.live_aggregator import LiveAggregator, RunningStats
+from src.processors.sketches import DEFAULT_RELATIVE_ACCURACY
+from src.processors.statistics import PERCENTILES
+
+
+def assert_matches_exact(stats, values):
+    values = values[~np.isnan(values)]
+    assert stats['count'] == len(values)
+    assert stats['min'] == values.min()
+    assert stats['max'] == values.max()
+    assert stats['sum'] == pytest.approx(values.sum())
+    assert stats['avg'] == pytest.approx(values.mean())
+    assert stats['stddev'] == pytest.approx(values.std(), rel=1e-9)
+    for percentile in PERCENTILES:
+        exact = np.percentile(values, percentile, method='lower')
+        assert stats[f'p{percentile}'] == pytest.approx(exact, rel=DEFAULT_RELATIVE_ACCURACY, abs=1e-12), percentile
+
+
+def poll(start, values, hosts=('slave-1',), label='host'):
+    """Panel data of one poll: consecutive one-second points per host"""
+    timestamps = (start + np.arange(len(values[0]))) * 1000.0
+    return PanelData(
+        panel_id=1, panel_title='Response time', panel_type='timeseries', metrics={}, raw_data={},
+        series={'A': [SeriesColumns('A', timestamps, host_values, labels={label: host})
+                      for host, host_values in zip(hosts, values)]}
+    )
+
+
+@pytest.mark.parametrize('values', [
+    np.random.default_rng(1).lognormal(-1.5, 0.8, 30_000),
+    np.random.default_rng(2).normal(0, 40, 30_000),
+    np.where(np.arange(30_000) % 11 == 0, np.nan, np.random.default_rng(3).lognormal(12, 2, 30_000)),
+])
+def test_running_stats_match_exact_over_chunks(values):
+    timestamps = np.arange(len(values)) * 1000.0
+    stats = RunningStats()
+    for chunk in np.array_split(np.arange(len(values)), 37):
+        stats.update(timestamps[chunk], values[chunk])
+    
+    metrics = stats.metrics()
+    assert_matches_exact(metrics, values)
+    assert metrics['latest'] == values[~np.isnan(values)][-1]
+
+
+def test_live_aggregator_matches_exact_statistics_of_all_polls():
+    rng = np.random.default_rng(4)
+    hosts = ('slave-1', 'slave-2')
+    polls = [(rng.lognormal(-1, 1, 600), rng.normal(0.5, 0.2, 600)) for _ in range(10)]
+    
+    aggregator = LiveAggregator()
+    for index, values in enumerate(polls):
+        aggregator.ingest([poll(index * 600, values, hosts)])
+    
+    [panel] = aggregator.panel_data()
+    metrics = panel.metrics['A']
+    assert aggregator.points == 2 * 6000
+    assert_matches_exact(metrics, np.concatenate([value for values in polls for value in values]))
+    for position, host in enumerate(hosts):
+        assert_matches_exact(metrics['hosts'][host], np.concatenate([values[position] for values in polls]))
+
+
+def test_live_aggregator_skips_points_after_until():
+    aggregator = LiveAggregator()
+    aggregator.ingest([poll(0, [np.arange(10.0)])], until_ms=5000)
+    
+    [panel] = aggregator.panel_data()
+    assert panel.metrics['A']['count'] == 5
+    assert panel.metrics['A']['max'] == 4.0
+
+
+def test_live_aggregator_keeps_transactions_apart():
+    rng = np.random.default_rng(5)
+    transactions = ('login', 'checkout')
+    polls = [(rng.lognormal(-2, 0.5, 300), rng.lognormal(0, 0.5, 300)) for _ in range(4)]
+    
+    aggregator = LiveAggregator()
+    for index, values in enumerate(polls):
+        aggregator.ingest([poll(index * 300, values, transactions, label='transaction')])
+    
+    [panel] = aggregator.panel_data()
+    assert set(panel.metrics) == {'A transaction=login', 'A transaction=checkout'}
+    for position, transaction in enumerate(transactions):
+        metrics = panel.metrics[f"A transaction={transaction}"]
+        assert 'hosts' not in metrics
+        assert_matches_exact(metrics, np.concatenate([values[position] for values in polls]))
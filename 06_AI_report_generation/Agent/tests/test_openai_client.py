@@ -0,0 +1,87 @@
+"""Completion cache of the OpenAI client: hits skip the backend, any key change misses"""
+
+import pytest
+
+from src.clients.disk_cache import DiskCache
+from src.clients.llm_backends import LLMBackend
+from src.clients.openai_client import OpenAIClient
+
+
+class CountingBackend(LLMBackend):
+    """Backend answering with the request it received, counting calls"""
+    
+    def __init__(self, name='openai'):
+        self.name = name
+        self.calls = 0
+    
+    def complete(self, messages, model, temperature, max_tokens):
+        self.calls += 1
+        return f"{self.name} {model} {temperature} {max_tokens} {messages[-1]['content']} #{self.calls}"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DiskCache(str(tmp_path))
+
+
+def test_cache_hit_skips_the_backend(cache):
+    backend = CountingBackend()
+    client = OpenAIClient(backend=backend, cache=cache)
+    
+    first = client.analyze('prompt', 'system')
+    second = client.analyze('prompt', 'system')
+    streamed = "".join(client.analyze_stream('prompt', 'system'))
+    
+    assert backend.calls == 1
+    assert first == second == streamed
+    assert cache.stats()['hits'] == 2
+
+
+def test_streamed_completion_is_cached(cache):
+    backend = CountingBackend()
+    client = OpenAIClient(backend=backend, cache=cache)
+    
+    streamed = "".join(client.analyze_stream('prompt'))
+    
+    assert client.analyze('prompt') == streamed
+    assert backend.calls == 1
+
+
+@pytest.mark.parametrize('change', [
+    lambda client: setattr(client, '_model', 'gpt-4o'),
+    lambda client: setattr(client, '_temperature', 0.2),
+    lambda client: setattr(client, '_max_tokens', 500),
+])
+def test_request_parameters_are_part_of_the_key(cache, change):
+    backend = CountingBackend()
+    client = OpenAIClient(backend=backend, cache=cache)
+    client.analyze('prompt', 'system')
+    
+    change(client)
+    
+    assert client.analyze('prompt', 'system').endswith('#2')
+    assert backend.calls == 2
+
+
+@pytest.mark.parametrize('prompt, system_prompt', [
+    ('other prompt', 'system'),
+    ('prompt', 'other system'),
+    ('prompt', None),
+])
+def test_messages_are_part_of_the_key(cache, prompt, system_prompt):
+    backend = CountingBackend()
+    client = OpenAIClient(backend=backend, cache=cache)
+    client.analyze('prompt', 'system')
+    
+    client.analyze(prompt, system_prompt)
+    
+    assert backend.calls == 2
+
+
+def test_backend_is_part_of_the_key(cache):
+    openai, local = CountingBackend('openai'), CountingBackend('local')
+    OpenAIClient(backend=openai, cache=cache).analyze('prompt')
+    
+    answer = OpenAIClient(backend=local, cache=cache).analyze('prompt')
+    
+    assert answer.startswith('local') and local.calls == 1
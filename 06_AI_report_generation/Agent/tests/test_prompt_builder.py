@@ -0,0 +1,95 @@
+"""Prompt building within the token budget"""
+
+import pytest
+
+from src.builders.prompt_builder import PromptBuilder, estimate_tokens
+from src.processors.data_processor import PanelData
+
+
+def panel(panel_id, title, series=3, avg=100.0, stddev=10.0):
+    metrics = {
+        chr(ord('A') + index): {
+            'min': avg - 3 * stddev, 'avg': avg + index, 'p95': avg + 2 * stddev, 'p99': avg + 3 * stddev,
+            'max': avg + 4 * stddev, 'stddev': stddev,
+        }
+        for index in range(series)
+    }
+    return PanelData(panel_id, title, 'timeseries', metrics, {})
+
+
+PANELS = (
+    [panel(i, f"CPU usage {i}") for i in range(20)]
+    + [panel(100, 'Error rate'), panel(101, 'Response time p95'), panel(102, 'Throughput hits/s')]
+)
+
+
+def build(budget, panels=PANELS):
+    return PromptBuilder(token_budget=budget).build(panels, 'Load test', '10:00 to 11:00')
+
+
+def test_everything_fits_a_large_budget():
+    prompt = build(100_000)
+    
+    assert (prompt.panels_included, prompt.panels_merged, prompt.panels_dropped) == (len(PANELS), 0, 0)
+    assert 'omitted' not in prompt.user_prompt
+    assert all(f"{panel.panel_title} (timeseries):" in prompt.user_prompt for panel in PANELS)
+
+
+@pytest.mark.parametrize('budget', range(250, 3000, 50))
+def test_trims_to_the_budget(budget):
+    prompt = build(budget)
+    
+    assert prompt.tokens == estimate_tokens(prompt.system_prompt) + estimate_tokens(prompt.user_prompt)
+    assert prompt.tokens <= budget
+    assert prompt.token_budget == budget
+    assert prompt.panels_included + prompt.panels_dropped == len(PANELS)
+
+
+def test_lowest_ranked_panels_are_merged_before_any_is_dropped():
+    full = build(100_000)
+    prompt = build(full.tokens - 50)
+    
+    assert prompt.panels_merged > 0 and prompt.panels_dropped == 0
+    assert prompt.tokens <= full.tokens - 50
+    assert 'Error rate (timeseries):' in prompt.user_prompt
+    assert 'CPU usage 19: 3 series, avg 100-102, max 140' in prompt.user_prompt
+
+
+def test_dropped_panels_are_the_least_important_and_counted():
+    prompt = build(400)
+    
+    assert prompt.panels_dropped > 0
+    assert f"{prompt.panels_dropped} lower-priority panels omitted" in prompt.user_prompt
+    for title in ('Error rate', 'Response time p95', 'Throughput hits/s'):
+        assert title in prompt.user_prompt
+    assert prompt.user_prompt.index('Error rate') < prompt.user_prompt.index('Response time p95')
+
+
+def test_constant_series_share_one_line():
+    prompt = build(100_000, [panel(1, 'Threads', series=3, avg=50.0, stddev=0.0)])
+    
+    assert '  - constant: A=50, B=51, C=52' in prompt.user_prompt
+    assert '  - A:' not in prompt.user_prompt
+
+
+def test_budget_below_the_fixed_prompt_drops_every_panel():
+    prompt = build(10)
+    
+    assert prompt.panels_included == 0
+    assert prompt.panels_dropped == len(PANELS)
+
+
+COMPARISON = "Baseline comparison against run #3 (changes beyond 10%):\n" + "\n".join(
+    f"  - REGRESSION: Response time p95 A p95: 120 -> {150 + i} (+{25 + i}%)" for i in range(10)
+)
+
+
+@pytest.mark.parametrize('budget', range(500, 3000, 100))
+def test_appendix_is_kept_and_counted(budget):
+    prompt = PromptBuilder(token_budget=budget).build(PANELS, 'Load test', '10:00 to 11:00', appendix=COMPARISON)
+    
+    assert prompt.user_prompt.endswith("\n" + COMPARISON)
+    assert prompt.tokens == estimate_tokens(prompt.system_prompt) + estimate_tokens(prompt.user_prompt)
+    assert prompt.tokens <= budget
+    without = build(budget - estimate_tokens(COMPARISON))
+    assert (prompt.panels_merged, prompt.panels_dropped) == (without.panels_merged, without.panels_dropped)
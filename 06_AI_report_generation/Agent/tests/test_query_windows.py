@@ -0,0 +1,175 @@
+"""Long ranges split into interval-aligned windows and merged back exactly"""
+
+import io
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+import requests
+import urllib3
+
+from src.clients.disk_cache import DiskCache
+from src.clients.grafana_client import GrafanaClient
+from src.parsers.url_parser import GrafanaURLParser
+from src.processors.data_processor import DataProcessor
+
+
+HOUR_MS = 3600 * 1000
+# Not aligned to the 4 s interval of one-hour windows of 1000 points
+TIME_FROM = 1700000001234
+TIME_TO = TIME_FROM + 5 * HOUR_MS + 777
+QUERIES = [{'refId': 'A', 'expr': 'latency'}]
+
+
+class BucketGrafana:
+    """
+    Transport answering /api/ds/query like a GROUP BY time(intervalMs) query
+    
+    Every refId returns one frame per host with a point at each interval
+    multiple inside the requested range; values depend on the timestamp
+    only. The window starting first answers last.
+    """
+    
+    HOSTS = ('slave-1', 'slave-2')
+    
+    def __init__(self):
+        self.ranges = []
+        self._lock = threading.Lock()
+    
+    def post(self, url, json=None, headers=None):
+        return response(self._results(json))
+    
+    @contextmanager
+    def stream(self, method, url, json=None, headers=None):
+        yield response(self._results(json))
+    
+    def _results(self, payload):
+        time_from, time_to = int(payload['from']), int(payload['to'])
+        with self._lock:
+            self.ranges.append((time_from, time_to))
+            first = time_from == min(start for start, _ in self.ranges)
+        if first:
+            time.sleep(0.05)
+        
+        results = {}
+        for query in payload['queries']:
+            interval = query.get('intervalMs', 4000)
+            timestamps = list(range(math.ceil(time_from / interval) * interval, time_to + 1, interval))
+            results[query['refId']] = {'frames': [{
+                'schema': {'fields': [{'name': 'time'}, {'name': 'value', 'labels': {'host': host}}]},
+                'data': {'values': [timestamps, [value(timestamp, offset) for timestamp in timestamps]]},
+            } for offset, host in enumerate(self.HOSTS)]}
+        return {'results': results}
+
+
+def value(timestamp, offset):
+    if timestamp // 4000 % 17 == 0:
+        return None
+    return (timestamp // 4000 * 7919 % 1000) / 10 + offset * 50
+
+
+def response(body):
+    result = requests.Response()
+    result.status_code = 200
+    result.raw = urllib3.response.HTTPResponse(
+        body=io.BytesIO(json.dumps(body).encode()), preload_content=False, status=200
+    )
+    return result
+
+
+@pytest.fixture
+def make_client(monkeypatch):
+    monkeypatch.setenv('SERVICE_ACCOUNT_TOKEN', 'test')
+    
+    def make(time_from=TIME_FROM, time_to=TIME_TO, **options):
+        context = GrafanaURLParser().parse(f'http://grafana.local/d/abc/test?from={time_from}&to={time_to}')
+        transport = BucketGrafana()
+        return GrafanaClient(context, transport=transport, **options), transport
+    
+    return make
+
+
+@pytest.mark.parametrize('time_from, time_to', [
+    (TIME_FROM, TIME_TO),
+    (0, 3 * HOUR_MS),
+    (HOUR_MS - 1, 2 * HOUR_MS + 1),
+    (TIME_FROM, TIME_FROM + HOUR_MS + 1),
+])
+def test_windows_are_aligned_and_cover_every_point_once(make_client, time_from, time_to):
+    client, _ = make_client(window_seconds=3600)
+    
+    windows, interval_ms = client._split_time_range(time_from, time_to)
+    
+    assert interval_ms == 4000
+    assert windows[0][0] == time_from and windows[-1][1] == time_to
+    for (_, end), (start, _) in zip(windows, windows[1:]):
+        assert start == end + 1 and start % HOUR_MS == 0
+    points = range(math.ceil(time_from / interval_ms) * interval_ms, time_to + 1, interval_ms)
+    assert sorted(point for point in points for start, end in windows if start <= point <= end) == list(points)
+
+
+def test_short_range_is_one_window(make_client):
+    client, _ = make_client(window_seconds=3600)
+    
+    assert client._split_time_range(TIME_FROM, TIME_FROM + HOUR_MS) == ([(TIME_FROM, TIME_FROM + HOUR_MS)], 0)
+
+
+def series(result):
+    if isinstance(result, dict):
+        frames = result['results']['A']['frames']
+        return [(frame['schema']['fields'][1]['labels'], frame['data']['values']) for frame in frames]
+    return [(labels, [list(column) for column in columns])
+            for columns, labels in zip(result.frames['A'], result.labels['A'])]
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_windows_merge_in_timestamp_order(make_client, stream):
+    client, transport = make_client(window_seconds=3600)
+    
+    result = client.get_panel_data(1, 'ds', QUERIES, stream=stream)
+    
+    assert len(transport.ranges) == 6
+    timestamps = list(range(math.ceil(TIME_FROM / 4000) * 4000, TIME_TO + 1, 4000))
+    for offset, (labels, (merged_timestamps, values)) in enumerate(series(result)):
+        assert labels == {'host': BucketGrafana.HOSTS[offset]}
+        assert merged_timestamps == timestamps
+        expected = [value(timestamp, offset) for timestamp in timestamps]
+        # Streamed values are NaN where the JSON has null
+        assert [None if v is None or math.isnan(v) else v for v in values] == expected
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_merged_statistics_equal_a_single_window_query(make_client, stream):
+    windowed, _ = make_client(window_seconds=3600)
+    single, transport = make_client(interval_ms=4000)
+    panel = {'id': 1, 'title': 'Latency', 'type': 'timeseries'}
+    
+    merged = DataProcessor().process_panel_data(panel, windowed.get_panel_data(1, 'ds', QUERIES, stream=stream), None)
+    whole = DataProcessor().process_panel_data(panel, single.get_panel_data(1, 'ds', QUERIES, stream=stream), None)
+    
+    assert len(transport.ranges) == 1
+    assert merged.metrics == whole.metrics
+    assert merged.metrics['A']['count'] > 8000
+
+
+def test_only_the_window_ending_near_now_expires(make_client, tmp_path):
+    now_ms = int(time.time() * 1000)
+    cache = DiskCache(str(tmp_path))
+    client, transport = make_client(
+        now_ms - 3 * HOUR_MS, now_ms, window_seconds=3600, cache=cache, recent_range_ttl=60
+    )
+    client.get_panel_data(1, 'ds', QUERIES)
+    written = sorted(transport.ranges)
+    transport.ranges.clear()
+    
+    # Two TTLs later: older windows were written after they ended and stay
+    for path in tmp_path.glob('*.cache'):
+        os.utime(path, (time.time(), time.time() - 120))
+    client.get_panel_data(1, 'ds', QUERIES)
+    
+    assert len(written) == 4
+    assert transport.ranges == [written[-1]]
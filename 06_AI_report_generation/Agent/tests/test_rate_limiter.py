@@ -0,0 +1,54 @@
+"""Token bucket shared by concurrent callers"""
+
+import threading
+import time
+
+from src.clients.rate_limiter import RateLimiter
+
+
+def acquire_concurrently(limiter, callers):
+    waits, finished = [], []
+    lock = threading.Lock()
+    barrier = threading.Barrier(callers)
+    
+    def call():
+        barrier.wait()
+        waited = limiter.acquire()
+        with lock:
+            waits.append(waited)
+            finished.append(time.monotonic())
+    
+    started = time.monotonic()
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return waits, [at - started for at in sorted(finished)]
+
+
+def test_burst_passes_at_once_then_the_rate_applies():
+    waits, finished = acquire_concurrently(RateLimiter(1200, burst=3), callers=9)
+    
+    assert sorted(waits)[:3] == [0.0, 0.0, 0.0]
+    assert all(waited > 0 for waited in sorted(waits)[3:])
+    # The n-th call after the burst waits for n tokens at 20 per second
+    for position, at in enumerate(finished[3:], start=1):
+        assert at >= position * 0.05 * 0.9
+
+
+def test_concurrent_callers_never_exceed_the_rate():
+    rate, burst = 20.0, 2
+    _, finished = acquire_concurrently(RateLimiter(rate * 60, burst=burst), callers=8)
+    
+    for first in range(len(finished)):
+        for last in range(first, len(finished)):
+            window = finished[last] - finished[first]
+            # 10 ms slack for threads recording their time late
+            assert last - first + 1 <= burst + rate * (window + 0.01)
+
+
+def test_zero_rate_never_waits():
+    waits, _ = acquire_concurrently(RateLimiter(0, burst=1), callers=16)
+    
+    assert waits == [0.0] * 16
@@ -0,0 +1,150 @@
+"""Streamed reports against the report built in one piece"""
+
+import io
+from datetime import datetime
+
+import pytest
+
+from src.builders import report_builder as report_builder_module
+from src.builders.report_builder import ReportBuilder
+from src.builders.report_writer import ReportWriter
+from src.parsers.url_parser import GrafanaURLParser
+from src.processors.anomaly_detection import Anomaly
+from src.processors.data_processor import PanelData
+from src.storage.baseline import compare_runs
+from src.storage.run_store import StoredRun
+
+
+CONTEXT = GrafanaURLParser().parse('http://grafana.local/d/abc/test?from=1700000000000&to=1700003600000')
+SUMMARY_CHUNKS = ['Response times ', 'stayed flat;\n\n', '- errors peaked ', 'at 2%.']
+
+HOSTS = {'slave-1': {'avg': 0.2, 'p95': 0.4, 'p99': 0.5, 'max': 0.9}, 'slave-2': {'avg': 0.3, 'max': 1.1}}
+PANELS = [
+    PanelData(1, 'Response time', 'timeseries', {
+        'A': {'min': 0.1, 'max': 1.1, 'avg': 0.25, 'latest': 0.3, 'p95': 0.45, 'p99': 0.5, 'stddev': 0.1,
+              'hosts': HOSTS},
+        'B': {'error': 'timeout'},
+    }, {}, anomalies=[Anomaly('A', 'spike', 1.7e12, 1.7e12 + 60_000, 1.1, 0.25, 6.0, host='slave-2')]),
+    PanelData(2, 'Login', 'jtl', {'Login': {
+        'min': 12.0, 'max': 480.0, 'avg': 95.5, 'p90': 180.0, 'throughput': 4.2, 'error_rate': 0.02, 'errors': 5,
+        'response_codes': {'200': 245, '500': 5},
+    }}, {}),
+    PanelData(3, 'Active threads', 'stat', {}, {}),
+]
+
+
+class RecordingStream(io.StringIO):
+    """Echo stream recording itself and the report file at every flush"""
+    
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.flushed = []
+    
+    def flush(self):
+        self.flushed.append((self.getvalue(), self.path.read_text(encoding='utf-8')))
+
+
+@pytest.fixture(autouse=True)
+def frozen_clock(monkeypatch):
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime(2024, 3, 1, 12, 30, 0)
+    
+    monkeypatch.setattr(report_builder_module, 'datetime', FrozenDatetime)
+
+
+def comparison():
+    baseline = [PanelData(1, 'Response time', 'timeseries', {'A': {'avg': 0.2, 'p95': 0.3, 'p99': 0.5}}, {})]
+    run = StoredRun(
+        4, 'abc', 'Load test', CONTEXT.time_from, CONTEXT.time_to, {}, CONTEXT.raw_url, 'old.md', CONTEXT.time_to
+    )
+    comparison = compare_runs(PANELS, run, baseline)
+    assert comparison.regressions
+    return comparison
+
+
+def stream_report(path, summary_chunks, comparison, echo=None):
+    with ReportWriter(ReportBuilder(), path, echo=echo) as writer:
+        writer.write_header('Load test', CONTEXT)
+        if summary_chunks is not None:
+            writer.write_summary(iter(summary_chunks))
+        if comparison is not None:
+            writer.write_comparison(comparison)
+        writer.write_panels(PANELS)
+
+
+@pytest.mark.parametrize('summary_chunks', [SUMMARY_CHUNKS, [], None], ids=['summary', 'empty-summary', 'no-ai'])
+@pytest.mark.parametrize('with_comparison', [True, False], ids=['comparison', 'no-comparison'])
+def test_streamed_report_is_identical_to_the_built_report(tmp_path, summary_chunks, with_comparison):
+    baseline_comparison = comparison() if with_comparison else None
+    ai_analysis = None if summary_chunks is None else ''.join(summary_chunks)
+    echo = io.StringIO()
+    
+    stream_report(tmp_path / 'report.md', summary_chunks, baseline_comparison, echo=echo)
+    built = ReportBuilder().build_report('Load test', CONTEXT, PANELS, ai_analysis, baseline_comparison)
+    
+    assert (tmp_path / 'report.md').read_bytes() == built.encode('utf-8')
+    assert echo.getvalue() == built
+
+
+def test_sections_are_flushed_in_order(tmp_path):
+    path = tmp_path / 'report.md'
+    on_disk = []
+    
+    def summary():
+        for chunk in SUMMARY_CHUNKS:
+            # Every fragment is on disk before the next one is produced
+            on_disk.append(path.read_text(encoding='utf-8'))
+            yield chunk
+    
+    echo = RecordingStream(path)
+    with ReportWriter(ReportBuilder(), path, echo=echo) as writer:
+        writer.write_header('Load test', CONTEXT)
+        after_header = path.read_text(encoding='utf-8')
+        writer.write_summary(summary())
+        writer.write_comparison(comparison())
+        after_comparison = path.read_text(encoding='utf-8')
+        writer.write_panels(PANELS)
+        after_panels = path.read_text(encoding='utf-8')
+    report = path.read_text(encoding='utf-8')
+    
+    assert after_header.startswith('# Performance Test Report: Load test') and '##' not in after_header
+    assert on_disk[0].endswith('## 📊 Executive Summary\n\n')
+    for chunk, before, after in zip(SUMMARY_CHUNKS, on_disk, on_disk[1:]):
+        assert after == before + chunk
+    assert after_comparison.endswith("\n".join(ReportBuilder().render_comparison(comparison())) + "\n")
+    assert after_panels.startswith(after_comparison) and '*Report generated' not in after_panels
+    assert report.startswith(after_panels) and report.endswith('*Report generated by Performance Report Agent*')
+    headings = [
+        '# Performance Test Report', '## 📊 Executive Summary', '## 🔁 Baseline Comparison',
+        '## 📈 Panel Metrics', '### Response time', '### Login', '### Active threads', '\n---\n',
+    ]
+    positions = [report.index(heading) for heading in headings]
+    assert positions == sorted(positions)
+    # The echo stream is flushed with the file, never ahead of or behind it
+    assert all(echoed == written for echoed, written in echo.flushed)
+    assert echo.flushed[-1][0] == report
+
+
+def test_echo_started_late_replays_the_report_so_far(tmp_path):
+    echo = io.StringIO()
+    
+    with ReportWriter(ReportBuilder(), tmp_path / 'report.md') as writer:
+        writer.write_header('Load test', CONTEXT)
+        writer.write_summary(iter(SUMMARY_CHUNKS))
+        writer.echo_to(echo)
+        writer.write_panels(PANELS)
+    
+    assert echo.getvalue() == (tmp_path / 'report.md').read_text(encoding='utf-8')
+
+
+def test_failed_report_is_left_without_footer(tmp_path):
+    with pytest.raises(RuntimeError):
+        with ReportWriter(ReportBuilder(), tmp_path / 'report.md') as writer:
+            writer.write_header('Load test', CONTEXT)
+            raise RuntimeError('Grafana unreachable')
+    
+    report = (tmp_path / 'report.md').read_text(encoding='utf-8')
+    assert report.startswith('# Performance Test Report') and '*Report generated' not in report
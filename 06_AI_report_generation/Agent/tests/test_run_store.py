@@ -0,0 +1,161 @@
+"""Run store round trips and baseline selection"""
+
+import sys
+
+import numpy as np
+import pytest
+
+import agent as cli
+from src.agent import PerformanceReportAgent
+from src.parsers.url_parser import GrafanaURLParser
+from src.processors.data_processor import PanelData, SeriesColumns
+from src.storage.baseline import compare_runs
+from src.storage.run_store import RunStore
+
+
+URL = "https://grafana.example.com/d/load/test?orgId=1&from={start}&to={end}&var-app=checkout"
+HOUR_MS = 3_600_000
+
+
+def context(hour=0, **variables):
+    url = URL.format(start=1_700_000_000_000 + hour * HOUR_MS, end=1_700_000_000_000 + (hour + 1) * HOUR_MS)
+    url += ''.join(f"&var-{name}={value}" for name, value in variables.items())
+    return GrafanaURLParser().parse(url)
+
+
+def panels(p95=120.0, points=2000):
+    rng = np.random.default_rng(1)
+    timestamps = 1.7e12 + np.arange(points) * 1000.0
+    series = [
+        SeriesColumns('A', timestamps, rng.normal(100, 5, points), labels={'host': host})
+        for host in ('slave-1', 'slave-2')
+    ]
+    return [
+        PanelData(7, 'Response time', 'timeseries', {
+            'A': {'min': 80.0, 'avg': 100.0, 'p95': p95, 'p99': 140.0, 'max': 160.0, 'count': points},
+            'B': {'error': 'timeout'},
+        }, {}, series={'A': series}, row='Latency'),
+        PanelData(3, 'Throughput hits/s', 'stat', {'A': {'avg': 50.0, 'max': 60.0}}, {}),
+    ]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = RunStore(str(tmp_path / 'runs' / 'runs.db'))
+    yield store
+    store.close()
+
+
+def test_saved_run_loads_back(store):
+    saved = panels()
+    
+    run_id = store.save_run(context(), 'Load test', saved, report_path='report.md', series_points=100)
+    loaded = store.load_panels(run_id)
+    
+    assert [(panel.panel_id, panel.panel_title, panel.panel_type, panel.row) for panel in loaded] == [
+        (7, 'Response time', 'timeseries', 'Latency'), (3, 'Throughput hits/s', 'stat', None),
+    ]
+    assert [panel.metrics for panel in loaded] == [panel.metrics for panel in saved]
+    assert loaded[1].series == {} and loaded[0].raw_data == {}
+    expected = saved[0].downsample(100)['A']
+    for stored, column in zip(loaded[0].series['A'], expected, strict=True):
+        assert stored.labels == column.labels
+        assert np.array_equal(stored.timestamps, column.timestamps)
+        assert np.array_equal(stored.values, column.values)
+    
+    run = store.get_run(run_id)
+    assert (run.dashboard_uid, run.dashboard_title, run.report_path) == ('load', 'Load test', 'report.md')
+    assert run.variables == {'app': 'checkout'}
+    assert run.time_from == context().time_from and run.time_to == context().time_to
+
+
+def test_same_run_is_replaced_and_variables_are_part_of_the_key(store):
+    first = store.save_run(context(), 'Load test', panels(p95=120.0))
+    second = store.save_run(context(), 'Load test', panels(p95=150.0))
+    other = store.save_run(context(host='web-1'), 'Load test', panels())
+    
+    assert store.get_run(first) is None
+    assert store.find_run(context()).run_id == second
+    assert store.load_panels(second)[0].metrics['A']['p95'] == 150.0
+    assert store.find_run(context(host='web-1')).run_id == other
+    assert store.find_run(context(host='web-2')) is None
+
+
+def test_latest_runs_are_ordered_by_test_start(store):
+    for hour in (2, 0, 5, 1):
+        store.save_run(context(hour), 'Load test', panels())
+    
+    runs = store.latest_runs('load', limit=3)
+    
+    assert [run.time_from for run in runs] == [context(hour).time_from for hour in (5, 2, 1)]
+    assert store.latest_runs('other') == []
+
+
+def test_comparison_flags_regressions_by_direction():
+    baseline = panels(p95=100.0)
+    current = panels(p95=150.0)
+    current[1].metrics['A']['avg'] = 40.0
+    current.append(PanelData(99, 'New panel', 'timeseries', {}, {}))
+    
+    comparison = compare_runs(current, None, baseline)
+    
+    assert [(change.panel_title, change.metric) for change in comparison.regressions] == [
+        ('Response time', 'p95'), ('Throughput hits/s', 'avg'),
+    ]
+    assert comparison.improvements == []
+    assert comparison.unmatched_panels == 1
+    assert not any(change.ref_id == 'B' for change in comparison.changes)
+
+
+def agent(tmp_path, baseline):
+    return PerformanceReportAgent(
+        use_cache=False, llm_backend='local', baseline=baseline, run_store_path=str(tmp_path / 'runs.db')
+    )
+
+
+def test_baseline_selection(tmp_path, monkeypatch):
+    monkeypatch.setenv('SERVICE_ACCOUNT_TOKEN', 'test')
+    store = RunStore(str(tmp_path / 'runs.db'))
+    ids = {hour: store.save_run(context(hour), 'Load test', panels()) for hour in (0, 1, 3)}
+    store.close()
+    
+    latest = agent(tmp_path, 'latest')
+    by_id = agent(tmp_path, str(ids[0]))
+    by_url = agent(tmp_path, context(1).raw_url)
+    
+    assert latest._resolve_baseline(context(3)).run_id == ids[1]
+    assert latest._resolve_baseline(context(2)).run_id == ids[1]
+    assert latest._resolve_baseline(context(0)) is None
+    assert by_id._resolve_baseline(context(3)).run_id == ids[0]
+    assert by_url._resolve_baseline(context(3)).run_id == ids[1]
+    with pytest.raises(ValueError, match='not stored'):
+        agent(tmp_path, '12345')._resolve_baseline(context(3))
+
+
+def test_list_runs_needs_no_grafana_or_llm_settings(store, tmp_path, monkeypatch, capsys):
+    for name in ('OPENAI_API_KEY', 'SERVICE_ACCOUNT_TOKEN', 'LLM_BACKEND'):
+        monkeypatch.delenv(name, raising=False)
+    store.save_run(context(0), 'Load test', panels())
+    store.save_run(context(1), 'Load test', panels())
+    
+    monkeypatch.setattr(sys, 'argv', [
+        'agent.py', '--url', 'https://grafana.example.com/d/load', '--list-runs',
+        '--run-store', str(tmp_path / 'runs' / 'runs.db'), '--output-dir', str(tmp_path / 'reports')
+    ])
+    cli.main()
+    
+    lines = capsys.readouterr().out.splitlines()
+    assert [line.split()[0] for line in lines] == ['#2', '#1']
+    assert lines[0].endswith(context(1).raw_url)
+    assert not (tmp_path / 'reports').exists()
+
+
+def test_list_runs_without_a_store(tmp_path, monkeypatch, capsys):
+    path = tmp_path / 'runs.db'
+    monkeypatch.setattr(sys, 'argv', ['agent.py', '--url', 'https://grafana.example.com/d/load', '--list-runs',
+                                      '--run-store', str(path)])
+    
+    cli.main()
+    
+    assert 'No stored runs' in capsys.readouterr().out
+    assert not path.exists()
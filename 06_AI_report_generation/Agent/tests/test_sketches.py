@@ -0,0 +1,74 @@
+"""LatencySketch quantiles against exact percentiles"""
+
+import numpy as np
+import pytest
+
+from src.processors.sketches import LatencySketch, DEFAULT_RELATIVE_ACCURACY
+
+
+QUANTILES = (0.0, 0.01, 0.25, 0.5, 0.9, 0.95, 0.99, 1.0)
+
+
+def sketch_of(values, chunks=1):
+    sketch = LatencySketch()
+    for chunk in np.array_split(values, chunks):
+        sketch.add(chunk)
+    return sketch
+
+
+def assert_within_accuracy(sketch, values):
+    for q in QUANTILES:
+        # The sketch returns the value at rank floor(q * (n - 1))
+        exact = np.percentile(values, q * 100, method='lower')
+        assert sketch.quantile(q) == pytest.approx(exact, rel=DEFAULT_RELATIVE_ACCURACY, abs=1e-12), q
+
+
+@pytest.mark.parametrize('values', [
+    np.random.default_rng(1).uniform(0.01, 0.9, 50_000),
+    np.random.default_rng(2).normal(0, 50, 50_000),
+    -np.random.default_rng(3).lognormal(2, 1, 50_000),
+    np.random.default_rng(4).lognormal(30, 3, 50_000),
+    np.random.default_rng(5).lognormal(-20, 2, 50_000),
+], ids=['sub-1', 'mixed-sign', 'negative', 'large', 'tiny'])
+def test_quantiles_within_relative_accuracy(values):
+    assert_within_accuracy(sketch_of(values, chunks=7), values)
+
+
+def test_exact_moments_cover_every_sample():
+    values = np.array([-5.0, -3.0, 0.0, 1.0, 2.0, np.nan])
+    summary = sketch_of(values).summary()
+    
+    assert summary['count'] == 5
+    assert summary['sum'] == pytest.approx(-5.0)
+    assert summary['avg'] == pytest.approx(-1.0)
+    assert summary['min'] == -5.0
+    assert summary['max'] == 2.0
+    assert summary['stddev'] == pytest.approx(np.std([-5.0, -3.0, 0.0, 1.0, 2.0]))
+
+
+def test_merge_matches_pooled_values():
+    rng = np.random.default_rng(6)
+    parts = [rng.normal(0.5, 0.3, 10_000), rng.normal(-20, 5, 5_000), rng.lognormal(8, 1, 2_000)]
+    merged = sketch_of(parts[0])
+    for part in parts[1:]:
+        merged.merge(sketch_of(part))
+    pooled = np.concatenate(parts)
+    
+    assert merged.count == len(pooled)
+    assert merged.sum == pytest.approx(pooled.sum())
+    assert_within_accuracy(merged, pooled)
+
+
+def test_merge_keeps_operands_independent():
+    left, right = sketch_of(np.array([-1.0, 1.0])), sketch_of(np.array([-2.0]))
+    merged = left.copy().merge(right)
+    
+    assert merged.count == 3
+    assert left.count == 2 and left.quantile(0.0) == pytest.approx(-1.0, rel=0.01)
+
+
+def test_empty_sketch():
+    sketch = LatencySketch()
+    sketch.add(np.array([np.nan]))
+    assert sketch.quantile(0.5) is None
+    assert sketch.summary() == {'count': 0}
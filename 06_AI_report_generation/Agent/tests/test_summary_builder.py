@@ -0,0 +1,158 @@
+"""Map-reduce summary: panel groups, concurrent map calls and the reduce budget"""
+
+import threading
+import time
+
+import pytest
+
+from src.builders.prompt_builder import PromptBuilder, estimate_tokens
+from src.builders.summary_builder import GroupFindings, MapReduceSummaryBuilder
+from src.clients.rate_limiter import RateLimiter
+from src.processors.data_processor import PanelData
+
+
+STATS = {'min': 1.0, 'avg': 90.0, 'p95': 180.0, 'p99': 200.0, 'max': 250.0, 'stddev': 20.0}
+
+
+def panel(panel_id, title, row=None):
+    return PanelData(panel_id, title, 'timeseries', {'A': STATS}, {}, row=row)
+
+
+def builder(client=None, token_budget=3000, **options):
+    return MapReduceSummaryBuilder(client or FakeLLM(), PromptBuilder(token_budget=token_budget), **options)
+
+
+def findings(name, bullets, panel_count=6):
+    text = "\n".join(f"- {name} finding {number}: p95 rose from 120 ms to 480 ms" for number in range(bullets))
+    return GroupFindings(name=name, panel_count=panel_count, findings=text, latency_ms=1.0)
+
+
+class FakeLLM:
+    """Client answering every group prompt, tracking calls in flight"""
+    
+    def __init__(self, delay=0.0, failing=()):
+        self.delay = delay
+        self.failing = failing
+        self.in_flight = self.peak = 0
+        self.started = []
+        self.lock = threading.Lock()
+    
+    def analyze(self, user_prompt, system_prompt):
+        with self.lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            self.started.append(time.monotonic())
+        try:
+            time.sleep(self.delay)
+            if any(name in user_prompt for name in self.failing):
+                raise RuntimeError('model overloaded')
+            return f"- findings for {user_prompt.splitlines()[2]}"
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def test_panels_are_grouped_by_row_then_metric_kind():
+    panels = [
+        panel(1, 'Response time', row='Checkout'),
+        panel(2, 'Errors per second'),
+        panel(3, 'CPU usage', row='Checkout'),
+        panel(4, 'Hits per second'),
+        panel(5, 'Latency p95'),
+        panel(6, 'Failed logins'),
+        panel(7, 'Build info'),
+    ]
+    
+    groups = builder().group_panels(panels)
+    
+    assert [(name, [p.panel_id for p in group]) for name, group in groups] == [
+        ('Checkout', [1, 3]),
+        ('errors', [2, 6]),
+        ('throughput', [4]),
+        ('latency', [5]),
+        ('other', [7]),
+    ]
+
+
+@pytest.mark.parametrize('count, sizes', [(6, [6]), (7, [6, 1]), (14, [6, 6, 2])])
+def test_large_groups_are_split_in_chunks_of_six(count, sizes):
+    panels = [panel(i, f"Response time {i}", row='Checkout') for i in range(count)]
+    
+    groups = builder().group_panels(panels)
+    
+    assert [len(group) for _, group in groups] == sizes
+    assert [p.panel_id for _, group in groups for p in group] == list(range(count))
+    if len(sizes) > 1:
+        assert [name for name, _ in groups] == [f"Checkout ({n}/{len(sizes)})" for n in range(1, len(sizes) + 1)]
+    else:
+        assert [name for name, _ in groups] == ['Checkout']
+
+
+def test_map_keeps_group_order_and_reports_failed_groups():
+    panels = [panel(i, f"Response time {i}", row=row) for i, row in enumerate(['Login'] * 3 + ['Search'] * 3 + ['Pay'])]
+    
+    results = builder(FakeLLM(failing=('/ Search',)), concurrency=3).map(panels, 'Load test', '1 hour')
+    
+    assert [group.name for group in results] == ['Login', 'Search', 'Pay']
+    assert results[1].findings is None and results[1].error == 'model overloaded'
+    assert 'Login' in results[0].findings and results[2].panel_count == 1
+    prompt = builder().reduce_prompt(results, 'Load test', '1 hour')
+    assert 'Search' not in prompt.user_prompt and 'Pay (1 panels)' in prompt.user_prompt
+
+
+@pytest.mark.parametrize('concurrency', [1, 3])
+def test_map_calls_in_flight_stay_within_concurrency(concurrency):
+    client = FakeLLM(delay=0.02)
+    panels = [panel(i, f"Response time {i}", row=f"Row {i}") for i in range(8)]
+    
+    builder(client, concurrency=concurrency).map(panels, 'Load test', '1 hour')
+    
+    assert len(client.started) == 8
+    assert client.peak == concurrency
+
+
+def test_map_calls_wait_on_the_rate_limiter():
+    client = FakeLLM()
+    panels = [panel(i, f"Response time {i}", row=f"Row {i}") for i in range(6)]
+    
+    builder(client, concurrency=6, rate_limiter=RateLimiter(1200, burst=2)).map(panels, 'Load test', '1 hour')
+    
+    # Two calls of the burst at once, then one every 50 ms
+    started = sorted(client.started)
+    assert started[-1] - started[0] >= 4 * 0.05 * 0.9
+
+
+def test_reduce_prompt_keeps_all_findings_within_budget():
+    results = [findings('Login', 3), findings('Search', 3)]
+    
+    prompt = builder().reduce_prompt(results, 'Load test', '1 hour', appendix='Baseline comparison:\n- none')
+    
+    assert prompt.panels_included == 12 and prompt.panels_merged == prompt.panels_dropped == 0
+    assert all(text in prompt.user_prompt for text in ('Login finding 2', 'Search finding 2'))
+    assert prompt.user_prompt.endswith('\nBaseline comparison:\n- none')
+    assert prompt.tokens == estimate_tokens(prompt.system_prompt) + estimate_tokens(prompt.user_prompt)
+
+
+@pytest.mark.parametrize('token_budget', [400, 600, 900])
+def test_reduce_prompt_cuts_then_drops_the_last_findings_over_budget(token_budget):
+    results = [findings(f"Row {i}", 5) for i in range(12)]
+    appendix = "Baseline comparison:\n" + "\n".join(f"- Response time {i} p95 +40%" for i in range(10))
+    
+    prompt = builder(token_budget=token_budget).reduce_prompt(results, 'Load test', '1 hour', appendix=appendix)
+    
+    assert prompt.tokens <= token_budget
+    assert prompt.user_prompt.endswith("\n" + appendix)
+    assert prompt.panels_merged or prompt.panels_dropped
+    assert prompt.panels_included + prompt.panels_dropped == 72
+    # The first groups keep their findings longest
+    assert 'Row 0 finding 0' in prompt.user_prompt
+    if prompt.panels_dropped:
+        assert f"findings of {prompt.panels_dropped // 6} groups omitted" in prompt.user_prompt
+        assert 'Row 11 (' not in prompt.user_prompt
+
+
+def test_reduce_prompt_fails_without_findings():
+    failed = GroupFindings(name='Login', panel_count=3, findings=None, latency_ms=1.0, error='timeout')
+    
+    with pytest.raises(RuntimeError, match='every panel group'):
+        builder().reduce_prompt([failed], 'Load test', '1 hour')
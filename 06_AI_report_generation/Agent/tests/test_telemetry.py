@@ -0,0 +1,91 @@
+"""Tracer exports and the all-thread profiler"""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from src.telemetry import ThreadProfiler, Tracer
+
+
+def traced():
+    tracer = Tracer()
+    with tracer.span('report', dashboard='load') as report:
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix='panel') as pool:
+            list(pool.map(tracer.bind(lambda i: query(tracer, i)), range(3)))
+        report.set(panels=3)
+    tracer.count('points', 1000, source='grafana')
+    tracer.count('points', 500, source='grafana')
+    tracer.count('points', 7, source='jtl')
+    tracer.gauge('bytes_received', 2048)
+    tracer.gauge('label', 1, text='say "hi"\n')
+    return tracer
+
+
+def query(tracer, panel):
+    with tracer.span('query', panel=panel):
+        pass
+
+
+def test_chrome_trace(tmp_path):
+    tracer = traced()
+    path = tmp_path / 'out' / 'trace.json'
+    
+    tracer.write_trace(str(path))
+    
+    trace = json.loads(path.read_text())
+    spans = [event for event in trace['traceEvents'] if event['ph'] == 'X']
+    threads = {event['tid']: event['args']['name'] for event in trace['traceEvents'] if event['ph'] == 'M'}
+    [report] = [span for span in spans if span['name'] == 'report']
+    queries = [span for span in spans if span['name'] == 'query']
+    assert len(queries) == 3
+    assert all(span['args']['parent_id'] == report['args']['span_id'] for span in queries)
+    assert all(threads[span['tid']].startswith('panel') for span in queries)
+    assert sorted(span['args']['panel'] for span in queries) == [0, 1, 2]
+    assert report['args']['parent_id'] is None
+    assert report['args']['dashboard'] == 'load' and report['args']['panels'] == 3
+    assert all(span['dur'] >= 0 for span in spans) and report['dur'] >= max(span['dur'] for span in queries)
+    assert trace['otherData']['stages']['query']['calls'] == 3
+    assert {'name': 'points', 'labels': {'source': 'grafana'}, 'value': 1500} in trace['otherData']['counters']
+    assert not list(path.parent.glob('.*.tmp'))
+
+
+def test_prometheus_text(tmp_path):
+    tracer = traced()
+    path = tmp_path / 'metrics.prom'
+    
+    tracer.write_prometheus(str(path))
+    
+    lines = path.read_text().splitlines()
+    assert '# TYPE report_stage_seconds_total counter' in lines
+    assert 'report_stage_calls_total{stage="query"} 3' in lines
+    assert 'report_stage_calls_total{stage="report"} 1' in lines
+    assert '# TYPE report_points_total counter' in lines
+    assert 'report_points_total{source="grafana"} 1500' in lines
+    assert 'report_points_total{source="jtl"} 7' in lines
+    assert '# TYPE report_bytes_received gauge' in lines
+    assert 'report_bytes_received 2048' in lines
+    assert 'report_label{text="say \\"hi\\"\\n"} 1' in lines
+    assert any(line.startswith('report_peak_rss_bytes ') for line in lines)
+    assert tracer.counter_total('points') == 1507
+
+
+def spin(count):
+    return sum(range(count))
+
+
+def test_profiler_covers_pool_threads(tmp_path):
+    profiler = ThreadProfiler()
+    
+    profiler.start()
+    try:
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            results = list(pool.map(spin, [10_000] * 6))
+    finally:
+        stats = profiler.stop()
+    
+    assert results == [spin(10_000)] * 6
+    [calls] = [entry[1] for (_, _, function), entry in stats.stats.items() if function == 'spin']
+    assert calls == 6
+    stats_path, listing_path = profiler.dump(str(tmp_path / 'profile.pstats'))
+    listing = open(listing_path).read()
+    assert 'Hot paths by own time' in listing and 'spin' in listing
+    assert open(stats_path, 'rb').read()
@@ -0,0 +1,187 @@
+"""Dashboard variable interpolation and repeated panels"""
+
+import json
+
+import pytest
+
+from benchmarks.synthetic_grafana import DashboardSpec, build_dashboard
+from src.parsers.template_engine import TemplateEngine
+
+
+JMETER_TARGETS = [
+    {
+        'refId': 'A',
+        'rawQuery': True,
+        'query': 'SELECT mean("pct95.0") FROM "$measurement_name" WHERE ("application" =~ /^$application$/ '
+                 'AND "transaction" =~ /^$transaction$/) AND $timeFilter GROUP BY time($__interval)',
+    },
+    {
+        'refId': 'B',
+        'rawQuery': True,
+        'query': 'SELECT sum("count") FROM "${measurement_name}" WHERE "application" = \'${application}\' '
+                 'AND $timeFilter GROUP BY time([[__interval]]), "hostname"',
+    },
+]
+
+JMETER_VARIABLES = {
+    'measurement_name': 'jmeter',
+    'application': 'checkout',
+    'transaction': 'Create Order',
+    'data_source': 'influx-prod',
+}
+
+
+def legacy_substitute(queries, variables):
+    """The JSON string replacement used before the template engine"""
+    queries_str = json.dumps(queries)
+    for var_name, var_value in variables.items():
+        queries_str = queries_str.replace(f"${{{var_name}}}", var_value)
+        queries_str = queries_str.replace(f"${var_name}", var_value)
+        if var_value == "$__all":
+            queries_str = queries_str.replace(f"${{{var_name}}}", ".*")
+    return json.loads(queries_str)
+
+
+def engine(variables, definitions=None):
+    values = {name: value if isinstance(value, list) else [value] for name, value in variables.items()}
+    return TemplateEngine(values, definitions)
+
+
+@pytest.mark.parametrize('panels, variables', [
+    ([{'targets': JMETER_TARGETS, 'datasource': {'uid': '${data_source}'}}], JMETER_VARIABLES),
+    (build_dashboard(DashboardSpec())['dashboard']['panels'], {'transaction': 'Login', 'data_source': 'ds1'}),
+])
+def test_matches_legacy_substitution_for_single_values(panels, variables):
+    assert engine(variables).render(panels) == legacy_substitute(panels, variables)
+
+
+def test_variable_names_are_not_prefixes_of_longer_names():
+    variables = {'app': 'a1', 'application': 'checkout'}
+    query = 'app=$app application=$application ${app}/${application} [[app]]'
+    
+    assert engine(variables).render_text(query) == 'app=a1 application=checkout a1/checkout a1'
+    # The old replacement clobbered $application with the value of $app
+    assert legacy_substitute(query, variables) == 'app=a1 application=a1lication a1/checkout [[app]]'
+
+
+def test_unknown_variables_and_macros_are_left_alone():
+    text = 'time($__interval) AND $timeFilter AND $unknown AND ${other:csv}'
+    
+    assert engine({'host': 'a'}).render_text(text) == text
+
+
+def test_multi_value_formats():
+    templates = engine({'host': ['web-1', 'web.2']})
+    
+    assert templates.render_text('$host') == '(web-1|web\\.2)'
+    assert templates.render_text('${host:regex}') == '(web-1|web\\.2)'
+    assert templates.render_text('${host:pipe}') == 'web-1|web.2'
+    assert templates.render_text('${host:csv}') == 'web-1,web.2'
+    assert templates.render_text('${host:raw}') == 'web-1,web.2'
+    assert templates.render_text('${host:glob}') == '{web-1,web.2}'
+    assert templates.render_text('${host:sqlstring}') == "'web-1','web.2'"
+    assert templates.render_text('${host:json}') == '["web-1", "web.2"]'
+    assert templates.render_text('${host:queryparam}') == 'var-host=web-1&var-host=web.2'
+    assert templates.render_text('[[host:csv]]') == 'web-1,web.2'
+
+
+def test_single_value_formats():
+    templates = engine({'host': 'web.1'})
+    
+    assert templates.render_text('$host') == 'web.1'
+    assert templates.render_text('${host:regex}') == 'web\\.1'
+    assert templates.render_text('${host:pipe}') == 'web.1'
+    assert templates.render_text('${host.text}') == 'web.1'
+
+
+def test_bracket_syntax():
+    templates = engine({'host': 'web-1', 'dc': 'eu'})
+    
+    assert templates.render_text('[[host]]-[[dc]]') == 'web-1-eu'
+    assert templates.render_text('[[host:regex]]') == 'web-1'
+    assert templates.render_text('[[missing]]') == '[[missing]]'
+
+
+def test_multi_value_definition_escapes_a_single_value():
+    definitions = [{'name': 'host', 'multi': True}]
+    
+    assert engine({'host': 'web.1'}, definitions).render_text('/^$host$/') == '/^web\\.1$/'
+
+
+@pytest.mark.parametrize('definition, expected', [
+    ({'name': 'host', 'includeAll': True, 'allValue': 'web-.*'}, '/^web-.*$/'),
+    ({'name': 'host', 'includeAll': True, 'options': [
+        {'value': '$__all'}, {'value': 'web-1'}, {'value': 'web-2'},
+    ]}, '/^(web-1|web-2)$/'),
+    ({'name': 'host', 'includeAll': True}, '/^.*$/'),
+])
+def test_all_value(definition, expected):
+    templates = engine({'host': '$__all'}, [definition])
+    
+    assert templates.render_text('/^$host$/') == expected
+
+
+def test_all_values_with_format():
+    definition = {'name': 'host', 'options': [{'value': '$__all'}, {'value': 'a'}, {'value': 'b'}]}
+    templates = engine({'host': '$__all'}, [definition])
+    
+    assert templates.values('host') == ['a', 'b']
+    assert templates.render_text('${host:csv}') == 'a,b'
+    assert engine({'host': '$__all'}).values('host') is None
+
+
+def test_substituted_values_are_not_scanned_again():
+    templates = engine({'a': '$b', 'b': 'x'})
+    
+    assert templates.render_text('$a $b') == '$b x'
+
+
+def test_render_shares_strings_without_variables():
+    query = {'refId': 'A', 'query': 'SELECT 1', 'maxDataPoints': 100}
+    
+    rendered = engine({'host': 'a'}).render([query])[0]
+    assert rendered == query
+    assert rendered['query'] is query['query']
+
+
+def test_repeated_panel_gets_one_copy_per_value():
+    panels = [
+        {'id': 1, 'type': 'timeseries', 'title': 'CPU $host', 'repeat': 'host',
+         'targets': [{'refId': 'A', 'query': 'cpu{host="$host"}'}]},
+        {'id': 2, 'type': 'timeseries', 'title': 'Errors', 'targets': []},
+    ]
+    
+    expanded = engine({'host': ['web-1', 'web-2']}).expand_repeats(panels)
+    
+    assert [(panel['id'], panel['title']) for panel in expanded] == [(1, 'CPU web-1'), (3, 'CPU web-2'), (2, 'Errors')]
+    assert expanded[1]['targets'][0]['query'] == 'cpu{host="web-2"}'
+    assert expanded[1]['repeatPanelId'] == 1
+    assert expanded[1]['scopedVars'] == {'host': {'text': 'web-2', 'value': 'web-2'}}
+    assert 'repeatPanelId' not in expanded[0]
+
+
+def test_repeated_collapsed_row_copies_its_panels():
+    panels = [
+        {'id': 10, 'type': 'row', 'title': 'Host $host', 'repeat': 'host', 'collapsed': True, 'panels': [
+            {'id': 11, 'type': 'timeseries', 'title': 'Load $host', 'targets': []},
+        ]},
+    ]
+    
+    expanded = engine({'host': ['a', 'b']}).expand_repeats(panels)
+    
+    assert [row['title'] for row in expanded] == ['Host a', 'Host b']
+    assert [row['panels'][0]['title'] for row in expanded] == ['Load a', 'Load b']
+    ids = [expanded[0]['id'], expanded[0]['panels'][0]['id'], expanded[1]['id'], expanded[1]['panels'][0]['id']]
+    assert ids[:2] == [10, 11] and len(set(ids)) == 4
+
+
+def test_repeats_drop_saved_copies_and_keep_unknown_variables():
+    panels = [
+        {'id': 1, 'type': 'timeseries', 'title': '$host', 'repeat': 'host'},
+        {'id': 5, 'type': 'timeseries', 'title': 'old copy', 'repeatPanelId': 1},
+        {'id': 2, 'type': 'timeseries', 'title': '$zone', 'repeat': 'zone'},
+    ]
+    
+    expanded = engine({'host': ['a', 'b']}).expand_repeats(panels)
+    
+    assert [panel['title'] for panel in expanded] == ['a', 'b', '$zone']
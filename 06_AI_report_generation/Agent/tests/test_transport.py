@@ -0,0 +1,188 @@
+"""Retries, Retry-After, in-flight cap and bounded records against a fake rate-limiting server"""
+
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.clients import transport as transport_module
+from src.clients.transport import Transport, TransportConfig
+
+
+class ThrottlingServer(ThreadingHTTPServer):
+    """
+    Server answering each path with its planned (status, headers) responses
+    
+    Once a path's plan is used up it answers 200 "ok", after delay seconds.
+    The peak number of requests handled at once is tracked.
+    """
+    
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _Handler)
+        self.plans = {}
+        self.hits = {}
+        self.delay = 0.0
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+    
+    def url(self, path):
+        return f"http://127.0.0.1:{self.server_address[1]}{path}"
+    
+    def next_response(self, path):
+        with self.lock:
+            self.hits[path] = self.hits.get(path, 0) + 1
+            plan = self.plans.get(path, [])
+            return plan.pop(0) if plan else (200, {})
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    
+    def log_message(self, *args):
+        pass
+    
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+        try:
+            status, headers = server.next_response(self.path)
+            if status == 200 and server.delay:
+                time.sleep(server.delay)
+            body = b'ok' if status == 200 else b'slow down'
+            self.send_response(status)
+            for name, value in {'Content-Length': str(len(body)), **headers}.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+
+@pytest.fixture(scope='module')
+def throttling_server():
+    server = ThrottlingServer()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def server(throttling_server):
+    throttling_server.plans.clear()
+    throttling_server.hits.clear()
+    throttling_server.delay = 0.0
+    throttling_server.peak = 0
+    return throttling_server
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(transport_module.time, 'sleep', delays.append)
+    return delays
+
+
+def test_retries_use_full_jitter_backoff(server, sleeps):
+    server.plans['/flaky'] = [(503, {}), (429, {}), (503, {})]
+    transport = Transport(TransportConfig(backoff_base=0.5, backoff_max=1.5))
+    
+    response = transport.get(server.url('/flaky'))
+    
+    assert response.status_code == 200 and server.hits['/flaky'] == 4
+    assert len(sleeps) == 3
+    for attempt, delay in enumerate(sleeps):
+        assert 0 <= delay <= min(1.5, 0.5 * 2 ** attempt)
+    assert transport.summary()['retries'] == 3 and transport.summary()['requests'] == 1
+
+
+def test_backoff_delays_are_spread_over_the_whole_range():
+    transport = Transport(TransportConfig(backoff_base=1.0, backoff_max=30.0))
+    
+    delays = [transport._backoff(3) for _ in range(2000)]
+    
+    assert 0 <= min(delays) < 0.5 and 7.5 < max(delays) <= 8.0
+    assert 3.5 < sum(delays) / len(delays) < 4.5
+
+
+def test_retries_give_up_with_the_last_response(server, sleeps):
+    server.plans['/down'] = [(503, {})] * 5
+    transport = Transport(TransportConfig(max_retries=2))
+    
+    response = transport.get(server.url('/down'))
+    
+    assert response.status_code == 503 and server.hits['/down'] == 3
+    assert [(record.status, record.retries) for record in transport.records] == [(503, 2)]
+
+
+def http_date(seconds_from_now):
+    return formatdate(time.time() + seconds_from_now, usegmt=True)
+
+
+@pytest.mark.parametrize('retry_after, expected', [
+    (lambda: '2', 2.0),
+    (lambda: '0.25', 0.25),
+    (lambda: http_date(10), 10.0),
+    # Dates in the past and far future are clamped to [0, backoff_max]
+    (lambda: http_date(-60), 0.0),
+    (lambda: http_date(3600), 30.0),
+    (lambda: '3600', 30.0),
+], ids=['seconds', 'fraction', 'date', 'past date', 'far date', 'long'])
+def test_retry_after_is_honored(server, sleeps, retry_after, expected):
+    server.plans['/limited'] = [(429, {'Retry-After': retry_after()})]
+    transport = Transport(TransportConfig(backoff_max=30.0))
+    
+    assert transport.get(server.url('/limited')).status_code == 200
+    
+    [delay] = sleeps
+    assert delay == pytest.approx(expected, abs=1.5)
+
+
+def test_invalid_retry_after_falls_back_to_backoff(server, sleeps):
+    server.plans['/limited'] = [(503, {'Retry-After': 'soon'})]
+    transport = Transport(TransportConfig(backoff_base=0.5))
+    
+    assert transport.get(server.url('/limited')).status_code == 200
+    
+    [delay] = sleeps
+    assert 0 <= delay <= 0.5
+
+
+@pytest.mark.parametrize('streamed', [False, True])
+def test_max_in_flight_caps_concurrent_requests(server, streamed):
+    server.delay = 0.05
+    transport = Transport(TransportConfig(max_in_flight=2, pool_size=8))
+    
+    def fetch(index):
+        if not streamed:
+            return transport.get(server.url(f'/item/{index}')).content
+        with transport.stream('GET', server.url(f'/item/{index}')) as response:
+            return response.raw.read()
+    
+    threads = [threading.Thread(target=fetch, args=(index,)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert server.peak == 2
+    assert transport.summary()['requests'] == 8
+
+
+def test_records_are_bounded_and_totals_cover_every_request(server):
+    transport = Transport(TransportConfig(record_history=5))
+    
+    for index in range(12):
+        transport.get(server.url(f'/item/{index}'))
+    
+    summary = transport.summary()
+    assert len(transport.records) == 5
+    assert [record.path for record in transport.records] == [f'/item/{index}' for index in range(7, 12)]
+    assert summary['requests'] == 12 and summary['bytes'] == 12 * len(b'ok')
+    assert summary['max_ms'] >= summary['p95_ms'] >= summary['p50_ms'] > 0